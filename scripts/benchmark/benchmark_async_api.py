@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Load-test the sync and async (DB_ASYNC=true) analytics and video routes.
+
+This script:
+1. Creates a fresh schema (local Postgres by --url, or a temporary SQLite file)
+2. Loads synthetic snapshots with bulk_save_analytics (default: 2,000 videos x 5 days)
+3. Builds two in-process apps, one with videos/analytics routes, one with
+   videos_async/analytics_async, and drives them through ASGI with no network
+   or HTTP client in between
+4. For each concurrency level, fires a mix of GET /analytics?account_id=...,
+   GET /analytics/video/{id} and GET /videos/{id} and reports requests/sec
+   and p50/p95/p99 latency
+5. On PostgreSQL, repeats with a route waiting --slow-query-ms in pg_sleep(),
+   standing in for a slow aggregation or a remote database
+
+Sync routes run in Starlette's threadpool (--threads); async routes wait on
+the database without holding a thread. Both engines use the same pool
+(--pool-size + 10 overflow). A sync request keeps its connection until
+get_db() closes the session after the response was serialized, and that
+serialization needs a thread again: with fewer than two pooled connections
+per thread, threads blocked on pool checkout can starve the requests that
+would return connections, and requests fail with pool timeouts
+(--pool-timeout; they are counted as errors).
+
+Usage:
+    python scripts/benchmark/benchmark_async_api.py \\
+        --url postgresql://postgres@localhost:5432/youtube_analytics_bench
+    python scripts/benchmark/benchmark_async_api.py --concurrency 50 200 800 --requests 4000
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from statistics import quantiles
+from typing import Callable, Dict, List, Tuple
+
+from anyio import to_thread
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+# Add project root to path (2 levels up from scripts/benchmark/)
+project_root = Path(__file__).parents[2]
+sys.path.insert(0, str(project_root))
+
+from benchmark_bulk_save import make_record
+from src.api.dependencies import get_async_db, get_db
+from src.api.routes import analytics, analytics_async, videos, videos_async
+from src.database.config import DatabaseConfig
+from src.database.connection import DatabaseConnection
+from src.database.writers import ScraperDatabaseWriter
+
+ACCOUNT_NAME = 'benchmark'
+
+
+def load(connection: DatabaseConnection, videos_count: int, days: int) -> Tuple[int, List[str]]:
+    """Drop and recreate all tables, then save `days` snapshots of each video."""
+    connection.drop_tables()
+    connection.create_tables()
+    writer = ScraperDatabaseWriter(connection)
+    account_id = writer.ensure_account(ACCOUNT_NAME).id
+    base = datetime(2025, 1, 1)
+    video_ids = []
+    for day in range(days):
+        records = [make_record(i, base + timedelta(days=day)) for i in range(videos_count)]
+        video_ids = [record['video_id'] for record in records]
+        for start in range(0, len(records), 1000):
+            writer.bulk_save_analytics(records[start:start + 1000], account_name=ACCOUNT_NAME)
+        print(f"  ✓ Day {day + 1}/{days}: {videos_count:,} snapshots", end='\r')
+    print()
+    return account_id, video_ids
+
+
+def build_app(connection: DatabaseConnection, use_async: bool, slow_query_ms: int) -> FastAPI:
+    """App with the sync or async video/analytics routes bound to `connection`."""
+    app = FastAPI()
+
+    if use_async:
+        async def bench_db():
+            session = connection.get_async_session()
+            try:
+                yield session
+            finally:
+                await session.close()
+
+        app.include_router(videos_async.router)
+        app.include_router(analytics_async.router)
+        app.dependency_overrides[get_async_db] = bench_db
+
+        @app.get("/bench/slow")
+        async def slow(db: AsyncSession = Depends(get_async_db)):
+            await db.execute(text('SELECT pg_sleep(:seconds)'), {'seconds': slow_query_ms / 1000})
+            return {}
+    else:
+        def bench_db():
+            session = connection.get_session()
+            try:
+                yield session
+            finally:
+                session.close()
+
+        app.include_router(videos.router)
+        app.include_router(analytics.router)
+        app.dependency_overrides[get_db] = bench_db
+
+        @app.get("/bench/slow")
+        def slow(db: Session = Depends(get_db)):
+            db.execute(text('SELECT pg_sleep(:seconds)'), {'seconds': slow_query_ms / 1000})
+            return {}
+
+    return app
+
+
+async def request(app: FastAPI, path: str, query: str = '') -> int:
+    """Send one GET through the ASGI interface; return the status code."""
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': query.encode(),
+        'root_path': '', 'headers': [(b'host', b'benchmark')], 'client': ('127.0.0.1', 0),
+        'server': ('benchmark', 80),
+    }
+    response = {}
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+
+    try:
+        await app(scope, receive, send)
+    except Exception:
+        return 500  # e.g. pool checkout timeout (ServerErrorMiddleware re-raises)
+    return response['status']
+
+
+async def run_load(app: FastAPI, make_request: Callable[[int], Tuple[str, str]], total: int,
+                   concurrency: int) -> Dict[str, float]:
+    """Run `total` requests with `concurrency` in flight; return throughput and latency percentiles."""
+    latencies, failures = [], 0
+    next_request = iter(range(total))
+
+    async def worker():
+        nonlocal failures
+        for number in next_request:
+            path, query = make_request(number)
+            started = time.perf_counter()
+            status = await request(app, path, query)
+            latencies.append((time.perf_counter() - started) * 1000)
+            failures += status != 200
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    p50, p95, p99 = (quantiles(latencies, n=100)[i] for i in (49, 94, 98))
+    return {'rps': total / elapsed, 'p50': p50, 'p95': p95, 'p99': p99, 'failures': failures}
+
+
+async def benchmark(args, connection: DatabaseConnection, account_id: int, video_ids: List[str]) -> None:
+    to_thread.current_default_thread_limiter().total_tokens = args.threads
+    apps = {
+        'sync': build_app(connection, False, args.slow_query_ms),
+        'async': build_app(connection, True, args.slow_query_ms),
+    }
+
+    def mixed(number: int) -> Tuple[str, str]:
+        video_id = random.Random(number).choice(video_ids)
+        return [
+            ('/analytics', f'account_id={account_id}&limit=20'),
+            (f'/analytics/video/{video_id}', ''),
+            (f'/videos/{video_id}', ''),
+        ][number % 3]
+
+    scenarios = [('mixed reads', mixed)]
+    if not connection.config.is_sqlite and args.slow_query_ms:
+        scenarios.append((f'slow query ({args.slow_query_ms} ms)', lambda number: ('/bench/slow', '')))
+
+    for label, make_request in scenarios:
+        print(f"\n{label}")
+        print(f"  {'mode':<6} {'conc.':>6} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+        for concurrency in args.concurrency:
+            for mode, app in apps.items():
+                # Warm up connections and caches
+                await run_load(app, make_request, min(args.requests, concurrency * 2), concurrency)
+                result = await run_load(app, make_request, args.requests, concurrency)
+                print(
+                    f"  {mode:<6} {concurrency:>6} {result['rps']:>9.0f} {result['p50']:>9.1f} "
+                    f"{result['p95']:>9.1f} {result['p99']:>9.1f} {result['failures']:>7}"
+                )
+
+    await connection.close_async()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test sync vs async API routes")
+    parser.add_argument('--videos', type=int, default=2_000, help='Number of synthetic videos')
+    parser.add_argument('--days', type=int, default=5, help='Snapshots per video')
+    parser.add_argument('--requests', type=int, default=3_000, help='Requests per run')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[10, 100, 500],
+                        help='Requests in flight')
+    parser.add_argument('--threads', type=int, default=20, help='Threadpool size for sync routes')
+    parser.add_argument('--pool-size', type=int, default=30, help='Connection pool size of both engines')
+    parser.add_argument('--pool-timeout', type=int, default=5,
+                        help='Seconds a request waits for a pooled connection before failing')
+    parser.add_argument('--slow-query-ms', type=int, default=20,
+                        help='pg_sleep() of the slow query scenario (PostgreSQL, 0 to skip)')
+    parser.add_argument('--url', help='SQLAlchemy URL (default: temporary SQLite file). '
+                                      'WARNING: all tables in this database are dropped')
+    args = parser.parse_args()
+
+    url = args.url or f"sqlite:///{Path(tempfile.mkdtemp()) / 'bench.db'}"
+    connection = DatabaseConnection(DatabaseConfig(url=url, pool_size=args.pool_size, pool_timeout=args.pool_timeout))
+
+    print("=" * 70)
+    print("⚡ Sync vs async API benchmark")
+    print("=" * 70)
+    print(f"Database:   {connection.engine.url.render_as_string(hide_password=True)}")
+    print(f"Async URL:  {connection.async_engine.url.render_as_string(hide_password=True)}")
+    print(f"Snapshots:  {args.videos:,} videos x {args.days} days")
+    print(f"Pool:       {args.pool_size} + {connection.config.max_overflow} overflow, {args.threads} threads")
+    if 2 * args.threads > args.pool_size + connection.config.max_overflow:
+        print("⚠ Less than two pooled connections per thread: sync runs may stall on pool checkout")
+
+    account_id, video_ids = load(connection, args.videos, args.days)
+    try:
+        asyncio.run(benchmark(args, connection, account_id, video_ids))
+    finally:
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Benchmark analytics write paths: AnalyticsIngestor, bulk_save_analytics and save_analytics.
+
+This script:
+1. Creates a fresh schema (SQLite file by default, or any --url such as local Postgres)
+2. Generates synthetic scraper results (default: 10,000 videos)
+3. Loads them with AnalyticsIngestor (COPY on PostgreSQL) and reports rows/sec
+4. Saves them with bulk_save_analytics in batches and reports rows/sec
+5. Saves a sample with save_analytics one record at a time for comparison
+
+Usage:
+    python scripts/benchmark/benchmark_bulk_save.py
+    python scripts/benchmark/benchmark_bulk_save.py --records 10000 --batch-size 500 \\
+        --url postgresql://postgres@localhost:5432/youtube_analytics_bench
+"""
+
+import argparse
+import random
+import string
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List
+
+# Add project root to path (2 levels up from scripts/benchmark/)
+project_root = Path(__file__).parents[2]
+sys.path.insert(0, str(project_root))
+
+from src.database.config import DatabaseConfig
+from src.database.connection import DatabaseConnection
+from src.database.ingest import AnalyticsIngestor
+from src.database.models import Account, VideoAnalytics, TrafficSource
+from src.database.writers import ScraperDatabaseWriter
+
+TRAFFIC_SOURCES = [
+    'Browse features', 'Suggested videos', 'YouTube search', 'External',
+    'Channel pages', 'Direct or unknown', 'Playlists', 'Notifications',
+]
+
+
+def make_record(index: int, crawl_date: datetime) -> Dict[str, Any]:
+    """Build one synthetic result shaped like get_video_analytics() output."""
+    rng = random.Random(index)
+    video_id = ''.join(rng.choices(string.ascii_letters + string.digits + '-_', k=11))
+    shares = [rng.uniform(1, 40) for _ in TRAFFIC_SOURCES]
+    total = sum(shares)
+    return {
+        'video_id': video_id,
+        'top_metrics': {
+            'Impressions': str(rng.randint(1_000, 2_000_000)),
+            'Impressions click-through rate': f"{rng.uniform(1, 15):.1f}%",
+            'Views': str(rng.randint(100, 500_000)),
+            'Unique viewers': str(rng.randint(50, 300_000)),
+        },
+        'how_viewers_find': {
+            name: f"{share * 100 / total:.1f}%" for name, share in zip(TRAFFIC_SOURCES, shares)
+        },
+        'impressions_data': {
+            'Views from impressions': str(rng.randint(50, 200_000)),
+            'YouTube recommending your content': f"{rng.uniform(10, 90):.1f}%",
+            'Click-through rate (from impressions)': f"{rng.uniform(1, 15):.1f}%",
+            'Average view duration (from impressions)': f"{rng.randint(0, 9)}:{rng.randint(0, 59):02d}",
+            'Watch time from impressions (hours)': f"{rng.uniform(1, 5000):.1f}",
+        },
+        'publish_start_date': (crawl_date - timedelta(days=rng.randint(1, 700))).strftime('%Y-%m-%d'),
+        'crawl_datetime': crawl_date.strftime('%d/%m/%Y'),
+        'page_text': 'Analytics ' * 50,
+    }
+
+
+def reset_database(connection: DatabaseConnection, account_name: str) -> None:
+    """Drop and recreate all tables, then create the benchmark account."""
+    connection.drop_tables()
+    connection.create_tables()
+    with connection.session_scope() as session:
+        session.add(Account(name=account_name))
+
+
+def count_rows(connection: DatabaseConnection) -> Dict[str, int]:
+    with connection.session_scope() as session:
+        return {
+            'video_analytics': session.query(VideoAnalytics).count(),
+            'traffic_sources': session.query(TrafficSource).count(),
+        }
+
+
+def run_bulk(writer: ScraperDatabaseWriter, records: List[Dict[str, Any]], account_name: str,
+             channel_url: str, batch_size: int) -> float:
+    started = time.perf_counter()
+    for start in range(0, len(records), batch_size):
+        writer.bulk_save_analytics(records[start:start + batch_size], account_name=account_name,
+                                   channel_url=channel_url)
+    return time.perf_counter() - started
+
+
+def run_per_record(writer: ScraperDatabaseWriter, records: List[Dict[str, Any]], account_name: str,
+                   channel_url: str) -> float:
+    started = time.perf_counter()
+    for record in records:
+        writer.save_analytics(video_id=record['video_id'], account_name=account_name,
+                              analytics_data=record, channel_url=channel_url)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark analytics write paths")
+    parser.add_argument('--records', type=int, default=10_000, help='Number of synthetic records')
+    parser.add_argument('--batch-size', type=int, default=500, help='Records per bulk_save_analytics call')
+    parser.add_argument('--ingest-batch-size', type=int, default=5000, help='Records per ingest transaction')
+    parser.add_argument('--compare', type=int, default=1_000,
+                        help='Records to save one at a time for comparison (0 to skip)')
+    parser.add_argument('--url', help='SQLAlchemy URL (default: temporary SQLite file). '
+                                      'WARNING: all tables in this database are dropped')
+    args = parser.parse_args()
+
+    url = args.url or f"sqlite:///{Path(tempfile.mkdtemp()) / 'bench.db'}"
+    connection = DatabaseConnection(DatabaseConfig(url=url))
+    writer = ScraperDatabaseWriter(connection)
+    account_name = 'benchmark'
+    channel_url = 'https://www.youtube.com/@benchmark'
+    crawl_date = datetime(2025, 1, 1)
+
+    print("=" * 70)
+    print("📊 Analytics write path benchmark")
+    print("=" * 70)
+    print(f"Database:   {connection.engine.url.render_as_string(hide_password=True)}")
+    print(f"Records:    {args.records:,} (batch size {args.batch_size})")
+
+    records = [make_record(i, crawl_date) for i in range(args.records)]
+
+    reset_database(connection, account_name)
+    report = AnalyticsIngestor(connection, batch_size=args.ingest_batch_size).ingest(
+        records, account_name=account_name, channel_url=channel_url
+    )
+    print(f"\n✓ Ingest path ({report['method']}): {report['seconds']:6.2f}s  "
+          f"{report['rows_per_second']:10,.0f} records/s  "
+          f"({report['analytics_inserted']:,} analytics, {report['traffic_sources_inserted']:,} traffic rows)")
+
+    reset_database(connection, account_name)
+    bulk_seconds = run_bulk(writer, records, account_name, channel_url, args.batch_size)
+    rows = count_rows(connection)
+    print(f"✓ Bulk path:       {bulk_seconds:8.2f}s  "
+          f"{args.records / bulk_seconds:10,.0f} records/s  "
+          f"({rows['video_analytics']:,} analytics, {rows['traffic_sources']:,} traffic rows)")
+
+    # Re-saving the same batch must not create duplicates
+    started = time.perf_counter()
+    writer.bulk_save_analytics(records[:args.batch_size], account_name=account_name, channel_url=channel_url)
+    print(f"✓ Re-save of {min(args.batch_size, args.records):,} existing records: "
+          f"{time.perf_counter() - started:.2f}s, analytics rows now {count_rows(connection)['video_analytics']:,}")
+
+    if args.compare:
+        sample = records[:args.compare]
+        reset_database(connection, account_name)
+        loop_seconds = run_per_record(writer, sample, account_name, channel_url)
+        print(f"✓ Per-record path: {loop_seconds:8.2f}s  "
+              f"{len(sample) / loop_seconds:10,.0f} records/s  ({len(sample):,} records)")
+        speedup = (args.records / bulk_seconds) / (len(sample) / loop_seconds)
+        print(f"\n⚡ Speedup: {speedup:.1f}x")
+
+    connection.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Compare the original per-column indexes with the covering/BRIN index layout.
+
+This script:
+1. Seeds a synthetic dataset like benchmark_query_plans.py (SQLite file by
+   default, or any --url such as local Postgres), one day of every account
+   at a time as the daily scrape writes it (--by-account loads all days of
+   an account at once, which leaves rows out of scraped_at order and shows
+   what BRIN loses then)
+2. Restores the original indexes (restore_legacy_indexes) and runs the hot
+   path cases of benchmark_query_plans.py, plus a one-day scan across all
+   accounts
+3. Applies the new layout (apply_index_layout) and runs the same cases
+4. Prints p50/p95 latency, database execution time and shared buffers
+   touched (PostgreSQL, from EXPLAIN (ANALYZE, BUFFERS)) per case and
+   layout, and the index sizes of both layouts
+
+Usage:
+    python scripts/benchmark/benchmark_indexes.py
+    python scripts/benchmark/benchmark_indexes.py --accounts 20 --videos 1000 \\
+        --url postgresql://postgres@localhost:5432/youtube_analytics_bench
+"""
+
+import argparse
+import sys
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+# Add project root to path (2 levels up from scripts/benchmark/)
+project_root = Path(__file__).parents[2]
+sys.path.insert(0, str(project_root))
+
+from benchmark_query_plans import BASE_DATE, build_cases, explain_case, seed, time_case
+from src.database.config import DatabaseConfig
+from src.database.connection import DatabaseConnection
+from src.database.indexes import apply_index_layout, index_sizes, restore_legacy_indexes
+from src.database.models import VideoAnalytics
+
+LAYOUTS = ('legacy', 'covering/BRIN')
+
+
+def extra_cases(snapshots: int) -> Dict[str, Callable[[Session, int], Any]]:
+    """Access pattern the layout trades off: cross-account time ranges."""
+    def day_scan(session: Session, number: int):
+        # What compaction, export and pruning do: one day of snapshots of every account
+        day = BASE_DATE + timedelta(days=number % snapshots)
+        return session.execute(
+            select(func.count(), func.sum(VideoAnalytics.views))
+            .where(VideoAnalytics.scraped_at >= day, VideoAnalytics.scraped_at < day + timedelta(days=1))
+        ).one()
+
+    return {'day_scan': day_scan}
+
+
+def database_cost(statements: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Execution time (ms) and shared buffers of a case's statements, weighted by executions."""
+    milliseconds, buffers = 0.0, 0
+    for statement in statements:
+        plan = statement['plan']
+        if not isinstance(plan, dict):
+            return {}
+        node = plan['Plan']
+        milliseconds += plan.get('Execution Time', 0.0) * statement['executions']
+        buffers += (node.get('Shared Hit Blocks', 0) + node.get('Shared Read Blocks', 0)) * statement['executions']
+    return {'ms': milliseconds, 'buffers': buffers}
+
+
+def run_layout(connection: DatabaseConnection, cases: Dict[str, Callable], repeat: int, warmup: int,
+               first_number: int) -> Dict[str, Dict[str, Any]]:
+    results = {}
+    for position, (name, call) in enumerate(cases.items()):
+        offset = first_number + position * 100_000
+        latency = time_case(connection, call, repeat, warmup, offset)
+        statements = explain_case(connection, call, offset + warmup + repeat)
+        results[name] = {**latency, **database_cost(statements)}
+        print(f"  ✓ {name:<26} p50 {latency['p50']:8.2f} ms", end='\r')
+    print(' ' * 60, end='\r')
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the legacy and covering/BRIN index layouts")
+    parser.add_argument('--accounts', type=int, default=10, help='Number of synthetic accounts')
+    parser.add_argument('--channels', type=int, default=2, help='Channels per account')
+    parser.add_argument('--videos', type=int, default=500, help='Videos per channel')
+    parser.add_argument('--snapshots', type=int, default=8, help='Daily snapshots per video')
+    parser.add_argument('--batch-size', type=int, default=5000, help='Records per ingest transaction while seeding')
+    parser.add_argument('--by-account', action='store_true', help='Seed all days of one account at a time')
+    parser.add_argument('--repeat', type=int, default=50, help='Timed runs per case')
+    parser.add_argument('--warmup', type=int, default=5, help='Untimed runs per case before timing')
+    parser.add_argument('--url', help='SQLAlchemy URL (default: temporary SQLite file). '
+                                      'WARNING: all tables in this database are dropped')
+    args = parser.parse_args()
+
+    url = args.url or f"sqlite:///{Path(tempfile.mkdtemp()) / 'bench.db'}"
+    connection = DatabaseConnection(DatabaseConfig(url=url, pool_profile='batch'))
+
+    print("=" * 70)
+    print("🗂  Index layout benchmark")
+    print("=" * 70)
+    print(f"Database:   {connection.engine.url.render_as_string(hide_password=True)}")
+    print(f"Dataset:    {args.accounts} accounts x {args.channels} channels x {args.videos:,} videos "
+          f"x {args.snapshots} snapshots")
+
+    dataset = seed(connection, args.accounts, args.channels, args.videos, args.snapshots, args.batch_size,
+                   by_day=not args.by_account)
+    print(f"✓ Seeded in {dataset['seconds']:.1f}s")
+    cases = {**build_cases(connection, dataset, args.snapshots), **extra_cases(args.snapshots)}
+
+    results, sizes = {}, {}
+    for number, layout in enumerate(LAYOUTS):
+        if layout == 'legacy':
+            restore_legacy_indexes(connection, concurrently=False)
+        else:
+            apply_index_layout(connection, concurrently=False)
+        sizes[layout] = index_sizes(connection)
+        # Writing cases get fresh iteration numbers per layout, so their data stays new
+        results[layout] = run_layout(connection, cases, args.repeat, args.warmup, number * 1_000_000)
+
+    old, new = (results[layout] for layout in LAYOUTS)
+    print(f"\n  {'case':<26} {'p50 ms':>17} {'p95 ms':>17} {'db ms':>17} {'buffers':>19}")
+    print(f"  {'':<26} {'legacy':>8} {'new':>8} {'legacy':>8} {'new':>8} {'legacy':>8} {'new':>8} "
+          f"{'legacy':>9} {'new':>9}")
+    for name in cases:
+        before, after = old[name], new[name]
+        db_columns = (f"{before['ms']:>8.2f} {after['ms']:>8.2f} {before['buffers']:>9,} {after['buffers']:>9,}"
+                      if 'ms' in before and 'ms' in after else f"{'-':>8} {'-':>8} {'-':>9} {'-':>9}")
+        print(f"  {name:<26} {before['p50']:>8.2f} {after['p50']:>8.2f} "
+              f"{before['p95']:>8.2f} {after['p95']:>8.2f} {db_columns}")
+
+    if sizes['legacy']:
+        print("\n📦 Index sizes")
+        for layout in LAYOUTS:
+            print(f"  {layout}: {sum(sizes[layout].values()) / 1024 / 1024:.1f} MB")
+            for name, size in sizes[layout].items():
+                print(f"    {name:<48} {size / 1024:>10,.0f} kB")
+
+    connection.close()
+
+
+if __name__ == '__main__':
+    main()
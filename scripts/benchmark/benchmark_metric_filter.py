@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Benchmark ad-hoc metric filters on video_analytics_raw.
+
+This script:
+1. Creates a fresh schema (SQLite file by default, or any --url such as local Postgres)
+2. Loads synthetic snapshots (default: 1,000,000) with raw payloads and parsed metric_values
+3. Times `metric >= value` filters:
+   - parsing the stored JSON text on every row (PostgreSQL, how json columns behave)
+   - metric_values without indexes (sequential scan)
+   - metric_values with the expression indexes (what GET /analytics?metric=...&gte=... runs)
+4. Prints the query plan of the indexed query
+
+Usage:
+    python scripts/benchmark/benchmark_metric_filter.py --rows 100000
+    python scripts/benchmark/benchmark_metric_filter.py \\
+        --url postgresql://postgres@localhost:5432/youtube_analytics_bench
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List
+
+from sqlalchemy import insert, select, text
+
+# Add project root to path (2 levels up from scripts/benchmark/)
+project_root = Path(__file__).parents[2]
+sys.path.insert(0, str(project_root))
+
+from src.database.config import DatabaseConfig
+from src.database.connection import DatabaseConnection
+from src.database.models import (
+    Account, Video, VideoAnalytics, VideoAnalyticsRaw, has_metric, metric_index_name, metric_value,
+)
+from src.database.raw_storage import ensure_metric_indexes
+
+VIDEOS = 10_000
+
+
+def make_rows(start: int, count: int, account_id: int, base: datetime) -> List[Dict[str, Any]]:
+    """Build analytics and raw rows for snapshot numbers [start, start + count)."""
+    analytics, raw = [], []
+    for number in range(start, start + count):
+        rng = random.Random(number)
+        impressions = rng.randint(1_000, 2_000_000)
+        views = rng.randint(100, 500_000)
+        ctr = round(rng.uniform(1, 15), 1)
+        analytics.append({
+            'id': number + 1,
+            'video_id': f"v{number % VIDEOS:010d}",
+            'account_id': account_id,
+            'impressions': impressions,
+            'views': views,
+            'ctr_percentage': ctr,
+            'scraped_at': base + timedelta(days=number // VIDEOS, seconds=number % VIDEOS),
+        })
+        raw.append({
+            'analytics_id': number + 1,
+            'top_metrics': {
+                'Impressions': f"{impressions:,}",
+                'Views': f"{views:,}",
+                'Impressions click-through rate': f"{ctr}%",
+            },
+            'metric_values': {'Impressions': impressions, 'Views': views, 'Impressions click-through rate': ctr},
+        })
+    return analytics, raw
+
+
+def load(connection: DatabaseConnection, rows: int, batch_size: int) -> float:
+    """Drop and recreate all tables, then insert the synthetic snapshots."""
+    connection.drop_tables()
+    connection.create_tables()
+    started = time.perf_counter()
+    with connection.engine.begin() as conn:
+        account_id = conn.execute(insert(Account.__table__).returning(Account.id), {'name': 'benchmark'}).scalar()
+        conn.execute(insert(Video.__table__), [{'video_id': f"v{i:010d}"} for i in range(VIDEOS)])
+    base = datetime(2024, 1, 1)
+    for start in range(0, rows, batch_size):
+        analytics, raw = make_rows(start, min(batch_size, rows - start), account_id, base)
+        with connection.engine.begin() as conn:
+            conn.execute(insert(VideoAnalytics.__table__), analytics)
+            conn.execute(insert(VideoAnalyticsRaw.__table__), raw)
+        print(f"  ✓ Loaded {start + len(analytics):,} / {rows:,}", end='\r')
+    print()
+    with connection.engine.begin() as conn:
+        conn.execute(text('ANALYZE'))
+    return time.perf_counter() - started
+
+
+def time_query(connection: DatabaseConnection, query, repeat: int) -> Dict[str, float]:
+    """Run a query `repeat` times; return best time in ms and row count."""
+    best, count = None, 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        with connection.engine.connect() as conn:
+            count = len(conn.execute(query).all())
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return {'ms': best, 'rows': count}
+
+
+def metric_query(condition):
+    return (
+        select(VideoAnalytics.id, VideoAnalytics.views)
+        .join(VideoAnalyticsRaw, VideoAnalyticsRaw.analytics_id == VideoAnalytics.id)
+        .where(condition)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark metric filters on video_analytics_raw")
+    parser.add_argument('--rows', type=int, default=1_000_000, help='Number of synthetic snapshots')
+    parser.add_argument('--batch-size', type=int, default=20_000, help='Rows per insert transaction')
+    parser.add_argument('--metric', default='Impressions', help='Metric to filter on')
+    parser.add_argument('--gte', type=float, default=1_998_000, help='Lower bound of the filter')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per query (best time is reported)')
+    parser.add_argument('--url', help='SQLAlchemy URL (default: temporary SQLite file). '
+                                      'WARNING: all tables in this database are dropped')
+    args = parser.parse_args()
+
+    url = args.url or f"sqlite:///{Path(tempfile.mkdtemp()) / 'bench.db'}"
+    connection = DatabaseConnection(DatabaseConfig(url=url))
+    is_sqlite = connection.config.is_sqlite
+
+    print("=" * 70)
+    print("🔎 Metric filter benchmark")
+    print("=" * 70)
+    print(f"Database:   {connection.engine.url.render_as_string(hide_password=True)}")
+    print(f"Rows:       {args.rows:,}")
+    print(f"Filter:     {args.metric} >= {args.gte:,.0f}")
+
+    seconds = load(connection, args.rows, args.batch_size)
+    print(f"✓ Loaded in {seconds:.1f}s")
+
+    value = metric_value(VideoAnalyticsRaw.metric_values, args.metric)
+    indexed = metric_query(has_metric(VideoAnalyticsRaw.metric_values, args.metric) & (value >= args.gte))
+    results = {}
+
+    if not is_sqlite:
+        # What a json column costs: the document text is parsed again for every row
+        reparse_sql = text("""
+            SELECT va.id, va.views FROM video_analytics va
+            JOIN video_analytics_raw r ON r.analytics_id = va.id
+            WHERE CAST(REPLACE(REPLACE(CAST(CAST(r.top_metrics AS TEXT) AS JSON) ->> :metric, ',', ''), '%', '')
+                       AS FLOAT) >= :gte
+        """).bindparams(metric=args.metric, gte=args.gte)
+        results['json text, parsed per row'] = time_query(connection, reparse_sql, args.repeat)
+
+    index_name = metric_index_name(args.metric)
+    with connection.engine.begin() as conn:
+        conn.execute(text(f'DROP INDEX IF EXISTS {index_name}'))
+        if not is_sqlite:
+            conn.execute(text('DROP INDEX IF EXISTS idx_video_analytics_raw_metric_values'))
+    results['metric_values, no index'] = time_query(connection, indexed, args.repeat)
+
+    ensure_metric_indexes(connection)
+    with connection.engine.begin() as conn:
+        conn.execute(text('ANALYZE'))
+    results['metric_values, indexed'] = time_query(connection, indexed, args.repeat)
+
+    print()
+    for label, result in results.items():
+        print(f"✓ {label:<28} {result['ms']:10.1f} ms  ({result['rows']:,} rows)")
+    baseline = next(iter(results.values()))['ms']
+    print(f"\n⚡ Speedup: {baseline / results['metric_values, indexed']['ms']:.1f}x")
+
+    explain = 'EXPLAIN QUERY PLAN ' if is_sqlite else 'EXPLAIN '
+    sql = str(indexed.compile(connection.engine, compile_kwargs={'literal_binds': True}))
+    with connection.engine.connect() as conn:
+        print("\nPlan:")
+        for row in conn.execute(text(explain + sql)):
+            print(f"  {row[-1]}")
+
+    connection.close()
+
+
+if __name__ == '__main__':
+    main()
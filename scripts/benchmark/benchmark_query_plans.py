@@ -0,0 +1,485 @@
+#!/usr/bin/env python3
+"""
+Query-plan regression suite for the hot database paths.
+
+This script:
+1. Creates a fresh schema (SQLite file by default, or any --url such as local Postgres)
+2. Seeds a synthetic dataset with AnalyticsIngestor: --accounts accounts with
+   --channels channels each, --videos videos per channel and --snapshots
+   daily snapshots per video
+3. Calls the real code behind GET /analytics, GET /analytics/video/{id},
+   GET /analytics/account/{id}/stats, POST /videos/bulk and
+   ScraperDatabaseWriter.save_analytics --repeat times each and reports
+   p50/p95/p99 latency
+4. Runs each case once more with every SQL statement it sends explained on
+   the fly: EXPLAIN (ANALYZE, BUFFERS) inside a savepoint on PostgreSQL,
+   EXPLAIN QUERY PLAN on SQLite
+5. Fails (exit code 1) when a plan scans a table with more than
+   --seq-scan-min-rows rows sequentially, or when a case's p95 latency
+   exceeds its threshold (DEFAULT_MAX_P95_MS, --max-p95 CASE=MS)
+
+Usage:
+    python scripts/benchmark/benchmark_query_plans.py
+    python scripts/benchmark/benchmark_query_plans.py --plans \\
+        --url postgresql://postgres@localhost:5432/youtube_analytics_bench
+    python scripts/benchmark/benchmark_query_plans.py --accounts 20 --videos 5000 \\
+        --max-p95 list_analytics=20 --report plans.json
+
+The route functions are called directly with a session of their own (what
+get_db() hands them), so the statements are exactly those the API sends,
+without HTTP or serialization overhead in the timings.
+"""
+
+import argparse
+import json
+import math
+import re
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List
+
+from sqlalchemy import event, func, select, text
+from sqlalchemy.orm import Session
+
+# Add project root to path (2 levels up from scripts/benchmark/)
+project_root = Path(__file__).parents[2]
+sys.path.insert(0, str(project_root))
+
+from benchmark_bulk_save import make_record
+from src.api.routes import analytics, videos
+from src.api.schemas import BulkVideoCreate
+from src.database.config import DatabaseConfig
+from src.database.connection import DatabaseConnection
+from src.database.ingest import AnalyticsIngestor
+from src.database.models import Account, Base, Channel
+from src.database.writers import ScraperDatabaseWriter
+
+BASE_DATE = datetime(2025, 1, 1)
+
+# p95 latency budget per case in ms (override with --max-p95 CASE=MS)
+DEFAULT_MAX_P95_MS = {
+    'list_analytics': 250,
+    'list_analytics_all': 250,
+    'list_analytics_range': 250,
+    'get_video_analytics': 50,
+    'get_account_stats': 50,
+    'get_account_stats_range': 100,
+    'bulk_create_videos': 250,
+    'save_analytics': 50,
+}
+
+EXPLAINABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH')
+
+
+# ==================== Dataset ====================
+
+def seed(connection: DatabaseConnection, accounts: int, channels: int, videos_per_channel: int,
+         snapshots: int, batch_size: int, by_day: bool = False) -> Dict[str, Any]:
+    """
+    Drop and recreate all tables, then load the synthetic dataset.
+
+    Args:
+        by_day: Ingest one day of every account at a time, like the daily
+            scrape does, so rows land in scraped_at order (default: all days
+            of one account at a time)
+
+    Returns:
+        Dict with account names/IDs, channel IDs and the seeded video IDs per account
+    """
+    connection.drop_tables()
+    connection.create_tables()
+    ingestor = AnalyticsIngestor(connection, batch_size=batch_size)
+    started = time.perf_counter()
+    dataset = {'accounts': [], 'video_ids': {}, 'channel_ids': {}}
+    channels_by_account = {}
+    for account_number in range(accounts):
+        account_name = f"benchmark-{account_number}"
+        first = account_number * channels * videos_per_channel
+        channels_by_account[account_name] = [
+            (f"https://www.youtube.com/@benchmark{account_number}x{channel_number}",
+             first + channel_number * videos_per_channel)
+            for channel_number in range(channels)
+        ]
+        dataset['video_ids'][account_name] = [
+            make_record(number, BASE_DATE)['video_id']
+            for number in range(first, first + channels * videos_per_channel)
+        ]
+        dataset['accounts'].append(account_name)
+
+    def records(first: int, days: range) -> Iterator[Dict[str, Any]]:
+        for day in days:
+            for number in range(first, first + videos_per_channel):
+                yield make_record(number, BASE_DATE + timedelta(days=day))
+
+    rounds = [range(day, day + 1) for day in range(snapshots)] if by_day else [range(snapshots)]
+    for round_number, days in enumerate(rounds):
+        for account_number, (account_name, account_channels) in enumerate(channels_by_account.items()):
+            for channel_url, first in account_channels:
+                ingestor.ingest(records(first, days), account_name=account_name, channel_url=channel_url)
+            progress = round_number * accounts + account_number + 1
+            print(f"  ✓ {progress}/{len(rounds) * accounts} ingest rounds "
+                  f"({channels * videos_per_channel:,} videos x {len(days)} snapshots each)", end='\r')
+    print()
+
+    with connection.session_scope() as session:
+        dataset['account_ids'] = dict(session.execute(select(Account.name, Account.id)).all())
+        dataset['channel_ids'] = {
+            account_id: channel_id
+            for account_id, channel_id in session.execute(
+                select(Channel.account_id, func.min(Channel.id)).group_by(Channel.account_id)
+            )
+        }
+    with connection.engine.begin() as conn:
+        conn.execute(text('ANALYZE'))
+    dataset['seconds'] = time.perf_counter() - started
+    return dataset
+
+
+def table_sizes(connection: DatabaseConnection) -> Dict[str, int]:
+    """Row count of every table (PostgreSQL: planner estimates, including partitions)."""
+    with connection.engine.connect() as conn:
+        if connection.engine.dialect.name == 'postgresql':
+            rows = conn.execute(text(
+                "SELECT relname, reltuples FROM pg_class "
+                "WHERE relkind IN ('r', 'm') AND relnamespace = 'public'::regnamespace"
+            ))
+            return {name: max(0, int(tuples)) for name, tuples in rows}
+        return {
+            table.name: conn.execute(select(func.count()).select_from(table)).scalar()
+            for table in Base.metadata.sorted_tables
+            if connection.engine.dialect.has_table(conn, table.name)
+        }
+
+
+# ==================== Plans ====================
+
+class PlanRecorder:
+    """
+    Explains every statement an engine sends while active.
+
+    Each distinct statement is explained once, with its first parameters, on
+    the connection and in the transaction it runs in, right before it runs.
+    EXPLAIN ANALYZE executes the statement, so on PostgreSQL it runs inside a
+    savepoint that is rolled back; the real statement then runs as usual.
+    """
+
+    def __init__(self, connection: DatabaseConnection):
+        self.engine = connection.engine
+        self.is_postgresql = self.engine.dialect.name == 'postgresql'
+        self.statements: Dict[str, Dict[str, Any]] = {}
+
+    def __enter__(self) -> 'PlanRecorder':
+        event.listen(self.engine, 'before_cursor_execute', self._before_cursor_execute)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        event.remove(self.engine, 'before_cursor_execute', self._before_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        if not statement.lstrip().upper().startswith(EXPLAINABLE):
+            return
+        if statement in self.statements:
+            self.statements[statement]['executions'] += 1
+            return
+        if executemany and isinstance(parameters, (list, tuple)) and parameters \
+                and isinstance(parameters[0], (dict, list, tuple)):
+            # Explain the first parameter set (RETURNING inserts already arrive one row at a time)
+            parameters = parameters[0]
+        entry = {'sql': statement, 'executions': 1, 'plan': None, 'error': None}
+        self.statements[statement] = entry
+        plan_cursor = cursor.connection.cursor()
+        try:
+            if self.is_postgresql:
+                plan_cursor.execute('SAVEPOINT query_plan')
+                try:
+                    plan_cursor.execute('EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) ' + statement, parameters)
+                    entry['plan'] = plan_cursor.fetchone()[0][0]
+                except Exception as e:
+                    entry['error'] = str(e).strip()
+                finally:
+                    plan_cursor.execute('ROLLBACK TO SAVEPOINT query_plan')
+                    plan_cursor.execute('RELEASE SAVEPOINT query_plan')
+            else:
+                try:
+                    plan_cursor.execute('EXPLAIN QUERY PLAN ' + statement, parameters or ())
+                    entry['plan'] = [row[-1] for row in plan_cursor.fetchall()]
+                except Exception as e:
+                    entry['error'] = str(e).strip()
+        finally:
+            plan_cursor.close()
+
+
+def _plan_nodes(node: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield node
+    for child in node.get('Plans', []):
+        yield from _plan_nodes(child)
+
+
+def sequential_scans(plan: Any, is_postgresql: bool) -> List[str]:
+    """Tables a plan reads without an index (SQLite: full SCAN without USING INDEX)."""
+    if plan is None:
+        return []
+    if is_postgresql:
+        return [node['Relation Name'] for node in _plan_nodes(plan['Plan'])
+                if node['Node Type'] == 'Seq Scan']
+    tables = []
+    for detail in plan:
+        match = re.match(r'SCAN (?:TABLE )?(\w+)', detail)
+        if match and 'USING' not in detail:
+            tables.append(match.group(1))
+    return tables
+
+
+def format_plan(plan: Any, is_postgresql: bool) -> List[str]:
+    """Plan as indented lines (PostgreSQL: node, index, actual time, rows and buffers)."""
+    if not is_postgresql:
+        return list(plan)
+    lines = []
+
+    def walk(node: Dict[str, Any], depth: int) -> None:
+        label = node['Node Type']
+        if node.get('Relation Name'):
+            label += f" on {node['Relation Name']}"
+        if node.get('Index Name'):
+            label += f" using {node['Index Name']}"
+        buffers = f"hit={node.get('Shared Hit Blocks', 0)} read={node.get('Shared Read Blocks', 0)}"
+        lines.append(f"{'  ' * depth}-> {label}  (actual {node.get('Actual Total Time', 0):.3f} ms, "
+                     f"rows={node.get('Actual Rows', 0)}, loops={node.get('Actual Loops', 0)}, {buffers})")
+        for child in node.get('Plans', []):
+            walk(child, depth + 1)
+
+    walk(plan['Plan'], 0)
+    return lines
+
+
+# ==================== Cases ====================
+
+def build_cases(connection: DatabaseConnection, dataset: Dict[str, Any],
+                snapshots: int) -> Dict[str, Callable[[Session, int], Any]]:
+    """Callables running one request of each hot path (session, iteration number)."""
+    account_name = dataset['accounts'][0]
+    account_id = dataset['account_ids'][account_name]
+    channel_id = dataset['channel_ids'][account_id]
+    video_ids = dataset['video_ids'][account_name]
+    last_day = (BASE_DATE + timedelta(days=snapshots - 1)).date()
+    week = (last_day - timedelta(days=6), last_day)
+    writer = ScraperDatabaseWriter(connection)
+
+    def list_analytics(session: Session, number: int):
+        return analytics.list_analytics(
+            account_id=account_id, video_id=None, date_from=None, date_to=None, metric=None, gte=None,
+            lte=None, include_raw=False, skip=0, limit=None, response_format='json', db=session,
+        )
+
+    def list_analytics_all(session: Session, number: int):
+        # Unfiltered GET /analytics: newest snapshots of every account
+        return analytics.list_analytics(
+            account_id=None, video_id=None, date_from=None, date_to=None, metric=None, gte=None, lte=None,
+            include_raw=False, skip=0, limit=None, response_format='json', db=session,
+        )
+
+    def list_analytics_range(session: Session, number: int):
+        return analytics.list_analytics(
+            account_id=account_id, video_id=None, date_from=week[0], date_to=week[1], metric=None,
+            gte=None, lte=None, include_raw=False, skip=0, limit=None, response_format='json', db=session,
+        )
+
+    def get_video_analytics(session: Session, number: int):
+        return analytics.get_video_analytics(
+            video_id=video_ids[number % len(video_ids)], date_from=None, date_to=None, include_raw=False,
+            skip=0, limit=None, response_format='json', db=session,
+        )
+
+    def get_account_stats(session: Session, number: int):
+        return analytics.get_account_stats(account_id=account_id, date_from=None, date_to=None, db=session)
+
+    def get_account_stats_range(session: Session, number: int):
+        return analytics.get_account_stats(account_id=account_id, date_from=week[0], date_to=week[1], db=session)
+
+    def bulk_create_videos(session: Session, number: int):
+        # Half already known, half new: both branches of the route
+        known = [video_ids[(number * 25 + i) % len(video_ids)] for i in range(25)]
+        new = [f"n{number:07d}{i:03d}" for i in range(25)]
+        return videos.bulk_create_videos(BulkVideoCreate(channel_id=channel_id, video_ids=known + new), db=session)
+
+    def save_analytics(session: Session, number: int):
+        # A changed snapshot of a seeded video, one day after the seeded history
+        video_number = number % len(video_ids)
+        record = make_record(video_number, BASE_DATE + timedelta(days=snapshots + number // len(video_ids)))
+        record['top_metrics']['Views'] = str(int(record['top_metrics']['Views']) + 1 + number)
+        return writer.save_analytics(video_id=record['video_id'], account_name=account_name,
+                                     analytics_data=record, session=session)
+
+    return {
+        'list_analytics': list_analytics,
+        'list_analytics_all': list_analytics_all,
+        'list_analytics_range': list_analytics_range,
+        'get_video_analytics': get_video_analytics,
+        'get_account_stats': get_account_stats,
+        'get_account_stats_range': get_account_stats_range,
+        'bulk_create_videos': bulk_create_videos,
+        'save_analytics': save_analytics,
+    }
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def time_case(connection: DatabaseConnection, call: Callable[[Session, int], Any], repeat: int,
+              warmup: int, offset: int) -> Dict[str, float]:
+    """Run a case `warmup + repeat` times, each with a fresh session; return latency percentiles in ms."""
+    latencies = []
+    for number in range(offset, offset + warmup + repeat):
+        session = connection.get_session()
+        try:
+            started = time.perf_counter()
+            call(session, number)
+            elapsed = (time.perf_counter() - started) * 1000
+        finally:
+            session.close()
+        if number >= offset + warmup:
+            latencies.append(elapsed)
+    return {
+        'p50': percentile(latencies, 50),
+        'p95': percentile(latencies, 95),
+        'p99': percentile(latencies, 99),
+        'max': max(latencies),
+    }
+
+
+def explain_case(connection: DatabaseConnection, call: Callable[[Session, int], Any],
+                 number: int) -> List[Dict[str, Any]]:
+    """Run a case once with every statement explained."""
+    session = connection.get_session()
+    try:
+        with PlanRecorder(connection) as recorder:
+            call(session, number)
+    finally:
+        session.close()
+    return list(recorder.statements.values())
+
+
+def parse_thresholds(values: List[str]) -> Dict[str, float]:
+    thresholds = dict(DEFAULT_MAX_P95_MS)
+    for value in values or []:
+        name, _, ms = value.partition('=')
+        if name not in DEFAULT_MAX_P95_MS or not ms:
+            raise SystemExit(f"✗ --max-p95 expects CASE=MS with CASE one of: {', '.join(DEFAULT_MAX_P95_MS)}")
+        thresholds[name] = float(ms)
+    return thresholds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query-plan and latency regression suite for hot database paths")
+    parser.add_argument('--accounts', type=int, default=10, help='Number of synthetic accounts')
+    parser.add_argument('--channels', type=int, default=2, help='Channels per account')
+    parser.add_argument('--videos', type=int, default=500, help='Videos per channel')
+    parser.add_argument('--snapshots', type=int, default=8, help='Daily snapshots per video')
+    parser.add_argument('--batch-size', type=int, default=5000, help='Records per ingest transaction while seeding')
+    parser.add_argument('--repeat', type=int, default=50, help='Timed runs per case')
+    parser.add_argument('--warmup', type=int, default=5, help='Untimed runs per case before timing')
+    parser.add_argument('--cases', nargs='+', choices=list(DEFAULT_MAX_P95_MS), help='Only run these cases')
+    parser.add_argument('--max-p95', action='append', metavar='CASE=MS',
+                        help='p95 latency threshold of a case in ms (repeatable)')
+    parser.add_argument('--seq-scan-min-rows', type=int, default=1_000,
+                        help='Sequential scans of tables up to this many rows are not regressions')
+    parser.add_argument('--allow-seq-scan', action='append', default=[], metavar='TABLE',
+                        help='Table that may be scanned sequentially (repeatable)')
+    parser.add_argument('--plans', action='store_true', help='Print the plan of every statement')
+    parser.add_argument('--report', help='Write latencies, plans and failures to this JSON file')
+    parser.add_argument('--url', help='SQLAlchemy URL (default: temporary SQLite file). '
+                                      'WARNING: all tables in this database are dropped')
+    args = parser.parse_args()
+
+    thresholds = parse_thresholds(args.max_p95)
+    url = args.url or f"sqlite:///{Path(tempfile.mkdtemp()) / 'bench.db'}"
+    connection = DatabaseConnection(DatabaseConfig(url=url, pool_profile='batch'))
+    is_postgresql = connection.engine.dialect.name == 'postgresql'
+
+    print("=" * 70)
+    print("🧭 Query-plan regression suite")
+    print("=" * 70)
+    print(f"Database:   {connection.engine.url.render_as_string(hide_password=True)}")
+    print(f"Dataset:    {args.accounts} accounts x {args.channels} channels x {args.videos:,} videos "
+          f"x {args.snapshots} snapshots")
+
+    dataset = seed(connection, args.accounts, args.channels, args.videos, args.snapshots, args.batch_size)
+    sizes = table_sizes(connection)
+    print(f"✓ Seeded in {dataset['seconds']:.1f}s "
+          f"({args.accounts * args.channels * args.videos * args.snapshots:,} snapshots)")
+
+    cases = build_cases(connection, dataset, args.snapshots)
+    selected = args.cases or list(cases)
+    results, failures = {}, []
+
+    print(f"\n  {'case':<26} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max p95':>9} {'stmts':>6}")
+    for position, name in enumerate(selected):
+        # Writing cases get fresh iteration numbers per phase, so their data stays new
+        offset = position * 100_000
+        try:
+            latency = time_case(connection, cases[name], args.repeat, args.warmup, offset)
+            statements = explain_case(connection, cases[name], offset + args.warmup + args.repeat)
+        except Exception as e:
+            print(f"✗ {name:<26} failed: {type(e).__name__}: {e}")
+            results[name] = {'error': str(e)}
+            failures.append(f"{name}: {e}")
+            continue
+
+        problems = []
+        if latency['p95'] > thresholds[name]:
+            problems.append(f"p95 {latency['p95']:.1f} ms > {thresholds[name]:g} ms")
+        for statement in statements:
+            statement['seq_scans'] = sorted({
+                table for table in sequential_scans(statement['plan'], is_postgresql)
+                if table not in args.allow_seq_scan and sizes.get(table, 0) > args.seq_scan_min_rows
+            })
+            for table in statement['seq_scans']:
+                problems.append(f"sequential scan on {table} ({sizes[table]:,} rows): "
+                                f"{' '.join(statement['sql'].split())[:120]}")
+            if statement['error']:
+                print(f"  ⚠ {name}: could not explain statement: {statement['error']}")
+
+        mark = '✗' if problems else '✓'
+        print(f"{mark} {name:<26} {latency['p50']:>9.2f} {latency['p95']:>9.2f} {latency['p99']:>9.2f} "
+              f"{thresholds[name]:>9g} {len(statements):>6}")
+        for problem in problems:
+            print(f"    ✗ {problem}")
+        if args.plans:
+            for statement in statements:
+                print(f"\n    [{statement['executions']}x] {' '.join(statement['sql'].split())}")
+                if statement['plan'] is not None:
+                    for line in format_plan(statement['plan'], is_postgresql):
+                        print(f"      {line}")
+            print()
+
+        results[name] = {'latency_ms': latency, 'max_p95_ms': thresholds[name],
+                         'statements': statements, 'problems': problems}
+        failures.extend(f"{name}: {problem}" for problem in problems)
+
+    if args.report:
+        report = {
+            'database': connection.engine.dialect.name,
+            'dataset': {key: getattr(args, key) for key in ('accounts', 'channels', 'videos', 'snapshots')},
+            'table_sizes': sizes,
+            'cases': results,
+        }
+        Path(args.report).write_text(json.dumps(report, indent=2, default=str), encoding='utf-8')
+        print(f"✓ Report written to {args.report}")
+
+    connection.close()
+
+    print()
+    if failures:
+        print(f"✗ {len(failures)} regression(s)")
+        sys.exit(1)
+    print(f"✓ No regressions in {len(selected)} case(s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Backfill video_analytics_latest from the video_analytics history.
+
+This script:
+1. Creates missing tables (including video_analytics_latest)
+2. Rebuilds the latest snapshot per (video, account), for all accounts or one
+3. Prints the number of rows written
+
+The writers keep the table current afterwards; re-running is safe.
+
+Usage:
+    python scripts/migration/backfill_latest_analytics.py
+    python scripts/migration/backfill_latest_analytics.py --account my_account
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path (2 levels up from scripts/migration/)
+project_root = Path(__file__).parents[2]
+sys.path.insert(0, str(project_root))
+
+from src.database.config import DatabaseConfig
+from src.database.connection import DatabaseConnection
+from src.database.models import Account
+from src.database.writers import ScraperDatabaseWriter
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill video_analytics_latest")
+    parser.add_argument('--account', help='Only rebuild this account (default: all)')
+    parser.add_argument('--url', help='SQLAlchemy URL (default: DATABASE_URL / DB_* settings)')
+    args = parser.parse_args()
+
+    connection = DatabaseConnection(DatabaseConfig(url=args.url, pool_profile='batch'))
+    writer = ScraperDatabaseWriter(connection)
+
+    print("=" * 70)
+    print("📊 Backfill video_analytics_latest")
+    print("=" * 70)
+
+    try:
+        connection.create_tables()
+        started = time.perf_counter()
+        with connection.session_scope() as session:
+            account_id = None
+            if args.account:
+                account_id = session.query(Account.id).filter(Account.name == args.account).scalar()
+                if account_id is None:
+                    print(f"❌ Account '{args.account}' not found")
+                    sys.exit(1)
+            rows = writer.refresh_latest(session, account_id=account_id)
+        print(f"✓ Wrote {rows:,} latest row(s) in {time.perf_counter() - started:.2f}s")
+    finally:
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
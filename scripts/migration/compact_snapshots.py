@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Apply the snapshot retention policy to video_analytics.
+
+This script:
+1. Keeps every snapshot scraped within --keep-all-days (default: 7)
+2. Keeps the latest snapshot per video and day within --daily-days (default: 90)
+3. Keeps the latest snapshot per video and week before that
+4. Deletes the rest with their traffic sources and raw payloads, --batch-size
+   snapshots per transaction
+5. Prints deleted rows per table and the reclaimed bytes
+
+Usage:
+    python scripts/migration/compact_snapshots.py --dry-run
+    python scripts/migration/compact_snapshots.py --keep-all-days 14 --daily-days 180 --vacuum
+
+Run it from cron, or set DB_COMPACTION_INTERVAL_HOURS to let the API process schedule it.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to path (2 levels up from scripts/migration/)
+project_root = Path(__file__).parents[2]
+sys.path.insert(0, str(project_root))
+
+from src.database.compaction import DAILY_DAYS, KEEP_ALL_DAYS, SnapshotCompactor
+from src.database.config import DatabaseConfig
+from src.database.connection import DatabaseConnection
+from src.database.partitioning import CHILD_TABLES
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Downsample old video_analytics snapshots")
+    parser.add_argument('--keep-all-days', type=int, default=KEEP_ALL_DAYS,
+                        help=f'Keep every snapshot this many days (default: {KEEP_ALL_DAYS})')
+    parser.add_argument('--daily-days', type=int, default=DAILY_DAYS,
+                        help=f'Keep one snapshot per day this many days, one per week before (default: {DAILY_DAYS})')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Snapshots deleted per transaction')
+    parser.add_argument('--pause', type=float, default=0.0, help='Seconds to sleep between transactions')
+    parser.add_argument('--dry-run', action='store_true', help='Only count snapshots that would be deleted')
+    parser.add_argument('--vacuum', action='store_true',
+                        help='VACUUM afterwards (PostgreSQL: VACUUM ANALYZE; SQLite: full VACUUM, locks the file)')
+    parser.add_argument('--url', help='SQLAlchemy URL (default: DATABASE_URL / DB_* settings)')
+    args = parser.parse_args()
+
+    connection = DatabaseConnection(DatabaseConfig(url=args.url, pool_profile='batch'))
+    compactor = SnapshotCompactor(
+        connection,
+        keep_all_days=args.keep_all_days,
+        daily_days=args.daily_days,
+        batch_size=args.batch_size,
+        pause=args.pause,
+    )
+
+    print("=" * 70)
+    print("🗜️  Snapshot compaction")
+    print("=" * 70)
+    print(f"Keep all:   after {compactor.cutoffs()['keep_all']:%Y-%m-%d}")
+    print(f"Daily:      after {compactor.cutoffs()['daily']:%Y-%m-%d}, weekly before")
+
+    try:
+        report = compactor.compact(dry_run=args.dry_run)
+        if args.dry_run:
+            print(f"\n✓ {report['snapshots']:,} snapshot(s) would be deleted")
+            return
+        print(f"\n✓ Deleted {report['snapshots']:,} snapshot(s) in {report['batches']:,} batch(es), "
+              f"{report['seconds']:.2f}s")
+        for child in CHILD_TABLES:
+            print(f"  {child:<28} {report[child]:>12,} rows")
+        print(f"✓ Reclaimed {report['rows']:,} rows, {report['bytes'] / 1024 / 1024:,.1f} MB")
+        if args.vacuum:
+            compactor.vacuum()
+            print("✓ Vacuumed")
+    finally:
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Export the analytics history to Parquet files (requires pyarrow).
+
+This script:
+1. Reads video_analytics and traffic_sources above the last export's
+   high-water mark through a server-side cursor
+2. Writes them to --output (default: DB_EXPORT_DIR) partitioned by account
+   and month: <table>/account_id=<id>/month=<YYYY-MM>/part-<first id>.parquet
+3. Moves the high-water mark once every file is written (safe to re-run)
+4. --full: deletes the previous export and exports the whole history
+5. Prints exported rows per table and the export state
+
+Usage:
+    python scripts/migration/export_parquet.py
+    python scripts/migration/export_parquet.py --output /mnt/lake/youtube --compression snappy
+    python scripts/migration/export_parquet.py --full
+
+Read the result with pyarrow.dataset.dataset(path, partitioning='hive'),
+pandas.read_parquet(path) or DuckDB's read_parquet('<path>/**/*.parquet', hive_partitioning=1).
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to path (2 levels up from scripts/migration/)
+project_root = Path(__file__).parents[2]
+sys.path.insert(0, str(project_root))
+
+from src.database.config import DatabaseConfig
+from src.database.connection import DatabaseConnection
+from src.database.export import EXPORT_TABLES, ParquetExporter
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export video_analytics and traffic_sources to Parquet")
+    parser.add_argument('--output', help='Export directory (default: DB_EXPORT_DIR, data/export)')
+    parser.add_argument('--batch-size', type=int, default=10000, help='Rows per cursor chunk and record batch')
+    parser.add_argument('--compression', default='zstd', choices=['zstd', 'snappy', 'gzip', 'none'],
+                        help='Parquet compression codec (default: zstd)')
+    parser.add_argument('--full', action='store_true', help='Delete the previous export and export everything')
+    parser.add_argument('--url', help='SQLAlchemy URL (default: DATABASE_URL / DB_* settings)')
+    args = parser.parse_args()
+
+    connection = DatabaseConnection(DatabaseConfig(url=args.url, pool_profile='batch'))
+    try:
+        exporter = ParquetExporter(
+            args.output, connection, batch_size=args.batch_size, compression=args.compression
+        )
+    except RuntimeError as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+
+    print("=" * 70)
+    print("📦 Parquet export")
+    print("=" * 70)
+    print(f"Output:      {exporter.output_dir}")
+    print(f"High-water:  {exporter.load_state()['high_water']:,}" + (" (full export)" if args.full else ""))
+
+    try:
+        report = exporter.export(full=args.full)
+        print(f"\n✓ Wrote {report['files']:,} file(s) in {report['seconds']:.2f}s")
+        for table in EXPORT_TABLES:
+            print(f"  {table:<28} {report['rows'][table]:>12,} rows")
+
+        state = exporter.load_state()
+        print(f"✓ High-water mark {state['high_water']:,}, "
+              f"{state['rows']['video_analytics']:,} snapshot(s) exported in total")
+    finally:
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Store raw analytics payloads as JSONB and index parsed metric values.
+
+This script:
+1. Adds video_analytics_raw.metric_values if missing
+2. Converts json columns of video_analytics_raw to jsonb (PostgreSQL, rewrites the table)
+3. Parses metric_values for existing rows in batches (re-running is safe)
+4. Creates the GIN index on metric_values and the per-metric expression indexes
+
+Usage:
+    python scripts/migration/jsonb_metric_values.py
+    python scripts/migration/jsonb_metric_values.py --batch-size 20000 --skip-convert
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path (2 levels up from scripts/migration/)
+project_root = Path(__file__).parents[2]
+sys.path.insert(0, str(project_root))
+
+from src.database.config import DatabaseConfig
+from src.database.connection import DatabaseConnection
+from src.database.raw_storage import (
+    backfill_metric_values, convert_raw_to_jsonb, ensure_metric_indexes,
+)
+from src.database.writers import ScraperDatabaseWriter
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert raw analytics payloads to JSONB and index metrics")
+    parser.add_argument('--batch-size', type=int, default=5000, help='Rows parsed per transaction')
+    parser.add_argument('--skip-convert', action='store_true', help='Do not convert json columns to jsonb')
+    parser.add_argument('--url', help='SQLAlchemy URL (default: DATABASE_URL / DB_* settings)')
+    args = parser.parse_args()
+
+    connection = DatabaseConnection(DatabaseConfig(url=args.url, pool_profile='batch'))
+
+    print("=" * 70)
+    print("🔎 JSONB payloads and metric indexes")
+    print("=" * 70)
+
+    try:
+        started = time.perf_counter()
+        connection.create_tables()
+        if not args.skip_convert:
+            convert_raw_to_jsonb(connection)
+        updated = backfill_metric_values(
+            connection, batch_size=args.batch_size, writer=ScraperDatabaseWriter(connection)
+        )
+        ensure_metric_indexes(connection)
+        print(f"✓ Parsed {updated:,} row(s) in {time.perf_counter() - started:.2f}s")
+    finally:
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -13,38 +13,16 @@ This script:
 import json
 import os
 import sys
-import re
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any
 
 # Add project root to path (2 levels up from scripts/migration/)
 project_root = Path(__file__).parents[2]
 sys.path.insert(0, str(project_root))
 
-from src.database.models import Account, Channel
+from src.database.models import Account
 from src.database.connection import db
-
-
-def extract_channel_id_from_url(url: str) -> Optional[str]:
-    """Extract channel ID from YouTube channel URL."""
-    if not url:
-        return None
-    
-    # Extract channel ID from /channel/UCxxxxxx format
-    match = re.search(r'/channel/([^/?]+)', url)
-    if match:
-        return match.group(1)
-    
-    # For @username or /c/ format, return the identifier
-    match = re.search(r'/@([^/?]+)', url)
-    if match:
-        return match.group(1)
-    
-    match = re.search(r'/c/([^/?]+)', url)
-    if match:
-        return match.group(1)
-    
-    return None
+from src.database.upsert import extract_channel_id, upsert_accounts, upsert_channels
 
 
 def load_config() -> Dict[str, Any]:
@@ -66,62 +44,43 @@ def load_config() -> Dict[str, Any]:
 
 def ensure_account_exists(account_name: str, cookies_file: str, session) -> Account:
     """Ensure account exists in database, create if not."""
-    account = session.query(Account).filter(Account.name == account_name).first()
-    
-    if not account:
-        account = Account(
-            name=account_name,
-            cookies_file=cookies_file
-        )
-        session.add(account)
-        session.flush()
+    ids, created = upsert_accounts(session, [account_name], {account_name: cookies_file})
+    if created:
         print(f"  ✓ Created account: {account_name}")
     else:
         print(f"  ✓ Account exists: {account_name}")
     
-    return account
+    return session.get(Account, ids[account_name])
 
 
 def import_channels_for_account(account: Account, channels_data: List[Dict], session) -> int:
     """Import channels for an account."""
-    imported_count = 0
+    urls = []
+    for channel_data in channels_data:
+        if not channel_data.get('url'):
+            print(f"    ⚠ Skipped channel with no URL")
+            continue
+        urls.append(channel_data['url'])
+    
+    _, created = upsert_channels(session, account.id, urls)
     
     for channel_data in channels_data:
         channel_url = channel_data.get('url')
         if not channel_url:
-            print(f"    ⚠ Skipped channel with no URL")
             continue
-        
-        # Check if channel already exists
-        existing_channel = session.query(Channel).filter(
-            Channel.account_id == account.id,
-            Channel.url == channel_url
-        ).first()
-        
-        if existing_channel:
+        if channel_url not in created:
             print(f"    ℹ Channel already exists: {channel_url}")
             continue
-        
-        # Extract channel ID
-        channel_id = extract_channel_id_from_url(channel_url)
-        
-        # Create new channel
-        channel = Channel(
-            account_id=account.id,
-            url=channel_url,
-            channel_id=channel_id
-        )
-        session.add(channel)
-        imported_count += 1
         print(f"    ✓ Imported channel: {channel_url}")
-        print(f"      - Channel ID: {channel_id}")
+        print(f"      - Channel ID: {extract_channel_id(channel_url)}")
         print(f"      - Videos: {len(channel_data.get('video_ids', []))}")
     
-    return imported_count
+    return len(created)
 
 
 def main():
     """Main migration function."""
+    db.use_pool_profile('batch')
     print("=" * 70)
     print("📺 Channel Data Migration: config.json → PostgreSQL")
     print("=" * 70)
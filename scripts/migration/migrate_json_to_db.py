@@ -3,8 +3,8 @@
 Migrate existing JSON analytics data to PostgreSQL database.
 
 This script:
-1. Finds all analytics_results_*.json files
-2. Imports them into the database
+1. Finds all analytics_results_*.json / *.jsonl files
+2. Bulk-loads them into the database (COPY on PostgreSQL, executemany elsewhere)
 3. Creates accounts if they don't exist
 4. Preserves all historical data
 """
@@ -19,113 +19,80 @@ from typing import List, Dict, Any
 project_root = Path(__file__).parents[2]
 sys.path.insert(0, str(project_root))
 
-from src.database.writers import db_writer
-from src.database.models import Account
+from src.database.ingest import AnalyticsIngestor, iter_records_from_file, print_ingest_report
 from src.database.connection import db
+from src.database.upsert import upsert_accounts
 
 
 def find_analytics_json_files() -> List[Path]:
-    """Find all analytics_results_*.json files in the data/archive directory."""
+    """Find all analytics_results_*.json / *.jsonl files in the data/archive directory."""
     # Use project_root defined at module level
     archive_dir = project_root / "data" / "archive"
     if not archive_dir.exists():
         print(f"⚠ Archive directory not found: {archive_dir}")
         return []
         
-    json_files = list(archive_dir.glob("analytics_results_*.json"))
+    json_files = list(archive_dir.glob("analytics_results_*.json")) + list(archive_dir.glob("analytics_results_*.jsonl"))
     return sorted(json_files)
 
 
 def extract_account_name_from_filename(filename: str) -> str:
     """Extract account name from filename like 'analytics_results_Beau.json'."""
-    # Remove 'analytics_results_' prefix and '.json' suffix
-    name = filename.replace("analytics_results_", "").replace(".json", "")
-    return name
+    # Remove 'analytics_results_' prefix and '.json' / '.jsonl' suffix
+    name = filename.replace("analytics_results_", "")
+    return Path(name).stem if Path(name).suffix in (".json", ".jsonl") else name
 
 
 def ensure_account_exists(account_name: str, cookies_file: str = None) -> None:
     """Ensure account exists in database, create if not."""
+    # Try to find cookies file
+    if not cookies_file:
+        cookies_file = f"data/cookies/profile/youtube_cookies_{account_name}.json"
+        if not os.path.exists(cookies_file):
+            cookies_file = f"data/cookies/profile/youtube_cookies_{account_name.replace(' ', '_')}.json"
+
     with db.session_scope() as session:
-        account = session.query(Account).filter(Account.name == account_name).first()
-        if not account:
-            # Try to find cookies file
-            if not cookies_file:
-                cookies_file = f"data/cookies/profile/youtube_cookies_{account_name}.json"
-                if not os.path.exists(cookies_file):
-                    cookies_file = f"data/cookies/profile/youtube_cookies_{account_name.replace(' ', '_')}.json"
-            
-            account = Account(
-                name=account_name,
-                cookies_file=cookies_file if os.path.exists(cookies_file) else None
-            )
-            session.add(account)
-            session.commit()
-            print(f"  ✓ Created account: {account_name}")
-        else:
-            print(f"  ✓ Account exists: {account_name}")
+        _, created = upsert_accounts(
+            session, [account_name], {account_name: cookies_file if os.path.exists(cookies_file) else None}
+        )
+    if created:
+        print(f"  ✓ Created account: {account_name}")
+    else:
+        print(f"  ✓ Account exists: {account_name}")
 
 
-def import_json_file(json_file: Path) -> Dict[str, int]:
-    """Import a single JSON file into the database."""
+def import_json_file(json_file: Path, ingestor: AnalyticsIngestor) -> Dict[str, int]:
+    """Import a single JSON / JSONL file into the database."""
     print(f"\n📄 Processing: {json_file.name}")
     
     # Extract account name from filename
     account_name = extract_account_name_from_filename(json_file.name)
     print(f"  Account: {account_name}")
     
-    # Load JSON data
-    try:
-        with open(json_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-    except Exception as e:
-        print(f"  ✗ Error reading file: {e}")
-        return {"success": 0, "errors": 0, "skipped": 0}
-    
-    if not isinstance(data, list):
-        print(f"  ✗ Invalid format: expected list, got {type(data)}")
-        return {"success": 0, "errors": 0, "skipped": 0}
-    
-    print(f"  Found {len(data)} video records")
-    
     # Ensure account exists
     ensure_account_exists(account_name)
     
-    # Import each video's analytics
-    stats = {"success": 0, "errors": 0, "skipped": 0}
-    
-    for idx, video_data in enumerate(data, 1):
-        video_id = video_data.get('video_id')
-        
-        if not video_id:
-            print(f"    [{idx}/{len(data)}] ⚠ Skipped: no video_id")
-            stats["skipped"] += 1
-            continue
-        
-        # Skip if there's an error in the data
-        if 'error' in video_data:
-            print(f"    [{idx}/{len(data)}] ⚠ Skipped {video_id}: has error")
-            stats["skipped"] += 1
-            continue
-        
-        try:
-            # Save to database
-            db_writer.save_analytics(
-                video_id=video_id,
-                account_name=account_name,
-                analytics_data=video_data
-            )
-            print(f"    [{idx}/{len(data)}] ✓ Imported {video_id}")
-            stats["success"] += 1
-            
-        except Exception as e:
-            print(f"    [{idx}/{len(data)}] ✗ Error importing {video_id}: {e}")
-            stats["errors"] += 1
+    # Stream records into the database in batches
+    try:
+        report = ingestor.ingest(iter_records_from_file(json_file), account_name=account_name)
+    except (ValueError, json.JSONDecodeError) as e:
+        print(f"  ✗ Error reading file: {e}")
+        return {"success": 0, "errors": 0, "skipped": 0}
+    except Exception as e:
+        print(f"  ✗ Error importing file: {e}")
+        return {"success": 0, "errors": 1, "skipped": 0}
     
-    return stats
+    print_ingest_report(report)
+    return {
+        "success": report["analytics_inserted"],
+        "errors": 0,
+        "skipped": report["records_skipped"] + report["duplicates_skipped"],
+    }
 
 
 def main():
     """Main migration function."""
+    db.use_pool_profile('batch')
     print("=" * 70)
     print("📊 YouTube Analytics JSON to Database Migration")
     print("=" * 70)
@@ -134,7 +101,7 @@ def main():
     json_files = find_analytics_json_files()
     
     if not json_files:
-        print("\n⚠ No analytics_results_*.json files found in current directory")
+        print("\n⚠ No analytics_results_*.json / *.jsonl files found in data/archive")
         print("   Make sure you're running this from the project root directory")
         return
     
@@ -161,9 +128,10 @@ def main():
     
     # Import each file
     total_stats = {"success": 0, "errors": 0, "skipped": 0}
+    ingestor = AnalyticsIngestor(db)
     
     for json_file in json_files:
-        stats = import_json_file(json_file)
+        stats = import_json_file(json_file, ingestor)
         total_stats["success"] += stats["success"]
         total_stats["errors"] += stats["errors"]
         total_stats["skipped"] += stats["skipped"]
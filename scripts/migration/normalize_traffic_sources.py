@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Dictionary-encode traffic source names and optionally switch the breakdown layout.
+
+This script:
+1. Creates traffic_source_types (seeded with the known YouTube traffic sources)
+2. Adds traffic_sources.source_type_id and fills it from source_name in batches (re-running is safe)
+3. Drops traffic_sources.source_name and its index
+4. With --layout, moves breakdowns between traffic_sources ('rows') and
+   traffic_source_breakdowns ('wide', one row per snapshot)
+
+Set DB_TRAFFIC_LAYOUT to the chosen layout before restarting the writers.
+
+Usage:
+    python scripts/migration/normalize_traffic_sources.py
+    python scripts/migration/normalize_traffic_sources.py --layout wide --batch-size 20000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path (2 levels up from scripts/migration/)
+project_root = Path(__file__).parents[2]
+sys.path.insert(0, str(project_root))
+
+from src.database.config import DatabaseConfig, TRAFFIC_LAYOUTS
+from src.database.connection import DatabaseConnection
+from src.database.traffic_storage import convert_traffic_layout, normalize_traffic_sources
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dictionary-encode traffic sources")
+    parser.add_argument('--batch-size', type=int, default=50000, help='Ids per update/move transaction')
+    parser.add_argument('--layout', choices=TRAFFIC_LAYOUTS, help='Move stored breakdowns into this layout')
+    parser.add_argument('--url', help='SQLAlchemy URL (default: DATABASE_URL / DB_* settings)')
+    args = parser.parse_args()
+
+    connection = DatabaseConnection(DatabaseConfig(url=args.url, pool_profile='batch'))
+
+    print("=" * 70)
+    print("🔤 Traffic source dictionary")
+    print("=" * 70)
+
+    try:
+        started = time.perf_counter()
+        connection.create_tables()
+        result = normalize_traffic_sources(connection, batch_size=args.batch_size)
+        print(f"✓ Encoded {result['updated']:,} row(s), deleted {result['deleted']:,} unnamed row(s)")
+        if args.layout:
+            moved = convert_traffic_layout(args.layout, connection, batch_size=args.batch_size)
+            print(f"✓ Moved {moved:,} snapshot(s) to the '{args.layout}' layout")
+        print(f"✓ Done in {time.perf_counter() - started:.2f}s")
+    finally:
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Manage monthly partitions of the video_analytics table (PostgreSQL).
+
+This script:
+1. --convert: migrates an existing plain video_analytics table (with data)
+   into a table partitioned by scraped_at month, in one transaction
+2. --ensure: creates missing partitions for the coming months
+3. --retire: detaches partitions older than --keep-months and archives
+   (moves to the "archive" schema) or drops them
+4. Always prints the current partitions
+
+Usage:
+    python scripts/migration/partition_video_analytics.py --convert
+    python scripts/migration/partition_video_analytics.py --ensure --months-ahead 6
+    python scripts/migration/partition_video_analytics.py --retire --keep-months 24 --mode archive
+
+Run --ensure from cron (e.g. monthly) so inserts never land in the default partition.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to path (2 levels up from scripts/migration/)
+project_root = Path(__file__).parents[2]
+sys.path.insert(0, str(project_root))
+
+from src.database.config import DatabaseConfig
+from src.database.connection import DatabaseConnection
+from src.database.partitioning import PartitionManager
+
+
+def print_partitions(manager: PartitionManager) -> None:
+    partitions = manager.list_partitions()
+    if not partitions:
+        print("\nvideo_analytics is not partitioned")
+        return
+    print(f"\n📊 Partitions ({len(partitions)}):")
+    for partition in partitions:
+        print(f"  {partition['name']:<32} ~{partition['rows']:>10,} rows  {partition['bound']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage monthly partitions of video_analytics")
+    parser.add_argument('--convert', action='store_true', help='Convert the existing table to a partitioned one')
+    parser.add_argument('--keep-legacy', action='store_true',
+                        help='With --convert: keep the old table as video_analytics_legacy')
+    parser.add_argument('--ensure', action='store_true', help='Create missing future partitions')
+    parser.add_argument('--months-ahead', type=int, default=3, help='Future months to keep created (default: 3)')
+    parser.add_argument('--retire', action='store_true', help='Retire partitions older than --keep-months')
+    parser.add_argument('--keep-months', type=int, default=24, help='Months of data to keep online (default: 24)')
+    parser.add_argument('--mode', choices=['archive', 'drop'], default='archive',
+                        help='What to do with retired partitions (default: archive)')
+    parser.add_argument('--url', help='SQLAlchemy URL (default: DATABASE_URL / DB_* settings)')
+    args = parser.parse_args()
+
+    connection = DatabaseConnection(DatabaseConfig(url=args.url, pool_profile='batch'))
+    manager = PartitionManager(connection, months_ahead=args.months_ahead)
+    if not manager.is_supported:
+        print("❌ Partitioning requires PostgreSQL")
+        sys.exit(1)
+
+    print("=" * 70)
+    print("🗂️  video_analytics partition management")
+    print("=" * 70)
+
+    try:
+        if args.convert:
+            manager.convert_table(keep_legacy=args.keep_legacy)
+        if args.ensure:
+            created = manager.ensure_partitions()
+            print(f"✓ {len(created)} partition(s) created")
+        if args.retire:
+            retired = manager.retire_partitions(args.keep_months, mode=args.mode)
+            print(f"✓ {len(retired)} partition(s) retired")
+        print_partitions(manager)
+    finally:
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
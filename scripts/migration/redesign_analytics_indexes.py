@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Move video_analytics, video_analytics_latest and videos to the covering/BRIN index layout.
+
+This script:
+1. Creates the indexes defined on the models: (account_id, scraped_at DESC),
+   (account_id, video_id, scraped_at DESC) INCLUDE (stats columns), BRIN on
+   scraped_at, and the covering account index of video_analytics_latest
+   (CREATE INDEX CONCURRENTLY on PostgreSQL; per partition and attached
+   when video_analytics is partitioned)
+2. Drops the indexes they replace: the single-column video_analytics indexes,
+   (video_id, account_id), idx_video_analytics_latest_account_id and
+   idx_videos_video_id (--keep-legacy skips this)
+3. ANALYZEs the tables and prints index sizes before and after
+4. --revert: recreates the old indexes and drops the new ones
+
+Usage:
+    python scripts/migration/redesign_analytics_indexes.py
+    python scripts/migration/redesign_analytics_indexes.py --keep-legacy
+    python scripts/migration/redesign_analytics_indexes.py --revert
+
+Re-running is safe. scripts/benchmark/benchmark_indexes.py compares both layouts on a seeded dataset.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path (2 levels up from scripts/migration/)
+project_root = Path(__file__).parents[2]
+sys.path.insert(0, str(project_root))
+
+from src.database.config import DatabaseConfig
+from src.database.connection import DatabaseConnection
+from src.database.indexes import apply_index_layout, index_sizes, restore_legacy_indexes
+
+
+def print_sizes(sizes) -> None:
+    for name, size in sizes.items():
+        print(f"  {name:<48} {size / 1024 / 1024:>10.1f} MB")
+    print(f"  {'total':<48} {sum(sizes.values()) / 1024 / 1024:>10.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply the covering/BRIN index layout to the analytics tables")
+    parser.add_argument('--keep-legacy', action='store_true', help='Create the new indexes but keep the old ones')
+    parser.add_argument('--revert', action='store_true', help='Restore the old indexes and drop the new ones')
+    parser.add_argument('--blocking', action='store_true',
+                        help='Build without CONCURRENTLY (faster, blocks writes; PostgreSQL)')
+    parser.add_argument('--url', help='SQLAlchemy URL (default: DATABASE_URL / DB_* settings)')
+    args = parser.parse_args()
+
+    connection = DatabaseConnection(DatabaseConfig(url=args.url, pool_profile='batch'))
+
+    print("=" * 70)
+    print("🗂  Analytics index layout")
+    print("=" * 70)
+
+    try:
+        before = index_sizes(connection)
+        if before:
+            print("\nIndexes before:")
+            print_sizes(before)
+
+        started = time.perf_counter()
+        if args.revert:
+            restore_legacy_indexes(connection, concurrently=not args.blocking)
+        else:
+            apply_index_layout(connection, concurrently=not args.blocking, drop_legacy=not args.keep_legacy)
+        print(f"✓ Done in {time.perf_counter() - started:.1f}s")
+
+        after = index_sizes(connection)
+        if after:
+            print("\nIndexes after:")
+            print_sizes(after)
+    finally:
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Move raw payloads (top_metrics, traffic_sources, impressions_data, page_text)
+out of video_analytics into video_analytics_raw.
+
+This script:
+1. Creates video_analytics_raw (lz4 compressed on PostgreSQL 14+)
+2. Copies the legacy columns in id batches (re-running is safe)
+3. Drops the legacy columns from video_analytics
+4. Optionally runs VACUUM FULL (PostgreSQL) / VACUUM (SQLite) to return the space
+
+Usage:
+    python scripts/migration/split_raw_analytics.py
+    python scripts/migration/split_raw_analytics.py --batch-size 50000 --vacuum
+    python scripts/migration/split_raw_analytics.py --keep-columns
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from sqlalchemy import text
+
+# Add project root to path (2 levels up from scripts/migration/)
+project_root = Path(__file__).parents[2]
+sys.path.insert(0, str(project_root))
+
+from src.database.config import DatabaseConfig
+from src.database.connection import DatabaseConnection
+from src.database.raw_storage import split_raw_columns
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move raw analytics payloads into video_analytics_raw")
+    parser.add_argument('--batch-size', type=int, default=10000, help='Analytics ids per copy transaction')
+    parser.add_argument('--keep-columns', action='store_true',
+                        help='Copy only, keep the legacy columns on video_analytics')
+    parser.add_argument('--vacuum', action='store_true',
+                        help='Rewrite video_analytics afterwards to return the freed space (locks the table)')
+    parser.add_argument('--url', help='SQLAlchemy URL (default: DATABASE_URL / DB_* settings)')
+    args = parser.parse_args()
+
+    connection = DatabaseConnection(DatabaseConfig(url=args.url, pool_profile='batch'))
+
+    print("=" * 70)
+    print("📦 Split raw payloads out of video_analytics")
+    print("=" * 70)
+
+    try:
+        started = time.perf_counter()
+        result = split_raw_columns(connection, batch_size=args.batch_size, drop_columns=not args.keep_columns)
+        print(f"✓ Copied {result['copied']:,} raw row(s) in {time.perf_counter() - started:.2f}s")
+
+        if result['dropped_columns']:
+            statement = 'VACUUM' if connection.config.is_sqlite else 'VACUUM FULL video_analytics'
+            if args.vacuum:
+                with connection.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+                    conn.execute(text(statement))
+                print(f"✓ {statement} done")
+            else:
+                print(f"💡 Run '{statement}' to return the space of the dropped columns")
+    finally:
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Sync a scraper node's edge store (DB_MODE=edge) to the central database.
+
+This script:
+1. Opens the local SQLite edge store (--edge-path, default: DB_EDGE_PATH)
+2. Sends snapshots above the high-water mark to the central database in
+   batches of --batch-size (idempotent, safe to interrupt and re-run)
+3. --watch: keeps syncing every --interval seconds until interrupted
+4. --prune-days: deletes synced snapshots older than N days from the edge store
+5. Prints the high-water mark and pending snapshots
+
+Usage:
+    python scripts/migration/sync_edge.py --status
+    python scripts/migration/sync_edge.py --central-url postgresql://postgres@db-host:5432/youtube_analytics
+    python scripts/migration/sync_edge.py --watch --interval 60 --prune-days 14
+
+Scrapers running with DB_MODE=edge start the same agent in the background;
+use this script for nodes that only sync, or to drain a store after an outage.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path (2 levels up from scripts/migration/)
+project_root = Path(__file__).parents[2]
+sys.path.insert(0, str(project_root))
+
+from src.database.config import DatabaseConfig
+from src.database.connection import DatabaseConnection
+from src.database.edge import EdgeSyncAgent
+
+
+def print_status(agent: EdgeSyncAgent) -> None:
+    status = agent.get_status()
+    print(f"High-water mark: {status['high_water']:,}")
+    print(f"Pending:         {status['pending']:,} snapshot(s)")
+
+
+def main():
+    defaults = DatabaseConfig()
+    parser = argparse.ArgumentParser(description="Sync the local edge store to the central database")
+    parser.add_argument('--edge-path', default=defaults.edge_path,
+                        help=f'SQLite file of the edge store (default: {defaults.edge_path})')
+    parser.add_argument('--central-url', help='SQLAlchemy URL of the central database (default: DATABASE_URL / DB_* settings)')
+    parser.add_argument('--batch-size', type=int, default=500, help='Snapshots per central transaction')
+    parser.add_argument('--status', action='store_true', help='Only print the sync state')
+    parser.add_argument('--watch', action='store_true', help='Keep syncing every --interval seconds')
+    parser.add_argument('--interval', type=float, default=defaults.edge_sync_interval,
+                        help=f'Seconds between runs with --watch (default: {defaults.edge_sync_interval:g})')
+    parser.add_argument('--prune-days', type=int,
+                        help='Delete synced snapshots older than this many days from the edge store')
+    args = parser.parse_args()
+
+    edge = DatabaseConnection(DatabaseConfig(url=f"sqlite:///{args.edge_path}"))
+    central = DatabaseConnection(DatabaseConfig(url=args.central_url or defaults.central_url, pool_profile='batch'))
+    agent = EdgeSyncAgent(edge, central, batch_size=args.batch_size, interval=args.interval)
+
+    print("=" * 70)
+    print("🔄 Edge sync")
+    print("=" * 70)
+    print(f"Edge:     {edge.engine.url.render_as_string(hide_password=True)}")
+    print(f"Central:  {central.engine.url.render_as_string(hide_password=True)}")
+
+    try:
+        if args.status:
+            print_status(agent)
+            return
+        while True:
+            try:
+                report = agent.sync()
+                print(f"✓ Sent {report['sent']:,} snapshot(s) in {report['batches']:,} batch(es), "
+                      f"{report['seconds']:.2f}s")
+            except Exception as e:
+                if not args.watch:
+                    raise
+                print(f"⚠ Sync failed, retrying in {args.interval:g}s: {e}")
+            if args.prune_days is not None:
+                print(f"✓ Pruned {agent.prune(args.prune_days):,} synced snapshot(s)")
+            print_status(agent)
+            if not args.watch:
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        print("\n✓ Stopped")
+    finally:
+        edge.close()
+        central.close()
+
+
+if __name__ == '__main__':
+    main()
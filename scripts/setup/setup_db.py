@@ -72,6 +72,7 @@ def create_tables():
 
 def main():
     """Main setup function."""
+    db.use_pool_profile('batch')
     print_header("YouTube Analytics - Database Setup")
 
     # Display current configuration
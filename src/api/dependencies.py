@@ -1,5 +1,8 @@
 """FastAPI dependencies."""
 
+from typing import AsyncGenerator
+
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from src.database.connection import db
@@ -19,3 +22,19 @@ def get_db() -> Session:
         yield session
     finally:
         session.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency to get an async database session (used when DB_ASYNC=true).
+
+    Usage in routes:
+        @app.get("/items")
+        async def get_items(db: AsyncSession = Depends(get_async_db)):
+            # use await db.execute(...)
+    """
+    session = db.get_async_session()
+    try:
+        yield session
+    finally:
+        await session.close()
@@ -4,8 +4,11 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
+from src.database.compaction import get_compactor
 from src.database.connection import db
-from src.api.routes import accounts, channels, videos, analytics
+from src.database.write_behind import get_write_behind_writer
+from src.api.routes import accounts, channels, videos, analytics, metrics
+from src.api.routes import analytics_async, videos_async
 
 # Create FastAPI app
 app = FastAPI(
@@ -30,18 +33,27 @@ app.add_middleware(
 async def startup_event():
     """Initialize database on startup."""
     print("Starting YouTube Analytics API...")
+    db.use_pool_profile('api')
     db.create_tables()
     health = db.health_check()
     if health:
         print("✓ Database connection healthy")
     else:
         print("✗ Warning: Database health check failed")
+    get_write_behind_writer()
+    print("✓ Write-behind writer started")
+    if db.config.compaction_interval_hours > 0:
+        get_compactor().start(db.config.compaction_interval_hours)
+        print(f"✓ Snapshot compaction scheduled every {db.config.compaction_interval_hours:g}h")
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown."""
     print("Shutting down YouTube Analytics API...")
+    get_write_behind_writer().stop()
+    get_compactor().stop()
+    await db.close_async()
     db.close()
 
 
@@ -71,17 +83,19 @@ async def root():
             "channels": "/channels",
             "videos": "/videos",
             "analytics": "/analytics",
+            "metrics": "/metrics/phases",
         },
     }
 
 
 # ==================== Route Registration ====================
 
-# Include routers
+# Include routers (DB_ASYNC=true serves videos and analytics from the async engine)
 app.include_router(accounts.router)
 app.include_router(channels.router)
-app.include_router(videos.router)
-app.include_router(analytics.router)
+app.include_router(videos_async.router if db.config.use_async else videos.router)
+app.include_router(analytics_async.router if db.config.use_async else analytics.router)
+app.include_router(metrics.router)
 
 
 # ==================== Error Handling ====================
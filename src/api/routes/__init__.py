@@ -1,5 +1,5 @@
 """API route modules."""
 
-from src.api.routes import accounts, channels, videos, analytics
+from src.api.routes import accounts, channels, videos, analytics, metrics
 
-__all__ = ['accounts', 'channels', 'videos', 'analytics']
+__all__ = ['accounts', 'channels', 'videos', 'analytics', 'metrics']
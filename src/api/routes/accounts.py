@@ -7,7 +7,9 @@ from sqlalchemy.orm import Session
 
 from src.api.schemas import AccountCreate, AccountResponse, AccountUpdate
 from src.api.dependencies import get_db
+from src.database.identity_cache import ACCOUNT, CHANNEL, VIDEO
 from src.database.models import Account
+from src.database.writers import db_writer
 
 router = APIRouter(prefix="/accounts", tags=["accounts"])
 
@@ -72,6 +74,7 @@ def update_account(account_id: int, account: AccountUpdate, db: Session = Depend
                 status_code=status.HTTP_409_CONFLICT,
                 detail=f"Account '{account.name}' already exists"
             )
+        db_writer.identity_cache.invalidate(ACCOUNT, db_account.name)
         db_account.name = account.name
 
     if account.cookies_file is not None:
@@ -92,6 +95,11 @@ def delete_account(account_id: int, db: Session = Depends(get_db)):
             detail=f"Account {account_id} not found"
         )
 
+    account_name = account.name
     db.delete(account)
     db.commit()
+    # Channels and their videos are deleted with the account
+    db_writer.identity_cache.invalidate(ACCOUNT, account_name)
+    db_writer.identity_cache.invalidate(CHANNEL)
+    db_writer.identity_cache.invalidate(VIDEO)
     return None
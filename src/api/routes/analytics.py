@@ -1,24 +1,246 @@
 """API routes for analytics data."""
 
 from typing import List
-from datetime import date
+from datetime import date, datetime, timedelta
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy import func, and_
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, and_, select, tuple_
+from sqlalchemy.orm import Session, selectinload
 
 from src.api.schemas import (
     VideoAnalyticsCreate,
     VideoAnalyticsResponse,
+    VideoAnalyticsSummaryResponse,
+    VideoAnalyticsLatestResponse,
     VideoAnalyticsUpdate,
     BulkAnalyticsCreate,
     AnalyticsStatsResponse,
+    AnalyticsTrendPoint,
+    AnalyticsSeriesPoint,
+    TrafficSourceTotal,
+    AnalyticsEnqueueRequest,
+    AnalyticsEnqueueResponse,
 )
 from src.api.dependencies import get_db
-from src.database.models import VideoAnalytics, Video, Account, TrafficSource
+from src.database.change_detection import expand_runs
+from src.database.export import EXPORT_TABLES, PARQUET_MEDIA_TYPE, ParquetExporter
+from src.database.models import (
+    VideoAnalytics, VideoAnalyticsLatest, VideoAnalyticsRaw, AnalyticsDailyRollup, Video, Account, TrafficSource,
+    has_metric, metric_value,
+)
+from src.database.upsert import upsert_videos
+from src.database.write_behind import get_write_behind_writer
+from src.database.writers import db_writer
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 
+# format=json returns one page; format=ndjson streams one snapshot per line
+RESPONSE_FORMATS = ('json', 'ndjson')
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Rows per server-side cursor fetch of an NDJSON stream
+STREAM_BATCH_SIZE = 500
+
+
+def _filter_scraped_at(query, date_from: date = None, date_to: date = None):
+    """
+    Restrict a VideoAnalytics query to a scrape date range.
+
+    Plain range predicates on scraped_at let PostgreSQL prune monthly
+    partitions of video_analytics (see src/database/partitioning.py).
+    """
+    if date_from is not None:
+        query = query.filter(VideoAnalytics.scraped_at >= date_from)
+    if date_to is not None:
+        query = query.filter(VideoAnalytics.scraped_at <= date_to)
+    return query
+
+
+def _filter_metric(query, metric: str = None, gte: float = None, lte: float = None):
+    """
+    Restrict a VideoAnalytics query by a parsed metric value in video_analytics_raw.metric_values.
+
+    Range predicates on the metrics in INDEXED_METRICS use their expression
+    index; on PostgreSQL other metrics are narrowed by the GIN index on
+    metric_values first.
+    """
+    if metric is None:
+        if gte is not None or lte is not None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="gte/lte require a metric"
+            )
+        return query
+
+    value = metric_value(VideoAnalyticsRaw.metric_values, metric)
+    query = query.join(VideoAnalyticsRaw, VideoAnalyticsRaw.analytics_id == VideoAnalytics.id)
+    query = query.filter(has_metric(VideoAnalyticsRaw.metric_values, metric))
+    if gte is not None:
+        query = query.filter(value >= gte)
+    if lte is not None:
+        query = query.filter(value <= lte)
+    return query
+
+
+def _series_query(video_id: str, account_id: int = None, date_from: date = None, date_to: date = None):
+    """
+    Select a video's snapshots whose runs overlap a day range (see expand_runs).
+
+    A run that started before date_from still covers it, so the lower bound
+    is applied to last_seen_at; the upper bound stays on scraped_at.
+    """
+    query = select(VideoAnalytics).where(VideoAnalytics.video_id == video_id)
+    if account_id is not None:
+        query = query.where(VideoAnalytics.account_id == account_id)
+    if date_from is not None:
+        query = query.where(
+            func.coalesce(VideoAnalytics.last_seen_at, VideoAnalytics.scraped_at)
+            >= datetime.combine(date_from, datetime.min.time())
+        )
+    if date_to is not None:
+        query = query.where(VideoAnalytics.scraped_at < datetime.combine(date_to + timedelta(days=1), datetime.min.time()))
+    return query
+
+
+def _with_raw(query, include_raw: bool):
+    """
+    Load traffic breakdowns (and video_analytics_raw when raw payloads were
+    requested) with one extra SELECT each instead of one per snapshot.
+    """
+    query = query.options(
+        selectinload(VideoAnalytics.traffic_sources_breakdown),
+        selectinload(VideoAnalytics.traffic_sources_wide),
+    )
+    return query.options(selectinload(VideoAnalytics.raw)) if include_raw else query
+
+
+def _analytics_response(analytics: VideoAnalytics, include_raw: bool):
+    """
+    Serialize an analytics row, reading the raw payload columns only on request.
+
+    Without include_raw, top_metrics, traffic_sources, impressions_data and
+    page_text are returned as null and video_analytics_raw is never queried.
+    """
+    if include_raw:
+        return VideoAnalyticsResponse.model_validate(analytics)
+    return VideoAnalyticsSummaryResponse.model_validate(analytics)
+
+
+def _save_snapshots(db: Session, records: List[VideoAnalyticsCreate]) -> List[tuple]:
+    """
+    Write API analytics records through the scraper writer's snapshot path.
+
+    Records are saved per account with ScraperDatabaseWriter.save_snapshots(),
+    so unchanged metrics extend the latest snapshot's run and
+    video_analytics_latest, analytics_daily_rollup and traffic sources are
+    kept up to date exactly as for scraped batches. The latest rows are
+    locked (in account id order, the same in every request) before records
+    are stamped with the current time, so a concurrent request that
+    committed first never holds a newer scraped_at. The caller commits.
+
+    Returns:
+        (id, scraped_at) of the snapshot standing for each record, in order
+    """
+    if not records:
+        return []
+
+    # Create missing videos in one statement
+    upsert_videos(db, [{'video_id': video_id} for video_id in sorted({record.video_id for record in records})])
+    video_ids = {}
+    for record in records:
+        video_ids.setdefault(record.account_id, set()).add(record.video_id)
+    for account_id in sorted(video_ids):
+        db_writer.lock_latest(account_id, video_ids[account_id], db)
+
+    scraped_at = datetime.utcnow()
+    batches = {}
+    for record in records:
+        rows, traffic_by_key = batches.setdefault(record.account_id, ({}, {}))
+        key = (record.video_id, scraped_at)
+        # One row per video and account; a later duplicate in the request wins
+        rows[key] = {
+            **record.model_dump(),
+            'metric_values': db_writer.build_metric_values(record.top_metrics, record.impressions_data),
+            'scraped_at': scraped_at,
+        }
+        traffic_by_key[key] = db_writer.build_traffic_source_rows(None, record.traffic_sources or {})
+
+    stored = {}
+    for account_id in sorted(batches):
+        rows, traffic_by_key = batches[account_id]
+        for analytics_id, video_id, _, row_scraped_at in db_writer.save_snapshots(rows, traffic_by_key, account_id, db):
+            stored[(video_id, account_id)] = (analytics_id, row_scraped_at)
+
+    # Folded (or already stored) records are represented by the current snapshot of their video
+    missing = {(record.video_id, record.account_id) for record in records} - stored.keys()
+    if missing:
+        for latest in db.execute(
+            select(VideoAnalyticsLatest.video_id, VideoAnalyticsLatest.account_id,
+                   VideoAnalyticsLatest.analytics_id, VideoAnalyticsLatest.scraped_at)
+            .where(tuple_(VideoAnalyticsLatest.video_id, VideoAnalyticsLatest.account_id).in_(missing))
+        ):
+            stored[(latest.video_id, latest.account_id)] = (latest.analytics_id, latest.scraped_at)
+    return [stored[(record.video_id, record.account_id)] for record in records]
+
+
+def _load_snapshots(db: Session, stored: List[tuple]) -> List[VideoAnalytics]:
+    """Load the snapshots returned by _save_snapshots() with their raw payloads and traffic breakdowns."""
+    if not stored:
+        return []
+    query = _with_raw(select(VideoAnalytics), True).where(
+        # scraped_at lets PostgreSQL prune to the snapshots' partitions
+        tuple_(VideoAnalytics.id, VideoAnalytics.scraped_at).in_(set(stored))
+    )
+    snapshots = {(row.id, row.scraped_at): row for row in db.scalars(query)}
+    return [snapshots[key] for key in stored]
+
+
+def _page_limit(response_format: str, limit: int = None):
+    """
+    Validate the response format and resolve the page size.
+
+    JSON pages default to DEFAULT_PAGE_SIZE and hold at most MAX_PAGE_SIZE
+    rows; NDJSON streams are not capped (no limit streams every match).
+    """
+    if response_format not in RESPONSE_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"format must be one of {', '.join(RESPONSE_FORMATS)}"
+        )
+    if response_format == 'ndjson':
+        return limit
+    if limit is not None and limit > MAX_PAGE_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"limit must not exceed {MAX_PAGE_SIZE} (use format=ndjson for larger reads)"
+        )
+    return limit or DEFAULT_PAGE_SIZE
+
+
+def _ndjson_lines(batch: List[VideoAnalytics], include_raw: bool) -> str:
+    return ''.join(_analytics_response(analytics, include_raw).model_dump_json() + '\n' for analytics in batch)
+
+
+def _stream_ndjson(bind, statement, include_raw: bool) -> StreamingResponse:
+    """
+    Stream the snapshots of a select as newline-delimited JSON.
+
+    The statement runs in its own session with yield_per, so PostgreSQL
+    reads through a server-side cursor STREAM_BATCH_SIZE rows at a time, the
+    selectinload options of _with_raw run once per batch, and the session's
+    weak-referencing identity map lets serialized batches go: memory stays
+    flat however many rows are sent.
+    """
+    def lines():
+        with Session(bind) as session:
+            result = session.scalars(statement.execution_options(yield_per=STREAM_BATCH_SIZE))
+            for batch in result.partitions():
+                yield _ndjson_lines(batch, include_raw)
+
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
+
 
 @router.get("", response_model=List[VideoAnalyticsResponse])
 def list_analytics(
@@ -26,8 +248,13 @@ def list_analytics(
     video_id: str = Query(None),
     date_from: date = Query(None),
     date_to: date = Query(None),
+    metric: str = Query(None, max_length=100, description="Metric label, e.g. Impressions"),
+    gte: float = Query(None, description="Minimum metric value"),
+    lte: float = Query(None, description="Maximum metric value"),
+    include_raw: bool = Query(False),
     skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000),
+    limit: int = Query(None, ge=1, description="Page size (json: default 100, max 1000; ndjson: unlimited)"),
+    response_format: str = Query('json', alias='format', description="json or ndjson"),
     db: Session = Depends(get_db),
 ):
     """
@@ -38,34 +265,32 @@ def list_analytics(
     - video_id: Filter by video
     - date_from: Filter by scrape date (from)
     - date_to: Filter by scrape date (to)
+    - metric: Only snapshots having this metric (e.g. Impressions, Views)
+    - gte / lte: Range of the metric's value
+    - include_raw: Include raw payloads (top_metrics, traffic_sources, impressions_data, page_text)
     - skip: Pagination offset
     - limit: Pagination limit
+    - format: 'json' (one page) or 'ndjson' (streamed, one snapshot per line)
     """
-    query = db.query(VideoAnalytics)
+    limit = _page_limit(response_format, limit)
+    query = _with_raw(db.query(VideoAnalytics), include_raw)
 
     if account_id is not None:
         query = query.filter(VideoAnalytics.account_id == account_id)
     if video_id is not None:
         query = query.filter(VideoAnalytics.video_id == video_id)
-    if date_from is not None:
-        query = query.filter(VideoAnalytics.scraped_at >= date_from)
-    if date_to is not None:
-        query = query.filter(VideoAnalytics.scraped_at <= date_to)
+    query = _filter_scraped_at(query, date_from, date_to)
+    query = _filter_metric(query, metric, gte, lte)
 
-    return query.order_by(VideoAnalytics.scraped_at.desc()).offset(skip).limit(limit).all()
+    query = query.order_by(VideoAnalytics.scraped_at.desc()).offset(skip).limit(limit)
+    if response_format == 'ndjson':
+        return _stream_ndjson(db.get_bind(), query.statement, include_raw)
+    return [_analytics_response(analytics, include_raw) for analytics in query]
 
 
 @router.post("", response_model=VideoAnalyticsResponse, status_code=status.HTTP_201_CREATED)
 def create_analytics(analytics: VideoAnalyticsCreate, db: Session = Depends(get_db)):
-    """Create new analytics record."""
-    # Verify video exists
-    video = db.query(Video).filter(Video.video_id == analytics.video_id).first()
-    if not video:
-        # Create video if it doesn't exist
-        video = Video(video_id=analytics.video_id)
-        db.add(video)
-        db.flush()
-
+    """Create new analytics record (an unchanged one extends the latest snapshot's run)."""
     # Verify account exists
     account = db.query(Account).filter(Account.id == analytics.account_id).first()
     if not account:
@@ -74,84 +299,69 @@ def create_analytics(analytics: VideoAnalyticsCreate, db: Session = Depends(get_
             detail=f"Account {analytics.account_id} not found"
         )
 
-    db_analytics = VideoAnalytics(
-        video_id=analytics.video_id,
-        account_id=analytics.account_id,
-        impressions=analytics.impressions,
-        views=analytics.views,
-        unique_viewers=analytics.unique_viewers,
-        ctr_percentage=analytics.ctr_percentage,
-        views_from_impressions=analytics.views_from_impressions,
-        youtube_recommending_percentage=analytics.youtube_recommending_percentage,
-        ctr_from_impressions_percentage=analytics.ctr_from_impressions_percentage,
-        avg_view_duration_seconds=analytics.avg_view_duration_seconds,
-        watch_time_hours=analytics.watch_time_hours,
-        publish_start_date=analytics.publish_start_date,
-        top_metrics=analytics.top_metrics,
-        traffic_sources=analytics.traffic_sources,
-        impressions_data=analytics.impressions_data,
-        page_text=analytics.page_text,
-    )
-    db.add(db_analytics)
+    stored = _save_snapshots(db, [analytics])
     db.commit()
-    db.refresh(db_analytics)
-    return db_analytics
+    return _load_snapshots(db, stored)[0]
+
+
+@router.post("/enqueue", response_model=AnalyticsEnqueueResponse, status_code=status.HTTP_202_ACCEPTED)
+def enqueue_analytics(request: AnalyticsEnqueueRequest):
+    """
+    Queue raw scraper results for the write-behind writer.
+
+    Records are saved in large batches shortly after the response is sent.
+    Returns 503 if the queue is full and nothing could be accepted.
+    """
+    writer = get_write_behind_writer()
+    accepted = writer.submit_many(request.records, request.account_name, request.channel_url)
+    if accepted == 0:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Write-behind queue is full, retry later",
+        )
+    return {
+        "accepted": accepted,
+        "rejected": len(request.records) - accepted,
+        "queue_depth": writer.get_metrics()["queue_depth"],
+    }
 
 
 @router.post("/bulk", response_model=List[VideoAnalyticsResponse], status_code=status.HTTP_201_CREATED)
 def bulk_create_analytics(bulk: BulkAnalyticsCreate, db: Session = Depends(get_db)):
-    """Bulk create analytics records."""
-    created_analytics = []
-
-    for analytics_data in bulk.analytics:
-        # Verify/create video
-        video = db.query(Video).filter(Video.video_id == analytics_data.video_id).first()
-        if not video:
-            video = Video(video_id=analytics_data.video_id)
-            db.add(video)
-            db.flush()
-
-        # Verify account
-        account = db.query(Account).filter(Account.id == analytics_data.account_id).first()
-        if not account:
-            continue  # Skip if account doesn't exist
-
-        db_analytics = VideoAnalytics(
-            video_id=analytics_data.video_id,
-            account_id=analytics_data.account_id,
-            impressions=analytics_data.impressions,
-            views=analytics_data.views,
-            unique_viewers=analytics_data.unique_viewers,
-            ctr_percentage=analytics_data.ctr_percentage,
-            views_from_impressions=analytics_data.views_from_impressions,
-            youtube_recommending_percentage=analytics_data.youtube_recommending_percentage,
-            ctr_from_impressions_percentage=analytics_data.ctr_from_impressions_percentage,
-            avg_view_duration_seconds=analytics_data.avg_view_duration_seconds,
-            watch_time_hours=analytics_data.watch_time_hours,
-            publish_start_date=analytics_data.publish_start_date,
-            top_metrics=analytics_data.top_metrics,
-            traffic_sources=analytics_data.traffic_sources,
-            impressions_data=analytics_data.impressions_data,
-            page_text=analytics_data.page_text,
-        )
-        db.add(db_analytics)
-        created_analytics.append(db_analytics)
+    """Bulk create analytics records (records of unknown accounts are skipped)."""
+    account_ids = {analytics_data.account_id for analytics_data in bulk.analytics}
+    known_accounts = set(db.scalars(select(Account.id).where(Account.id.in_(account_ids))))
 
+    stored = _save_snapshots(
+        db, [analytics_data for analytics_data in bulk.analytics if analytics_data.account_id in known_accounts]
+    )
     db.commit()
-    for analytics in created_analytics:
-        db.refresh(analytics)
-
-    return created_analytics
+    return _load_snapshots(db, stored)
 
 
 @router.get("/video/{video_id}", response_model=List[VideoAnalyticsResponse])
 def get_video_analytics(
     video_id: str,
+    date_from: date = Query(None),
+    date_to: date = Query(None),
+    include_raw: bool = Query(False),
     skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000),
+    limit: int = Query(None, ge=1, description="Page size (json: default 100, max 1000; ndjson: unlimited)"),
+    response_format: str = Query('json', alias='format', description="json or ndjson"),
     db: Session = Depends(get_db),
 ):
-    """Get all analytics records for a specific video."""
+    """
+    Get all analytics records for a specific video.
+
+    Query parameters:
+    - date_from: Filter by scrape date (from)
+    - date_to: Filter by scrape date (to)
+    - include_raw: Include raw payloads
+    - skip: Pagination offset
+    - limit: Pagination limit
+    - format: 'json' (one page) or 'ndjson' (streamed, one snapshot per line)
+    """
+    limit = _page_limit(response_format, limit)
     video = db.query(Video).filter(Video.video_id == video_id).first()
     if not video:
         raise HTTPException(
@@ -159,14 +369,46 @@ def get_video_analytics(
             detail=f"Video {video_id} not found"
         )
 
-    return (
-        db.query(VideoAnalytics)
-        .filter(VideoAnalytics.video_id == video_id)
-        .order_by(VideoAnalytics.scraped_at.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
+    query = _filter_scraped_at(
+        _with_raw(db.query(VideoAnalytics), include_raw).filter(VideoAnalytics.video_id == video_id),
+        date_from,
+        date_to,
     )
+    query = query.order_by(VideoAnalytics.scraped_at.desc()).offset(skip).limit(limit)
+    if response_format == 'ndjson':
+        return _stream_ndjson(db.get_bind(), query.statement, include_raw)
+    return [_analytics_response(analytics, include_raw) for analytics in query]
+
+
+@router.get("/video/{video_id}/series", response_model=List[AnalyticsSeriesPoint])
+def get_video_series(
+    video_id: str,
+    account_id: int = Query(None),
+    date_from: date = Query(None),
+    date_to: date = Query(None),
+    db: Session = Depends(get_db),
+):
+    """
+    Get a video's metrics per day.
+
+    Scrapes that found nothing changed are stored as one snapshot with
+    last_seen_at; this endpoint expands such runs to one point per day, so
+    the series looks as if every scrape had been stored.
+
+    Query parameters:
+    - account_id: Only this account
+    - date_from: First day (inclusive)
+    - date_to: Last day (inclusive)
+    """
+    video = db.query(Video).filter(Video.video_id == video_id).first()
+    if not video:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Video {video_id} not found"
+        )
+
+    snapshots = db.scalars(_series_query(video_id, account_id, date_from, date_to))
+    return [AnalyticsSeriesPoint(**point) for point in expand_runs(snapshots, date_from, date_to)]
 
 
 @router.get("/account/{account_id}/stats", response_model=AnalyticsStatsResponse)
@@ -185,39 +427,43 @@ def get_account_stats(
             detail=f"Account {account_id} not found"
         )
 
-    query = db.query(VideoAnalytics).filter(VideoAnalytics.account_id == account_id)
-
-    if date_from is not None:
-        query = query.filter(VideoAnalytics.scraped_at >= date_from)
-    if date_to is not None:
-        query = query.filter(VideoAnalytics.scraped_at <= date_to)
-
-    # Get latest analytics for each video (avoid double-counting)
-    latest_analytics = (
-        db.query(VideoAnalytics)
-        .filter(VideoAnalytics.account_id == account_id)
-        .distinct(VideoAnalytics.video_id)
-        .order_by(VideoAnalytics.video_id, VideoAnalytics.scraped_at.desc())
-    )
-
-    if date_from is not None:
-        latest_analytics = latest_analytics.filter(VideoAnalytics.scraped_at >= date_from)
-    if date_to is not None:
-        latest_analytics = latest_analytics.filter(VideoAnalytics.scraped_at <= date_to)
-
-    analytics_list = latest_analytics.all()
-
-    total_videos = len(analytics_list)
-    total_impressions = sum(a.impressions or 0 for a in analytics_list)
-    total_views = sum(a.views or 0 for a in analytics_list)
-    total_watch_time = sum(float(a.watch_time_hours or 0) for a in analytics_list)
+    if date_from is None and date_to is None:
+        # Current state: one row per video in video_analytics_latest
+        latest = VideoAnalyticsLatest.__table__
+        source = select(latest).where(latest.c.account_id == account_id).subquery()
+    else:
+        # Latest snapshot of each video within the date range (avoid double-counting),
+        # ranked in SQL so only the numeric columns leave the database
+        ranked = _filter_scraped_at(
+            db.query(
+                VideoAnalytics.impressions,
+                VideoAnalytics.views,
+                VideoAnalytics.watch_time_hours,
+                VideoAnalytics.ctr_percentage,
+                func.row_number().over(
+                    partition_by=VideoAnalytics.video_id,
+                    order_by=VideoAnalytics.scraped_at.desc(),
+                ).label('position'),
+            ).filter(VideoAnalytics.account_id == account_id),
+            date_from,
+            date_to,
+        ).subquery()
+        source = select(ranked).where(ranked.c.position == 1).subquery()
+
+    total_videos, total_impressions, total_views, total_watch_time, average_ctr = db.execute(
+        select(
+            func.count(),
+            func.coalesce(func.sum(source.c.impressions), 0),
+            func.coalesce(func.sum(source.c.views), 0),
+            func.coalesce(func.sum(source.c.watch_time_hours), 0),
+            func.avg(func.nullif(source.c.ctr_percentage, 0)),
+        )
+    ).one()
+    total_watch_time = float(total_watch_time)
+    average_ctr = float(average_ctr) if average_ctr is not None else None
 
     average_views = total_views / total_videos if total_videos > 0 else 0
 
-    # Calculate average CTR
-    ctr_list = [float(a.ctr_percentage) for a in analytics_list if a.ctr_percentage]
-    average_ctr = sum(ctr_list) / len(ctr_list) if ctr_list else None
-
     return AnalyticsStatsResponse(
         total_videos=total_videos,
         total_impressions=total_impressions,
@@ -230,16 +476,167 @@ def get_account_stats(
     )
 
 
+@router.get("/account/{account_id}/trend", response_model=List[AnalyticsTrendPoint])
+def get_account_trend(
+    account_id: int,
+    date_from: date = Query(None),
+    date_to: date = Query(None),
+    channel_id: int = Query(None, description="Only this channel (0: videos without a channel)"),
+    db: Session = Depends(get_db),
+):
+    """
+    Get per-day totals of an account's snapshots from analytics_daily_rollup.
+
+    Query parameters:
+    - date_from: First day (inclusive)
+    - date_to: Last day (inclusive)
+    - channel_id: Restrict to one channel
+    """
+    account = db.query(Account).filter(Account.id == account_id).first()
+    if not account:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Account {account_id} not found"
+        )
+
+    query = db.query(
+        AnalyticsDailyRollup.day,
+        func.sum(AnalyticsDailyRollup.snapshots),
+        func.sum(AnalyticsDailyRollup.impressions),
+        func.sum(AnalyticsDailyRollup.views),
+        func.sum(AnalyticsDailyRollup.unique_viewers),
+        func.sum(AnalyticsDailyRollup.watch_time_hours),
+        func.sum(AnalyticsDailyRollup.ctr_sum),
+        func.sum(AnalyticsDailyRollup.ctr_count),
+    ).filter(AnalyticsDailyRollup.account_id == account_id)
+    if channel_id is not None:
+        query = query.filter(AnalyticsDailyRollup.channel_id == channel_id)
+    if date_from is not None:
+        query = query.filter(AnalyticsDailyRollup.day >= date_from)
+    if date_to is not None:
+        query = query.filter(AnalyticsDailyRollup.day <= date_to)
+
+    return [
+        AnalyticsTrendPoint(
+            day=day,
+            snapshots=snapshots,
+            impressions=impressions,
+            views=views,
+            unique_viewers=unique_viewers,
+            watch_time_hours=float(watch_time),
+            average_ctr_percentage=float(ctr_sum) / ctr_count if ctr_count else None,
+        )
+        for day, snapshots, impressions, views, unique_viewers, watch_time, ctr_sum, ctr_count
+        in query.group_by(AnalyticsDailyRollup.day).order_by(AnalyticsDailyRollup.day)
+    ]
+
+
+@router.get("/account/{account_id}/traffic-sources", response_model=List[TrafficSourceTotal])
+def get_account_traffic_sources(
+    account_id: int,
+    date_from: date = Query(None),
+    date_to: date = Query(None),
+    db: Session = Depends(get_db),
+):
+    """
+    Get the average share of each traffic source across an account's snapshots.
+
+    Query parameters:
+    - date_from: Filter by scrape date (from)
+    - date_to: Filter by scrape date (to)
+    """
+    account = db.query(Account).filter(Account.id == account_id).first()
+    if not account:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Account {account_id} not found"
+        )
+
+    return db_writer.get_traffic_source_totals(db, account_id=account_id, date_from=date_from, date_to=date_to)
+
+
+@router.get("/account/{account_id}/latest", response_model=List[VideoAnalyticsLatestResponse])
+def get_account_latest_analytics(
+    account_id: int,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+):
+    """Get the current (latest) analytics snapshot of every video of an account."""
+    account = db.query(Account).filter(Account.id == account_id).first()
+    if not account:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Account {account_id} not found"
+        )
+
+    return (
+        db.query(VideoAnalyticsLatest)
+        .filter(VideoAnalyticsLatest.account_id == account_id)
+        .order_by(VideoAnalyticsLatest.views.desc(), VideoAnalyticsLatest.video_id)
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+
+
+@router.get("/export.parquet")
+def export_parquet(
+    table: str = Query('video_analytics'),
+    account_id: int = None,
+    date_from: date = None,
+    date_to: date = None,
+    after_id: int = Query(None, ge=0),
+):
+    """
+    Stream video_analytics or traffic_sources as one Parquet file.
+
+    Rows are read with a server-side cursor and sent row group by row group,
+    so the export is not paged and the API holds one chunk in memory.
+
+    Query parameters:
+    - table: 'video_analytics' or 'traffic_sources'
+    - account_id: Filter by account
+    - date_from: Snapshots scraped on or after this day
+    - date_to: Snapshots scraped on or before this day
+    - after_id: Only snapshots with a higher id (incremental pulls)
+    """
+    if table not in EXPORT_TABLES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"table must be one of {', '.join(EXPORT_TABLES)}"
+        )
+    try:
+        exporter = ParquetExporter()
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=str(e))
+
+    return StreamingResponse(
+        exporter.iter_parquet(table, account_id, date_from, date_to, after_id),
+        media_type=PARQUET_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="{table}.parquet"'},
+    )
+
+
 @router.get("/{analytics_id}", response_model=VideoAnalyticsResponse)
-def get_analytics(analytics_id: int, db: Session = Depends(get_db)):
-    """Get analytics by ID."""
+def get_analytics(
+    analytics_id: int,
+    include_raw: bool = Query(False),
+    db: Session = Depends(get_db),
+):
+    """
+    Get analytics by ID.
+
+    Query parameters:
+    - include_raw: Include raw payloads
+    """
     analytics = db.query(VideoAnalytics).filter(VideoAnalytics.id == analytics_id).first()
     if not analytics:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Analytics {analytics_id} not found"
         )
-    return analytics
+    return _analytics_response(analytics, include_raw)
 
 
 @router.put("/{analytics_id}", response_model=VideoAnalyticsResponse)
@@ -277,7 +674,21 @@ def update_analytics(analytics_id: int, analytics: VideoAnalyticsUpdate, db: Ses
         db_analytics.traffic_sources = analytics.traffic_sources
     if analytics.impressions_data is not None:
         db_analytics.impressions_data = analytics.impressions_data
-
+    if analytics.top_metrics is not None or analytics.impressions_data is not None:
+        db_analytics.metric_values = db_writer.build_metric_values(
+            db_analytics.top_metrics, db_analytics.impressions_data
+        )
+    # Edited values no longer match the scrape, so later scrapes must not extend this snapshot
+    db_analytics.content_hash = None
+
+    db.flush()
+    db_writer.refresh_latest(db, video_ids=[db_analytics.video_id], account_id=db_analytics.account_id)
+    db_writer.rebuild_rollup(
+        db,
+        account_id=db_analytics.account_id,
+        date_from=db_analytics.scraped_at.date(),
+        date_to=(db_analytics.last_seen_at or db_analytics.scraped_at).date(),
+    )
     db.commit()
     db.refresh(db_analytics)
     return db_analytics
@@ -293,6 +704,12 @@ def delete_analytics(analytics_id: int, db: Session = Depends(get_db)):
             detail=f"Analytics {analytics_id} not found"
         )
 
+    video_id, account_id = analytics.video_id, analytics.account_id
+    # Every day of the snapshot's run loses its count
+    first_day, last_day = analytics.scraped_at.date(), (analytics.last_seen_at or analytics.scraped_at).date()
     db.delete(analytics)
+    db.flush()
+    db_writer.refresh_latest(db, video_ids=[video_id], account_id=account_id)
+    db_writer.rebuild_rollup(db, account_id=account_id, date_from=first_day, date_to=last_day)
     db.commit()
     return None
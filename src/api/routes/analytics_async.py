@@ -0,0 +1,395 @@
+"""
+Async API routes for analytics data (served instead of analytics.py when DB_ASYNC=true).
+
+Same paths, parameters and responses as analytics.py. Queries are awaited on
+the async engine, so a request waiting on the database does not hold a
+threadpool worker. Writer helpers that take a sync Session (snapshot writes,
+latest table, daily rollup, traffic source totals) and response serialization
+run through AsyncSession.run_sync(), where relationship loads are still
+possible.
+"""
+
+from typing import List
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from src.api.routes import analytics
+from src.api.routes.analytics import (
+    NDJSON_MEDIA_TYPE, STREAM_BATCH_SIZE,
+    _analytics_response, _filter_metric, _filter_scraped_at, _ndjson_lines, _page_limit, _series_query, _with_raw,
+)
+from src.api.schemas import (
+    VideoAnalyticsCreate,
+    VideoAnalyticsResponse,
+    VideoAnalyticsLatestResponse,
+    VideoAnalyticsUpdate,
+    BulkAnalyticsCreate,
+    AnalyticsStatsResponse,
+    AnalyticsTrendPoint,
+    AnalyticsSeriesPoint,
+    TrafficSourceTotal,
+    AnalyticsEnqueueResponse,
+)
+from src.api.dependencies import get_async_db
+from src.database.change_detection import expand_runs
+from src.database.models import VideoAnalytics, VideoAnalyticsLatest, AnalyticsDailyRollup, Video, Account
+from src.database.writers import db_writer
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+# Queue hand-off only, no database access
+router.post("/enqueue", response_model=AnalyticsEnqueueResponse, status_code=status.HTTP_202_ACCEPTED)(
+    analytics.enqueue_analytics
+)
+# Streams from the sync engine's server-side cursor, iterated in the threadpool
+router.get("/export.parquet")(analytics.export_parquet)
+
+
+async def _serialize(db: AsyncSession, rows: List[VideoAnalytics], include_raw: bool) -> list:
+    """Build response models inside run_sync() so lazy attributes can still load."""
+    return await db.run_sync(lambda session: [_analytics_response(row, include_raw) for row in rows])
+
+
+def _stream_ndjson(bind, statement, include_raw: bool) -> StreamingResponse:
+    """
+    Stream the snapshots of a select as newline-delimited JSON (see analytics._stream_ndjson).
+
+    AsyncSession.stream() keeps a server-side cursor open on the async
+    engine; each batch is serialized inside run_sync().
+    """
+    async def lines():
+        async with AsyncSession(bind) as session:
+            result = await session.stream_scalars(statement.execution_options(yield_per=STREAM_BATCH_SIZE))
+            async for batch in result.partitions():
+                yield await session.run_sync(lambda _: _ndjson_lines(batch, include_raw))
+
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
+
+
+async def _check_account(db: AsyncSession, account_id: int) -> None:
+    """Raise 404 if the account does not exist."""
+    if await db.get(Account, account_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Account {account_id} not found"
+        )
+
+
+async def _get_analytics(db: AsyncSession, analytics_id: int, include_raw: bool = False) -> VideoAnalytics:
+    """Load a snapshot by id (with its raw payload if requested) or raise 404."""
+    query = select(VideoAnalytics).where(VideoAnalytics.id == analytics_id)
+    if include_raw:
+        query = query.options(selectinload(VideoAnalytics.raw))
+    analytics_row = await db.scalar(query)
+    if not analytics_row:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Analytics {analytics_id} not found"
+        )
+    return analytics_row
+
+
+async def _save_and_load(db: AsyncSession, records: List[VideoAnalyticsCreate]) -> list:
+    """Save records through analytics._save_snapshots(), commit and serialize the stored snapshots."""
+    stored = await db.run_sync(lambda session: analytics._save_snapshots(session, records))
+    await db.commit()
+    return await db.run_sync(
+        lambda session: [_analytics_response(row, True) for row in analytics._load_snapshots(session, stored)]
+    )
+
+
+@router.get("", response_model=List[VideoAnalyticsResponse])
+async def list_analytics(
+    account_id: int = Query(None),
+    video_id: str = Query(None),
+    date_from: date = Query(None),
+    date_to: date = Query(None),
+    metric: str = Query(None, max_length=100, description="Metric label, e.g. Impressions"),
+    gte: float = Query(None, description="Minimum metric value"),
+    lte: float = Query(None, description="Maximum metric value"),
+    include_raw: bool = Query(False),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(None, ge=1, description="Page size (json: default 100, max 1000; ndjson: unlimited)"),
+    response_format: str = Query('json', alias='format', description="json or ndjson"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """List analytics with optional filters (see analytics.list_analytics)."""
+    limit = _page_limit(response_format, limit)
+    query = _with_raw(select(VideoAnalytics), include_raw)
+
+    if account_id is not None:
+        query = query.where(VideoAnalytics.account_id == account_id)
+    if video_id is not None:
+        query = query.where(VideoAnalytics.video_id == video_id)
+    query = _filter_scraped_at(query, date_from, date_to)
+    query = _filter_metric(query, metric, gte, lte)
+
+    query = query.order_by(VideoAnalytics.scraped_at.desc()).offset(skip).limit(limit)
+    if response_format == 'ndjson':
+        return _stream_ndjson(db.bind, query, include_raw)
+    rows = (await db.scalars(query)).all()
+    return await _serialize(db, rows, include_raw)
+
+
+@router.post("", response_model=VideoAnalyticsResponse, status_code=status.HTTP_201_CREATED)
+async def create_analytics(analytics_data: VideoAnalyticsCreate, db: AsyncSession = Depends(get_async_db)):
+    """Create new analytics record (see analytics.create_analytics)."""
+    await _check_account(db, analytics_data.account_id)
+    return (await _save_and_load(db, [analytics_data]))[0]
+
+
+@router.post("/bulk", response_model=List[VideoAnalyticsResponse], status_code=status.HTTP_201_CREATED)
+async def bulk_create_analytics(bulk: BulkAnalyticsCreate, db: AsyncSession = Depends(get_async_db)):
+    """Bulk create analytics records (see analytics.bulk_create_analytics)."""
+    account_ids = {analytics_data.account_id for analytics_data in bulk.analytics}
+    known_accounts = set((await db.scalars(select(Account.id).where(Account.id.in_(account_ids)))).all())
+
+    return await _save_and_load(
+        db, [analytics_data for analytics_data in bulk.analytics if analytics_data.account_id in known_accounts]
+    )
+
+
+@router.get("/video/{video_id}", response_model=List[VideoAnalyticsResponse])
+async def get_video_analytics(
+    video_id: str,
+    date_from: date = Query(None),
+    date_to: date = Query(None),
+    include_raw: bool = Query(False),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(None, ge=1, description="Page size (json: default 100, max 1000; ndjson: unlimited)"),
+    response_format: str = Query('json', alias='format', description="json or ndjson"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Get all analytics records for a specific video (see analytics.get_video_analytics)."""
+    limit = _page_limit(response_format, limit)
+    if await db.scalar(select(Video.id).where(Video.video_id == video_id)) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Video {video_id} not found"
+        )
+
+    query = _filter_scraped_at(
+        _with_raw(select(VideoAnalytics), include_raw).where(VideoAnalytics.video_id == video_id),
+        date_from,
+        date_to,
+    )
+    query = query.order_by(VideoAnalytics.scraped_at.desc()).offset(skip).limit(limit)
+    if response_format == 'ndjson':
+        return _stream_ndjson(db.bind, query, include_raw)
+    rows = (await db.scalars(query)).all()
+    return await _serialize(db, rows, include_raw)
+
+
+@router.get("/video/{video_id}/series", response_model=List[AnalyticsSeriesPoint])
+async def get_video_series(
+    video_id: str,
+    account_id: int = Query(None),
+    date_from: date = Query(None),
+    date_to: date = Query(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Get a video's metrics per day, runs of unchanged scrapes expanded (see analytics.get_video_series)."""
+    if await db.scalar(select(Video.id).where(Video.video_id == video_id)) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Video {video_id} not found"
+        )
+
+    snapshots = (await db.scalars(_series_query(video_id, account_id, date_from, date_to))).all()
+    return [AnalyticsSeriesPoint(**point) for point in expand_runs(snapshots, date_from, date_to)]
+
+
+@router.get("/account/{account_id}/stats", response_model=AnalyticsStatsResponse)
+async def get_account_stats(
+    account_id: int,
+    date_from: date = Query(None),
+    date_to: date = Query(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Get aggregated statistics for an account (see analytics.get_account_stats)."""
+    await _check_account(db, account_id)
+
+    if date_from is None and date_to is None:
+        latest = VideoAnalyticsLatest.__table__
+        source = select(latest).where(latest.c.account_id == account_id).subquery()
+    else:
+        ranked = _filter_scraped_at(
+            select(
+                VideoAnalytics.impressions,
+                VideoAnalytics.views,
+                VideoAnalytics.watch_time_hours,
+                VideoAnalytics.ctr_percentage,
+                func.row_number().over(
+                    partition_by=VideoAnalytics.video_id,
+                    order_by=VideoAnalytics.scraped_at.desc(),
+                ).label('position'),
+            ).where(VideoAnalytics.account_id == account_id),
+            date_from,
+            date_to,
+        ).subquery()
+        source = select(ranked).where(ranked.c.position == 1).subquery()
+
+    total_videos, total_impressions, total_views, total_watch_time, average_ctr = (await db.execute(
+        select(
+            func.count(),
+            func.coalesce(func.sum(source.c.impressions), 0),
+            func.coalesce(func.sum(source.c.views), 0),
+            func.coalesce(func.sum(source.c.watch_time_hours), 0),
+            func.avg(func.nullif(source.c.ctr_percentage, 0)),
+        )
+    )).one()
+
+    return AnalyticsStatsResponse(
+        total_videos=total_videos,
+        total_impressions=total_impressions,
+        total_views=total_views,
+        total_watch_time_hours=float(total_watch_time),
+        average_ctr_percentage=float(average_ctr) if average_ctr is not None else None,
+        average_views_per_video=total_views / total_videos if total_videos > 0 else 0,
+        date_from=date_from,
+        date_to=date_to,
+    )
+
+
+@router.get("/account/{account_id}/trend", response_model=List[AnalyticsTrendPoint])
+async def get_account_trend(
+    account_id: int,
+    date_from: date = Query(None),
+    date_to: date = Query(None),
+    channel_id: int = Query(None, description="Only this channel (0: videos without a channel)"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Get per-day totals of an account's snapshots from analytics_daily_rollup."""
+    await _check_account(db, account_id)
+
+    query = select(
+        AnalyticsDailyRollup.day,
+        func.sum(AnalyticsDailyRollup.snapshots),
+        func.sum(AnalyticsDailyRollup.impressions),
+        func.sum(AnalyticsDailyRollup.views),
+        func.sum(AnalyticsDailyRollup.unique_viewers),
+        func.sum(AnalyticsDailyRollup.watch_time_hours),
+        func.sum(AnalyticsDailyRollup.ctr_sum),
+        func.sum(AnalyticsDailyRollup.ctr_count),
+    ).where(AnalyticsDailyRollup.account_id == account_id)
+    if channel_id is not None:
+        query = query.where(AnalyticsDailyRollup.channel_id == channel_id)
+    if date_from is not None:
+        query = query.where(AnalyticsDailyRollup.day >= date_from)
+    if date_to is not None:
+        query = query.where(AnalyticsDailyRollup.day <= date_to)
+
+    result = await db.execute(query.group_by(AnalyticsDailyRollup.day).order_by(AnalyticsDailyRollup.day))
+    return [
+        AnalyticsTrendPoint(
+            day=day,
+            snapshots=snapshots,
+            impressions=impressions,
+            views=views,
+            unique_viewers=unique_viewers,
+            watch_time_hours=float(watch_time),
+            average_ctr_percentage=float(ctr_sum) / ctr_count if ctr_count else None,
+        )
+        for day, snapshots, impressions, views, unique_viewers, watch_time, ctr_sum, ctr_count in result
+    ]
+
+
+@router.get("/account/{account_id}/traffic-sources", response_model=List[TrafficSourceTotal])
+async def get_account_traffic_sources(
+    account_id: int,
+    date_from: date = Query(None),
+    date_to: date = Query(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Get the average share of each traffic source across an account's snapshots."""
+    await _check_account(db, account_id)
+
+    return await db.run_sync(
+        lambda session: db_writer.get_traffic_source_totals(
+            session, account_id=account_id, date_from=date_from, date_to=date_to
+        )
+    )
+
+
+@router.get("/account/{account_id}/latest", response_model=List[VideoAnalyticsLatestResponse])
+async def get_account_latest_analytics(
+    account_id: int,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Get the current (latest) analytics snapshot of every video of an account."""
+    await _check_account(db, account_id)
+
+    return (await db.scalars(
+        select(VideoAnalyticsLatest)
+        .where(VideoAnalyticsLatest.account_id == account_id)
+        .order_by(VideoAnalyticsLatest.views.desc(), VideoAnalyticsLatest.video_id)
+        .offset(skip)
+        .limit(limit)
+    )).all()
+
+
+@router.get("/{analytics_id}", response_model=VideoAnalyticsResponse)
+async def get_analytics(
+    analytics_id: int,
+    include_raw: bool = Query(False),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Get analytics by ID."""
+    analytics_row = await _get_analytics(db, analytics_id, include_raw)
+    return (await _serialize(db, [analytics_row], include_raw))[0]
+
+
+@router.put("/{analytics_id}", response_model=VideoAnalyticsResponse)
+async def update_analytics(
+    analytics_id: int,
+    analytics_data: VideoAnalyticsUpdate,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Update analytics record."""
+    db_analytics = await _get_analytics(db, analytics_id, include_raw=True)
+
+    # Update provided fields
+    for field, value in analytics_data.model_dump(exclude_none=True).items():
+        setattr(db_analytics, field, value)
+    if analytics_data.top_metrics is not None or analytics_data.impressions_data is not None:
+        db_analytics.metric_values = db_writer.build_metric_values(
+            db_analytics.top_metrics, db_analytics.impressions_data
+        )
+    # Edited values no longer match the scrape, so later scrapes must not extend this snapshot
+    db_analytics.content_hash = None
+
+    await db.flush()
+    video_id, account_id = db_analytics.video_id, db_analytics.account_id
+    first_day, last_day = db_analytics.scraped_at.date(), (db_analytics.last_seen_at or db_analytics.scraped_at).date()
+    await db.run_sync(lambda session: db_writer.refresh_latest(session, video_ids=[video_id], account_id=account_id))
+    await db.run_sync(
+        lambda session: db_writer.rebuild_rollup(session, account_id=account_id, date_from=first_day, date_to=last_day)
+    )
+    await db.commit()
+    await db.refresh(db_analytics)
+    return (await _serialize(db, [db_analytics], True))[0]
+
+
+@router.delete("/{analytics_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_analytics(analytics_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Delete analytics record."""
+    analytics_row = await _get_analytics(db, analytics_id)
+
+    video_id, account_id = analytics_row.video_id, analytics_row.account_id
+    # Every day of the snapshot's run loses its count
+    first_day, last_day = analytics_row.scraped_at.date(), (analytics_row.last_seen_at or analytics_row.scraped_at).date()
+    await db.delete(analytics_row)
+    await db.flush()
+    await db.run_sync(lambda session: db_writer.refresh_latest(session, video_ids=[video_id], account_id=account_id))
+    await db.run_sync(
+        lambda session: db_writer.rebuild_rollup(session, account_id=account_id, date_from=first_day, date_to=last_day)
+    )
+    await db.commit()
+    return None
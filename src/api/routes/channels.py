@@ -7,11 +7,21 @@ from sqlalchemy.orm import Session
 
 from src.api.schemas import ChannelCreate, ChannelResponse, ChannelUpdate
 from src.api.dependencies import get_db
+from src.database.identity_cache import CHANNEL, VIDEO
 from src.database.models import Channel, Account
+from src.database.writers import db_writer
 
 router = APIRouter(prefix="/channels", tags=["channels"])
 
 
+def _url_taken(db: Session, account_id: int, url: str, exclude_id: int = None) -> bool:
+    """Check whether the account already has a channel with this URL (uq_account_channel_url)."""
+    query = db.query(Channel.id).filter(Channel.account_id == account_id, Channel.url == url)
+    if exclude_id is not None:
+        query = query.filter(Channel.id != exclude_id)
+    return query.first() is not None
+
+
 @router.get("", response_model=List[ChannelResponse])
 def list_channels(account_id: int = None, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
     """List channels with optional account filter."""
@@ -32,6 +42,12 @@ def create_channel(channel: ChannelCreate, db: Session = Depends(get_db)):
             detail=f"Account {channel.account_id} not found"
         )
 
+    if _url_taken(db, channel.account_id, channel.url):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Channel '{channel.url}' already exists for account {channel.account_id}"
+        )
+
     db_channel = Channel(
         account_id=channel.account_id,
         url=channel.url,
@@ -67,6 +83,12 @@ def update_channel(channel_id: int, channel: ChannelUpdate, db: Session = Depend
         )
 
     if channel.url is not None:
+        if _url_taken(db, db_channel.account_id, channel.url, exclude_id=channel_id):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Channel '{channel.url}' already exists for account {db_channel.account_id}"
+            )
+        db_writer.identity_cache.invalidate(CHANNEL, (db_channel.account_id, db_channel.url))
         db_channel.url = channel.url
     if channel.channel_id is not None:
         db_channel.channel_id = channel.channel_id
@@ -88,6 +110,10 @@ def delete_channel(channel_id: int, db: Session = Depends(get_db)):
             detail=f"Channel {channel_id} not found"
         )
 
+    cache_key = (channel.account_id, channel.url)
     db.delete(channel)
     db.commit()
+    # Videos of the channel are deleted with it
+    db_writer.identity_cache.invalidate(CHANNEL, cache_key)
+    db_writer.identity_cache.invalidate(VIDEO)
     return None
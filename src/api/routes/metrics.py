@@ -0,0 +1,86 @@
+"""API routes for scraper runtime metrics."""
+
+from collections import deque
+from threading import Lock
+
+from fastapi import APIRouter, HTTPException, status, Query
+
+from src.api.schemas import PhaseMetricsReport, PhaseMetricsSummary
+from src.database.compaction import get_compactor
+from src.database.connection import db
+from src.database.write_behind import get_write_behind_writer
+from src.database.writers import db_writer
+from src.utils.phase_metrics import PhaseMetrics
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+# Phase histograms pushed by scraper runs, aggregated in memory for this API process
+_phase_store = PhaseMetrics()
+_recent_runs = deque(maxlen=50)
+_runs = {"count": 0}
+_lock = Lock()
+
+
+@router.post("/phases", status_code=status.HTTP_202_ACCEPTED)
+def ingest_phase_metrics(report: PhaseMetricsReport):
+    """Accept a per-phase timing snapshot from a scraper run."""
+    snapshot = report.model_dump(mode="json")
+    try:
+        _phase_store.merge(snapshot)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    with _lock:
+        _recent_runs.append(snapshot)
+        _runs["count"] += 1
+    return {"accepted": True, "phases": len(report.phases)}
+
+
+@router.get("/phases", response_model=PhaseMetricsSummary)
+def get_phase_metrics(recent: int = Query(10, ge=0, le=50)):
+    """
+    Get per-phase duration histograms aggregated across all pushed runs.
+
+    Query parameters:
+    - recent: Number of most recent run snapshots to include
+    """
+    with _lock:
+        runs = _runs["count"]
+        recent_runs = list(_recent_runs)[-recent:] if recent else []
+    return {
+        "runs": runs,
+        "phases": _phase_store.snapshot()["phases"],
+        "recent_runs": recent_runs,
+    }
+
+
+@router.get("/write-behind")
+def get_write_behind_metrics():
+    """Get write-behind queue depth, throughput and flush latency."""
+    return get_write_behind_writer().get_metrics()
+
+
+@router.get("/compaction")
+def get_compaction_metrics():
+    """Get the snapshot compaction schedule and the rows/bytes reclaimed by the last run."""
+    return get_compactor().get_status()
+
+
+@router.get("/identity-cache")
+def get_identity_cache_metrics():
+    """Get size and hit rate of the writer's account/channel/video id cache."""
+    return db_writer.identity_cache.stats()
+
+
+@router.get("/pool")
+def get_pool_metrics():
+    """Get this process's pool profile, checkout wait, connections in use, overflow and pre-ping cost."""
+    return db.get_pool_metrics()
+
+
+@router.delete("/phases", status_code=status.HTTP_204_NO_CONTENT)
+def reset_phase_metrics():
+    """Clear aggregated phase metrics."""
+    _phase_store.reset()
+    with _lock:
+        _recent_runs.clear()
+        _runs["count"] = 0
@@ -7,7 +7,10 @@ from sqlalchemy.orm import Session
 
 from src.api.schemas import VideoCreate, VideoResponse, VideoUpdate, BulkVideoCreate
 from src.api.dependencies import get_db
+from src.database.identity_cache import VIDEO
 from src.database.models import Video, Channel
+from src.database.upsert import upsert_videos
+from src.database.writers import db_writer
 
 router = APIRouter(prefix="/videos", tags=["videos"])
 
@@ -23,12 +26,7 @@ def list_videos(channel_id: int = None, skip: int = 0, limit: int = 100, db: Ses
 
 @router.post("", response_model=VideoResponse, status_code=status.HTTP_201_CREATED)
 def create_video(video: VideoCreate, db: Session = Depends(get_db)):
-    """Create a new video."""
-    # Check if video already exists
-    existing = db.query(Video).filter(Video.video_id == video.video_id).first()
-    if existing:
-        return existing  # Return existing if already present
-
+    """Create a new video (an existing video is returned unchanged)."""
     # Verify channel exists if provided
     if video.channel_id is not None:
         channel = db.query(Channel).filter(Channel.id == video.channel_id).first()
@@ -38,16 +36,14 @@ def create_video(video: VideoCreate, db: Session = Depends(get_db)):
                 detail=f"Channel {video.channel_id} not found"
             )
 
-    db_video = Video(
-        video_id=video.video_id,
-        channel_id=video.channel_id,
-        title=video.title,
-        publish_date=video.publish_date
-    )
-    db.add(db_video)
+    ids, _ = upsert_videos(db, [{
+        'video_id': video.video_id,
+        'channel_id': video.channel_id,
+        'title': video.title,
+        'publish_date': video.publish_date,
+    }])
     db.commit()
-    db.refresh(db_video)
-    return db_video
+    return db.get(Video, ids[video.video_id])
 
 
 @router.post("/bulk", response_model=List[VideoResponse], status_code=status.HTTP_201_CREATED)
@@ -62,26 +58,13 @@ def bulk_create_videos(bulk_create: BulkVideoCreate, db: Session = Depends(get_d
                 detail=f"Channel {bulk_create.channel_id} not found"
             )
 
-    created_videos = []
-    for video_id in bulk_create.video_ids:
-        # Check if video already exists
-        existing = db.query(Video).filter(Video.video_id == video_id).first()
-        if existing:
-            created_videos.append(existing)
-            continue
-
-        db_video = Video(
-            video_id=video_id,
-            channel_id=bulk_create.channel_id
-        )
-        db.add(db_video)
-        created_videos.append(db_video)
-
+    # Existing videos are kept as they are
+    ids, _ = upsert_videos(db, [
+        {'video_id': video_id, 'channel_id': bulk_create.channel_id} for video_id in bulk_create.video_ids
+    ])
     db.commit()
-    for video in created_videos:
-        db.refresh(video)
-
-    return created_videos
+    videos = {video.id: video for video in db.query(Video).filter(Video.id.in_(ids.values()))}
+    return [videos[ids[video_id]] for video_id in bulk_create.video_ids]
 
 
 @router.get("/{video_id}", response_model=VideoResponse)
@@ -128,4 +111,5 @@ def delete_video(video_id: str, db: Session = Depends(get_db)):
 
     db.delete(video)
     db.commit()
+    db_writer.identity_cache.invalidate(VIDEO, video_id)
     return None
@@ -0,0 +1,106 @@
+"""Async API routes for video management (served instead of videos.py when DB_ASYNC=true)."""
+
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.api.schemas import VideoCreate, VideoResponse, VideoUpdate, BulkVideoCreate
+from src.api.dependencies import get_async_db
+from src.database.identity_cache import VIDEO
+from src.database.models import Video, Channel
+from src.database.upsert import upsert_videos
+from src.database.writers import db_writer
+
+router = APIRouter(prefix="/videos", tags=["videos"])
+
+
+async def _get_video(db: AsyncSession, video_id: str) -> Video:
+    """Load a video by YouTube ID or raise 404."""
+    video = await db.scalar(select(Video).where(Video.video_id == video_id))
+    if not video:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Video {video_id} not found"
+        )
+    return video
+
+
+async def _check_channel(db: AsyncSession, channel_id: int) -> None:
+    """Raise 404 if a channel id was given but does not exist."""
+    if channel_id is not None and await db.get(Channel, channel_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Channel {channel_id} not found"
+        )
+
+
+@router.get("", response_model=List[VideoResponse])
+async def list_videos(channel_id: int = None, skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_async_db)):
+    """List videos with optional channel filter."""
+    query = select(Video)
+    if channel_id is not None:
+        query = query.where(Video.channel_id == channel_id)
+    return (await db.scalars(query.offset(skip).limit(limit))).all()
+
+
+@router.post("", response_model=VideoResponse, status_code=status.HTTP_201_CREATED)
+async def create_video(video: VideoCreate, db: AsyncSession = Depends(get_async_db)):
+    """Create a new video (an existing video is returned unchanged)."""
+    await _check_channel(db, video.channel_id)
+
+    ids, _ = await db.run_sync(lambda session: upsert_videos(session, [{
+        'video_id': video.video_id,
+        'channel_id': video.channel_id,
+        'title': video.title,
+        'publish_date': video.publish_date,
+    }]))
+    await db.commit()
+    return await db.get(Video, ids[video.video_id])
+
+
+@router.post("/bulk", response_model=List[VideoResponse], status_code=status.HTTP_201_CREATED)
+async def bulk_create_videos(bulk_create: BulkVideoCreate, db: AsyncSession = Depends(get_async_db)):
+    """Bulk create videos for a channel."""
+    await _check_channel(db, bulk_create.channel_id)
+
+    # Existing videos are kept as they are
+    ids, _ = await db.run_sync(lambda session: upsert_videos(session, [
+        {'video_id': video_id, 'channel_id': bulk_create.channel_id} for video_id in bulk_create.video_ids
+    ]))
+    await db.commit()
+    videos = {video.id: video for video in await db.scalars(select(Video).where(Video.id.in_(ids.values())))}
+    return [videos[ids[video_id]] for video_id in bulk_create.video_ids]
+
+
+@router.get("/{video_id}", response_model=VideoResponse)
+async def get_video(video_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Get video by video ID (YouTube ID)."""
+    return await _get_video(db, video_id)
+
+
+@router.put("/{video_id}", response_model=VideoResponse)
+async def update_video(video_id: str, video: VideoUpdate, db: AsyncSession = Depends(get_async_db)):
+    """Update a video."""
+    db_video = await _get_video(db, video_id)
+
+    if video.title is not None:
+        db_video.title = video.title
+    if video.publish_date is not None:
+        db_video.publish_date = video.publish_date
+
+    await db.commit()
+    await db.refresh(db_video)
+    return db_video
+
+
+@router.delete("/{video_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_video(video_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Delete a video."""
+    video = await _get_video(db, video_id)
+
+    await db.delete(video)
+    await db.commit()
+    db_writer.identity_cache.invalidate(VIDEO, video_id)
+    return None
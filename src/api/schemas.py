@@ -3,7 +3,7 @@
 from datetime import datetime, date
 from typing import Optional, List, Dict, Any
 
-from pydantic import BaseModel, Field
+from pydantic import AliasChoices, BaseModel, Field
 
 
 # ==================== Account Schemas ====================
@@ -126,11 +126,12 @@ class TrafficSourceCreate(TrafficSourceBase):
 
 
 class TrafficSourceResponse(TrafficSourceBase):
-    """Schema for traffic source response."""
+    """Schema for traffic source response (id and created_at are null in the wide layout)."""
 
-    id: int
+    id: Optional[int] = None
     analytics_id: int
-    created_at: datetime
+    source_type_id: int
+    created_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -138,8 +139,8 @@ class TrafficSourceResponse(TrafficSourceBase):
 
 # ==================== Analytics Schemas ====================
 
-class VideoAnalyticsBase(BaseModel):
-    """Base analytics schema."""
+class VideoAnalyticsMetrics(BaseModel):
+    """Numeric analytics columns (stored in video_analytics)."""
 
     impressions: Optional[int] = None
     views: Optional[int] = None
@@ -151,6 +152,11 @@ class VideoAnalyticsBase(BaseModel):
     avg_view_duration_seconds: Optional[int] = None
     watch_time_hours: Optional[float] = None
     publish_start_date: Optional[date] = None
+
+
+class VideoAnalyticsBase(VideoAnalyticsMetrics):
+    """Base analytics schema."""
+
     top_metrics: Optional[Dict[str, Any]] = None
     traffic_sources: Optional[Dict[str, Any]] = None
     impressions_data: Optional[Dict[str, Any]] = None
@@ -181,6 +187,23 @@ class VideoAnalyticsUpdate(BaseModel):
     impressions_data: Optional[Dict[str, Any]] = None
 
 
+class VideoAnalyticsSummaryResponse(VideoAnalyticsMetrics):
+    """Schema for analytics response without raw payloads (video_analytics_raw is not read)."""
+
+    id: int
+    video_id: str
+    account_id: int
+    scraped_at: datetime
+    last_seen_at: Optional[datetime] = None
+    observed_count: int = 1
+    traffic_sources_breakdown: List[TrafficSourceResponse] = Field(
+        default=[], validation_alias=AliasChoices('traffic_breakdown', 'traffic_sources_breakdown')
+    )
+
+    class Config:
+        from_attributes = True
+
+
 class VideoAnalyticsResponse(VideoAnalyticsBase):
     """Schema for analytics response."""
 
@@ -188,7 +211,35 @@ class VideoAnalyticsResponse(VideoAnalyticsBase):
     video_id: str
     account_id: int
     scraped_at: datetime
-    traffic_sources_breakdown: List[TrafficSourceResponse] = []
+    last_seen_at: Optional[datetime] = None
+    observed_count: int = 1
+    metric_values: Optional[Dict[str, float]] = None
+    traffic_sources_breakdown: List[TrafficSourceResponse] = Field(
+        default=[], validation_alias=AliasChoices('traffic_breakdown', 'traffic_sources_breakdown')
+    )
+
+    class Config:
+        from_attributes = True
+
+
+class VideoAnalyticsLatestResponse(BaseModel):
+    """Schema for the current (latest) analytics snapshot of a video."""
+
+    video_id: str
+    account_id: int
+    analytics_id: int
+    scraped_at: datetime
+    last_seen_at: Optional[datetime] = None
+    impressions: Optional[int] = None
+    views: Optional[int] = None
+    unique_viewers: Optional[int] = None
+    ctr_percentage: Optional[float] = None
+    views_from_impressions: Optional[int] = None
+    youtube_recommending_percentage: Optional[float] = None
+    ctr_from_impressions_percentage: Optional[float] = None
+    avg_view_duration_seconds: Optional[int] = None
+    watch_time_hours: Optional[float] = None
+    publish_start_date: Optional[date] = None
 
     class Config:
         from_attributes = True
@@ -209,6 +260,48 @@ class AnalyticsStatsResponse(BaseModel):
     date_to: Optional[date] = None
 
 
+class AnalyticsTrendPoint(BaseModel):
+    """Schema for one day of an account's analytics trend."""
+
+    day: date
+    snapshots: int
+    impressions: int
+    views: int
+    unique_viewers: int
+    watch_time_hours: float
+    average_ctr_percentage: Optional[float] = None
+
+
+class AnalyticsSeriesPoint(BaseModel):
+    """Schema for one day of a video's metrics, with runs of unchanged scrapes expanded."""
+
+    day: date
+    video_id: str
+    account_id: int
+    analytics_id: int
+    scraped_at: datetime
+    observed: bool = Field(description="False for days in the middle of a run of unchanged scrapes")
+    impressions: Optional[int] = None
+    views: Optional[int] = None
+    unique_viewers: Optional[int] = None
+    ctr_percentage: Optional[float] = None
+    views_from_impressions: Optional[int] = None
+    youtube_recommending_percentage: Optional[float] = None
+    ctr_from_impressions_percentage: Optional[float] = None
+    avg_view_duration_seconds: Optional[int] = None
+    watch_time_hours: Optional[float] = None
+    publish_start_date: Optional[date] = None
+
+
+class TrafficSourceTotal(BaseModel):
+    """Schema for the average share of one traffic source across snapshots."""
+
+    source_type_id: int
+    source_name: Optional[str] = None
+    snapshots: int
+    average_percentage: Optional[float] = None
+
+
 class AnalyticsFilterParams(BaseModel):
     """Schema for analytics filtering parameters."""
 
@@ -256,6 +349,55 @@ class BulkAnalyticsCreate(BaseModel):
     analytics: List[VideoAnalyticsCreate]
 
 
+class AnalyticsEnqueueRequest(BaseModel):
+    """Schema for queueing raw scraper results for write-behind saving."""
+
+    account_name: str = Field(..., min_length=1, max_length=255)
+    channel_url: Optional[str] = Field(None, max_length=500)
+    records: List[Dict[str, Any]] = Field(..., min_items=1, description="Scraper result dictionaries")
+
+
+class AnalyticsEnqueueResponse(BaseModel):
+    """Schema for write-behind enqueue result."""
+
+    accepted: int
+    rejected: int
+    queue_depth: int
+
+
+# ==================== Metrics Schemas ====================
+
+class PhaseHistogramSchema(BaseModel):
+    """Schema for one scraping phase's duration histogram."""
+
+    count: int = Field(..., ge=0)
+    total_seconds: float = Field(..., ge=0)
+    avg_seconds: float = 0.0
+    min_seconds: Optional[float] = None
+    max_seconds: float = 0.0
+    buckets: List[float] = Field(..., description="Bucket upper bounds in seconds")
+    counts: List[int] = Field(..., description="Samples per bucket, last entry is overflow")
+    outcomes: Dict[str, int] = {}
+    share: Optional[float] = None
+
+
+class PhaseMetricsReport(BaseModel):
+    """Schema for a per-phase timing snapshot pushed by a scraper run."""
+
+    account_name: Optional[str] = None
+    started_at: Optional[datetime] = None
+    exported_at: Optional[datetime] = None
+    phases: Dict[str, PhaseHistogramSchema]
+
+
+class PhaseMetricsSummary(BaseModel):
+    """Schema for phase metrics aggregated across pushed runs."""
+
+    runs: int
+    phases: Dict[str, PhaseHistogramSchema]
+    recent_runs: List[PhaseMetricsReport] = []
+
+
 # ==================== Response Schemas ====================
 
 class APIResponse(BaseModel):
@@ -8,7 +8,13 @@ from src.database.models import (
     Channel,
     Video,
     VideoAnalytics,
+    VideoAnalyticsRaw,
+    VideoAnalyticsObservation,
+    VideoAnalyticsLatest,
+    AnalyticsDailyRollup,
     TrafficSource,
+    TrafficSourceType,
+    TrafficSourceBreakdown,
     ScrapingHistory,
 )
 
@@ -22,6 +28,12 @@ __all__ = [
     'Channel',
     'Video',
     'VideoAnalytics',
+    'VideoAnalyticsRaw',
+    'VideoAnalyticsObservation',
+    'VideoAnalyticsLatest',
+    'AnalyticsDailyRollup',
     'TrafficSource',
+    'TrafficSourceType',
+    'TrafficSourceBreakdown',
     'ScrapingHistory',
 ]
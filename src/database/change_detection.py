@@ -0,0 +1,124 @@
+"""Change detection for analytics snapshots: content hashes and runs of unchanged scrapes."""
+
+import hashlib
+import json
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import inspect, text
+
+from src.database.connection import DatabaseConnection, db
+from src.database.models import VideoAnalytics, VideoAnalyticsLatest
+
+# Snapshot columns covered by the content hash (with metric_values and traffic sources)
+HASHED_COLUMNS = (
+    'impressions', 'views', 'unique_viewers', 'ctr_percentage', 'views_from_impressions',
+    'youtube_recommending_percentage', 'ctr_from_impressions_percentage', 'avg_view_duration_seconds',
+    'watch_time_hours', 'publish_start_date',
+)
+
+# Columns added to tables created before change detection existed
+CHANGE_DETECTION_COLUMNS = {
+    VideoAnalytics.__table__: ('content_hash', 'last_seen_at', 'observed_count'),
+    VideoAnalyticsLatest.__table__: ('content_hash', 'last_seen_at'),
+}
+
+
+def prepare_change_detection(db_connection: DatabaseConnection = None) -> None:
+    """
+    Add content_hash, last_seen_at and observed_count to existing snapshot tables.
+
+    Existing snapshots keep a NULL hash, so the first scrape of each video
+    after the upgrade is stored in full and later unchanged scrapes extend it.
+    """
+    connection = db_connection or db
+    inspector = inspect(connection.engine)
+    for table, column_names in CHANGE_DETECTION_COLUMNS.items():
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for name in column_names:
+            if name in existing:
+                continue
+            column = table.c[name]
+            definition = column.type.compile(dialect=connection.engine.dialect)
+            if column.server_default is not None:
+                definition += f' NOT NULL DEFAULT {column.server_default.arg}'
+            with connection.engine.begin() as conn:
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {name} {definition}'))
+            print(f"✓ Added {table.name}.{name}")
+
+
+def content_hash(row: Dict[str, Any], traffic_rows: Iterable[Dict[str, Any]]) -> str:
+    """
+    Hash the normalized metric set of a snapshot.
+
+    Covers the parsed metric columns, metric_values and the parsed traffic
+    source shares; display strings and page_text are left out, so a scrape
+    that only differs in formatting or page chrome hashes the same.
+
+    Args:
+        row: build_analytics_row() output
+        traffic_rows: build_traffic_source_rows() output
+
+    Returns:
+        32 hex digit digest
+    """
+    normalized = {
+        'columns': [None if row.get(column) is None else str(row[column]) for column in HASHED_COLUMNS],
+        'metrics': sorted((row.get('metric_values') or {}).items()),
+        'traffic': sorted((source['source_name'], str(source['percentage'])) for source in traffic_rows),
+    }
+    payload = json.dumps(normalized, separators=(',', ':'), default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+def run_days(scraped_at: datetime, last_seen_at: Optional[datetime]) -> List[date]:
+    """Days a snapshot stands for: from its scrape to the last unchanged scrape."""
+    first = scraped_at.date()
+    last = (last_seen_at or scraped_at).date()
+    return [first + timedelta(days=offset) for offset in range((last - first).days + 1)]
+
+
+def expand_runs(
+    snapshots: Iterable[Any],
+    date_from: date = None,
+    date_to: date = None,
+) -> List[Dict[str, Any]]:
+    """
+    Expand stored snapshots into one point per video, account and day.
+
+    A run (a snapshot plus the unchanged scrapes folded into it) yields a
+    point for every day between scraped_at and last_seen_at. When several
+    snapshots cover a day, the latest scrape wins.
+
+    Args:
+        snapshots: VideoAnalytics objects or dicts with their column values
+        date_from: First day to return (inclusive)
+        date_to: Last day to return (inclusive)
+
+    Returns:
+        Points ordered by video, account and day, each with 'day',
+        'analytics_id', 'observed' (False for days filled in from a run)
+        and the snapshot's metric columns
+    """
+    points: Dict[tuple, Dict[str, Any]] = {}
+    for snapshot in snapshots:
+        values = snapshot if isinstance(snapshot, dict) else {
+            column.name: getattr(snapshot, column.name) for column in VideoAnalytics.__table__.columns
+        }
+        days = run_days(values['scraped_at'], values.get('last_seen_at'))
+        for day in days:
+            if (date_from is not None and day < date_from) or (date_to is not None and day > date_to):
+                continue
+            key = (values['video_id'], values['account_id'], day)
+            if key in points and points[key]['scraped_at'] > values['scraped_at']:
+                continue
+            points[key] = {
+                'day': day,
+                'video_id': values['video_id'],
+                'account_id': values['account_id'],
+                'analytics_id': values['id'],
+                'scraped_at': values['scraped_at'],
+                'observed': day in (days[0], days[-1]),
+                **{column: values.get(column) for column in HASHED_COLUMNS},
+            }
+    return [points[key] for key in sorted(points)]
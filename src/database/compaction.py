@@ -0,0 +1,287 @@
+"""Retention and downsampling of video_analytics snapshots."""
+
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import bindparam, case, func, literal_column, select, text
+
+from src.database.connection import DatabaseConnection, db
+from src.database.models import VideoAnalytics, VideoAnalyticsLatest
+from src.database.partitioning import CHILD_TABLES
+
+# Default retention policy: every snapshot for 7 days, the last one per day
+# for 90 days, the last one per week after that
+KEEP_ALL_DAYS = 7
+DAILY_DAYS = 90
+
+
+class SnapshotCompactor:
+    """
+    Deletes superseded snapshots according to a retention policy.
+
+    Snapshots younger than keep_all_days are kept. Older ones are grouped per
+    video, account and day (younger than daily_days) or ISO week (older), and
+    only the snapshot observed last (by last_seen_at) in each group survives,
+    together with its traffic sources and raw payload. Snapshots referenced by
+    video_analytics_latest, and snapshots whose run of unchanged scrapes lasts
+    past the end of their group, are never deleted. analytics_daily_rollup is
+    left as is, so per-day totals keep counting the removed snapshots.
+
+    Work is split into week-sized scraped_at windows (partition-pruned on a
+    partitioned table) and deletes of at most batch_size snapshots, each in
+    its own short transaction.
+    """
+
+    def __init__(
+        self,
+        db_connection: DatabaseConnection = None,
+        keep_all_days: int = KEEP_ALL_DAYS,
+        daily_days: int = DAILY_DAYS,
+        batch_size: int = 1000,
+        pause: float = 0.0,
+    ):
+        """
+        Initialize compactor.
+
+        Args:
+            db_connection: DatabaseConnection instance (uses global db if None)
+            keep_all_days: Keep every snapshot scraped within this many days
+            daily_days: Keep one snapshot per day within this many days, one per week before
+            batch_size: Maximum snapshots deleted per transaction
+            pause: Seconds to sleep between delete transactions (throttling)
+        """
+        if daily_days < keep_all_days:
+            raise ValueError(f"daily_days ({daily_days}) must not be smaller than keep_all_days ({keep_all_days})")
+        self.db = db_connection or db
+        self.keep_all_days = keep_all_days
+        self.daily_days = daily_days
+        self.batch_size = max(1, batch_size)
+        self.pause = pause
+        self.last_report: Optional[Dict[str, Any]] = None
+        self._runs = 0
+        self._interval_hours: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    # ==================== Compaction ====================
+
+    def cutoffs(self, today: date = None) -> Dict[str, datetime]:
+        """Midnight boundaries of the policy: 'keep_all' (newer kept) and 'daily' (newer bucketed by day)."""
+        midnight = datetime.combine(today or date.today(), datetime.min.time())
+        return {
+            'keep_all': midnight - timedelta(days=self.keep_all_days),
+            'daily': midnight - timedelta(days=self.daily_days),
+        }
+
+    def _bucket(self, timestamp, daily_cutoff: datetime):
+        """Day bucket for timestamps newer than daily_cutoff, Monday-based week bucket before."""
+        if self.db.config.is_sqlite:
+            day = func.date(timestamp)
+            # strftime('%w') counts from Sunday = 0; step back to Monday
+            sql = str(timestamp.compile(dialect=self.db.engine.dialect))
+            week = literal_column(
+                f"date({sql}, '-' || ((CAST(strftime('%w', {sql}) AS INTEGER) + 6) % 7) || ' days')"
+            )
+        else:
+            day = func.date_trunc('day', timestamp)
+            week = func.date_trunc('week', timestamp)
+        return case((timestamp >= daily_cutoff, day), else_=week)
+
+    def find_superseded(self, lower: datetime, upper: datetime, daily_cutoff: datetime) -> List[int]:
+        """Ids of snapshots in [lower, upper) that are not the last observed of their day/week bucket."""
+        analytics = VideoAnalytics.__table__
+        latest = VideoAnalyticsLatest.__table__
+        last_seen_at = func.coalesce(analytics.c.last_seen_at, analytics.c.scraped_at)
+        bucket = self._bucket(analytics.c.scraped_at, daily_cutoff)
+        ranked = (
+            select(
+                analytics.c.id,
+                # A snapshot stands for every scrape of its run, so the run seen last wins
+                # (a re-sent older batch can start a run inside an earlier, longer one)
+                func.row_number().over(
+                    partition_by=(analytics.c.video_id, analytics.c.account_id, bucket),
+                    order_by=(last_seen_at.desc(), analytics.c.scraped_at.desc(), analytics.c.id.desc()),
+                ).label('position'),
+                (bucket != self._bucket(last_seen_at, daily_cutoff)).label('extends_past_bucket'),
+            )
+            .where(analytics.c.scraped_at >= lower, analytics.c.scraped_at < upper)
+            .subquery()
+        )
+        query = (
+            select(ranked.c.id)
+            .where(ranked.c.position > 1)
+            .where(ranked.c.extends_past_bucket.is_(False))
+            .where(ranked.c.id.not_in(select(latest.c.analytics_id)))
+            .order_by(ranked.c.id)
+        )
+        with self.db.engine.connect() as conn:
+            return list(conn.execute(query).scalars())
+
+    def _free_bytes(self) -> int:
+        """Bytes on the SQLite freelist (pages released by DELETE)."""
+        with self.db.engine.connect() as conn:
+            pages = conn.execute(text('PRAGMA freelist_count')).scalar()
+            page_size = conn.execute(text('PRAGMA page_size')).scalar()
+        return pages * page_size
+
+    def _delete_batch(self, ids: List[int], lower: datetime, upper: datetime) -> Dict[str, int]:
+        """Delete snapshots and their child rows in one transaction; return row counts (and bytes on PostgreSQL)."""
+        counts = {}
+        with self.db.engine.begin() as conn:
+            if not self.db.config.is_sqlite:
+                # Size of the tuples about to be deleted (TOASTed values count compressed)
+                counts['bytes'] = sum(
+                    conn.execute(
+                        text(f'SELECT COALESCE(SUM(pg_column_size(t.*)), 0) FROM {table} t WHERE {column} IN :ids')
+                        .bindparams(bindparam('ids', expanding=True)),
+                        {'ids': ids},
+                    ).scalar()
+                    for table, column in [('video_analytics', 'id')] + [(child, 'analytics_id') for child in CHILD_TABLES]
+                )
+            for child in CHILD_TABLES:
+                counts[child] = conn.execute(
+                    text(f'DELETE FROM {child} WHERE analytics_id IN :ids').bindparams(bindparam('ids', expanding=True)),
+                    {'ids': ids},
+                ).rowcount
+            analytics = VideoAnalytics.__table__
+            counts['snapshots'] = conn.execute(
+                analytics.delete()
+                .where(analytics.c.id.in_(ids))
+                # Lets PostgreSQL prune to the window's partitions
+                .where(analytics.c.scraped_at >= lower, analytics.c.scraped_at < upper)
+            ).rowcount
+        return counts
+
+    def compact(self, dry_run: bool = False, today: date = None) -> Dict[str, Any]:
+        """
+        Apply the retention policy once.
+
+        Args:
+            dry_run: Only count the snapshots that would be deleted
+            today: Reference day of the policy (default: today)
+
+        Returns:
+            Report with deleted snapshots, child rows per table, total rows,
+            reclaimed bytes (tuple sizes on PostgreSQL, freed pages on SQLite),
+            batches and duration
+        """
+        started = time.perf_counter()
+        cutoffs = self.cutoffs(today)
+        report: Dict[str, Any] = {
+            'dry_run': dry_run,
+            'keep_all_before': cutoffs['keep_all'].isoformat(),
+            'daily_before': cutoffs['daily'].isoformat(),
+            'snapshots': 0,
+            **{child: 0 for child in CHILD_TABLES},
+            'rows': 0,
+            'bytes': 0,
+            'batches': 0,
+        }
+        analytics = VideoAnalytics.__table__
+        with self.db.engine.connect() as conn:
+            oldest = conn.execute(
+                select(func.min(analytics.c.scraped_at)).where(analytics.c.scraped_at < cutoffs['keep_all'])
+            ).scalar()
+        free_before = self._free_bytes() if self.db.config.is_sqlite and not dry_run else 0
+
+        if oldest is not None:
+            # Monday-aligned windows, so no week bucket spans two windows
+            lower = datetime.combine(oldest.date() - timedelta(days=oldest.weekday()), datetime.min.time())
+            while lower < cutoffs['keep_all']:
+                upper = min(lower + timedelta(days=7), cutoffs['keep_all'])
+                ids = self.find_superseded(lower, upper, cutoffs['daily'])
+                if dry_run:
+                    report['snapshots'] += len(ids)
+                    ids = []
+                for start in range(0, len(ids), self.batch_size):
+                    counts = self._delete_batch(ids[start:start + self.batch_size], lower, upper)
+                    for key, value in counts.items():
+                        report[key] += value
+                    report['batches'] += 1
+                    if self.pause:
+                        time.sleep(self.pause)
+                lower = upper
+
+        if self.db.config.is_sqlite and not dry_run:
+            report['bytes'] = self._free_bytes() - free_before
+        report['rows'] = report['snapshots'] + sum(report[child] for child in CHILD_TABLES)
+        report['seconds'] = round(time.perf_counter() - started, 3)
+        report['finished_at'] = datetime.now().isoformat()
+        with self._lock:
+            self.last_report = report
+            self._runs += 1
+        return report
+
+    def vacuum(self) -> None:
+        """
+        Make freed space reusable (PostgreSQL: VACUUM ANALYZE, no exclusive lock)
+        or return it to the filesystem (SQLite: VACUUM, rewrites the file).
+        """
+        tables = ('video_analytics',) + CHILD_TABLES
+        with self.db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            if self.db.config.is_sqlite:
+                conn.execute(text('VACUUM'))
+            else:
+                for table in tables:
+                    conn.execute(text(f'VACUUM (ANALYZE) {table}'))
+
+    # ==================== Schedule ====================
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval_hours: float) -> 'SnapshotCompactor':
+        """Run compact() every interval_hours in a background thread (idempotent)."""
+        with self._lock:
+            if not self.running:
+                self._interval_hours = interval_hours
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name='snapshot-compactor', daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self, timeout: float = None) -> None:
+        """Stop the background thread (waits for a running compaction to finish)."""
+        if not self.running:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get schedule state and the report of the last run."""
+        with self._lock:
+            return {
+                'running': self.running,
+                'interval_hours': self._interval_hours,
+                'runs': self._runs,
+                'keep_all_days': self.keep_all_days,
+                'daily_days': self.daily_days,
+                'last_report': self.last_report,
+            }
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval_hours * 3600):
+            try:
+                report = self.compact()
+                print(f"✓ Compaction: deleted {report['snapshots']:,} snapshot(s), "
+                      f"{report['rows']:,} row(s), {report['bytes']:,} bytes in {report['seconds']:.1f}s")
+            except Exception as e:
+                print(f"✗ Compaction failed: {e}")
+
+
+_default_compactor: Optional[SnapshotCompactor] = None
+_default_lock = threading.Lock()
+
+
+def get_compactor() -> SnapshotCompactor:
+    """Get the process-wide SnapshotCompactor (not started)."""
+    global _default_compactor
+    with _default_lock:
+        if _default_compactor is None:
+            _default_compactor = SnapshotCompactor()
+        return _default_compactor
@@ -7,6 +7,24 @@ from dotenv import load_dotenv
 # Load environment variables from .env file
 load_dotenv()
 
+# Storage layouts of the traffic source breakdown (see DB_TRAFFIC_LAYOUT)
+TRAFFIC_LAYOUTS = ('rows', 'wide')
+
+# Where a process stores data (see DB_MODE)
+DB_MODES = ('central', 'edge')
+
+# Connection pool per process role (see DB_POOL_PROFILE). The API serves
+# many short requests from warm connections; scraper processes write
+# rarely and sit idle while crawling, so they keep a couple of connections
+# and ping them before use; migration and maintenance scripts work through
+# one connection at a time. 'default' uses the DatabaseConfig arguments.
+POOL_PROFILES = {
+    'api': {'pool_size': 10, 'max_overflow': 10, 'pool_timeout': 10, 'pool_recycle': 1800, 'pre_ping': False},
+    'scraper': {'pool_size': 2, 'max_overflow': 2, 'pool_timeout': 60, 'pool_recycle': 900, 'pre_ping': True},
+    'batch': {'pool_size': 1, 'max_overflow': 2, 'pool_timeout': 60, 'pool_recycle': 3600, 'pre_ping': False},
+}
+DEFAULT_POOL_PROFILE = 'default'
+
 
 class DatabaseConfig:
     """Database configuration class."""
@@ -20,7 +38,10 @@ class DatabaseConfig:
         database: str = None,
         echo: bool = False,
         pool_size: int = 20,
-        max_overflow: int = 10
+        max_overflow: int = 10,
+        pool_timeout: int = 30,
+        url: str = None,
+        pool_profile: str = None,
     ):
         """
         Initialize database configuration.
@@ -34,7 +55,44 @@ class DatabaseConfig:
         - DB_PASSWORD: Database password
         - DB_NAME: Database name (default: youtube_analytics)
         - DB_ECHO: Enable SQL query logging (default: false)
+        - DATABASE_URL: Full SQLAlchemy URL overriding the settings above
+          (e.g. sqlite:///data/analytics.db for local runs and benchmarks)
+        - DB_PARTITION_ANALYTICS: Partition video_analytics by month on
+          PostgreSQL (default: false)
+        - DB_TRAFFIC_LAYOUT: Traffic source breakdown storage, 'rows' (one
+          traffic_sources row per source) or 'wide' (one
+          traffic_source_breakdowns row per snapshot) (default: rows)
+        - DB_COMPACTION_INTERVAL_HOURS: Run the snapshot retention compactor
+          inside the API process every N hours (default: 0, disabled)
+        - DB_ASYNC: Serve the analytics and video API routes from the async
+          engine (asyncpg / aiosqlite) instead of the threadpool (default: false)
+        - DB_DEDUPE_SNAPSHOTS: Extend the latest snapshot's run instead of
+          inserting a scrape whose metrics did not change (default: true;
+          always false in edge mode so every scrape reaches the sync agent)
+        - DB_MODE: 'central' (connect to the database above) or 'edge' (write
+          to a local SQLite file in WAL mode; src/database/edge.py syncs it
+          to the central database) (default: central). An explicit url
+          always connects to that database.
+        - DB_EDGE_PATH: SQLite file of edge mode (default: data/edge.db)
+        - DB_EDGE_SYNC_INTERVAL: Seconds between edge sync runs (default: 30)
+        - DB_EXPORT_DIR: Output directory of the Parquet export
+          (src/database/export.py) (default: data/export)
+        - DB_POOL_PROFILE: Connection pool profile of processes that do not
+          pick one ('api', 'scraper', 'batch' or 'default', see
+          POOL_PROFILES) (default: default)
+        - DB_POOL_<PROFILE>_SIZE, _MAX_OVERFLOW, _TIMEOUT, _RECYCLE,
+          _PRE_PING: Override one setting of a profile, e.g.
+          DB_POOL_API_SIZE=5 for every API worker
+        - DB_PGBOUNCER: Connect through PgBouncer in transaction pooling mode:
+          the async engine disables asyncpg's prepared statement caches and
+          leaves pooling to PgBouncer (default: false)
         """
+        self.url_override = url or os.getenv('DATABASE_URL') or None
+        self.mode = 'central' if url else os.getenv('DB_MODE', 'central').lower()
+        if self.mode not in DB_MODES:
+            raise ValueError(f"DB_MODE must be one of {', '.join(DB_MODES)}, got '{self.mode}'")
+        self.edge_path = os.getenv('DB_EDGE_PATH', os.path.join('data', 'edge.db'))
+        self.edge_sync_interval = float(os.getenv('DB_EDGE_SYNC_INTERVAL', 30))
         self.host = host or os.getenv('DB_HOST', 'localhost')
         self.port = port or int(os.getenv('DB_PORT', 5432))
         self.user = user or os.getenv('DB_USER', 'postgres')
@@ -43,10 +101,67 @@ class DatabaseConfig:
         self.echo = echo or os.getenv('DB_ECHO', 'false').lower() == 'true'
         self.pool_size = pool_size
         self.max_overflow = max_overflow
+        self.pool_timeout = pool_timeout
+        self.set_pool_profile(pool_profile or os.getenv('DB_POOL_PROFILE', DEFAULT_POOL_PROFILE))
+        self.pgbouncer = os.getenv('DB_PGBOUNCER', 'false').lower() == 'true'
+        self.partition_analytics = os.getenv('DB_PARTITION_ANALYTICS', 'false').lower() == 'true'
+        self.compaction_interval_hours = float(os.getenv('DB_COMPACTION_INTERVAL_HOURS', 0))
+        self.use_async = os.getenv('DB_ASYNC', 'false').lower() == 'true'
+        self.dedupe_snapshots = not self.is_edge and os.getenv('DB_DEDUPE_SNAPSHOTS', 'true').lower() == 'true'
+        self.traffic_layout = os.getenv('DB_TRAFFIC_LAYOUT', 'rows').lower()
+        if self.traffic_layout not in TRAFFIC_LAYOUTS:
+            raise ValueError(
+                f"DB_TRAFFIC_LAYOUT must be one of {', '.join(TRAFFIC_LAYOUTS)}, got '{self.traffic_layout}'"
+            )
+        self.export_dir = os.getenv('DB_EXPORT_DIR', os.path.join('data', 'export'))
+
+    def set_pool_profile(self, profile: str) -> None:
+        """Select the connection pool profile ('api', 'scraper', 'batch' or 'default')."""
+        profile = profile.lower()
+        if profile != DEFAULT_POOL_PROFILE and profile not in POOL_PROFILES:
+            raise ValueError(
+                f"DB_POOL_PROFILE must be one of {', '.join((DEFAULT_POOL_PROFILE, *POOL_PROFILES))}, got '{profile}'"
+            )
+        self.pool_profile = profile
+
+    @property
+    def pool_settings(self) -> dict:
+        """Pool size, overflow, timeout, recycle and pre-ping of the pool profile (with env overrides)."""
+        if self.pool_profile == DEFAULT_POOL_PROFILE:
+            settings = {
+                'pool_size': self.pool_size,
+                'max_overflow': self.max_overflow,
+                'pool_timeout': self.pool_timeout,
+                'pool_recycle': 3600,
+                'pre_ping': True,
+            }
+        else:
+            settings = dict(POOL_PROFILES[self.pool_profile])
+        prefix = f'DB_POOL_{self.pool_profile.upper()}_'
+        for suffix, key in (
+            ('SIZE', 'pool_size'),
+            ('MAX_OVERFLOW', 'max_overflow'),
+            ('TIMEOUT', 'pool_timeout'),
+            ('RECYCLE', 'pool_recycle'),
+        ):
+            if os.getenv(prefix + suffix):
+                settings[key] = int(os.getenv(prefix + suffix))
+        if os.getenv(prefix + 'PRE_PING'):
+            settings['pre_ping'] = os.getenv(prefix + 'PRE_PING').lower() == 'true'
+        return settings
 
     @property
     def url(self) -> str:
-        """Get the SQLAlchemy database URL."""
+        """Get the SQLAlchemy database URL (the local SQLite file in edge mode)."""
+        if self.is_edge:
+            return f"sqlite:///{self.edge_path}"
+        return self.central_url
+
+    @property
+    def central_url(self) -> str:
+        """Get the SQLAlchemy URL of the central database (edge mode syncs to it)."""
+        if self.url_override:
+            return self.url_override
         # Handle Unix socket (host starts with /)
         if self.host.startswith('/'):
             if self.password:
@@ -57,12 +172,21 @@ class DatabaseConfig:
             return f"postgresql://{self.user}:{self.password}@{self.host}:{self.port}/{self.database}"
         return f"postgresql://{self.user}@{self.host}:{self.port}/{self.database}"
 
+    @property
+    def is_edge(self) -> bool:
+        """Whether this process writes to a local edge store (DB_MODE=edge)."""
+        return self.mode == 'edge'
+
+    @property
+    def is_sqlite(self) -> bool:
+        """Whether the configured database is SQLite."""
+        return self.url.startswith('sqlite')
+
     @property
     def async_url(self) -> str:
-        """Get the async SQLAlchemy database URL."""
-        if self.password:
-            return f"postgresql+asyncpg://{self.user}:{self.password}@{self.host}:{self.port}/{self.database}"
-        return f"postgresql+asyncpg://{self.user}@{self.host}:{self.port}/{self.database}"
+        """Get the async SQLAlchemy database URL (asyncpg for PostgreSQL, aiosqlite for SQLite)."""
+        driver = 'sqlite+aiosqlite' if self.is_sqlite else 'postgresql+asyncpg'
+        return f"{driver}://{self.url.split('://', 1)[1]}"
 
     def __repr__(self) -> str:
         """String representation of database config."""
@@ -1,14 +1,29 @@
 """Database connection and session management."""
 
-from contextlib import contextmanager
-from typing import Generator
+import os
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncGenerator, Dict, Generator
+from uuid import uuid4
 
 from sqlalchemy import create_engine, event, Engine
 from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
 
 from src.database.config import DatabaseConfig
 from src.database.models import Base
+from src.database.pool_metrics import PoolMetrics, instrumented_pool_class
+
+# asyncpg behind PgBouncer (transaction pooling): consecutive transactions
+# may run on different server connections, so nothing may rely on a
+# statement prepared earlier; SQLAlchemy still prepares each statement once,
+# under a name no other client uses
+PGBOUNCER_CONNECT_ARGS = {
+    'statement_cache_size': 0,
+    'prepared_statement_cache_size': 0,
+    'prepared_statement_name_func': lambda: f'__asyncpg_{uuid4()}__',
+}
 
 
 class DatabaseConnection:
@@ -24,34 +39,139 @@ class DatabaseConnection:
         self.config = config or DatabaseConfig()
         self.engine = None
         self.SessionLocal = None
+        self._async_engine = None
+        self._AsyncSessionLocal = None
         self._init_engine()
 
+    def _pool_options(self, pool_class: type, metrics: PoolMetrics) -> dict:
+        """Connection pool settings of the pool profile (see DB_POOL_PROFILE), timed into metrics."""
+        settings = self.config.pool_settings
+        if self.config.is_sqlite:
+            return {'pool_pre_ping': settings['pre_ping']}
+        return {
+            'poolclass': instrumented_pool_class(pool_class, metrics),
+            'pool_size': settings['pool_size'],
+            'max_overflow': settings['max_overflow'],
+            'pool_timeout': settings['pool_timeout'],
+            'pool_recycle': settings['pool_recycle'],
+            'pool_pre_ping': settings['pre_ping'],
+        }
+
     def _init_engine(self) -> None:
         """Initialize SQLAlchemy engine with connection pooling."""
+        if self.config.is_edge:
+            os.makedirs(os.path.dirname(os.path.abspath(self.config.edge_path)), exist_ok=True)
+        self.pool_metrics = PoolMetrics()
         self.engine = create_engine(
             self.config.url,
             echo=self.config.echo,
-            pool_size=self.config.pool_size,
-            max_overflow=self.config.max_overflow,
-            pool_pre_ping=True,  # Verify connections before using them
-            pool_recycle=3600,   # Recycle connections after 1 hour
+            **self._pool_options(QueuePool, self.pool_metrics),
         )
+        self.pool_metrics.attach(self.engine)
 
-        # Enable foreign keys for SQLite (if used)
-        @event.listens_for(Engine, "connect")
-        def set_sqlite_pragma(dbapi_connection, connection_record):
-            if 'sqlite' in str(self.engine.url):
-                cursor = dbapi_connection.cursor()
-                cursor.execute("PRAGMA foreign_keys=ON")
-                cursor.close()
+        self._set_sqlite_pragmas(self.engine)
 
         self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
 
+    def use_pool_profile(self, profile: str) -> None:
+        """
+        Switch this process to a connection pool profile ('api', 'scraper', 'batch').
+
+        Meant for process start: the sync engine is rebuilt with the profile's
+        settings and the async engine is created with them on first use.
+        Keeps the current pool while connections are checked out.
+
+        Args:
+            profile: Pool profile (see POOL_PROFILES in config.py)
+        """
+        if profile == self.config.pool_profile:
+            return
+        if self.pool_metrics.in_use:
+            print(f"⚠ Keeping the '{self.config.pool_profile}' pool profile: "
+                  f"{self.pool_metrics.in_use} connection(s) in use")
+            return
+        self.config.set_pool_profile(profile)
+        self.engine.dispose()
+        self._init_engine()
+        self._async_engine = None
+        self._AsyncSessionLocal = None
+
+    def _set_sqlite_pragmas(self, engine: Engine) -> None:
+        """
+        Enable foreign keys (and WAL in edge mode) on every new SQLite connection.
+
+        Registered on this engine only, so a process holding SQLite and
+        PostgreSQL connections (edge mode) keeps them apart.
+        """
+        if not self.config.is_sqlite:
+            return
+
+        @event.listens_for(engine, "connect")
+        def set_sqlite_pragma(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA foreign_keys=ON")
+            if self.config.is_edge:
+                # Scraper threads write while the sync agent reads
+                cursor.execute("PRAGMA journal_mode=WAL")
+                cursor.execute("PRAGMA synchronous=NORMAL")
+                cursor.execute("PRAGMA busy_timeout=5000")
+            cursor.close()
+
+    @property
+    def async_engine(self) -> AsyncEngine:
+        """
+        Async engine on config.async_url, created on first use.
+
+        Needs asyncpg (PostgreSQL) or aiosqlite (SQLite); processes that only
+        use the sync engine never import them.
+        """
+        if self._async_engine is None:
+            self._init_async_engine()
+        return self._async_engine
+
+    def _init_async_engine(self) -> None:
+        """Initialize the async engine and session factory."""
+        self.async_pool_metrics = PoolMetrics()
+        if self.config.pgbouncer and not self.config.is_sqlite:
+            # PgBouncer does the pooling; a client-side pool would pile up prepared statements
+            options = {
+                'poolclass': NullPool,
+                'pool_pre_ping': self.config.pool_settings['pre_ping'],
+                'connect_args': PGBOUNCER_CONNECT_ARGS,
+            }
+        else:
+            options = self._pool_options(AsyncAdaptedQueuePool, self.async_pool_metrics)
+        self._async_engine = create_async_engine(self.config.async_url, echo=self.config.echo, **options)
+        self.async_pool_metrics.attach(self._async_engine.sync_engine)
+        self._set_sqlite_pragmas(self._async_engine.sync_engine)
+        # Objects stay readable after commit: attribute refreshes cannot lazy-load under asyncio
+        self._AsyncSessionLocal = async_sessionmaker(self._async_engine, autoflush=False, expire_on_commit=False)
+
     def create_tables(self) -> None:
         """Create all tables in the database."""
         Base.metadata.create_all(bind=self.engine)
         print(f"✓ Database tables created successfully at {self.config.database}")
 
+        from src.database.change_detection import prepare_change_detection
+        from src.database.raw_storage import prepare_raw_table
+        from src.database.traffic_storage import prepare_traffic_tables
+        from src.database.upsert import prepare_upsert_keys
+
+        prepare_raw_table(self)
+        prepare_traffic_tables(self)
+        prepare_change_detection(self)
+        prepare_upsert_keys(self)
+
+        if not self.config.is_sqlite:
+            from src.database.partitioning import PartitionManager
+
+            # Keep future monthly partitions created; convert on first run if enabled
+            manager = PartitionManager(self)
+            if manager.is_partitioned():
+                manager.ensure_partitions()
+            elif self.config.partition_analytics:
+                manager.convert_table()
+
     def drop_tables(self) -> None:
         """Drop all tables from the database (WARNING: Data loss)."""
         Base.metadata.drop_all(bind=self.engine)
@@ -80,6 +200,49 @@ class DatabaseConnection:
         finally:
             session.close()
 
+    def get_async_session(self) -> AsyncSession:
+        """Get a new async database session."""
+        if self._AsyncSessionLocal is None:
+            self._init_async_engine()
+        return self._AsyncSessionLocal()
+
+    @asynccontextmanager
+    async def async_session_scope(self) -> AsyncGenerator[AsyncSession, None]:
+        """
+        Async version of session_scope().
+
+        Usage:
+            async with db.async_session_scope() as session:
+                # use session
+        """
+        session = self.get_async_session()
+        try:
+            yield session
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
+
+    def get_pool_metrics(self) -> Dict[str, Any]:
+        """
+        Get the pool profile and the pool metrics of the sync (and async) engine.
+
+        Returns:
+            Dict with profile, pgbouncer flag, effective settings and a
+            PoolMetrics.snapshot() per engine
+        """
+        metrics = {
+            'profile': self.config.pool_profile,
+            'pgbouncer': self.config.pgbouncer,
+            'settings': self.config.pool_settings,
+            'sync': self.pool_metrics.snapshot(self.engine.pool),
+        }
+        if self._async_engine is not None:
+            metrics['async'] = self.async_pool_metrics.snapshot(self._async_engine.sync_engine.pool)
+        return metrics
+
     def health_check(self) -> bool:
         """Check if database connection is healthy."""
         try:
@@ -96,6 +259,11 @@ class DatabaseConnection:
         if self.engine:
             self.engine.dispose()
 
+    async def close_async(self) -> None:
+        """Close the async engine's connections (if it was created)."""
+        if self._async_engine is not None:
+            await self._async_engine.dispose()
+
 
 # Global database instance
 db = DatabaseConnection()
@@ -0,0 +1,319 @@
+"""Edge storage: scraper nodes write to a local SQLite file and sync it to the central database."""
+
+import atexit
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, select, text
+
+from src.database.config import DatabaseConfig
+from src.database.connection import DatabaseConnection, db
+from src.database.models import Account, Channel, Video, VideoAnalytics, VideoAnalyticsRaw
+from src.database.partitioning import CHILD_TABLES
+from src.database.writers import ScraperDatabaseWriter
+
+# Sync bookkeeping lives in the edge file only, never in the central schema
+_edge_metadata = MetaData()
+edge_sync_state = Table(
+    'edge_sync_state',
+    _edge_metadata,
+    Column('name', String(50), primary_key=True),
+    # Highest video_analytics.id already written to the central database
+    Column('high_water', Integer, nullable=False, default=0),
+    Column('synced', Integer, nullable=False, default=0),
+    Column('updated_at', DateTime),
+)
+
+STATE_NAME = 'video_analytics'
+
+
+class EdgeSyncAgent:
+    """
+    Streams snapshots from an edge store to the central database.
+
+    With DB_MODE=edge the global db is a local SQLite file in WAL mode with
+    the same models, so scraping never waits on (or fails with) the central
+    database. The agent reads snapshots with an id above the high-water mark
+    in batches, rebuilds the scraper records from their raw payloads and
+    saves them centrally with bulk_save_analytics, grouped by account and
+    channel. The mark only moves after the central commit; a batch that is
+    sent twice after a crash is skipped centrally (same video, account and
+    scraped_at), so every batch is idempotent.
+
+    Change detection runs centrally; the edge keeps every scrape so ids only
+    grow. The agent turns DB_DEDUPE_SNAPSHOTS off on its edge connection
+    (also when the store was opened with an explicit url) and refuses a
+    store that already folded scrapes into runs: their repeats carry no id
+    of their own and would never reach the central database.
+    """
+
+    def __init__(
+        self,
+        edge: DatabaseConnection = None,
+        central: DatabaseConnection = None,
+        batch_size: int = 500,
+        interval: float = None,
+    ):
+        """
+        Initialize sync agent.
+
+        Args:
+            edge: Edge store (uses global db if None, which is the edge store when DB_MODE=edge)
+            central: Central database (connects to the edge config's central_url if None)
+            batch_size: Snapshots per central transaction
+            interval: Seconds between sync runs in the background thread (default: DB_EDGE_SYNC_INTERVAL)
+        """
+        self.edge = edge or db
+        # A folded scrape extends a run the high-water mark may already have passed
+        self.edge.config.dedupe_snapshots = False
+        self.central = central or DatabaseConnection(
+            DatabaseConfig(url=self.edge.config.central_url, pool_profile='scraper')
+        )
+        self.writer = ScraperDatabaseWriter(self.central)
+        self.batch_size = max(1, batch_size)
+        self.interval = self.edge.config.edge_sync_interval if interval is None else interval
+        self.last_error: Optional[str] = None
+        self.last_sync: Optional[str] = None
+        self._ready_accounts = set()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.edge.create_tables()
+        _edge_metadata.create_all(bind=self.edge.engine)
+        self._check_unfolded()
+
+    def _check_unfolded(self) -> None:
+        """Raise ValueError if the edge store extended runs instead of keeping every scrape."""
+        analytics = VideoAnalytics.__table__
+        with self.edge.engine.connect() as conn:
+            folded = conn.execute(
+                select(func.count()).select_from(analytics).where(analytics.c.observed_count > 1)
+            ).scalar()
+        if folded:
+            raise ValueError(
+                f"Edge store {self.edge.engine.url.render_as_string(hide_password=True)} has {folded:,} "
+                "snapshot(s) with folded scrapes (written with DB_DEDUPE_SNAPSHOTS=true); "
+                "their repeated scrapes cannot be synced to the central database"
+            )
+
+    # ==================== High-Water Mark ====================
+
+    def high_water(self) -> int:
+        """Highest snapshot id already in the central database."""
+        with self.edge.engine.connect() as conn:
+            return conn.execute(
+                select(edge_sync_state.c.high_water).where(edge_sync_state.c.name == STATE_NAME)
+            ).scalar() or 0
+
+    def _advance(self, high_water: int, synced: int) -> None:
+        with self.edge.engine.begin() as conn:
+            updated = conn.execute(
+                edge_sync_state.update()
+                .where(edge_sync_state.c.name == STATE_NAME)
+                .values(high_water=high_water, synced=edge_sync_state.c.synced + synced, updated_at=datetime.utcnow())
+            ).rowcount
+            if not updated:
+                conn.execute(edge_sync_state.insert().values(
+                    name=STATE_NAME, high_water=high_water, synced=synced, updated_at=datetime.utcnow()
+                ))
+
+    def pending(self) -> int:
+        """Snapshots above the high-water mark."""
+        with self.edge.engine.connect() as conn:
+            return conn.execute(
+                select(func.count()).select_from(VideoAnalytics.__table__)
+                .where(VideoAnalytics.__table__.c.id > self.high_water())
+            ).scalar()
+
+    # ==================== Sync ====================
+
+    def _read_batch(self, high_water: int) -> List[Dict[str, Any]]:
+        """Next snapshots above high_water as scraper records, with id, account and channel."""
+        analytics = VideoAnalytics.__table__
+        raw = VideoAnalyticsRaw.__table__
+        accounts = Account.__table__
+        videos = Video.__table__
+        channels = Channel.__table__
+        query = (
+            select(
+                analytics.c.id, analytics.c.video_id, analytics.c.scraped_at, analytics.c.publish_start_date,
+                accounts.c.name.label('account_name'), accounts.c.cookies_file,
+                channels.c.url.label('channel_url'),
+                raw.c.top_metrics, raw.c.traffic_sources, raw.c.impressions_data, raw.c.page_text,
+            )
+            .select_from(
+                analytics
+                .join(accounts, accounts.c.id == analytics.c.account_id)
+                .join(videos, videos.c.video_id == analytics.c.video_id)
+                .outerjoin(channels, channels.c.id == videos.c.channel_id)
+                .outerjoin(raw, raw.c.analytics_id == analytics.c.id)
+            )
+            .where(analytics.c.id > high_water)
+            .order_by(analytics.c.id)
+            .limit(self.batch_size)
+        )
+        with self.edge.engine.connect() as conn:
+            rows = conn.execute(query).mappings().all()
+        return [
+            {
+                'id': row['id'],
+                'account_name': row['account_name'],
+                'cookies_file': row['cookies_file'],
+                'channel_url': row['channel_url'],
+                'record': {
+                    'video_id': row['video_id'],
+                    'top_metrics': row['top_metrics'] or {},
+                    'how_viewers_find': row['traffic_sources'] or {},
+                    'impressions_data': row['impressions_data'] or {},
+                    'publish_start_date': row['publish_start_date'].isoformat() if row['publish_start_date'] else None,
+                    'crawl_datetime': row['scraped_at'],
+                    'page_text': row['page_text'],
+                },
+            }
+            for row in rows
+        ]
+
+    def sync_batch(self) -> int:
+        """
+        Send the next batch to the central database and move the high-water mark.
+
+        Returns:
+            Number of snapshots sent (0 when the edge store is in sync)
+        """
+        snapshots = self._read_batch(self.high_water())
+        if not snapshots:
+            return 0
+
+        groups: Dict[tuple, List[Dict[str, Any]]] = {}
+        for snapshot in snapshots:
+            groups.setdefault((snapshot['account_name'], snapshot['channel_url']), []).append(snapshot)
+        for (account_name, channel_url), group in groups.items():
+            if account_name not in self._ready_accounts:
+                self.writer.ensure_account(account_name, cookies_file=group[0]['cookies_file'])
+                self._ready_accounts.add(account_name)
+            self.writer.bulk_save_analytics(
+                [snapshot['record'] for snapshot in group], account_name=account_name, channel_url=channel_url
+            )
+
+        self._advance(snapshots[-1]['id'], len(snapshots))
+        return len(snapshots)
+
+    def sync(self, max_batches: int = None) -> Dict[str, Any]:
+        """
+        Send batches until the edge store is in sync (or max_batches were sent).
+
+        Returns:
+            Report with snapshots sent, batches, high-water mark, pending snapshots and duration
+        """
+        started = time.perf_counter()
+        sent = batches = 0
+        while max_batches is None or batches < max_batches:
+            count = self.sync_batch()
+            if not count:
+                break
+            sent += count
+            batches += 1
+        with self._lock:
+            self.last_error = None
+            self.last_sync = datetime.now().isoformat()
+        return {
+            'sent': sent,
+            'batches': batches,
+            'high_water': self.high_water(),
+            'pending': self.pending(),
+            'seconds': round(time.perf_counter() - started, 3),
+        }
+
+    def prune(self, keep_days: int = 7) -> int:
+        """
+        Delete synced snapshots older than keep_days from the edge store.
+
+        The snapshot at the high-water mark is kept, so SQLite never hands
+        out an id at or below the mark again.
+
+        Returns:
+            Number of snapshots deleted
+        """
+        high_water = self.high_water()
+        cutoff = datetime.utcnow() - timedelta(days=keep_days)
+        analytics = VideoAnalytics.__table__
+        params = {'high_water': high_water, 'cutoff': cutoff}
+        with self.edge.engine.begin() as conn:
+            for child in CHILD_TABLES:
+                conn.execute(text(
+                    f'DELETE FROM {child} WHERE analytics_id IN '
+                    '(SELECT id FROM video_analytics WHERE id < :high_water AND scraped_at < :cutoff)'
+                ), params)
+            return conn.execute(
+                analytics.delete().where(analytics.c.id < high_water, analytics.c.scraped_at < cutoff)
+            ).rowcount
+
+    # ==================== Background Thread ====================
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> 'EdgeSyncAgent':
+        """Sync every interval seconds in a background thread (idempotent)."""
+        with self._lock:
+            if not self.running:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name='edge-sync', daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self, timeout: float = None) -> None:
+        """
+        Stop the background thread (waits for a running batch to finish).
+
+        Snapshots that were not sent stay in the edge store for the next run.
+        """
+        if not self.running:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get sync state: high-water mark, pending snapshots, last run and last error."""
+        with self._lock:
+            last_error, last_sync = self.last_error, self.last_sync
+        return {
+            'running': self.running,
+            'edge': self.edge.engine.url.render_as_string(hide_password=True),
+            'central': self.central.engine.url.render_as_string(hide_password=True),
+            'high_water': self.high_water(),
+            'pending': self.pending(),
+            'last_sync': last_sync,
+            'last_error': last_error,
+        }
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                report = self.sync()
+                if report['sent']:
+                    print(f"✓ Edge sync: sent {report['sent']:,} snapshot(s), {report['pending']:,} pending")
+            except Exception as e:
+                # Central database unreachable: keep scraping locally, retry next interval
+                with self._lock:
+                    self.last_error = str(e)
+                print(f"⚠ Edge sync failed, retrying in {self.interval:g}s: {e}")
+            self._stop.wait(self.interval)
+
+
+_default_agent: Optional[EdgeSyncAgent] = None
+_default_lock = threading.Lock()
+
+
+def get_edge_sync_agent() -> EdgeSyncAgent:
+    """Get the process-wide EdgeSyncAgent for the global edge store (started)."""
+    global _default_agent
+    with _default_lock:
+        if _default_agent is None:
+            _default_agent = EdgeSyncAgent()
+            atexit.register(_default_agent.stop)
+        return _default_agent.start()
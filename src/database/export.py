@@ -0,0 +1,362 @@
+"""Columnar export of the analytics history to Parquet (requires pyarrow)."""
+
+import json
+import os
+import shutil
+import time
+from datetime import date, datetime, timedelta
+from itertools import groupby
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import Date, DateTime, Integer, Numeric, SmallInteger, func, select, text
+
+from src.database.connection import DatabaseConnection, db
+from src.database.models import TrafficSource, TrafficSourceType, VideoAnalytics
+from src.database.writers import ScraperDatabaseWriter
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is unavailable without pyarrow
+    pa = pq = None
+
+EXPORT_TABLES = ('video_analytics', 'traffic_sources')
+
+# Export state (high-water mark and totals) kept next to the exported files
+STATE_FILE = '_export_state.json'
+
+PARQUET_MEDIA_TYPE = 'application/vnd.apache.parquet'
+
+# Exported columns and their SQLAlchemy types (traffic_sources also gets source_name)
+EXPORT_COLUMNS = {
+    'video_analytics': {column.name: column.type for column in VideoAnalytics.__table__.columns},
+    'traffic_sources': {
+        'analytics_id': TrafficSource.__table__.c.analytics_id.type,
+        'video_id': VideoAnalytics.__table__.c.video_id.type,
+        'account_id': VideoAnalytics.__table__.c.account_id.type,
+        'scraped_at': VideoAnalytics.__table__.c.scraped_at.type,
+        'source_type_id': TrafficSource.__table__.c.source_type_id.type,
+        'percentage': TrafficSource.__table__.c.percentage.type,
+    },
+}
+
+
+def require_pyarrow() -> None:
+    """Raise RuntimeError when pyarrow is not installed."""
+    if pa is None:
+        raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)")
+
+
+def _arrow_type(column_type) -> 'pa.DataType':
+    if isinstance(column_type, SmallInteger):
+        return pa.int16()
+    if isinstance(column_type, Integer):
+        return pa.int64()
+    if isinstance(column_type, Numeric):
+        return pa.decimal128(column_type.precision, column_type.scale)
+    if isinstance(column_type, DateTime):
+        return pa.timestamp('us')
+    if isinstance(column_type, Date):
+        return pa.date32()
+    return pa.string()
+
+
+def export_schema(table: str, partitioned: bool = False) -> 'pa.Schema':
+    """
+    Arrow schema of an exported table.
+
+    Args:
+        table: 'video_analytics' or 'traffic_sources'
+        partitioned: Leave out account_id, which the partition directory holds
+
+    Returns:
+        pyarrow Schema (decimals keep the database precision)
+    """
+    require_pyarrow()
+    fields = [
+        pa.field(name, _arrow_type(column_type))
+        for name, column_type in EXPORT_COLUMNS[table].items()
+        if not (partitioned and name == 'account_id')
+    ]
+    if table == 'traffic_sources':
+        fields.insert(-1, pa.field('source_name', pa.dictionary(pa.int16(), pa.string())))
+    return pa.schema(fields)
+
+
+class _ChunkSink:
+    """Write-only file object that collects Parquet bytes until they are drained."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ParquetExporter:
+    """
+    Exports video_analytics and traffic_sources to Parquet files.
+
+    export() writes Hive-style partitions, one directory per account and
+    scrape month (<table>/account_id=<id>/month=<YYYY-MM>/), readable with
+    pyarrow.dataset, pandas, DuckDB or Spark. Each run only exports
+    snapshots above the high-water mark stored in _export_state.json and
+    adds one part file per touched partition, named after the first id of
+    the run, so an interrupted run is simply repeated. Traffic shares are
+    exported for the same snapshots (either storage layout, see
+    DB_TRAFFIC_LAYOUT), with the source type name dictionary-encoded.
+
+    Rows are read through a server-side cursor (stream_results) in chunks of
+    batch_size, ordered by account and scrape time, and written as Arrow
+    record batches to one open file at a time, so memory stays bounded by a
+    chunk whatever the table size.
+
+    Exported snapshots are not rewritten: a run extended later by change
+    detection (last_seen_at, observed_count) or a snapshot committed with an
+    id below the mark after a run started only shows up after a full export.
+    """
+
+    def __init__(
+        self,
+        output_dir: str = None,
+        db_connection: DatabaseConnection = None,
+        batch_size: int = 10000,
+        compression: str = 'zstd',
+    ):
+        """
+        Initialize exporter.
+
+        Args:
+            output_dir: Export directory (default: DB_EXPORT_DIR)
+            db_connection: DatabaseConnection instance (uses global db if None)
+            batch_size: Rows fetched per cursor chunk and written per record batch
+            compression: Parquet compression codec ('zstd', 'snappy', 'gzip' or 'none')
+
+        Raises:
+            RuntimeError: If pyarrow is not installed
+        """
+        require_pyarrow()
+        self.db = db_connection or db
+        self.output_dir = Path(output_dir or self.db.config.export_dir)
+        self.batch_size = max(1, batch_size)
+        self.compression = compression
+        self.writer = ScraperDatabaseWriter(self.db)
+
+    # ==================== State ====================
+
+    @property
+    def state_path(self) -> Path:
+        return self.output_dir / STATE_FILE
+
+    def load_state(self) -> Dict[str, Any]:
+        """Export state: high-water mark, exported rows per table, files and last run."""
+        if self.state_path.exists():
+            return json.loads(self.state_path.read_text())
+        return {'high_water': 0, 'rows': {table: 0 for table in EXPORT_TABLES}, 'files': 0, 'exported_at': None}
+
+    def _save_state(self, state: Dict[str, Any]) -> None:
+        tmp_path = self.state_path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(state, indent=2))
+        os.replace(tmp_path, self.state_path)
+
+    def reset(self) -> None:
+        """Delete the exported tables and the export state."""
+        for table in EXPORT_TABLES:
+            shutil.rmtree(self.output_dir / table, ignore_errors=True)
+        self.state_path.unlink(missing_ok=True)
+
+    # ==================== Reading ====================
+
+    def _read(
+        self,
+        table: str,
+        account_id: int = None,
+        date_from: date = None,
+        date_to: date = None,
+        after_id: int = None,
+        until_id: int = None,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Stream rows of an exported table in chunks of batch_size.
+
+        Yields:
+            Lists of row dicts ordered by account, scrape time and snapshot id
+        """
+        conditions = []
+        params: Dict[str, Any] = {}
+        for column, operator, value in (
+            ('account_id', '=', account_id),
+            ('scraped_at', '>=', date_from),
+            ('scraped_at', '<', date_to + timedelta(days=1) if date_to is not None else None),
+            ('id', '>', after_id),
+            ('id', '<=', until_id),
+        ):
+            if value is not None:
+                name = f"p{len(params)}"
+                conditions.append(f"va.{column} {operator} :{name}")
+                params[name] = value
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+        names = {}
+        if table == 'video_analytics':
+            columns = ', '.join(f'va.{name}' for name in EXPORT_COLUMNS[table])
+            source = 'FROM video_analytics va'
+        else:
+            source, type_column, percentage_column = self.writer.traffic_from_clause(self.db.engine.dialect.name)
+            columns = (
+                f'va.id AS analytics_id, va.video_id, va.account_id, va.scraped_at, '
+                f'{type_column} AS source_type_id, {percentage_column} AS percentage'
+            )
+            with self.db.engine.connect() as conn:
+                names = dict(conn.execute(select(TrafficSourceType.id, TrafficSourceType.name)).all())
+
+        query = text(
+            f"SELECT {columns} {source} {where} ORDER BY va.account_id, va.scraped_at, va.id"
+        ).columns(**EXPORT_COLUMNS[table])
+        with self.db.engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, max_row_buffer=self.batch_size).execute(query, params)
+            for chunk in result.mappings().partitions(self.batch_size):
+                rows = [dict(row) for row in chunk]
+                if names:
+                    for row in rows:
+                        row['source_name'] = names.get(row['source_type_id'])
+                yield rows
+
+    # ==================== Partitioned Export ====================
+
+    def _partition_path(self, table: str, account_id: int, month: str, name: str) -> Path:
+        return self.output_dir / table / f'account_id={account_id}' / f'month={month}' / name
+
+    def _export_table(self, table: str, after_id: int, until_id: int, written: List[Path]) -> int:
+        """Write one table's snapshots in (after_id, until_id] to .tmp part files; returns rows written."""
+        schema = export_schema(table, partitioned=True)
+        name = f'part-{after_id + 1:012d}.parquet.tmp'
+        rows = 0
+        key: Optional[Tuple[int, str]] = None
+        writer = None
+        try:
+            for chunk in self._read(table, after_id=after_id, until_id=until_id):
+                for partition, group in groupby(
+                    chunk, key=lambda row: (row['account_id'], row['scraped_at'].strftime('%Y-%m'))
+                ):
+                    if partition != key:
+                        if writer is not None:
+                            writer.close()
+                        key = partition
+                        path = self._partition_path(table, *partition, name)
+                        path.parent.mkdir(parents=True, exist_ok=True)
+                        writer = pq.ParquetWriter(str(path), schema, compression=self.compression)
+                        written.append(path)
+                    batch = list(group)
+                    writer.write_batch(pa.RecordBatch.from_pylist(batch, schema=schema))
+                    rows += len(batch)
+        finally:
+            if writer is not None:
+                writer.close()
+        return rows
+
+    def export(self, full: bool = False) -> Dict[str, Any]:
+        """
+        Export snapshots added since the last run.
+
+        Part files are written under a .tmp name and only renamed, and the
+        high-water mark only moved, once every table was written.
+
+        Args:
+            full: Delete the previous export and export the whole history
+
+        Returns:
+            Report with rows per table, files written, high-water mark and duration
+        """
+        started = time.perf_counter()
+        if full:
+            self.reset()
+        state = self.load_state()
+        after_id = state['high_water']
+        with self.db.engine.connect() as conn:
+            until_id = conn.execute(select(func.max(VideoAnalytics.id))).scalar() or 0
+
+        report = {'rows': {table: 0 for table in EXPORT_TABLES}, 'files': 0, 'high_water': after_id}
+        if until_id > after_id:
+            written: List[Path] = []
+            try:
+                for table in EXPORT_TABLES:
+                    report['rows'][table] = self._export_table(table, after_id, until_id, written)
+            except BaseException:
+                for path in written:
+                    path.unlink(missing_ok=True)
+                raise
+            for path in written:
+                os.replace(path, path.with_suffix(''))
+
+            report['files'] = len(written)
+            report['high_water'] = until_id
+            state['high_water'] = until_id
+            for table in EXPORT_TABLES:
+                state['rows'][table] = state['rows'].get(table, 0) + report['rows'][table]
+            state['files'] += len(written)
+            state['exported_at'] = datetime.now().isoformat()
+            self._save_state(state)
+
+        report['seconds'] = round(time.perf_counter() - started, 3)
+        return report
+
+    # ==================== Single-File Stream ====================
+
+    def iter_parquet(
+        self,
+        table: str = 'video_analytics',
+        account_id: int = None,
+        date_from: date = None,
+        date_to: date = None,
+        after_id: int = None,
+    ) -> Iterator[bytes]:
+        """
+        Stream one Parquet file of a table as it is written.
+
+        Each cursor chunk becomes a row group whose bytes are yielded right
+        away; the footer comes last. Used by GET /analytics/export.parquet.
+
+        Args:
+            table: 'video_analytics' or 'traffic_sources'
+            account_id: Only snapshots of this account
+            date_from: Only snapshots scraped on or after this day
+            date_to: Only snapshots scraped on or before this day
+            after_id: Only snapshots with a higher id (incremental pulls)
+
+        Yields:
+            Parquet file bytes
+        """
+        if table not in EXPORT_TABLES:
+            raise ValueError(f"table must be one of {', '.join(EXPORT_TABLES)}, got '{table}'")
+        schema = export_schema(table)
+        sink = _ChunkSink()
+        writer = pq.ParquetWriter(sink, schema, compression=self.compression)
+        try:
+            for chunk in self._read(table, account_id, date_from, date_to, after_id=after_id):
+                writer.write_batch(pa.RecordBatch.from_pylist(chunk, schema=schema))
+                data = sink.drain()
+                if data:
+                    yield data
+        finally:
+            writer.close()
+        yield sink.drain()
@@ -0,0 +1,109 @@
+"""In-process identity cache for rows the writers look up repeatedly."""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+# Cache namespaces
+ACCOUNT = 'account'    # account name -> accounts.id
+CHANNEL = 'channel'    # (account_id, channel url) -> channels.id
+VIDEO = 'video'        # YouTube video_id -> True (row exists)
+SOURCE_TYPE = 'source_type'  # traffic source name -> traffic_source_types.id
+
+
+class IdentityCache:
+    """
+    Bounded, thread-safe LRU mapping natural keys to primary keys.
+
+    Scraper writes resolve the same account, channel and videos over and over;
+    caching their ids skips those SELECTs. Entries are only added for rows that
+    are committed, and must be invalidated when rows are deleted or renamed.
+    """
+
+    def __init__(self, max_size: int = 10000):
+        """
+        Initialize identity cache.
+
+        Args:
+            max_size: Maximum number of entries across all namespaces
+        """
+        self.max_size = max(1, max_size)
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits: Dict[str, int] = {}
+        self._misses: Dict[str, int] = {}
+        self._evictions = 0
+
+    def get(self, kind: str, key: Hashable) -> Optional[Any]:
+        """
+        Look up a cached value.
+
+        Args:
+            kind: Namespace (ACCOUNT, CHANNEL or VIDEO)
+            key: Natural key within the namespace
+
+        Returns:
+            Cached value or None
+        """
+        with self._lock:
+            value = self._entries.get((kind, key))
+            if value is None:
+                self._misses[kind] = self._misses.get(kind, 0) + 1
+                return None
+            self._entries.move_to_end((kind, key))
+            self._hits[kind] = self._hits.get(kind, 0) + 1
+            return value
+
+    def put(self, kind: str, key: Hashable, value: Any) -> None:
+        """Cache a value, evicting the least recently used entries if full."""
+        if value is None:
+            return
+        with self._lock:
+            self._entries[(kind, key)] = value
+            self._entries.move_to_end((kind, key))
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, kind: str, key: Hashable = None) -> None:
+        """
+        Drop cached entries.
+
+        Args:
+            kind: Namespace to invalidate
+            key: Single key to drop (drops the whole namespace if None)
+        """
+        with self._lock:
+            if key is not None:
+                self._entries.pop((kind, key), None)
+                return
+            for entry in [entry for entry in self._entries if entry[0] == kind]:
+                del self._entries[entry]
+
+    def clear(self) -> None:
+        """Drop all cached entries (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get size and per-namespace hit/miss counters."""
+        with self._lock:
+            kinds = sorted(set(self._hits) | set(self._misses))
+            by_kind = {}
+            for kind in kinds:
+                hits, misses = self._hits.get(kind, 0), self._misses.get(kind, 0)
+                by_kind[kind] = {
+                    'hits': hits,
+                    'misses': misses,
+                    'hit_rate': round(hits / (hits + misses), 3) if hits + misses else 0.0,
+                }
+            hits, misses = sum(self._hits.values()), sum(self._misses.values())
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'evictions': self._evictions,
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': round(hits / (hits + misses), 3) if hits + misses else 0.0,
+                'by_kind': by_kind,
+            }
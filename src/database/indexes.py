@@ -0,0 +1,198 @@
+"""
+Index layout of the analytics tables.
+
+video_analytics used to carry one B-tree per column (video_id, account_id,
+scraped_at) plus (video_id, account_id), all of them prefixes of
+uq_video_account_timestamp or useless for the account-scoped reads the API
+runs. The layout defined on the models replaces them with:
+
+- (account_id, scraped_at DESC): an account's snapshots newest first
+- (account_id, video_id, scraped_at DESC) INCLUDE (stats columns): newest
+  snapshot per video of an account, answered from the index alone
+- (scraped_at DESC): global listings newest first, without an account filter
+- BRIN on scraped_at: time-range scans over all accounts at a fraction of
+  a B-tree's size (rows arrive roughly in scraped_at order)
+
+video_analytics_latest gets its account index with the stats columns
+included, and videos loses idx_videos_video_id, a copy of its unique
+constraint.
+"""
+
+from typing import Dict, List
+
+from sqlalchemy import Index, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateIndex
+
+from src.database.connection import DatabaseConnection, db
+from src.database.models import Video, VideoAnalytics, VideoAnalyticsLatest
+
+# Indexes introduced by the layout, per table
+LAYOUT_INDEXES = {
+    'video_analytics': (
+        'idx_video_analytics_account_scraped',
+        'idx_video_analytics_account_video_scraped',
+        'idx_video_analytics_scraped_desc',
+        'idx_video_analytics_scraped_at_range',
+    ),
+    'video_analytics_latest': ('idx_video_analytics_latest_account_stats',),
+}
+
+# Indexes the layout replaces: name -> (table, columns)
+LEGACY_INDEXES = {
+    'idx_video_analytics_video_id': ('video_analytics', '(video_id)'),
+    'idx_video_analytics_account_id': ('video_analytics', '(account_id)'),
+    'idx_video_analytics_scraped_at': ('video_analytics', '(scraped_at)'),
+    'idx_video_analytics_video_account': ('video_analytics', '(video_id, account_id)'),
+    'idx_video_analytics_latest_account_id': ('video_analytics_latest', '(account_id)'),
+    'idx_videos_video_id': ('videos', '(video_id)'),
+}
+
+_TABLES = {table.name: table for table in (VideoAnalytics.__table__, VideoAnalyticsLatest.__table__, Video.__table__)}
+
+
+def _index_definition(index: Index, dialect) -> str:
+    """Everything after 'ON <table>' of an index's CREATE INDEX (method, columns, INCLUDE)."""
+    ddl = str(CreateIndex(index).compile(dialect=dialect))
+    return ddl.split(f' ON {index.table.name} ', 1)[1]
+
+
+def _partitions(conn: Connection, table_name: str) -> List[str]:
+    """Partitions of a partitioned table (empty for plain tables and SQLite)."""
+    if conn.dialect.name != 'postgresql':
+        return []
+    return list(conn.scalars(text("""
+        SELECT c.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(:table)
+        ORDER BY c.relname
+    """), {'table': table_name}))
+
+
+def _drop_invalid(conn: Connection, name: str) -> None:
+    """Drop an index left invalid by an interrupted CREATE INDEX CONCURRENTLY."""
+    if conn.dialect.name == 'postgresql' and conn.scalar(text("""
+        SELECT NOT i.indisvalid FROM pg_index i WHERE i.indexrelid = to_regclass(:name)
+    """), {'name': name}):
+        conn.execute(text(f'DROP INDEX {name}'))
+
+
+def _create(conn: Connection, name: str, table_name: str, definition: str, concurrently: bool) -> None:
+    """
+    CREATE INDEX IF NOT EXISTS, concurrently where PostgreSQL allows it.
+
+    A partitioned table's index is created ON ONLY the parent and each
+    partition's index is built concurrently and attached to it, so writes
+    keep going during the build.
+    """
+    concurrently = concurrently and conn.dialect.name == 'postgresql'
+    option = 'CONCURRENTLY ' if concurrently else ''
+    partitions = _partitions(conn, table_name)
+    if not partitions:
+        _drop_invalid(conn, name)
+        conn.execute(text(f'CREATE INDEX {option}IF NOT EXISTS {name} ON {table_name} {definition}'))
+        return
+
+    conn.execute(text(f'CREATE INDEX IF NOT EXISTS {name} ON ONLY {table_name} {definition}'))
+    suffix = name.replace(f'idx_{table_name}_', '')
+    for partition in partitions:
+        child = f'{partition}_{suffix}_idx'
+        _drop_invalid(conn, child)
+        conn.execute(text(f'CREATE INDEX {option}IF NOT EXISTS {child} ON {partition} {definition}'))
+        attached = conn.scalar(text("""
+            SELECT EXISTS (SELECT 1 FROM pg_inherits WHERE inhrelid = to_regclass(:child))
+        """), {'child': child})
+        if not attached:
+            conn.execute(text(f'ALTER INDEX {name} ATTACH PARTITION {child}'))
+
+
+def _drop(conn: Connection, name: str, table_name: str, concurrently: bool) -> None:
+    # Indexes of partitioned tables cannot be dropped concurrently
+    concurrently = concurrently and conn.dialect.name == 'postgresql' and not _partitions(conn, table_name)
+    conn.execute(text(f"DROP INDEX {'CONCURRENTLY ' if concurrently else ''}IF EXISTS {name}"))
+
+
+def _analyze(conn: Connection) -> None:
+    """Refresh planner statistics so the new indexes are picked up right away."""
+    conn.execute(text(f"ANALYZE {', '.join(_TABLES)}" if conn.dialect.name == 'postgresql' else 'ANALYZE'))
+
+
+def apply_index_layout(
+    db_connection: DatabaseConnection = None,
+    concurrently: bool = True,
+    drop_legacy: bool = True,
+) -> Dict[str, List[str]]:
+    """
+    Create the model's indexes of video_analytics, video_analytics_latest and
+    videos, then drop the indexes they replace (LEGACY_INDEXES).
+
+    Safe to re-run: existing indexes are kept, invalid leftovers of an
+    interrupted concurrent build are rebuilt.
+
+    Args:
+        db_connection: DatabaseConnection instance (uses global db if None)
+        concurrently: Build and drop without blocking writes (PostgreSQL)
+        drop_legacy: Drop the replaced indexes
+
+    Returns:
+        Dict with the 'created' (ensured) and 'dropped' index names
+    """
+    connection = db_connection or db
+    report = {'created': [], 'dropped': []}
+    with connection.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        for table in _TABLES.values():
+            for index in sorted(table.indexes, key=lambda index: index.name):
+                _create(conn, index.name, table.name, _index_definition(index, conn.dialect), concurrently)
+                report['created'].append(index.name)
+        if drop_legacy:
+            for name, (table_name, _) in LEGACY_INDEXES.items():
+                _drop(conn, name, table_name, concurrently)
+                report['dropped'].append(name)
+        _analyze(conn)
+    print(f"✓ Index layout applied: {len(report['created'])} ensured, {len(report['dropped'])} legacy dropped")
+    return report
+
+
+def restore_legacy_indexes(db_connection: DatabaseConnection = None, concurrently: bool = True) -> Dict[str, List[str]]:
+    """
+    Undo apply_index_layout(): recreate LEGACY_INDEXES and drop LAYOUT_INDEXES.
+
+    Returns:
+        Dict with the 'created' and 'dropped' index names
+    """
+    connection = db_connection or db
+    report = {'created': [], 'dropped': []}
+    with connection.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        for name, (table_name, columns) in LEGACY_INDEXES.items():
+            _create(conn, name, table_name, columns, concurrently)
+            report['created'].append(name)
+        for table_name, names in LAYOUT_INDEXES.items():
+            for name in names:
+                _drop(conn, name, table_name, concurrently)
+                report['dropped'].append(name)
+        _analyze(conn)
+    print(f"✓ Legacy indexes restored: {len(report['created'])} created, {len(report['dropped'])} dropped")
+    return report
+
+
+def index_sizes(db_connection: DatabaseConnection = None) -> Dict[str, int]:
+    """
+    On-disk size in bytes of every index of the laid-out tables (PostgreSQL;
+    partitioned indexes are summed over their partitions).
+
+    Returns:
+        Dict of index name to bytes (empty on other databases)
+    """
+    connection = db_connection or db
+    if connection.engine.dialect.name != 'postgresql':
+        return {}
+    with connection.engine.connect() as conn:
+        rows = conn.execute(text("""
+            SELECT i.indexrelid::regclass::text,
+                   COALESCE((SELECT sum(pg_relation_size(relid)) FROM pg_partition_tree(i.indexrelid)),
+                            pg_relation_size(i.indexrelid))
+            FROM pg_index i
+            WHERE i.indrelid = ANY(CAST(:tables AS regclass[]))
+            ORDER BY 1
+        """), {'tables': list(_TABLES)}).all()
+    return {name: int(size) for name, size in rows}
@@ -0,0 +1,407 @@
+"""High-throughput ingest of analytics snapshots.
+
+PostgreSQL: rows are streamed into temporary staging tables with
+``COPY FROM STDIN`` and merged into ``video_analytics`` / ``traffic_sources``
+with one set-based statement per batch. Other databases (SQLite) fall back to
+batched ``executemany`` inserts.
+"""
+
+import io
+import json
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from src.database.change_detection import content_hash
+from src.database.connection import DatabaseConnection, db
+from src.database.models import RAW_COLUMNS, Account, VideoAnalytics, VideoAnalyticsRaw
+from src.database.upsert import insert_snapshots, upsert_accounts, upsert_videos
+from src.database.writers import LATEST_COLUMNS, ROLLUP_SUM_COLUMNS, ScraperDatabaseWriter
+
+# Analytics columns written by the ingest path (everything except the serial id);
+# raw payloads (RAW_COLUMNS) go to video_analytics_raw
+ANALYTICS_COLUMNS = [column.name for column in VideoAnalytics.__table__.columns if column.name != 'id']
+JSON_COLUMNS = {'top_metrics', 'traffic_sources', 'impressions_data', 'metric_values'}
+
+
+def iter_records_from_file(file_path) -> Iterator[Dict[str, Any]]:
+    """
+    Read scraper results from a .json array or a .jsonl file.
+
+    Args:
+        file_path: Path to the file
+
+    Yields:
+        Analytics dictionaries
+    """
+    file_path = Path(file_path)
+    with open(file_path, 'r', encoding='utf-8') as f:
+        if file_path.suffix == '.jsonl':
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+            return
+        data = json.load(f)
+    if not isinstance(data, list):
+        raise ValueError(f"{file_path.name}: expected a JSON array")
+    yield from data
+
+
+def _copy_value(value: Any, column: str = None) -> str:
+    """Encode one value for COPY text format."""
+    if value is None:
+        return '\\N'
+    if column in JSON_COLUMNS:
+        value = json.dumps(value, ensure_ascii=False)
+    elif isinstance(value, (datetime, date)):
+        value = value.isoformat()
+    elif not isinstance(value, str):
+        value = str(value) if not isinstance(value, Decimal) else format(value, 'f')
+    return (
+        value.replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+
+class AnalyticsIngestor:
+    """Bulk loader for analytics snapshots used by backfills and JSON migrations."""
+
+    def __init__(self, db_connection: DatabaseConnection = None, batch_size: int = 5000):
+        """
+        Initialize ingestor.
+
+        Args:
+            db_connection: DatabaseConnection instance (uses global db if None)
+            batch_size: Records staged and merged per transaction
+        """
+        self.db = db_connection or db
+        self.batch_size = max(1, batch_size)
+        self.writer = ScraperDatabaseWriter(self.db)
+        self._account_ids: Dict[str, int] = {}
+
+    @property
+    def uses_copy(self) -> bool:
+        """Whether COPY is available for the configured database."""
+        return self.db.engine.dialect.name == 'postgresql'
+
+    def ingest(
+        self,
+        records: Iterable[Dict[str, Any]],
+        account_name: str = None,
+        channel_url: str = None,
+    ) -> Dict[str, Any]:
+        """
+        Load analytics snapshots.
+
+        Records without a video_id or carrying an 'error' key are skipped.
+        Each record is stored under its own 'account_name' if present,
+        otherwise under account_name; missing accounts are created. A
+        snapshot that already exists for the same video, account and
+        scraped_at is skipped (uq_video_account_timestamp).
+
+        Args:
+            records: Iterable of analytics dictionaries (streamed in batches)
+            account_name: Default account for records without 'account_name'
+            channel_url: Optional channel URL that new videos are linked to
+
+        Returns:
+            Report with row counts, elapsed seconds and rows per second
+        """
+        report = {
+            'method': 'copy' if self.uses_copy else 'executemany',
+            'records_read': 0,
+            'records_skipped': 0,
+            'accounts_created': 0,
+            'videos_created': 0,
+            'analytics_inserted': 0,
+            'duplicates_skipped': 0,
+            'traffic_sources_inserted': 0,
+            'batches': 0,
+        }
+        started = time.perf_counter()
+
+        batch: List[Dict[str, Any]] = []
+        for record in records:
+            report['records_read'] += 1
+            if not record.get('video_id') or 'error' in record:
+                report['records_skipped'] += 1
+                continue
+            batch.append(record)
+            if len(batch) >= self.batch_size:
+                self._ingest_batch(batch, account_name, channel_url, report)
+                batch = []
+        if batch:
+            self._ingest_batch(batch, account_name, channel_url, report)
+
+        seconds = time.perf_counter() - started
+        report['seconds'] = round(seconds, 3)
+        report['rows_per_second'] = round(report['records_read'] / seconds, 1) if seconds else 0.0
+        return report
+
+    def _ingest_batch(
+        self,
+        records: List[Dict[str, Any]],
+        default_account: Optional[str],
+        channel_url: Optional[str],
+        report: Dict[str, Any],
+    ) -> None:
+        try:
+            counts, row_count = self._ingest_in_transaction(records, default_account, channel_url, report)
+        except Exception:
+            # Accounts created in the failed transaction were rolled back
+            self._account_ids.clear()
+            raise
+
+        report['batches'] += 1
+        report['videos_created'] += counts['videos']
+        report['analytics_inserted'] += counts['analytics']
+        report['duplicates_skipped'] += row_count - counts['analytics']
+        report['traffic_sources_inserted'] += counts['traffic_sources']
+
+    def _ingest_in_transaction(
+        self,
+        records: List[Dict[str, Any]],
+        default_account: Optional[str],
+        channel_url: Optional[str],
+        report: Dict[str, Any],
+    ) -> Tuple[Dict[str, int], int]:
+        with self.db.session_scope() as session:
+            names = {record.get('account_name') or default_account for record in records}
+            if channel_url and default_account:
+                names.add(default_account)
+            account_ids = self._resolve_account_ids(names, session, report)
+            channel_id = None
+            if channel_url and default_account:
+                account = session.get(Account, account_ids[default_account])
+                channel_id = self.writer.get_or_create_channel(account, channel_url, session).id
+
+            rows: List[Tuple[Dict[str, Any], Dict[str, Any]]] = []
+            for record in records:
+                account_id = account_ids[record.get('account_name') or default_account]
+                row = self.writer.build_analytics_row(record['video_id'], account_id, record)
+                traffic_sources = record.get('how_viewers_find') or {}
+                # Every snapshot is kept, but hashed so later scrapes can extend its run
+                row['content_hash'] = content_hash(row, self.writer.build_traffic_source_rows(None, traffic_sources))
+                row['last_seen_at'] = row['scraped_at']
+                row['observed_count'] = 1
+                rows.append((row, traffic_sources))
+
+            if self.uses_copy:
+                counts = self._merge_with_copy(rows, channel_id, session)
+            else:
+                counts = self._merge_with_executemany(rows, channel_id, session)
+        return counts, len(rows)
+
+    def _resolve_account_ids(self, names: set, session: Session, report: Dict[str, Any]) -> Dict[str, int]:
+        """Map account names to IDs, creating missing accounts."""
+        if None in names:
+            raise ValueError("Records without 'account_name' need a default account_name")
+        missing = names - self._account_ids.keys()
+        if missing:
+            ids, created = upsert_accounts(session, missing)
+            self._account_ids.update(ids)
+            for name in sorted(created):
+                report['accounts_created'] += 1
+                print(f"  ✓ Created account in database: {name}")
+        return {name: self._account_ids[name] for name in names}
+
+    # ==================== PostgreSQL COPY path ====================
+
+    def _merge_with_copy(
+        self,
+        rows: List[Tuple[Dict[str, Any], Dict[str, Any]]],
+        channel_id: Optional[int],
+        session: Session,
+    ) -> Dict[str, int]:
+        """Stage rows with COPY and merge them in one statement."""
+        analytics_buffer = io.StringIO()
+        raw_buffer = io.StringIO()
+        traffic_buffer = io.StringIO()
+        traffic_rows = []
+        for row_no, (row, traffic_sources) in enumerate(rows):
+            analytics_buffer.write(
+                '\t'.join([str(row_no)] + [_copy_value(row.get(c), c) for c in ANALYTICS_COLUMNS]) + '\n'
+            )
+            if any(row.get(c) is not None for c in RAW_COLUMNS):
+                raw_buffer.write('\t'.join([str(row_no)] + [_copy_value(row.get(c), c) for c in RAW_COLUMNS]) + '\n')
+            traffic_rows.extend(self.writer.build_traffic_source_rows(row_no, traffic_sources))
+        type_ids = self.writer.resolve_source_type_ids([traffic['source_name'] for traffic in traffic_rows], session)
+        for traffic in traffic_rows:
+            source_type_id = type_ids[traffic['source_name']]
+            traffic_buffer.write(f"{traffic['analytics_id']}\t{source_type_id}\t{_copy_value(traffic['percentage'])}\n")
+        analytics_buffer.seek(0)
+        raw_buffer.seek(0)
+        traffic_buffer.seek(0)
+
+        columns = ', '.join(ANALYTICS_COLUMNS)
+        raw_columns = ', '.join(RAW_COLUMNS)
+        staged_raw_columns = ', '.join(f"staged_raw.{c}" for c in RAW_COLUMNS)
+        latest_columns = ', '.join(LATEST_COLUMNS)
+        latest_values = ', '.join(f"picked.{c}" for c in LATEST_COLUMNS)
+        latest_updates = ', '.join(f"{c} = EXCLUDED.{c}" for c in ('analytics_id',) + LATEST_COLUMNS + ('updated_at',))
+        rollup_increments = ', '.join(f"{c} = analytics_daily_rollup.{c} + EXCLUDED.{c}" for c in ROLLUP_SUM_COLUMNS)
+        traffic_join = """
+            FROM inserted
+            JOIN picked USING (video_id, account_id, scraped_at)
+            JOIN stage_traffic_sources staged ON staged.row_no = picked.row_no
+        """
+        if self.writer.traffic_layout == 'wide':
+            traffic_insert = f"""
+                INSERT INTO traffic_source_breakdowns (analytics_id, source_type_ids, percentages)
+                SELECT inserted.id, array_agg(staged.source_type_id ORDER BY staged.source_type_id),
+                       array_agg(staged.percentage ORDER BY staged.source_type_id)
+                {traffic_join}
+                GROUP BY inserted.id
+                RETURNING cardinality(source_type_ids) AS sources
+            """
+        else:
+            traffic_insert = f"""
+                INSERT INTO traffic_sources (analytics_id, source_type_id, percentage, created_at)
+                SELECT inserted.id, staged.source_type_id, staged.percentage, now()
+                {traffic_join}
+                RETURNING 1 AS sources
+            """
+        cursor = session.connection().connection.cursor()
+        try:
+            # LIKE keeps staging in sync with the table definition; the serial id is not staged
+            cursor.execute(
+                "CREATE TEMP TABLE stage_video_analytics (LIKE video_analytics) ON COMMIT DROP;"
+                "ALTER TABLE stage_video_analytics DROP COLUMN id, ADD COLUMN row_no integer;"
+                "CREATE TEMP TABLE stage_video_analytics_raw (LIKE video_analytics_raw) ON COMMIT DROP;"
+                "ALTER TABLE stage_video_analytics_raw DROP COLUMN analytics_id, ADD COLUMN row_no integer;"
+                "CREATE TEMP TABLE stage_traffic_sources "
+                "(row_no integer, source_type_id smallint, percentage numeric(5, 2)) ON COMMIT DROP;"
+            )
+            cursor.copy_expert(
+                f"COPY stage_video_analytics (row_no, {columns}) FROM STDIN", analytics_buffer
+            )
+            cursor.copy_expert(
+                f"COPY stage_video_analytics_raw (row_no, {raw_columns}) FROM STDIN", raw_buffer
+            )
+            cursor.copy_expert(
+                "COPY stage_traffic_sources (row_no, source_type_id, percentage) FROM STDIN", traffic_buffer
+            )
+
+            cursor.execute(
+                "INSERT INTO videos (video_id, channel_id, created_at, updated_at) "
+                "SELECT DISTINCT video_id, %s::integer, now(), now() FROM stage_video_analytics "
+                "ORDER BY video_id ON CONFLICT (video_id) DO NOTHING",
+                (channel_id,),
+            )
+            videos = cursor.rowcount
+
+            # Last staged row wins for duplicate keys inside the batch; existing snapshots are kept
+            cursor.execute(
+                f"""
+                WITH picked AS (
+                    SELECT DISTINCT ON (video_id, account_id, scraped_at) *
+                    FROM stage_video_analytics
+                    ORDER BY video_id, account_id, scraped_at, row_no DESC
+                ),
+                inserted AS (
+                    INSERT INTO video_analytics ({columns})
+                    SELECT {columns} FROM picked
+                    ON CONFLICT ON CONSTRAINT uq_video_account_timestamp DO NOTHING
+                    RETURNING id, video_id, account_id, scraped_at
+                ),
+                raw AS (
+                    INSERT INTO video_analytics_raw (analytics_id, {raw_columns})
+                    SELECT inserted.id, {staged_raw_columns}
+                    FROM inserted
+                    JOIN picked USING (video_id, account_id, scraped_at)
+                    JOIN stage_video_analytics_raw staged_raw ON staged_raw.row_no = picked.row_no
+                ),
+                traffic AS ({traffic_insert}),
+                latest AS (
+                    INSERT INTO video_analytics_latest
+                        (video_id, account_id, analytics_id, {latest_columns}, updated_at)
+                    SELECT DISTINCT ON (inserted.video_id, inserted.account_id)
+                        inserted.video_id, inserted.account_id, inserted.id, {latest_values}, now()
+                    FROM inserted
+                    JOIN picked USING (video_id, account_id, scraped_at)
+                    ORDER BY inserted.video_id, inserted.account_id, inserted.scraped_at DESC
+                    ON CONFLICT (video_id, account_id) DO UPDATE SET {latest_updates}
+                    WHERE video_analytics_latest.scraped_at <= EXCLUDED.scraped_at
+                ),
+                rollup AS (
+                    INSERT INTO analytics_daily_rollup
+                        (account_id, channel_id, day, {', '.join(ROLLUP_SUM_COLUMNS)}, updated_at)
+                    SELECT picked.account_id, COALESCE(videos.channel_id, 0), picked.scraped_at::date,
+                           count(*), COALESCE(sum(picked.impressions), 0), COALESCE(sum(picked.views), 0),
+                           COALESCE(sum(picked.unique_viewers), 0), COALESCE(sum(picked.watch_time_hours), 0),
+                           COALESCE(sum(NULLIF(picked.ctr_percentage, 0)), 0), count(NULLIF(picked.ctr_percentage, 0)),
+                           now()
+                    FROM inserted
+                    JOIN picked USING (video_id, account_id, scraped_at)
+                    JOIN videos ON videos.video_id = picked.video_id
+                    GROUP BY 1, 2, 3
+                    ON CONFLICT (account_id, channel_id, day) DO UPDATE SET {rollup_increments},
+                        updated_at = EXCLUDED.updated_at
+                )
+                SELECT (SELECT count(*) FROM inserted), (SELECT COALESCE(sum(sources), 0) FROM traffic)
+                """
+            )
+            analytics, traffic_sources = cursor.fetchone()
+        finally:
+            cursor.close()
+
+        return {'videos': videos, 'analytics': analytics, 'traffic_sources': traffic_sources}
+
+    # ==================== executemany fallback ====================
+
+    def _merge_with_executemany(
+        self,
+        rows: List[Tuple[Dict[str, Any], Dict[str, Any]]],
+        channel_id: Optional[int],
+        session: Session,
+    ) -> Dict[str, int]:
+        """Insert rows with batched executemany, skipping existing keys."""
+        # Last row wins for duplicate keys inside the batch
+        by_key: Dict[tuple, Tuple[Dict[str, Any], Dict[str, Any]]] = {}
+        for row, traffic_sources in rows:
+            by_key[(row['video_id'], row['account_id'], row['scraped_at'])] = (row, traffic_sources)
+
+        _, new_videos = upsert_videos(
+            session, [{'video_id': video_id, 'channel_id': channel_id} for video_id in {key[0] for key in by_key}]
+        )
+        inserted = insert_snapshots(session, [self.writer.split_raw_values(row)[0] for row, _ in by_key.values()])
+        if not inserted:
+            return {'videos': len(new_videos), 'analytics': 0, 'traffic_sources': 0}
+
+        raw_rows = []
+        traffic_rows = []
+        for analytics_id, *key in inserted:
+            row, traffic_sources = by_key[tuple(key)]
+            raw_row = self.writer.build_raw_row(analytics_id, row)
+            if raw_row:
+                raw_rows.append(raw_row)
+            traffic_rows.extend(self.writer.build_traffic_source_rows(analytics_id, traffic_sources))
+        if raw_rows:
+            session.execute(insert(VideoAnalyticsRaw.__table__), raw_rows)
+        self.writer.write_traffic_sources(traffic_rows, session)
+        snapshots = [{**by_key[tuple(key)][0], 'id': analytics_id} for analytics_id, *key in inserted]
+        self.writer.upsert_latest(snapshots, session)
+        self.writer.add_to_rollup(snapshots, session)
+
+        return {'videos': len(new_videos), 'analytics': len(inserted), 'traffic_sources': len(traffic_rows)}
+
+
+def print_ingest_report(report: Dict[str, Any]) -> None:
+    """Print an ingest report in the migration scripts' format."""
+    print(f"  Method:              {report['method']}")
+    print(f"  Records read:        {report['records_read']}")
+    print(f"  Records skipped:     {report['records_skipped']}")
+    print(f"  Accounts created:    {report['accounts_created']}")
+    print(f"  Videos created:      {report['videos_created']}")
+    print(f"  Analytics inserted:  {report['analytics_inserted']}")
+    print(f"  Duplicates skipped:  {report['duplicates_skipped']}")
+    print(f"  Traffic rows:        {report['traffic_sources_inserted']}")
+    print(f"  Throughput:          {report['rows_per_second']:,.0f} rows/s ({report['seconds']}s)")
@@ -3,12 +3,118 @@
 from datetime import datetime
 from typing import List, Optional
 
-from sqlalchemy import Column, Integer, String, DateTime, Float, Date, Text, ForeignKey, Numeric, JSON, UniqueConstraint, Index
+from sqlalchemy import Boolean, Column, Integer, BigInteger, SmallInteger, String, DateTime, Float, Date, Text, ForeignKey, Numeric, JSON, UniqueConstraint, Index
+from sqlalchemy import event, insert
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import object_session, relationship
+from sqlalchemy.sql.expression import ColumnElement
+from sqlalchemy.sql.visitors import InternalTraversal
 
 Base = declarative_base()
 
+# JSON on SQLite, binary JSONB (indexable, no re-parsing on read) on PostgreSQL
+JSONType = JSON().with_variant(JSONB(), 'postgresql')
+
+# Raw scraper payloads kept in video_analytics_raw instead of the hot analytics row
+RAW_COLUMNS = ('top_metrics', 'traffic_sources', 'impressions_data', 'page_text', 'metric_values')
+
+# Columns account stats aggregate, carried in the covering indexes (INCLUDE on PostgreSQL)
+STATS_COLUMNS = ('impressions', 'views', 'watch_time_hours', 'ctr_percentage')
+
+# Traffic sources listed by YouTube Studio, seeded into traffic_source_types
+TRAFFIC_SOURCE_NAMES = (
+    'Direct or unknown', 'Channel pages', 'YouTube search', 'Other YouTube features', 'Browse features',
+    'External', 'Suggested videos', 'Playlists', 'End screens', 'Cards', 'Notifications', 'Subscriptions',
+    'Others',
+)
+
+# Metrics of video_analytics_raw.metric_values with an expression index for range filters
+INDEXED_METRICS = ('Impressions', 'Views', 'Unique viewers', 'Impressions click-through rate')
+
+
+class metric_value(ColumnElement):
+    """
+    Numeric value of one metric in a metric_values JSON column.
+
+    Compiles to the same expression as the per-metric indexes
+    (CAST(metric_values ->> 'Views' AS FLOAT) on PostgreSQL,
+    JSON_EXTRACT(metric_values, '$."Views"') on SQLite), so range filters
+    on an indexed metric become index scans. The metric name is rendered
+    as an escaped literal because expression indexes only match constants.
+    """
+
+    type = Float()
+    inherit_cache = True
+    _traverse_internals = [
+        ('column', InternalTraversal.dp_clauseelement),
+        ('metric', InternalTraversal.dp_string),
+    ]
+
+    def __init__(self, column, metric: str):
+        self.column = column
+        self.metric = metric
+
+
+class has_metric(ColumnElement):
+    """Whether a metric_values JSON column contains the metric (GIN-indexed `?` on PostgreSQL)."""
+
+    type = Boolean()
+    inherit_cache = True
+    _traverse_internals = [
+        ('column', InternalTraversal.dp_clauseelement),
+        ('metric', InternalTraversal.dp_string),
+    ]
+
+    def __init__(self, column, metric: str):
+        self.column = column
+        self.metric = metric
+
+
+def _json_path(metric: str) -> str:
+    return '$."' + metric.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+@compiles(metric_value)
+def _compile_metric_value(element, compiler, **kw):
+    key = compiler.render_literal_value(element.metric, String())
+    return f"CAST(({compiler.process(element.column, **kw)} ->> {key}) AS FLOAT)"
+
+
+@compiles(metric_value, 'sqlite')
+def _compile_metric_value_sqlite(element, compiler, **kw):
+    path = compiler.render_literal_value(_json_path(element.metric), String())
+    return f"JSON_EXTRACT({compiler.process(element.column, **kw)}, {path})"
+
+
+@compiles(has_metric)
+def _compile_has_metric(element, compiler, **kw):
+    key = compiler.render_literal_value(element.metric, String())
+    return f"({compiler.process(element.column, **kw)} ? {key})"
+
+
+@compiles(has_metric, 'sqlite')
+def _compile_has_metric_sqlite(element, compiler, **kw):
+    path = compiler.render_literal_value(_json_path(element.metric), String())
+    return f"(JSON_TYPE({compiler.process(element.column, **kw)}, {path}) IS NOT NULL)"
+
+
+def _raw_attribute(name: str) -> property:
+    """Expose a video_analytics_raw column on VideoAnalytics (loaded on first access)."""
+
+    def get(self):
+        return getattr(self.raw, name) if self.raw is not None else None
+
+    def set(self, value):
+        if self.raw is None:
+            if value is None:
+                return
+            self.raw = VideoAnalyticsRaw()
+        setattr(self.raw, name, value)
+
+    return property(get, set, doc=f"{name} from video_analytics_raw")
+
 
 class Account(Base):
     """Represents a YouTube account."""
@@ -49,6 +155,8 @@ class Channel(Base):
 
     __table_args__ = (
         UniqueConstraint('account_id', 'channel_id', name='uq_account_channel_id'),
+        # Conflict target of upsert_channels()
+        UniqueConstraint('account_id', 'url', name='uq_account_channel_url'),
         Index('idx_channels_account_id', 'account_id'),
         Index('idx_channels_url', 'url'),
     )
@@ -76,7 +184,6 @@ class Video(Base):
     scraping_history = relationship('ScrapingHistory', back_populates='video', cascade='all, delete-orphan')
 
     __table_args__ = (
-        Index('idx_videos_video_id', 'video_id'),
         Index('idx_videos_channel_id', 'channel_id'),
     )
 
@@ -106,54 +213,271 @@ class VideoAnalytics(Base):
 
     # Dates
     publish_start_date = Column(Date)
-    scraped_at = Column(DateTime, default=datetime.utcnow)
-
-    # Raw JSON data
-    top_metrics = Column(JSON)
-    traffic_sources = Column(JSON)
-    impressions_data = Column(JSON)
-    page_text = Column(Text)
+    # Partition key when video_analytics is partitioned by month (see partitioning.py)
+    scraped_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    # Change detection: a scrape whose content_hash equals the latest snapshot's
+    # extends that snapshot's run instead of inserting a row (see writers.py)
+    content_hash = Column(String(32))
+    last_seen_at = Column(DateTime)
+    observed_count = Column(Integer, nullable=False, default=1, server_default='1')
+
+    # Raw JSON data and page text, stored in video_analytics_raw
+    top_metrics = _raw_attribute('top_metrics')
+    traffic_sources = _raw_attribute('traffic_sources')
+    impressions_data = _raw_attribute('impressions_data')
+    page_text = _raw_attribute('page_text')
+    metric_values = _raw_attribute('metric_values')
 
     # Relationships
     video = relationship('Video', back_populates='analytics')
     account = relationship('Account', back_populates='analytics')
-    traffic_sources_breakdown = relationship('TrafficSource', back_populates='analytics', cascade='all, delete-orphan')
+    raw = relationship(
+        'VideoAnalyticsRaw',
+        uselist=False,
+        cascade='all, delete-orphan',
+        primaryjoin='VideoAnalytics.id == foreign(VideoAnalyticsRaw.analytics_id)',
+    )
+    traffic_sources_breakdown = relationship(
+        'TrafficSource',
+        back_populates='analytics',
+        cascade='all, delete-orphan',
+        primaryjoin='VideoAnalytics.id == foreign(TrafficSource.analytics_id)',
+    )
+    traffic_sources_wide = relationship(
+        'TrafficSourceBreakdown',
+        uselist=False,
+        cascade='all, delete-orphan',
+        primaryjoin='VideoAnalytics.id == foreign(TrafficSourceBreakdown.analytics_id)',
+    )
+    observations = relationship(
+        'VideoAnalyticsObservation',
+        cascade='all, delete-orphan',
+        primaryjoin='VideoAnalytics.id == foreign(VideoAnalyticsObservation.analytics_id)',
+    )
 
     __table_args__ = (
+        # Also serves lookups by video_id and (video_id, account_id)
         UniqueConstraint('video_id', 'account_id', 'scraped_at', name='uq_video_account_timestamp'),
-        Index('idx_video_analytics_video_id', 'video_id'),
-        Index('idx_video_analytics_account_id', 'account_id'),
-        Index('idx_video_analytics_scraped_at', 'scraped_at'),
-        Index('idx_video_analytics_video_account', 'video_id', 'account_id'),
+        # An account's snapshots newest first (GET /analytics?account_id=...)
+        Index('idx_video_analytics_account_scraped', 'account_id', scraped_at.desc()),
+        # Newest snapshot per video of an account, with the stats columns for index-only scans
+        Index(
+            'idx_video_analytics_account_video_scraped', 'account_id', 'video_id', scraped_at.desc(),
+            postgresql_include=list(STATS_COLUMNS),
+        ),
+        # All snapshots newest first (GET /analytics without an account filter)
+        Index('idx_video_analytics_scraped_desc', scraped_at.desc()),
+        # Time-range scans (compaction, export, pruning): BRIN on PostgreSQL, B-tree elsewhere
+        Index('idx_video_analytics_scraped_at_range', 'scraped_at', postgresql_using='brin'),
     )
 
+    @property
+    def traffic_breakdown(self) -> List['TrafficSource']:
+        """Traffic source rows of this snapshot, whichever layout stores them."""
+        if self.traffic_sources_wide is not None:
+            return self.traffic_sources_wide.as_rows()
+        return list(self.traffic_sources_breakdown)
+
     def __repr__(self) -> str:
         return f"<VideoAnalytics(video_id='{self.video_id}', views={self.views})>"
 
 
+class VideoAnalyticsRaw(Base):
+    """Raw scraper payloads of an analytics snapshot, kept out of the hot table."""
+
+    __tablename__ = 'video_analytics_raw'
+
+    # No foreign key, see TrafficSource.analytics_id
+    analytics_id = Column(Integer, primary_key=True, autoincrement=False)
+    top_metrics = Column(JSONType)
+    traffic_sources = Column(JSONType)
+    impressions_data = Column(JSONType)
+    page_text = Column(Text)
+    # Parsed numbers of top_metrics and impressions_data keyed by label, e.g. {"Views": 1200.0}
+    metric_values = Column(JSONType)
+
+    __table_args__ = (
+        Index('idx_video_analytics_raw_metric_values', 'metric_values', postgresql_using='gin')
+        .ddl_if(dialect='postgresql'),
+    )
+
+    def __repr__(self) -> str:
+        return f"<VideoAnalyticsRaw(analytics_id={self.analytics_id})>"
+
+
+class VideoAnalyticsObservation(Base):
+    """Later unchanged scrape folded into a snapshot's run (see writers.py fold_unchanged)."""
+
+    __tablename__ = 'video_analytics_observations'
+
+    # No foreign key, see TrafficSource.analytics_id
+    analytics_id = Column(Integer, primary_key=True, autoincrement=False)
+    observed_at = Column(DateTime, primary_key=True)
+
+    def __repr__(self) -> str:
+        return f"<VideoAnalyticsObservation(analytics_id={self.analytics_id}, observed_at={self.observed_at})>"
+
+
+def metric_index_name(metric: str) -> str:
+    """Name of the expression index on metric_values for a metric."""
+    slug = ''.join(ch if ch.isalnum() else '_' for ch in metric.lower()).strip('_')
+    return f'idx_video_analytics_raw_metric_{slug}'[:63]
+
+
+for _metric in INDEXED_METRICS:
+    Index(metric_index_name(_metric), metric_value(VideoAnalyticsRaw.metric_values, _metric))
+
+
+class VideoAnalyticsLatest(Base):
+    """Most recent analytics snapshot per video and account (current state)."""
+
+    __tablename__ = 'video_analytics_latest'
+
+    video_id = Column(String(11), ForeignKey('videos.video_id', ondelete='CASCADE'), primary_key=True)
+    account_id = Column(Integer, ForeignKey('accounts.id', ondelete='CASCADE'), primary_key=True)
+    # Snapshot this row was copied from (no foreign key, see TrafficSource.analytics_id)
+    analytics_id = Column(Integer, nullable=False)
+    scraped_at = Column(DateTime, nullable=False)
+
+    # Numeric metrics copied from the snapshot
+    impressions = Column(Integer)
+    views = Column(Integer)
+    unique_viewers = Column(Integer)
+    ctr_percentage = Column(Numeric(5, 2))
+    views_from_impressions = Column(Integer)
+    youtube_recommending_percentage = Column(Numeric(5, 2))
+    ctr_from_impressions_percentage = Column(Numeric(5, 2))
+    avg_view_duration_seconds = Column(Integer)
+    watch_time_hours = Column(Numeric(10, 2))
+    publish_start_date = Column(Date)
+    content_hash = Column(String(32))
+    last_seen_at = Column(DateTime)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index('idx_video_analytics_latest_account_stats', 'account_id', postgresql_include=list(STATS_COLUMNS)),
+    )
+
+    def __repr__(self) -> str:
+        return f"<VideoAnalyticsLatest(video_id='{self.video_id}', account_id={self.account_id}, views={self.views})>"
+
+
+class AnalyticsDailyRollup(Base):
+    """Per account, channel and day totals of the snapshots scraped that day."""
+
+    __tablename__ = 'analytics_daily_rollup'
+
+    account_id = Column(Integer, ForeignKey('accounts.id', ondelete='CASCADE'), primary_key=True)
+    # 0 for videos that are not linked to a channel (NULL can't be part of the key)
+    channel_id = Column(Integer, primary_key=True, default=0)
+    day = Column(Date, primary_key=True)
+
+    snapshots = Column(Integer, nullable=False, default=0)
+    impressions = Column(BigInteger, nullable=False, default=0)
+    views = Column(BigInteger, nullable=False, default=0)
+    unique_viewers = Column(BigInteger, nullable=False, default=0)
+    watch_time_hours = Column(Numeric(14, 2), nullable=False, default=0)
+    # Sum and count of non-zero CTRs, for averages over any set of rollup rows
+    ctr_sum = Column(Numeric(14, 2), nullable=False, default=0)
+    ctr_count = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index('idx_analytics_daily_rollup_day', 'day'),
+    )
+
+    def __repr__(self) -> str:
+        return f"<AnalyticsDailyRollup(account_id={self.account_id}, channel_id={self.channel_id}, day={self.day})>"
+
+
+class TrafficSourceType(Base):
+    """Dictionary of traffic source names, referenced by a smallint id."""
+
+    __tablename__ = 'traffic_source_types'
+
+    # INTEGER PRIMARY KEY on SQLite so ids are assigned automatically
+    id = Column(SmallInteger().with_variant(Integer(), 'sqlite'), primary_key=True)
+    name = Column(String(100), unique=True, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<TrafficSourceType(id={self.id}, name='{self.name}')>"
+
+
+@event.listens_for(TrafficSourceType.__table__, 'after_create')
+def _seed_traffic_source_types(target, connection, **kw):
+    connection.execute(insert(target), [{'name': name} for name in TRAFFIC_SOURCE_NAMES])
+
+
 class TrafficSource(Base):
     """Represents traffic source breakdown for a video's analytics."""
 
     __tablename__ = 'traffic_sources'
 
     id = Column(Integer, primary_key=True)
-    analytics_id = Column(Integer, ForeignKey('video_analytics.id', ondelete='CASCADE'), nullable=False)
-    source_name = Column(String(100))
+    # No database foreign key: a partitioned video_analytics has no unique
+    # constraint on id alone. The relationship below deletes breakdown rows
+    # together with their analytics snapshot.
+    analytics_id = Column(Integer, nullable=False)
+    source_type_id = Column(SmallInteger, ForeignKey('traffic_source_types.id'), nullable=False)
     percentage = Column(Numeric(5, 2))
     created_at = Column(DateTime, default=datetime.utcnow)
 
     # Relationships
-    analytics = relationship('VideoAnalytics', back_populates='traffic_sources_breakdown')
+    analytics = relationship(
+        'VideoAnalytics',
+        back_populates='traffic_sources_breakdown',
+        primaryjoin='VideoAnalytics.id == foreign(TrafficSource.analytics_id)',
+    )
+    source_type = relationship('TrafficSourceType', lazy='joined')
 
     __table_args__ = (
         Index('idx_traffic_sources_analytics_id', 'analytics_id'),
-        Index('idx_traffic_sources_source_name', 'source_name'),
+        Index('idx_traffic_sources_source_type_id', 'source_type_id'),
     )
 
+    @property
+    def source_name(self) -> Optional[str]:
+        return self.source_type.name if self.source_type is not None else None
+
     def __repr__(self) -> str:
         return f"<TrafficSource(source='{self.source_name}', percentage={self.percentage})>"
 
 
+class TrafficSourceBreakdown(Base):
+    """
+    Traffic source breakdown of one snapshot in a single row (DB_TRAFFIC_LAYOUT=wide).
+
+    source_type_ids[i] received percentages[i] percent of the views. Arrays on
+    PostgreSQL, JSON lists on SQLite.
+    """
+
+    __tablename__ = 'traffic_source_breakdowns'
+
+    # No foreign key, see TrafficSource.analytics_id
+    analytics_id = Column(Integer, primary_key=True, autoincrement=False)
+    source_type_ids = Column(JSON().with_variant(ARRAY(SmallInteger), 'postgresql'), nullable=False)
+    percentages = Column(JSON().with_variant(ARRAY(Numeric(5, 2)), 'postgresql'), nullable=False)
+
+    def as_rows(self) -> List[TrafficSource]:
+        """Unsaved TrafficSource objects for the breakdown (for serialization)."""
+        session = object_session(self)
+        return [
+            TrafficSource(
+                analytics_id=self.analytics_id,
+                source_type_id=source_type_id,
+                source_type=session.get(TrafficSourceType, source_type_id) if session is not None else None,
+                percentage=percentage,
+            )
+            for source_type_id, percentage in zip(self.source_type_ids, self.percentages)
+        ]
+
+    def __repr__(self) -> str:
+        return f"<TrafficSourceBreakdown(analytics_id={self.analytics_id}, sources={len(self.source_type_ids)})>"
+
+
 class ScrapingHistory(Base):
     """Tracks scraping attempts and history."""
 
@@ -0,0 +1,344 @@
+"""Monthly range partitioning of video_analytics by scraped_at (PostgreSQL only)."""
+
+import re
+from datetime import date, datetime
+from typing import Any, Dict, List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateIndex
+
+from src.database.connection import DatabaseConnection, db
+from src.database.models import VideoAnalytics
+
+PARENT_TABLE = 'video_analytics'
+LEGACY_TABLE = 'video_analytics_legacy'
+DEFAULT_PARTITION = 'video_analytics_default'
+ARCHIVE_SCHEMA = 'archive'
+
+# Tables keyed by video_analytics.id whose rows are retired with their partition
+CHILD_TABLES = ('traffic_sources', 'traffic_source_breakdowns', 'video_analytics_raw', 'video_analytics_observations')
+
+# video_analytics_p202501 holds [2025-01-01, 2025-02-01)
+_PARTITION_NAME = re.compile(r'^video_analytics_p(\d{4})(\d{2})$')
+
+
+
+def month_start(value: date) -> date:
+    """First day of the month containing value."""
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    """First day of the month `months` after value's month."""
+    index = value.year * 12 + (value.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """Name of the partition holding the month."""
+    return f"{PARENT_TABLE}_p{month.year:04d}{month.month:02d}"
+
+
+class PartitionManager:
+    """
+    Manages monthly partitions of video_analytics.
+
+    The partitioned table's primary key is (id, scraped_at), because PostgreSQL
+    requires unique constraints to include the partition key. traffic_sources
+    therefore cannot keep a database foreign key to video_analytics.id; the ORM
+    relationship still links them and deletes breakdown rows with their
+    snapshot, and retiring a partition removes or archives its traffic rows,
+    raw payloads (video_analytics_raw) and folded scrapes
+    (video_analytics_observations).
+    """
+
+    def __init__(self, db_connection: DatabaseConnection = None, months_ahead: int = 3):
+        """
+        Initialize partition manager.
+
+        Args:
+            db_connection: DatabaseConnection instance (uses global db if None)
+            months_ahead: Number of future monthly partitions to keep created
+        """
+        self.db = db_connection or db
+        self.months_ahead = max(0, months_ahead)
+
+    @property
+    def is_supported(self) -> bool:
+        """Whether the database supports native partitioning (PostgreSQL)."""
+        return self.db.engine.dialect.name == 'postgresql'
+
+    def is_partitioned(self) -> bool:
+        """Whether video_analytics is already a partitioned table."""
+        if not self.is_supported:
+            return False
+        with self.db.engine.connect() as conn:
+            return self._is_partitioned(conn)
+
+    # ==================== Inspection ====================
+
+    def list_partitions(self) -> List[Dict[str, Any]]:
+        """
+        List partitions with their bounds and estimated row counts.
+
+        Returns:
+            List of dicts with name, month (None for the default partition),
+            bound and rows, ordered by month
+        """
+        if not self.is_partitioned():
+            return []
+        with self.db.engine.connect() as conn:
+            rows = conn.execute(text("""
+                SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), c.reltuples::bigint
+                FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = CAST(:parent AS regclass)
+            """), {'parent': PARENT_TABLE}).all()
+
+        partitions = []
+        for name, bound, estimated_rows in rows:
+            match = _PARTITION_NAME.match(name)
+            partitions.append({
+                'name': name,
+                'month': date(int(match.group(1)), int(match.group(2)), 1) if match else None,
+                'bound': bound,
+                'rows': max(0, estimated_rows),
+            })
+        return sorted(partitions, key=lambda p: (p['month'] is None, p['month'] or date.min))
+
+    # ==================== Maintenance ====================
+
+    def ensure_partitions(self, start: date = None, months_ahead: int = None) -> List[str]:
+        """
+        Create any missing monthly partitions from start through months_ahead.
+
+        Args:
+            start: First month to cover (default: current month)
+            months_ahead: Future months to cover (default: self.months_ahead)
+
+        Returns:
+            Names of the partitions that were created
+        """
+        if not self.is_partitioned():
+            return []
+        first = month_start(start or date.today())
+        last = add_months(month_start(date.today()), self.months_ahead if months_ahead is None else months_ahead)
+        last = max(first, last)
+        created = []
+        with self.db.engine.begin() as conn:
+            month = first
+            while month <= last:
+                if self._create_partition(conn, month):
+                    created.append(partition_name(month))
+                month = add_months(month, 1)
+        for name in created:
+            print(f"  ✓ Created partition {name}")
+        return created
+
+    def retire_partitions(self, keep_months: int, mode: str = 'archive') -> List[str]:
+        """
+        Detach partitions older than keep_months and archive or drop them.
+
+        video_analytics_latest rows copied from a retired snapshot are rebuilt
+        from the remaining history (or removed), so change detection never
+        extends a run whose snapshot is gone.
+
+        Args:
+            keep_months: Number of most recent months (including the current one) to keep
+            mode: 'archive' moves the partition and its traffic sources and raw
+                  payloads to the archive schema, 'drop' deletes them
+
+        Returns:
+            Names of the retired partitions
+        """
+        if mode not in ('archive', 'drop'):
+            raise ValueError(f"Unknown retire mode '{mode}' (expected 'archive' or 'drop')")
+        cutoff = add_months(month_start(date.today()), -(max(1, keep_months) - 1))
+        old = [p for p in self.list_partitions() if p['month'] is not None and p['month'] < cutoff]
+
+        from src.database.writers import ScraperDatabaseWriter
+
+        writer = ScraperDatabaseWriter(self.db)
+        retired = []
+        for partition in old:
+            name = partition['name']
+            with self.db.session_scope() as session:
+                conn = session.connection()
+                stale = list(conn.execute(text(
+                    f"SELECT DISTINCT video_id FROM video_analytics_latest WHERE analytics_id IN (SELECT id FROM {name})"
+                )).scalars())
+                conn.execute(text(f'ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}'))
+                if mode == 'archive':
+                    conn.execute(text(f'CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}'))
+                for child in CHILD_TABLES:
+                    if mode == 'archive':
+                        conn.execute(text(f"""
+                            CREATE TABLE {ARCHIVE_SCHEMA}.{child}_{name[len(PARENT_TABLE) + 1:]} AS
+                            SELECT t.* FROM {child} t WHERE t.analytics_id IN (SELECT id FROM {name})
+                        """))
+                    conn.execute(text(f"DELETE FROM {child} WHERE analytics_id IN (SELECT id FROM {name})"))
+                if mode == 'archive':
+                    conn.execute(text(f'ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}'))
+                else:
+                    conn.execute(text(f'DROP TABLE {name}'))
+                if stale:
+                    writer.refresh_latest(session, video_ids=stale)
+            retired.append(name)
+            print(f"  ✓ {'Archived' if mode == 'archive' else 'Dropped'} partition {name}")
+        return retired
+
+    # ==================== Migration ====================
+
+    def convert_table(self, keep_legacy: bool = False) -> Dict[str, Any]:
+        """
+        Convert an existing plain video_analytics table into a partitioned one.
+
+        Runs in a single transaction: the old table is renamed, a partitioned
+        table with the same columns, constraints and indexes is created,
+        partitions covering all existing data plus months_ahead are added,
+        rows are copied, and the old table is dropped (or kept as
+        video_analytics_legacy). Rows without scraped_at get the migration time.
+
+        Args:
+            keep_legacy: Keep the old table as video_analytics_legacy
+
+        Returns:
+            Dict with rows_copied and partitions
+        """
+        if not self.is_supported:
+            raise RuntimeError('Partitioning requires PostgreSQL')
+
+        with self.db.engine.begin() as conn:
+            if self._is_partitioned(conn):
+                print(f"  ✓ {PARENT_TABLE} is already partitioned")
+                return {'rows_copied': 0, 'partitions': len(self.list_partitions())}
+
+            conn.execute(text(f'LOCK TABLE {PARENT_TABLE} IN ACCESS EXCLUSIVE MODE'))
+            self._rename_legacy(conn)
+
+            conn.execute(text(f"""
+                CREATE TABLE {PARENT_TABLE} (LIKE {LEGACY_TABLE} INCLUDING DEFAULTS INCLUDING STORAGE)
+                PARTITION BY RANGE (scraped_at)
+            """))
+            conn.execute(text(f'ALTER TABLE {PARENT_TABLE} ALTER COLUMN scraped_at SET NOT NULL'))
+            conn.execute(text(f"""
+                ALTER TABLE {PARENT_TABLE}
+                    ADD CONSTRAINT {PARENT_TABLE}_pkey PRIMARY KEY (id, scraped_at),
+                    ADD CONSTRAINT uq_video_account_timestamp UNIQUE (video_id, account_id, scraped_at),
+                    ADD CONSTRAINT {PARENT_TABLE}_video_id_fkey FOREIGN KEY (video_id)
+                        REFERENCES videos (video_id) ON DELETE CASCADE,
+                    ADD CONSTRAINT {PARENT_TABLE}_account_id_fkey FOREIGN KEY (account_id)
+                        REFERENCES accounts (id) ON DELETE CASCADE
+            """))
+            # The model's indexes, created on the parent and inherited by every partition
+            for index in VideoAnalytics.__table__.indexes:
+                conn.execute(CreateIndex(index))
+            conn.execute(text(f'CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} DEFAULT'))
+
+            # The id sequence now belongs to the new table
+            sequence = conn.scalar(text("SELECT pg_get_serial_sequence(:table, 'id')"), {'table': LEGACY_TABLE})
+            if sequence:
+                conn.execute(text(f'ALTER SEQUENCE {sequence} OWNED BY {PARENT_TABLE}.id'))
+
+            oldest, newest = conn.execute(text(f'SELECT MIN(scraped_at), MAX(scraped_at) FROM {LEGACY_TABLE}')).one()
+            today = month_start(date.today())
+            month = month_start(oldest.date()) if oldest else today
+            last = max(add_months(today, self.months_ahead), month_start(newest.date()) if newest else today)
+            partitions = 0
+            while month <= last:
+                self._create_partition(conn, month)
+                partitions += 1
+                month = add_months(month, 1)
+
+            columns = [row[0] for row in conn.execute(text("""
+                SELECT column_name FROM information_schema.columns
+                WHERE table_schema = current_schema() AND table_name = :table
+                ORDER BY ordinal_position
+            """), {'table': LEGACY_TABLE})]
+            select_list = ', '.join(
+                'COALESCE(scraped_at, now())' if column == 'scraped_at' else column for column in columns
+            )
+            rows_copied = conn.execute(text(
+                f"INSERT INTO {PARENT_TABLE} ({', '.join(columns)}) SELECT {select_list} FROM {LEGACY_TABLE}"
+            )).rowcount
+
+            # traffic_sources.analytics_id can no longer reference video_analytics.id
+            for (constraint,) in conn.execute(text("""
+                SELECT conname FROM pg_constraint
+                WHERE conrelid = CAST('traffic_sources' AS regclass)
+                  AND confrelid = CAST(:legacy AS regclass) AND contype = 'f'
+            """), {'legacy': LEGACY_TABLE}).all():
+                conn.execute(text(f'ALTER TABLE traffic_sources DROP CONSTRAINT {constraint}'))
+
+            if not keep_legacy:
+                conn.execute(text(f'DROP TABLE {LEGACY_TABLE}'))
+
+        partitions += 1  # the default partition
+        print(f"✓ Partitioned {PARENT_TABLE}: {rows_copied:,} rows copied into {partitions} partitions")
+        return {'rows_copied': rows_copied, 'partitions': partitions}
+
+    # ==================== Internals ====================
+
+    @staticmethod
+    def _is_partitioned(conn: Connection) -> bool:
+        return bool(conn.scalar(text("""
+            SELECT EXISTS (
+                SELECT 1 FROM pg_partitioned_table p
+                JOIN pg_class c ON c.oid = p.partrelid
+                WHERE c.oid = to_regclass(:parent)
+            )
+        """), {'parent': PARENT_TABLE}))
+
+    @staticmethod
+    def _rename_legacy(conn: Connection) -> None:
+        """Rename the plain table and its constraints/indexes out of the way."""
+        conn.execute(text(f'ALTER TABLE {PARENT_TABLE} RENAME TO {LEGACY_TABLE}'))
+        for (constraint,) in conn.execute(text("""
+            SELECT conname FROM pg_constraint WHERE conrelid = CAST(:legacy AS regclass)
+        """), {'legacy': LEGACY_TABLE}).all():
+            conn.execute(text(f'ALTER TABLE {LEGACY_TABLE} RENAME CONSTRAINT {constraint} TO {constraint}_legacy'))
+        for (index,) in conn.execute(text("""
+            SELECT indexname FROM pg_indexes
+            WHERE schemaname = current_schema() AND tablename = :legacy AND indexname NOT LIKE '%\\_legacy'
+        """), {'legacy': LEGACY_TABLE}).all():
+            conn.execute(text(f'ALTER INDEX {index} RENAME TO {index}_legacy'))
+
+    @staticmethod
+    def _create_partition(conn: Connection, month: date) -> bool:
+        """
+        Create the partition for a month if missing.
+
+        Rows already sitting in the default partition for that month are moved
+        into the new partition (PostgreSQL refuses to attach otherwise).
+
+        Returns:
+            True if the partition was created
+        """
+        name = partition_name(month)
+        if conn.scalar(text('SELECT to_regclass(:name)'), {'name': name}) is not None:
+            return False
+
+        lower = datetime.combine(month, datetime.min.time())
+        upper = datetime.combine(add_months(month, 1), datetime.min.time())
+        bounds = {'lower': lower, 'upper': upper}
+        has_default = conn.scalar(text('SELECT to_regclass(:name)'), {'name': DEFAULT_PARTITION}) is not None
+        stray = has_default and conn.scalar(text(
+            f'SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE scraped_at >= :lower AND scraped_at < :upper)'
+        ), bounds)
+
+        if stray:
+            conn.execute(text(f'ALTER TABLE {PARENT_TABLE} DETACH PARTITION {DEFAULT_PARTITION}'))
+        conn.execute(text(
+            f"CREATE TABLE {name} PARTITION OF {PARENT_TABLE} "
+            f"FOR VALUES FROM ('{lower.isoformat(sep=' ')}') TO ('{upper.isoformat(sep=' ')}')"
+        ))
+        if stray:
+            conn.execute(text(
+                f'INSERT INTO {name} SELECT * FROM {DEFAULT_PARTITION} WHERE scraped_at >= :lower AND scraped_at < :upper'
+            ), bounds)
+            conn.execute(text(
+                f'DELETE FROM {DEFAULT_PARTITION} WHERE scraped_at >= :lower AND scraped_at < :upper'
+            ), bounds)
+            conn.execute(text(f'ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT'))
+        return True
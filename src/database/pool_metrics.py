@@ -0,0 +1,148 @@
+"""Connection pool instrumentation: checkout wait, connections in use, overflow and pre-ping cost."""
+
+import threading
+import time
+from typing import Any, Dict, Type
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import Pool, QueuePool
+
+# connection_record.info key: when a connection that will be pre-pinged left the pool
+_PING_STARTED = 'pool_metrics_ping_started'
+
+
+class PoolMetrics:
+    """
+    Counters of one engine's connection pool, fed by pool events.
+
+    Checkout wait (queueing for a free connection, including opening a new
+    one) is timed by the pool class from instrumented_pool_class(); the
+    pre-ping cost is the time between leaving the pool and the checkout
+    event, which SQLAlchemy fires right after the ping.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = self._empty()
+
+    @staticmethod
+    def _empty() -> Dict[str, Any]:
+        return {
+            'connects': 0,
+            'checkouts': 0,
+            'checkins': 0,
+            'invalidations': 0,
+            'timeouts': 0,
+            'in_use': 0,
+            'peak_in_use': 0,
+            'waits': 0,
+            'total_wait_seconds': 0.0,
+            'max_wait_seconds': 0.0,
+            'pre_pings': 0,
+            'total_pre_ping_seconds': 0.0,
+            'max_pre_ping_seconds': 0.0,
+        }
+
+    @property
+    def in_use(self) -> int:
+        """Connections currently checked out."""
+        with self._lock:
+            return self._metrics['in_use']
+
+    def attach(self, engine: Engine) -> None:
+        """Listen to the pool events of an engine (kept across engine.dispose())."""
+        event.listen(engine, 'connect', self._on_connect)
+        event.listen(engine, 'checkout', self._on_checkout)
+        event.listen(engine, 'checkin', self._on_checkin)
+        event.listen(engine, 'invalidate', self._on_invalidate)
+
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self._metrics['waits'] += 1
+            self._metrics['total_wait_seconds'] += seconds
+            self._metrics['max_wait_seconds'] = max(self._metrics['max_wait_seconds'], seconds)
+            if timed_out:
+                self._metrics['timeouts'] += 1
+
+    def _on_connect(self, dbapi_connection, connection_record) -> None:
+        with self._lock:
+            self._metrics['connects'] += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        ping_started = connection_record.info.pop(_PING_STARTED, None)
+        with self._lock:
+            self._metrics['checkouts'] += 1
+            self._metrics['in_use'] += 1
+            self._metrics['peak_in_use'] = max(self._metrics['peak_in_use'], self._metrics['in_use'])
+            if ping_started is not None:
+                seconds = time.perf_counter() - ping_started
+                self._metrics['pre_pings'] += 1
+                self._metrics['total_pre_ping_seconds'] += seconds
+                self._metrics['max_pre_ping_seconds'] = max(self._metrics['max_pre_ping_seconds'], seconds)
+
+    def _on_checkin(self, dbapi_connection, connection_record) -> None:
+        with self._lock:
+            self._metrics['checkins'] += 1
+            self._metrics['in_use'] = max(0, self._metrics['in_use'] - 1)
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception) -> None:
+        with self._lock:
+            self._metrics['invalidations'] += 1
+
+    def snapshot(self, pool: Pool) -> Dict[str, Any]:
+        """
+        Get the counters plus the live state of a pool.
+
+        Returns:
+            Dict with checkout/connect counts, connections in use (now and
+            peak), average/max checkout wait and pre-ping cost, and for
+            queue pools the size, idle connections and overflow in use
+        """
+        with self._lock:
+            metrics = dict(self._metrics)
+        total_wait = metrics.pop('total_wait_seconds')
+        total_ping = metrics.pop('total_pre_ping_seconds')
+        metrics['avg_wait_ms'] = round(total_wait / metrics['waits'] * 1000, 3) if metrics['waits'] else 0.0
+        metrics['max_wait_ms'] = round(metrics.pop('max_wait_seconds') * 1000, 3)
+        metrics['avg_pre_ping_ms'] = round(total_ping / metrics['pre_pings'] * 1000, 3) if metrics['pre_pings'] else 0.0
+        metrics['max_pre_ping_ms'] = round(metrics.pop('max_pre_ping_seconds') * 1000, 3)
+        metrics['pre_ping_total_ms'] = round(total_ping * 1000, 3)
+        metrics['pool_class'] = type(pool).__name__
+        if isinstance(pool, QueuePool):
+            metrics['pool_size'] = pool.size()
+            metrics['idle'] = pool.checkedin()
+            metrics['checked_out'] = pool.checkedout()
+            metrics['overflow'] = max(0, pool.overflow())
+            metrics['max_overflow'] = pool._max_overflow
+        return metrics
+
+
+class _TimedCheckout:
+    """Pool mixin timing how long a checkout waits for a connection."""
+
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.record_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        now = time.perf_counter()
+        self.metrics.record_wait(now - started)
+        if self._pre_ping and not record.fresh:
+            record.info[_PING_STARTED] = now
+        return record
+
+
+def instrumented_pool_class(pool_class: Type[QueuePool], metrics: PoolMetrics) -> Type[QueuePool]:
+    """
+    Subclass of a queue pool class that reports checkout waits to metrics.
+
+    The metrics live on the class, so they survive pool.recreate() (which
+    engine.dispose() and pre-ping failures use to replace the pool).
+    """
+    return type(f'Timed{pool_class.__name__}', (_TimedCheckout, pool_class), {'metrics': metrics})
@@ -0,0 +1,251 @@
+"""Storage of raw scraper payloads in video_analytics_raw."""
+
+from typing import Any, Dict, List
+
+from sqlalchemy import bindparam, inspect, select, text, update
+from sqlalchemy.schema import CreateIndex
+
+from src.database.connection import DatabaseConnection, db
+from src.database.models import RAW_COLUMNS, VideoAnalyticsRaw
+
+RAW_TABLE = VideoAnalyticsRaw.__tablename__
+
+# Columns holding JSON documents (stored as JSONB on PostgreSQL)
+JSON_RAW_COLUMNS = [column for column in RAW_COLUMNS if column != 'page_text']
+
+
+def set_raw_compression(db_connection: DatabaseConnection = None, method: str = 'lz4') -> List[str]:
+    """
+    Switch TOAST compression of the raw payload columns (PostgreSQL 14+).
+
+    lz4 compresses and decompresses much faster than the default pglz. Servers
+    without lz4 support (or older than 14) keep pglz; SQLite is left untouched.
+
+    Args:
+        db_connection: DatabaseConnection instance (uses global db if None)
+        method: Compression method ('lz4' or 'pglz')
+
+    Returns:
+        Columns whose compression was set
+    """
+    connection = db_connection or db
+    if connection.config.is_sqlite:
+        return []
+
+    with connection.engine.connect() as conn:
+        if int(conn.execute(text('SHOW server_version_num')).scalar()) < 140000:
+            return []
+        # Skip columns already using the method (ALTER TABLE takes an exclusive lock)
+        current = set(conn.execute(
+            text(f"""
+                SELECT attname FROM pg_attribute
+                WHERE attrelid = CAST('{RAW_TABLE}' AS regclass) AND attcompression = :code
+            """),
+            {'code': method[0]},
+        ).scalars())
+
+    changed = []
+    for column in RAW_COLUMNS:
+        if column in current:
+            continue
+        try:
+            with connection.engine.begin() as conn:
+                conn.execute(text(f'ALTER TABLE {RAW_TABLE} ALTER COLUMN {column} SET COMPRESSION {method}'))
+            changed.append(column)
+        except Exception as e:
+            print(f"⚠ Could not set {method} compression on {RAW_TABLE}.{column}, keeping default: {getattr(e, 'orig', e)}")
+            break
+    return changed
+
+
+def legacy_raw_columns(db_connection: DatabaseConnection = None) -> List[str]:
+    """Raw payload columns still present on video_analytics (schemas created before the split)."""
+    connection = db_connection or db
+    existing = {column['name'] for column in inspect(connection.engine).get_columns('video_analytics')}
+    return [column for column in RAW_COLUMNS if column in existing]
+
+
+def split_raw_columns(
+    db_connection: DatabaseConnection = None,
+    batch_size: int = 10000,
+    drop_columns: bool = True,
+) -> Dict[str, Any]:
+    """
+    Move raw payloads from legacy video_analytics columns into video_analytics_raw.
+
+    Rows are copied in id ranges of batch_size, one transaction each, so the
+    migration can be interrupted and re-run. Once everything is copied the
+    legacy columns are dropped; run VACUUM FULL (PostgreSQL) or VACUUM
+    (SQLite) afterwards to return the space.
+
+    Args:
+        db_connection: DatabaseConnection instance (uses global db if None)
+        batch_size: Number of analytics ids per copy transaction
+        drop_columns: Drop the legacy columns from video_analytics after copying
+
+    Returns:
+        Dict with copied row count and dropped columns
+    """
+    connection = db_connection or db
+    VideoAnalyticsRaw.__table__.create(bind=connection.engine, checkfirst=True)
+    set_raw_compression(connection)
+
+    columns = legacy_raw_columns(connection)
+    if not columns:
+        print("✓ video_analytics has no raw payload columns, nothing to migrate")
+        return {'copied': 0, 'dropped_columns': []}
+
+    with connection.engine.connect() as conn:
+        first_id, last_id = conn.execute(text('SELECT MIN(id), MAX(id) FROM video_analytics')).one()
+
+    column_list = ', '.join(columns)
+    any_payload = ' OR '.join(f'{column} IS NOT NULL' for column in columns)
+    copied = 0
+    if first_id is not None:
+        for lower in range(first_id, last_id + 1, batch_size):
+            with connection.engine.begin() as conn:
+                result = conn.execute(
+                    text(f"""
+                        INSERT INTO {RAW_TABLE} (analytics_id, {column_list})
+                        SELECT id, {column_list} FROM video_analytics
+                        WHERE id >= :lower AND id < :upper AND ({any_payload})
+                        ON CONFLICT (analytics_id) DO NOTHING
+                    """),
+                    {'lower': lower, 'upper': lower + batch_size},
+                )
+            copied += max(result.rowcount, 0)
+            print(f"  ✓ Copied ids {lower:,}-{min(lower + batch_size - 1, last_id):,} ({copied:,} rows so far)")
+
+    dropped = []
+    if drop_columns:
+        with connection.engine.begin() as conn:
+            for column in columns:
+                conn.execute(text(f'ALTER TABLE video_analytics DROP COLUMN {column}'))
+                dropped.append(column)
+        print(f"✓ Dropped {', '.join(dropped)} from video_analytics")
+
+    return {'copied': copied, 'dropped_columns': dropped}
+
+
+def prepare_raw_table(db_connection: DatabaseConnection = None) -> None:
+    """
+    Bring an existing video_analytics_raw up to the current model.
+
+    Adds columns introduced after the table was created (metric_values) and
+    sets lz4 compression on PostgreSQL. Cheap enough to run on every start.
+    """
+    connection = db_connection or db
+    existing = {column['name'] for column in inspect(connection.engine).get_columns(RAW_TABLE)}
+    table = VideoAnalyticsRaw.__table__
+    for column in table.columns:
+        if column.name not in existing:
+            column_type = column.type.compile(dialect=connection.engine.dialect)
+            with connection.engine.begin() as conn:
+                conn.execute(text(f'ALTER TABLE {RAW_TABLE} ADD COLUMN {column.name} {column_type}'))
+            print(f"✓ Added {RAW_TABLE}.{column.name}")
+    set_raw_compression(connection)
+
+
+def convert_raw_to_jsonb(db_connection: DatabaseConnection = None) -> List[str]:
+    """
+    Convert json columns of video_analytics_raw to jsonb (PostgreSQL only).
+
+    Rewrites the table under an exclusive lock; run it from the migration
+    script, not at application start.
+
+    Returns:
+        Converted columns
+    """
+    connection = db_connection or db
+    if connection.config.is_sqlite:
+        return []
+
+    with connection.engine.connect() as conn:
+        json_columns = list(conn.execute(
+            text("""
+                SELECT column_name FROM information_schema.columns
+                WHERE table_schema = current_schema() AND table_name = :table AND data_type = 'json'
+            """),
+            {'table': RAW_TABLE},
+        ).scalars())
+    columns = [column for column in JSON_RAW_COLUMNS if column in json_columns]
+    if columns:
+        alterations = ', '.join(f'ALTER COLUMN {column} TYPE jsonb USING {column}::jsonb' for column in columns)
+        with connection.engine.begin() as conn:
+            conn.execute(text(f'ALTER TABLE {RAW_TABLE} {alterations}'))
+        print(f"✓ Converted {', '.join(columns)} to jsonb")
+    return columns
+
+
+def backfill_metric_values(
+    db_connection: DatabaseConnection = None,
+    batch_size: int = 5000,
+    writer=None,
+) -> int:
+    """
+    Fill video_analytics_raw.metric_values for rows written before it existed.
+
+    Args:
+        db_connection: DatabaseConnection instance (uses global db if None)
+        batch_size: Rows parsed and updated per transaction
+        writer: ScraperDatabaseWriter used for parsing (uses global db_writer if None)
+
+    Returns:
+        Number of rows updated
+    """
+    from src.database.writers import db_writer
+
+    connection = db_connection or db
+    writer = writer or db_writer
+    table = VideoAnalyticsRaw.__table__
+    updated = 0
+    last_id = None
+    while True:
+        query = (
+            select(table.c.analytics_id, table.c.top_metrics, table.c.impressions_data)
+            .where(table.c.metric_values.is_(None))
+            .order_by(table.c.analytics_id)
+            .limit(batch_size)
+        )
+        if last_id is not None:
+            query = query.where(table.c.analytics_id > last_id)
+        with connection.engine.begin() as conn:
+            rows = conn.execute(query).all()
+            if not rows:
+                break
+            last_id = rows[-1].analytics_id
+            values = [
+                {'key': row.analytics_id, 'metric_values': writer.build_metric_values(row.top_metrics, row.impressions_data)}
+                for row in rows
+            ]
+            values = [value for value in values if value['metric_values']]
+            if values:
+                conn.execute(
+                    update(table).where(table.c.analytics_id == bindparam('key')),
+                    values,
+                )
+        updated += len(values)
+        print(f"  ✓ Parsed metrics up to analytics id {last_id:,} ({updated:,} rows updated)")
+    return updated
+
+
+def ensure_metric_indexes(db_connection: DatabaseConnection = None) -> List[str]:
+    """
+    Create the metric_values GIN and expression indexes if missing.
+
+    create_all() only creates indexes together with a new table, so existing
+    databases get them here (CREATE INDEX IF NOT EXISTS).
+
+    Returns:
+        Names of the indexes ensured
+    """
+    connection = db_connection or db
+    ensured = []
+    with connection.engine.begin() as conn:
+        for index in VideoAnalyticsRaw.__table__.indexes:
+            if connection.config.is_sqlite and index.dialect_options['postgresql']['using'] == 'gin':
+                continue
+            conn.execute(CreateIndex(index, if_not_exists=True))
+            ensured.append(index.name)
+    print(f"✓ Ensured {len(ensured)} index(es) on {RAW_TABLE}")
+    return ensured
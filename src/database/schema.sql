@@ -20,6 +20,7 @@ CREATE TABLE IF NOT EXISTS channels (
     created_at TIMESTAMP DEFAULT NOW(),
     updated_at TIMESTAMP DEFAULT NOW(),
     UNIQUE(account_id, channel_id),
+    CONSTRAINT uq_account_channel_url UNIQUE (account_id, url),
     FOREIGN KEY (account_id) REFERENCES accounts(id) ON DELETE CASCADE
 );
 
@@ -37,12 +38,14 @@ CREATE TABLE IF NOT EXISTS videos (
     updated_at TIMESTAMP DEFAULT NOW()
 );
 
-CREATE INDEX IF NOT EXISTS idx_videos_video_id ON videos(video_id);
 CREATE INDEX IF NOT EXISTS idx_videos_channel_id ON videos(channel_id);
 
--- Main analytics table
+-- Main analytics table, partitioned by scraped_at month.
+-- Monthly partitions are created by src/database/partitioning.py
+-- (scripts/migration/partition_video_analytics.py --ensure); rows outside
+-- them land in video_analytics_default.
 CREATE TABLE IF NOT EXISTS video_analytics (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     video_id VARCHAR(11) NOT NULL REFERENCES videos(video_id) ON DELETE CASCADE,
     account_id INTEGER NOT NULL REFERENCES accounts(id) ON DELETE CASCADE,
 
@@ -59,35 +62,141 @@ CREATE TABLE IF NOT EXISTS video_analytics (
 
     -- Dates
     publish_start_date DATE,
-    scraped_at TIMESTAMP DEFAULT NOW(),
+    scraped_at TIMESTAMP NOT NULL DEFAULT NOW(),
 
-    -- Raw JSON data (for flexibility and debugging)
-    top_metrics JSONB,
-    traffic_sources JSONB,
-    impressions_data JSONB,
-    page_text TEXT,
+    -- Change detection: later scrapes with the same content_hash only extend
+    -- the run (last_seen_at, observed_count) instead of adding a snapshot
+    content_hash VARCHAR(32),
+    last_seen_at TIMESTAMP,
+    observed_count INTEGER NOT NULL DEFAULT 1,
 
-    UNIQUE(video_id, account_id, scraped_at),
+    PRIMARY KEY (id, scraped_at),
+    CONSTRAINT uq_video_account_timestamp UNIQUE(video_id, account_id, scraped_at),
     FOREIGN KEY (video_id) REFERENCES videos(video_id) ON DELETE CASCADE,
     FOREIGN KEY (account_id) REFERENCES accounts(id) ON DELETE CASCADE
+) PARTITION BY RANGE (scraped_at);
+
+CREATE TABLE IF NOT EXISTS video_analytics_default PARTITION OF video_analytics DEFAULT;
+
+-- uq_video_account_timestamp also serves lookups by video_id and (video_id, account_id)
+-- An account's snapshots newest first
+CREATE INDEX IF NOT EXISTS idx_video_analytics_account_scraped ON video_analytics(account_id, scraped_at DESC);
+-- Newest snapshot per video of an account, stats read from the index alone
+CREATE INDEX IF NOT EXISTS idx_video_analytics_account_video_scraped
+    ON video_analytics(account_id, video_id, scraped_at DESC)
+    INCLUDE (impressions, views, watch_time_hours, ctr_percentage);
+-- All snapshots newest first (GET /analytics without an account filter)
+CREATE INDEX IF NOT EXISTS idx_video_analytics_scraped_desc ON video_analytics(scraped_at DESC);
+-- Time-range scans across accounts
+CREATE INDEX IF NOT EXISTS idx_video_analytics_scraped_at_range ON video_analytics USING brin (scraped_at);
+
+-- Raw JSON data and page text of each snapshot (for flexibility and debugging),
+-- kept out of the hot video_analytics rows
+CREATE TABLE IF NOT EXISTS video_analytics_raw (
+    -- No foreign key: video_analytics.id is only unique together with scraped_at
+    analytics_id INTEGER PRIMARY KEY,
+    top_metrics JSONB COMPRESSION lz4,
+    traffic_sources JSONB COMPRESSION lz4,
+    impressions_data JSONB COMPRESSION lz4,
+    page_text TEXT COMPRESSION lz4,
+    -- Parsed numbers of top_metrics and impressions_data keyed by label, e.g. {"Views": 1200}
+    metric_values JSONB COMPRESSION lz4
+);
+
+-- Later unchanged scrapes folded into a snapshot's run, one row per scrape,
+-- so analytics_daily_rollup can count each scrape on its own day
+CREATE TABLE IF NOT EXISTS video_analytics_observations (
+    -- No foreign key: video_analytics.id is only unique together with scraped_at
+    analytics_id INTEGER NOT NULL,
+    observed_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (analytics_id, observed_at)
+);
+
+-- Containment/key lookups on any metric, range filters on the common ones
+CREATE INDEX IF NOT EXISTS idx_video_analytics_raw_metric_values ON video_analytics_raw USING gin (metric_values);
+CREATE INDEX IF NOT EXISTS idx_video_analytics_raw_metric_impressions
+    ON video_analytics_raw (CAST((metric_values ->> 'Impressions') AS FLOAT));
+CREATE INDEX IF NOT EXISTS idx_video_analytics_raw_metric_views
+    ON video_analytics_raw (CAST((metric_values ->> 'Views') AS FLOAT));
+CREATE INDEX IF NOT EXISTS idx_video_analytics_raw_metric_unique_viewers
+    ON video_analytics_raw (CAST((metric_values ->> 'Unique viewers') AS FLOAT));
+CREATE INDEX IF NOT EXISTS idx_video_analytics_raw_metric_impressions_click_through_rate
+    ON video_analytics_raw (CAST((metric_values ->> 'Impressions click-through rate') AS FLOAT));
+
+-- Latest snapshot per video and account (current state, maintained by the writers)
+CREATE TABLE IF NOT EXISTS video_analytics_latest (
+    video_id VARCHAR(11) NOT NULL REFERENCES videos(video_id) ON DELETE CASCADE,
+    account_id INTEGER NOT NULL REFERENCES accounts(id) ON DELETE CASCADE,
+    analytics_id INTEGER NOT NULL,
+    scraped_at TIMESTAMP NOT NULL,
+    impressions INTEGER,
+    views INTEGER,
+    unique_viewers INTEGER,
+    ctr_percentage NUMERIC(5,2),
+    views_from_impressions INTEGER,
+    youtube_recommending_percentage NUMERIC(5,2),
+    ctr_from_impressions_percentage NUMERIC(5,2),
+    avg_view_duration_seconds INTEGER,
+    watch_time_hours NUMERIC(10,2),
+    publish_start_date DATE,
+    content_hash VARCHAR(32),
+    last_seen_at TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (video_id, account_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_video_analytics_latest_account_stats ON video_analytics_latest(account_id)
+    INCLUDE (impressions, views, watch_time_hours, ctr_percentage);
+
+-- Per account, channel and day totals (maintained incrementally by the writers)
+CREATE TABLE IF NOT EXISTS analytics_daily_rollup (
+    account_id INTEGER NOT NULL REFERENCES accounts(id) ON DELETE CASCADE,
+    channel_id INTEGER NOT NULL DEFAULT 0, -- 0: videos without a channel
+    day DATE NOT NULL,
+    snapshots INTEGER NOT NULL DEFAULT 0,
+    impressions BIGINT NOT NULL DEFAULT 0,
+    views BIGINT NOT NULL DEFAULT 0,
+    unique_viewers BIGINT NOT NULL DEFAULT 0,
+    watch_time_hours NUMERIC(14,2) NOT NULL DEFAULT 0,
+    ctr_sum NUMERIC(14,2) NOT NULL DEFAULT 0,
+    ctr_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (account_id, channel_id, day)
+);
+
+CREATE INDEX IF NOT EXISTS idx_analytics_daily_rollup_day ON analytics_daily_rollup(day);
+
+-- Traffic source names (dictionary; ids are referenced by traffic_sources and traffic_source_breakdowns)
+CREATE TABLE IF NOT EXISTS traffic_source_types (
+    id SMALLSERIAL PRIMARY KEY,
+    name VARCHAR(100) UNIQUE NOT NULL
 );
 
-CREATE INDEX IF NOT EXISTS idx_video_analytics_video_id ON video_analytics(video_id);
-CREATE INDEX IF NOT EXISTS idx_video_analytics_account_id ON video_analytics(account_id);
-CREATE INDEX IF NOT EXISTS idx_video_analytics_scraped_at ON video_analytics(scraped_at);
-CREATE INDEX IF NOT EXISTS idx_video_analytics_video_account ON video_analytics(video_id, account_id);
+INSERT INTO traffic_source_types (name) VALUES
+    ('Direct or unknown'), ('Channel pages'), ('YouTube search'), ('Other YouTube features'),
+    ('Browse features'), ('External'), ('Suggested videos'), ('Playlists'), ('End screens'),
+    ('Cards'), ('Notifications'), ('Subscriptions'), ('Others')
+ON CONFLICT (name) DO NOTHING;
 
--- Traffic sources (normalized breakdown)
+-- Traffic sources (normalized breakdown, DB_TRAFFIC_LAYOUT=rows)
 CREATE TABLE IF NOT EXISTS traffic_sources (
     id SERIAL PRIMARY KEY,
-    analytics_id INTEGER NOT NULL REFERENCES video_analytics(id) ON DELETE CASCADE,
-    source_name VARCHAR(100),
+    -- No foreign key: video_analytics.id is only unique together with scraped_at
+    analytics_id INTEGER NOT NULL,
+    source_type_id SMALLINT NOT NULL REFERENCES traffic_source_types(id),
     percentage NUMERIC(5,2),
     created_at TIMESTAMP DEFAULT NOW()
 );
 
 CREATE INDEX IF NOT EXISTS idx_traffic_sources_analytics_id ON traffic_sources(analytics_id);
-CREATE INDEX IF NOT EXISTS idx_traffic_sources_source_name ON traffic_sources(source_name);
+CREATE INDEX IF NOT EXISTS idx_traffic_sources_source_type_id ON traffic_sources(source_type_id);
+
+-- Traffic sources, one row per snapshot (DB_TRAFFIC_LAYOUT=wide); arrays are parallel
+CREATE TABLE IF NOT EXISTS traffic_source_breakdowns (
+    analytics_id INTEGER PRIMARY KEY,
+    source_type_ids SMALLINT[] NOT NULL,
+    percentages NUMERIC(5,2)[] NOT NULL
+);
 
 -- Scraping history/tracker
 CREATE TABLE IF NOT EXISTS scraping_history (
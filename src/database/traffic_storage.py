@@ -0,0 +1,188 @@
+"""Storage of traffic source breakdowns: the traffic_source_types dictionary and both layouts."""
+
+from typing import Any, Dict
+
+from sqlalchemy import inspect, text
+
+from src.database.config import TRAFFIC_LAYOUTS
+from src.database.connection import DatabaseConnection, db
+from src.database.models import TrafficSourceBreakdown, TrafficSourceType
+
+
+def _columns(connection: DatabaseConnection, table: str) -> set:
+    return {column['name'] for column in inspect(connection.engine).get_columns(table)}
+
+
+def prepare_traffic_tables(db_connection: DatabaseConnection = None) -> None:
+    """
+    Add traffic_sources.source_type_id to tables created before the dictionary existed.
+
+    Legacy rows keep their source_name until normalize_traffic_sources() runs;
+    new rows are written with a source_type_id right away.
+    """
+    connection = db_connection or db
+    if 'source_type_id' in _columns(connection, 'traffic_sources'):
+        return
+    with connection.engine.begin() as conn:
+        conn.execute(text(
+            'ALTER TABLE traffic_sources ADD COLUMN source_type_id SMALLINT REFERENCES traffic_source_types (id)'
+        ))
+        # The legacy name column must accept the new rows that only carry an id
+        if not connection.config.is_sqlite:
+            conn.execute(text('ALTER TABLE traffic_sources ALTER COLUMN source_name DROP NOT NULL'))
+    print("✓ Added traffic_sources.source_type_id")
+
+
+def normalize_traffic_sources(db_connection: DatabaseConnection = None, batch_size: int = 50000) -> Dict[str, Any]:
+    """
+    Replace traffic_sources.source_name strings with traffic_source_types ids.
+
+    Unknown names are added to traffic_source_types, ids are filled in id
+    ranges of batch_size (one transaction each, safe to re-run), then the
+    source_name column and its index are dropped. Rows without a name carry
+    no information and are deleted.
+
+    Args:
+        db_connection: DatabaseConnection instance (uses global db if None)
+        batch_size: Number of traffic_sources ids per update transaction
+
+    Returns:
+        Dict with updated row count, deleted row count and whether the column was dropped
+    """
+    connection = db_connection or db
+    TrafficSourceType.__table__.create(bind=connection.engine, checkfirst=True)
+    prepare_traffic_tables(connection)
+    if 'source_name' not in _columns(connection, 'traffic_sources'):
+        print("✓ traffic_sources is already normalized")
+        return {'updated': 0, 'deleted': 0, 'dropped_column': False}
+
+    with connection.engine.begin() as conn:
+        deleted = conn.execute(text('DELETE FROM traffic_sources WHERE source_name IS NULL')).rowcount
+        conn.execute(text("""
+            INSERT INTO traffic_source_types (name)
+            SELECT DISTINCT source_name FROM traffic_sources
+            WHERE source_name NOT IN (SELECT name FROM traffic_source_types)
+        """))
+        first_id, last_id = conn.execute(text('SELECT MIN(id), MAX(id) FROM traffic_sources')).one()
+
+    updated = 0
+    if first_id is not None:
+        for lower in range(first_id, last_id + 1, batch_size):
+            with connection.engine.begin() as conn:
+                result = conn.execute(
+                    text("""
+                        UPDATE traffic_sources
+                        SET source_type_id = (
+                            SELECT id FROM traffic_source_types WHERE name = traffic_sources.source_name
+                        )
+                        WHERE id >= :lower AND id < :upper AND source_type_id IS NULL
+                    """),
+                    {'lower': lower, 'upper': lower + batch_size},
+                )
+            updated += max(result.rowcount, 0)
+            print(f"  ✓ Normalized ids {lower:,}-{min(lower + batch_size - 1, last_id):,} ({updated:,} rows so far)")
+
+    with connection.engine.begin() as conn:
+        conn.execute(text('DROP INDEX IF EXISTS idx_traffic_sources_source_name'))
+        conn.execute(text('ALTER TABLE traffic_sources DROP COLUMN source_name'))
+        conn.execute(text(
+            'CREATE INDEX IF NOT EXISTS idx_traffic_sources_source_type_id ON traffic_sources (source_type_id)'
+        ))
+        if not connection.config.is_sqlite:
+            conn.execute(text('ALTER TABLE traffic_sources ALTER COLUMN source_type_id SET NOT NULL'))
+    print("✓ Dropped traffic_sources.source_name")
+
+    return {'updated': updated, 'deleted': deleted, 'dropped_column': True}
+
+
+def convert_traffic_layout(
+    layout: str,
+    db_connection: DatabaseConnection = None,
+    batch_size: int = 50000,
+) -> int:
+    """
+    Move stored breakdowns into a layout ('rows' or 'wide').
+
+    'wide' folds the traffic_sources rows of each snapshot into one
+    traffic_source_breakdowns row; 'rows' expands them back. Snapshots are
+    moved in analytics id ranges of batch_size, one transaction each.
+    Set DB_TRAFFIC_LAYOUT to the same layout so new snapshots follow.
+
+    Args:
+        layout: Target layout
+        db_connection: DatabaseConnection instance (uses global db if None)
+        batch_size: Number of analytics ids per transaction
+
+    Returns:
+        Number of snapshots moved
+    """
+    if layout not in TRAFFIC_LAYOUTS:
+        raise ValueError(f"Unknown traffic layout '{layout}' (expected one of {', '.join(TRAFFIC_LAYOUTS)})")
+    connection = db_connection or db
+    TrafficSourceBreakdown.__table__.create(bind=connection.engine, checkfirst=True)
+    postgres = not connection.config.is_sqlite
+
+    if layout == 'wide':
+        source = 'traffic_sources'
+        if postgres:
+            move = """
+                INSERT INTO traffic_source_breakdowns (analytics_id, source_type_ids, percentages)
+                SELECT analytics_id, array_agg(source_type_id ORDER BY source_type_id),
+                       array_agg(percentage ORDER BY source_type_id)
+                FROM traffic_sources
+                WHERE analytics_id >= :lower AND analytics_id < :upper
+                GROUP BY analytics_id
+                ON CONFLICT (analytics_id) DO NOTHING
+            """
+        else:
+            move = """
+                INSERT INTO traffic_source_breakdowns (analytics_id, source_type_ids, percentages)
+                SELECT analytics_id, json_group_array(source_type_id), json_group_array(percentage)
+                FROM (
+                    SELECT analytics_id, source_type_id, CAST(percentage AS REAL) AS percentage
+                    FROM traffic_sources
+                    WHERE analytics_id >= :lower AND analytics_id < :upper
+                    ORDER BY analytics_id, source_type_id
+                )
+                GROUP BY analytics_id
+                ON CONFLICT (analytics_id) DO NOTHING
+            """
+    else:
+        source = 'traffic_source_breakdowns'
+        if postgres:
+            move = """
+                INSERT INTO traffic_sources (analytics_id, source_type_id, percentage, created_at)
+                SELECT b.analytics_id, t.source_type_id, t.percentage, now()
+                FROM traffic_source_breakdowns b
+                CROSS JOIN LATERAL unnest(b.source_type_ids, b.percentages) AS t(source_type_id, percentage)
+                WHERE b.analytics_id >= :lower AND b.analytics_id < :upper
+            """
+        else:
+            move = """
+                INSERT INTO traffic_sources (analytics_id, source_type_id, percentage, created_at)
+                SELECT b.analytics_id, ids.value, pcts.value, CURRENT_TIMESTAMP
+                FROM traffic_source_breakdowns b
+                JOIN json_each(b.source_type_ids) ids
+                JOIN json_each(b.percentages) pcts ON pcts.key = ids.key
+                WHERE b.analytics_id >= :lower AND b.analytics_id < :upper
+            """
+
+    with connection.engine.connect() as conn:
+        first_id, last_id = conn.execute(text(f'SELECT MIN(analytics_id), MAX(analytics_id) FROM {source}')).one()
+    if first_id is None:
+        print(f"✓ No breakdowns to move, {source} is empty")
+        return 0
+
+    moved = 0
+    for lower in range(first_id, last_id + 1, batch_size):
+        params = {'lower': lower, 'upper': lower + batch_size}
+        with connection.engine.begin() as conn:
+            moved += conn.execute(
+                text(f'SELECT COUNT(DISTINCT analytics_id) FROM {source} '
+                     'WHERE analytics_id >= :lower AND analytics_id < :upper'),
+                params,
+            ).scalar()
+            conn.execute(text(move), params)
+            conn.execute(text(f'DELETE FROM {source} WHERE analytics_id >= :lower AND analytics_id < :upper'), params)
+        print(f"  ✓ Moved snapshots {lower:,}-{min(lower + batch_size - 1, last_id):,} ({moved:,} so far)")
+    return moved
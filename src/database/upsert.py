@@ -0,0 +1,283 @@
+"""
+Idempotent upserts of accounts, channels, videos and snapshots.
+
+Every path that creates these rows (ScraperDatabaseWriter, AnalyticsIngestor,
+the API routes and the migration scripts) goes through this module instead of
+querying a row and adding it when missing. Stored keys are read with one
+SELECT, missing keys are inserted with one INSERT ... ON CONFLICT DO NOTHING
+(RETURNING their ids), and keys a concurrent writer inserted in between are
+read back afterwards. Parallel writers racing on the same key therefore all
+succeed and agree on its id; the first writer's values are kept.
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import func, inspect, insert, select, text, tuple_, update
+from sqlalchemy.orm import Session
+
+from src.database.connection import DatabaseConnection, db
+from src.database.models import Account, Channel, Video, VideoAnalytics
+
+# Keys per SELECT ... IN when looking up stored rows
+LOOKUP_CHUNK_SIZE = 500
+
+# Unique key that upsert_channels() conflicts on (added to existing tables by prepare_upsert_keys)
+CHANNEL_URL_KEY = 'uq_account_channel_url'
+
+
+def dialect_insert(session: Session, model):
+    """
+    Get an INSERT construct that supports ON CONFLICT for the session's dialect.
+
+    Returns:
+        Dialect-specific Insert, or None if the dialect has no ON CONFLICT support
+    """
+    dialect = session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return None
+    return dialect_insert(model.__table__)
+
+
+def extract_channel_id(url: str) -> Optional[str]:
+    """
+    Extract the channel identifier from a YouTube channel URL.
+
+    Supports /channel/UCxxxxxx, /@username and /c/channelname URLs.
+    """
+    if not url:
+        return None
+    for pattern in (r'/channel/([^/?]+)', r'/@([^/?]+)', r'/c/([^/?]+)'):
+        match = re.search(pattern, url)
+        if match:
+            return match.group(1)
+    return None
+
+
+def _lookup_ids(session: Session, table, key_columns: Sequence[str], keys: Iterable[tuple]) -> Dict[tuple, int]:
+    """Ids of the stored rows among keys."""
+    columns = [table.c[name] for name in key_columns]
+    key_clause = columns[0] if len(columns) == 1 else tuple_(*columns)
+    keys = sorted(keys)
+    ids = {}
+    for start in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+        chunk = keys[start:start + LOOKUP_CHUNK_SIZE]
+        values = [key[0] for key in chunk] if len(columns) == 1 else chunk
+        for *key, row_id in session.execute(select(*columns, table.c.id).where(key_clause.in_(values))):
+            ids[tuple(key)] = row_id
+    return ids
+
+
+def upsert_rows(
+    session: Session,
+    model,
+    key_columns: Sequence[str],
+    rows: List[Dict[str, Any]],
+) -> Tuple[Dict[tuple, int], Set[tuple]]:
+    """
+    Insert the rows whose key is not stored yet and map every key to its id.
+
+    Stored rows are left untouched. Missing rows are inserted in key order,
+    so concurrent writers take their row locks in the same order.
+
+    Args:
+        session: Database session (the caller commits)
+        model: Model with an integer id and a unique constraint on key_columns
+        key_columns: Columns of the unique key
+        rows: Column values, all with the same columns; the last row wins for duplicate keys
+
+    Returns:
+        (dict of key tuple -> id, set of the keys inserted by this call)
+    """
+    table = model.__table__
+    by_key = {tuple(row[name] for name in key_columns): row for row in rows}
+    if not by_key:
+        return {}, set()
+
+    ids = _lookup_ids(session, table, key_columns, by_key)
+    missing = [by_key[key] for key in sorted(by_key.keys() - ids.keys())]
+    if not missing:
+        return ids, set()
+
+    stmt = dialect_insert(session, model)
+    if stmt is not None:
+        stmt = stmt.on_conflict_do_nothing(index_elements=list(key_columns))
+    else:
+        stmt = insert(table)
+    returning = (*[table.c[name] for name in key_columns], table.c.id)
+    created = set()
+    for *key, row_id in session.execute(stmt.returning(*returning), missing):
+        ids[tuple(key)] = row_id
+        created.add(tuple(key))
+
+    raced = by_key.keys() - ids.keys()
+    if raced:
+        # Inserted by a concurrent writer after the lookup
+        ids.update(_lookup_ids(session, table, key_columns, raced))
+    return ids, created
+
+
+def upsert_accounts(
+    session: Session,
+    names: Iterable[str],
+    cookies_files: Dict[str, Optional[str]] = None,
+) -> Tuple[Dict[str, int], Set[str]]:
+    """
+    Get the ids of accounts by name, creating missing accounts.
+
+    Args:
+        session: Database session (the caller commits)
+        names: Account names
+        cookies_files: Cookies file stored on newly created accounts, by name
+
+    Returns:
+        (dict of name -> id, set of the names created by this call)
+    """
+    cookies_files = cookies_files or {}
+    rows = [{'name': name, 'cookies_file': cookies_files.get(name)} for name in set(names)]
+    ids, created = upsert_rows(session, Account, ('name',), rows)
+    return {name: row_id for (name,), row_id in ids.items()}, {name for name, in created}
+
+
+def upsert_channels(session: Session, account_id: int, urls: Iterable[str]) -> Tuple[Dict[str, int], Set[str]]:
+    """
+    Get the ids of an account's channels by URL, creating missing channels.
+
+    A URL whose channel identifier (see extract_channel_id) is already stored
+    under another URL of the account violates uq_account_channel_id and raises.
+
+    Args:
+        session: Database session (the caller commits)
+        account_id: Account the channels belong to
+        urls: Channel URLs
+
+    Returns:
+        (dict of URL -> channel id, set of the URLs created by this call)
+    """
+    rows = [
+        {'account_id': account_id, 'url': url, 'channel_id': extract_channel_id(url)}
+        for url in set(urls)
+    ]
+    ids, created = upsert_rows(session, Channel, ('account_id', 'url'), rows)
+    return {url: row_id for (_, url), row_id in ids.items()}, {url for _, url in created}
+
+
+def upsert_videos(session: Session, videos: List[Dict[str, Any]]) -> Tuple[Dict[str, int], Set[str]]:
+    """
+    Get the ids of videos by YouTube video ID, creating missing videos.
+
+    Stored videos keep their channel, title and publish date.
+
+    Args:
+        session: Database session (the caller commits)
+        videos: Dicts with 'video_id' and optionally 'channel_id', 'title', 'publish_date'
+
+    Returns:
+        (dict of video_id -> id, set of the video IDs created by this call)
+    """
+    columns = sorted({column for video in videos for column in video})
+    rows = [{column: video.get(column) for column in columns} for video in videos]
+    ids, created = upsert_rows(session, Video, ('video_id',), rows)
+    return {video_id: row_id for (video_id,), row_id in ids.items()}, {video_id for video_id, in created}
+
+
+def insert_snapshots(session: Session, rows: List[Dict[str, Any]]) -> List[tuple]:
+    """
+    Insert video_analytics rows, skipping snapshots that are already stored.
+
+    A snapshot is identified by video, account and scraped_at
+    (uq_video_account_timestamp), so re-sending or concurrently sending the
+    same scrape stores it once.
+
+    Args:
+        session: Database session (the caller commits)
+        rows: video_analytics column values (without raw payload columns), all with the same columns
+
+    Returns:
+        List of (id, video_id, account_id, scraped_at) for the inserted rows
+    """
+    if not rows:
+        return []
+    table = VideoAnalytics.__table__
+    returning = (table.c.id, table.c.video_id, table.c.account_id, table.c.scraped_at)
+    rows = sorted(rows, key=lambda row: (row['video_id'], row['account_id'], row['scraped_at']))
+    stmt = dialect_insert(session, VideoAnalytics)
+    if stmt is not None:
+        stmt = stmt.on_conflict_do_nothing(index_elements=['video_id', 'account_id', 'scraped_at'])
+    else:
+        keys = [(row['video_id'], row['account_id'], row['scraped_at']) for row in rows]
+        existing = set()
+        for start in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+            existing.update(tuple(key) for key in session.execute(
+                select(table.c.video_id, table.c.account_id, table.c.scraped_at)
+                .where(tuple_(table.c.video_id, table.c.account_id, table.c.scraped_at)
+                       .in_(keys[start:start + LOOKUP_CHUNK_SIZE]))
+            ))
+        rows = [row for row, key in zip(rows, keys) if key not in existing]
+        if not rows:
+            return []
+        stmt = insert(table)
+
+    return [tuple(row) for row in session.execute(stmt.returning(*returning), rows).all()]
+
+
+# ==================== Schema ====================
+
+def _has_channel_url_key(connection: DatabaseConnection) -> bool:
+    inspector = inspect(connection.engine)
+    names = {constraint['name'] for constraint in inspector.get_unique_constraints('channels')}
+    names.update(index['name'] for index in inspector.get_indexes('channels') if index.get('unique'))
+    return CHANNEL_URL_KEY in names
+
+
+def prepare_upsert_keys(db_connection: DatabaseConnection = None) -> int:
+    """
+    Add the unique (account_id, url) key of channels to an existing table.
+
+    Channels created twice by racing writers before the key existed are
+    merged into the oldest one first: their videos are moved over and the
+    affected accounts' daily rollups are rebuilt.
+
+    Returns:
+        Number of duplicate channels merged
+    """
+    connection = db_connection or db
+    if _has_channel_url_key(connection):
+        return 0
+
+    from src.database.writers import ScraperDatabaseWriter
+
+    channels = Channel.__table__
+    with connection.session_scope() as session:
+        duplicates = session.execute(
+            select(channels.c.account_id, channels.c.url, func.min(channels.c.id))
+            .group_by(channels.c.account_id, channels.c.url)
+            .having(func.count() > 1)
+        ).all()
+        merged = 0
+        for account_id, url, keep_id in duplicates:
+            duplicate_ids = list(session.scalars(
+                select(channels.c.id)
+                .where(channels.c.account_id == account_id, channels.c.url == url, channels.c.id != keep_id)
+            ))
+            session.execute(
+                update(Video.__table__).where(Video.channel_id.in_(duplicate_ids)).values(channel_id=keep_id)
+            )
+            session.execute(channels.delete().where(channels.c.id.in_(duplicate_ids)))
+            merged += len(duplicate_ids)
+        writer = ScraperDatabaseWriter(connection)
+        for account_id in sorted({account_id for account_id, _, _ in duplicates}):
+            writer.rebuild_rollup(session, account_id=account_id)
+
+        if connection.config.is_sqlite:
+            session.execute(text(f'CREATE UNIQUE INDEX {CHANNEL_URL_KEY} ON channels (account_id, url)'))
+        else:
+            session.execute(text(f'ALTER TABLE channels ADD CONSTRAINT {CHANNEL_URL_KEY} UNIQUE (account_id, url)'))
+    if merged:
+        print(f"✓ Merged {merged} duplicate channel(s)")
+    print(f"✓ Added unique key {CHANNEL_URL_KEY} on channels (account_id, url)")
+    return merged
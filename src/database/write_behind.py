@@ -0,0 +1,317 @@
+"""Write-behind batching writer for scraper results."""
+
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+
+from src.database.writers import ScraperDatabaseWriter, db_writer
+
+# Sentinel pushed onto the queue to stop the writer thread
+_STOP = object()
+
+
+def is_transient_error(error: Exception) -> bool:
+    """Whether a database error is worth retrying (lost connection, lock, timeout)."""
+    if isinstance(error, (OperationalError, InterfaceError)):
+        return True
+    return isinstance(error, DBAPIError) and bool(error.connection_invalidated)
+
+
+class WriteBehindWriter:
+    """
+    Background writer that turns many small saves into a few large transactions.
+
+    Producers (scraper threads, API requests) call submit() and return
+    immediately. One writer thread drains the bounded queue, groups records by
+    account and channel, and saves each group with bulk_save_analytics once
+    batch_size records are waiting or flush_interval seconds have passed since
+    the first one arrived. Transient database errors are retried with backoff;
+    batches that still fail are appended to a dead-letter JSONL file so no
+    scraped data is lost.
+    """
+
+    def __init__(
+        self,
+        writer: ScraperDatabaseWriter = None,
+        max_queue: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 2.0,
+        max_retries: int = 3,
+        retry_backoff: float = 1.0,
+        dead_letter_file: str = os.path.join('data', 'write_behind_failed.jsonl'),
+    ):
+        """
+        Initialize write-behind writer.
+
+        Args:
+            writer: ScraperDatabaseWriter instance (uses global db_writer if None)
+            max_queue: Maximum number of records waiting to be written
+            batch_size: Flush once this many records are waiting
+            flush_interval: Flush at most this many seconds after the first waiting record arrived
+            max_retries: Retries for a batch that fails with a transient error
+            retry_backoff: Seconds before the first retry (doubles on each retry)
+            dead_letter_file: JSONL file receiving records that could not be written
+        """
+        self.writer = writer or db_writer
+        self.max_queue = max(1, max_queue)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.dead_letter_file = dead_letter_file
+        self._queue: queue.Queue = queue.Queue(maxsize=self.max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._ready_accounts = set()
+        self._metrics: Dict[str, Any] = {
+            'enqueued': 0,
+            'rejected': 0,
+            'written': 0,
+            'failed': 0,
+            'retries': 0,
+            'batches': 0,
+            'max_queue_depth': 0,
+            'last_flush_seconds': 0.0,
+            'max_flush_seconds': 0.0,
+            'total_flush_seconds': 0.0,
+            'last_flush_at': None,
+        }
+
+    # ==================== Lifecycle ====================
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> 'WriteBehindWriter':
+        """Start the writer thread (idempotent)."""
+        with self._lock:
+            if not self.running:
+                self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self, timeout: float = None) -> None:
+        """Write everything still queued, then stop the writer thread."""
+        if not self.running:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def flush(self) -> None:
+        """Block until every record submitted so far has been written (or dead-lettered)."""
+        if self.running:
+            self._queue.join()
+
+    # ==================== Producers ====================
+
+    def submit(
+        self,
+        record: Dict[str, Any],
+        account_name: str,
+        channel_url: str = None,
+        timeout: Optional[float] = 0,
+        metrics=None,
+    ) -> bool:
+        """
+        Queue one analytics record for writing.
+
+        Args:
+            record: Analytics dictionary as returned by the scraper
+            account_name: Account the record belongs to
+            channel_url: Optional channel URL to link new videos to
+            timeout: Seconds to wait for queue space (0: don't wait, None: wait forever)
+            metrics: Optional PhaseMetrics; the bulk save that writes the record is recorded as its 'save' phase
+
+        Returns:
+            True if queued, False if the queue stayed full
+        """
+        if not self.running:
+            self.start()
+        try:
+            if timeout == 0:
+                self._queue.put_nowait((account_name, channel_url, record, metrics))
+            else:
+                self._queue.put((account_name, channel_url, record, metrics), timeout=timeout)
+        except queue.Full:
+            with self._lock:
+                self._metrics['rejected'] += 1
+            return False
+        with self._lock:
+            self._metrics['enqueued'] += 1
+            self._metrics['max_queue_depth'] = max(self._metrics['max_queue_depth'], self._queue.qsize())
+        return True
+
+    def submit_many(
+        self,
+        records: List[Dict[str, Any]],
+        account_name: str,
+        channel_url: str = None,
+        timeout: Optional[float] = 0,
+        metrics=None,
+    ) -> int:
+        """
+        Queue several records for the same account.
+
+        Returns:
+            Number of records queued (stops at the first rejected record)
+        """
+        queued = 0
+        for record in records:
+            if not self.submit(record, account_name, channel_url, timeout=timeout, metrics=metrics):
+                break
+            queued += 1
+        return queued
+
+    # ==================== Metrics ====================
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get queue depth, throughput and flush latency."""
+        with self._lock:
+            metrics = dict(self._metrics)
+        total = metrics.pop('total_flush_seconds')
+        metrics['avg_flush_seconds'] = round(total / metrics['batches'], 3) if metrics['batches'] else 0.0
+        metrics['last_flush_seconds'] = round(metrics['last_flush_seconds'], 3)
+        metrics['max_flush_seconds'] = round(metrics['max_flush_seconds'], 3)
+        metrics['queue_depth'] = self._queue.qsize()
+        metrics['queue_capacity'] = self.max_queue
+        metrics['running'] = self.running
+        return metrics
+
+    # ==================== Writer thread ====================
+
+    def _run(self) -> None:
+        pending: List[Tuple[str, Optional[str], Dict[str, Any], Any]] = []
+        deadline = None
+        stopping = False
+        while not stopping:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                stopping = True
+                self._queue.task_done()
+            elif item is not None:
+                pending.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            due = deadline is not None and time.monotonic() >= deadline
+            if pending and (stopping or due or len(pending) >= self.batch_size):
+                self._write(pending)
+                for _ in pending:
+                    self._queue.task_done()
+                pending = []
+                deadline = None
+
+    def _write(self, items: List[Tuple[str, Optional[str], Dict[str, Any], Any]]) -> None:
+        groups: Dict[Tuple[str, Optional[str]], List[Dict[str, Any]]] = {}
+        group_metrics: Dict[Tuple[str, Optional[str]], Dict[int, Any]] = {}
+        for account_name, channel_url, record, metrics in items:
+            groups.setdefault((account_name, channel_url), []).append(record)
+            if metrics is not None:
+                group_metrics.setdefault((account_name, channel_url), {})[id(metrics)] = metrics
+
+        started = time.perf_counter()
+        for key, records in groups.items():
+            account_name, channel_url = key
+            group_started = time.perf_counter()
+            written = self._write_group(account_name, channel_url, records)
+            # Phase histogram of every scraper that submitted into this group
+            for metrics in group_metrics.get(key, {}).values():
+                metrics.record('save', time.perf_counter() - group_started, 'ok' if written else 'error')
+            if written:
+                with self._lock:
+                    self._metrics['written'] += len(records)
+            else:
+                self._dead_letter(account_name, channel_url, records)
+                with self._lock:
+                    self._metrics['failed'] += len(records)
+        elapsed = time.perf_counter() - started
+
+        with self._lock:
+            self._metrics['batches'] += 1
+            self._metrics['last_flush_seconds'] = elapsed
+            self._metrics['max_flush_seconds'] = max(self._metrics['max_flush_seconds'], elapsed)
+            self._metrics['total_flush_seconds'] += elapsed
+            self._metrics['last_flush_at'] = datetime.now().isoformat()
+
+    def _write_group(self, account_name: str, channel_url: Optional[str], records: List[Dict[str, Any]]) -> bool:
+        delay = self.retry_backoff
+        for attempt in range(self.max_retries + 1):
+            try:
+                if account_name not in self._ready_accounts:
+                    self.writer.ensure_account(account_name)
+                    self._ready_accounts.add(account_name)
+                self.writer.bulk_save_analytics(records, account_name=account_name, channel_url=channel_url)
+                return True
+            except Exception as e:
+                if attempt < self.max_retries and is_transient_error(e):
+                    with self._lock:
+                        self._metrics['retries'] += 1
+                    print(f"⚠ Write-behind: transient database error, retrying in {delay:.1f}s: {e}")
+                    time.sleep(delay)
+                    delay *= 2
+                    continue
+                print(f"✗ Write-behind: failed to save {len(records)} record(s) for '{account_name}': {e}")
+                return False
+        return False
+
+    def _dead_letter(self, account_name: str, channel_url: Optional[str], records: List[Dict[str, Any]]) -> None:
+        append_dead_letter(self.dead_letter_file, records, account_name, channel_url)
+
+
+def append_dead_letter(
+    dead_letter_file: str,
+    records: List[Dict[str, Any]],
+    account_name: str,
+    channel_url: Optional[str] = None,
+) -> bool:
+    """
+    Append records that could not be saved to a dead-letter JSONL file.
+
+    Each line is the record with the account and channel it was meant for,
+    so it can be re-imported later.
+
+    Returns:
+        True if every record was written
+    """
+    try:
+        directory = os.path.dirname(dead_letter_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(dead_letter_file, 'a', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(
+                    {**record, 'account_name': account_name, 'channel_url': channel_url},
+                    ensure_ascii=False, default=str,
+                ) + '\n')
+        return True
+    except Exception as e:
+        print(f"✗ Could not write dead-letter file {dead_letter_file}: {e}")
+        return False
+
+
+_default_writer: Optional[WriteBehindWriter] = None
+_default_lock = threading.Lock()
+
+
+def get_write_behind_writer() -> WriteBehindWriter:
+    """Get the process-wide WriteBehindWriter (started, flushed at interpreter exit)."""
+    global _default_writer
+    with _default_lock:
+        if _default_writer is None:
+            _default_writer = WriteBehindWriter()
+            atexit.register(_default_writer.stop)
+        return _default_writer.start()
@@ -1,25 +1,48 @@
 """Database writers for scraper integration."""
 
-from datetime import datetime
-from typing import Dict, List, Optional, Any
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Any, Tuple
 
-from sqlalchemy.orm import Session
+from sqlalchemy import Date, bindparam, case, cast, func, insert, select, text, union_all, update
+from sqlalchemy.orm import Session, selectinload
 
+from src.database.change_detection import content_hash
 from src.database.connection import DatabaseConnection, db
-from src.database.models import Account, Video, VideoAnalytics, TrafficSource
+from src.database.identity_cache import ACCOUNT, CHANNEL, SOURCE_TYPE, VIDEO, IdentityCache
+from src.database.models import (
+    RAW_COLUMNS, Account, AnalyticsDailyRollup, Channel, Video, VideoAnalytics, VideoAnalyticsLatest,
+    VideoAnalyticsObservation, VideoAnalyticsRaw, TrafficSource, TrafficSourceBreakdown, TrafficSourceType,
+)
+from src.database.upsert import (
+    dialect_insert, insert_snapshots, upsert_accounts, upsert_channels, upsert_videos,
+)
+
+# Snapshot totals kept per account, channel and day in analytics_daily_rollup
+ROLLUP_SUM_COLUMNS = (
+    'snapshots', 'impressions', 'views', 'unique_viewers', 'watch_time_hours', 'ctr_sum', 'ctr_count',
+)
+
+# Snapshot columns copied into video_analytics_latest
+LATEST_COLUMNS = (
+    'scraped_at', 'impressions', 'views', 'unique_viewers', 'ctr_percentage',
+    'views_from_impressions', 'youtube_recommending_percentage', 'ctr_from_impressions_percentage',
+    'avg_view_duration_seconds', 'watch_time_hours', 'publish_start_date', 'content_hash', 'last_seen_at',
+)
 
 
 class ScraperDatabaseWriter:
     """Writes scraper results to the database."""
 
-    def __init__(self, db_connection: DatabaseConnection = None):
+    def __init__(self, db_connection: DatabaseConnection = None, identity_cache: IdentityCache = None):
         """
         Initialize database writer.
 
         Args:
             db_connection: DatabaseConnection instance (uses global db if None)
+            identity_cache: Cache of account/channel/video ids (creates a new one if None)
         """
         self.db = db_connection or db
+        self.identity_cache = identity_cache or IdentityCache()
 
     def save_analytics(
         self,
@@ -32,7 +55,9 @@ class ScraperDatabaseWriter:
         """
         Save analytics data to database.
 
-        This method is designed to be called from the YouTube scraper.
+        This method is designed to be called from the YouTube scraper. It is
+        bulk_save_analytics() for one video, so concurrent scrapers saving the
+        same video or snapshot don't conflict.
 
         Args:
             video_id: YouTube video ID
@@ -48,7 +73,9 @@ class ScraperDatabaseWriter:
             session: Optional database session (creates new if None)
 
         Returns:
-            Created or updated VideoAnalytics object
+            Created VideoAnalytics object, or the latest one if the scrape was
+            unchanged and only extended its run (see fold_unchanged) or was
+            already stored
         """
         close_session = False
         if session is None:
@@ -56,89 +83,24 @@ class ScraperDatabaseWriter:
             close_session = True
 
         try:
-            # Get account
-            account = session.query(Account).filter(Account.name == account_name).first()
-            if not account:
-                raise ValueError(f"Account '{account_name}' not found in database")
+            inserted = self._save_batch([{**analytics_data, 'video_id': video_id}], account_name, channel_url, session)
+            if inserted:
+                analytics_id, _, _, scraped_at = inserted[0]
+            else:
+                latest = session.get(VideoAnalyticsLatest, (video_id, self._resolve_account_id(account_name, session)))
+                if latest is None:
+                    return None
+                analytics_id, scraped_at = latest.analytics_id, latest.scraped_at
 
-            # Create or get channel if channel_url is provided
-            channel = None
-            if channel_url:
-                from src.database.models import Channel
-                
-                # Check if channel already exists for this account
-                channel = session.query(Channel).filter(
-                    Channel.account_id == account.id,
-                    Channel.url == channel_url
-                ).first()
-                
-                if not channel:
-                    # Extract channel_id from URL
-                    channel_id = self._extract_channel_id_from_url(channel_url)
-                    
-                    # Create new channel
-                    channel = Channel(
-                        account_id=account.id,
-                        url=channel_url,
-                        channel_id=channel_id
-                    )
-                    session.add(channel)
-                    session.flush()  # Get channel.id
-                    print(f"  ✓ Created channel in database: {channel_url}")
-
-            # Get or create video
-            video = session.query(Video).filter(Video.video_id == video_id).first()
-            if not video:
-                video = Video(video_id=video_id)
-                session.add(video)
-                session.flush()
-
-            # Parse metrics from analytics data
-            top_metrics = analytics_data.get('top_metrics', {})
-            impressions_data = analytics_data.get('impressions_data', {})
-            traffic_sources = analytics_data.get('how_viewers_find', {})
-
-            # Create analytics record
-            analytics = VideoAnalytics(
-                video_id=video_id,
-                account_id=account.id,
-                impressions=self._parse_number(top_metrics.get('Impressions')),
-                views=self._parse_number(top_metrics.get('Views')),
-                unique_viewers=self._parse_number(top_metrics.get('Unique viewers')),
-                ctr_percentage=self._parse_percentage(top_metrics.get('Impressions click-through rate')),
-                views_from_impressions=self._parse_number(impressions_data.get('Views from impressions')),
-                youtube_recommending_percentage=self._parse_percentage(
-                    impressions_data.get('YouTube recommending your content')
-                ),
-                ctr_from_impressions_percentage=self._parse_percentage(
-                    impressions_data.get('Click-through rate (from impressions)')
-                ),
-                avg_view_duration_seconds=self._parse_duration(
-                    impressions_data.get('Average view duration (from impressions)')
-                ),
-                watch_time_hours=self._parse_float(
-                    impressions_data.get('Watch time from impressions (hours)')
-                ),
-                publish_start_date=self._parse_date(analytics_data.get('publish_start_date')),
-                top_metrics=top_metrics,
-                traffic_sources=traffic_sources,
-                impressions_data=impressions_data,
-                page_text=analytics_data.get('page_text'),
-                scraped_at=self._parse_timestamp(analytics_data.get('crawl_datetime')),
+            # scraped_at lets PostgreSQL prune to a single partition; the raw
+            # payload is loaded now so it stays readable after the session closes
+            return (
+                session.query(VideoAnalytics)
+                .options(selectinload(VideoAnalytics.raw))
+                .filter(VideoAnalytics.id == analytics_id, VideoAnalytics.scraped_at == scraped_at)
+                .first()
             )
 
-            session.add(analytics)
-            session.flush()  # Flush to get analytics.id before saving traffic sources
-
-            # Add traffic sources if provided (after flush so analytics.id is available)
-            if traffic_sources:
-                self._save_traffic_sources(analytics, traffic_sources, session)
-
-            session.commit()
-            session.refresh(analytics)
-
-            return analytics
-
         finally:
             if close_session:
                 session.close()
@@ -147,20 +109,33 @@ class ScraperDatabaseWriter:
         self,
         videos_data: List[Dict[str, Any]],
         account_name: str,
+        channel_url: str = None,
         session: Session = None,
-    ) -> List[VideoAnalytics]:
+    ) -> List[int]:
         """
-        Bulk save multiple analytics records.
+        Bulk save multiple analytics records in one transaction.
+
+        Account and channel are resolved once. Videos are upserted
+        (upsert_videos), analytics rows inserted with a multi-row
+        INSERT ... ON CONFLICT DO NOTHING RETURNING (insert_snapshots), raw
+        payloads and traffic sources with a multi-row INSERT each, and
+        video_analytics_latest and analytics_daily_rollup with one upsert
+        each. A snapshot that already exists for the same video, account and
+        scraped_at is skipped, so re-saving a batch (or saving it from two
+        scrapers at once) is harmless. Scrapes whose metrics did not change
+        extend the latest snapshot's run instead of being inserted (see
+        fold_unchanged).
 
         Args:
             videos_data: List of analytics dictionaries, each containing:
                 - video_id: YouTube video ID
                 - (other fields as per save_analytics)
-            account_name: Account name
+            account_name: Account name (must exist in database)
+            channel_url: Optional channel URL to link new videos to
             session: Optional database session
 
         Returns:
-            List of created VideoAnalytics objects
+            List of IDs of the created VideoAnalytics rows (unchanged scrapes create none)
         """
         close_session = False
         if session is None:
@@ -168,25 +143,134 @@ class ScraperDatabaseWriter:
             close_session = True
 
         try:
-            created = []
+            return [
+                analytics_id
+                for analytics_id, *_ in self._save_batch(videos_data, account_name, channel_url, session)
+            ]
+        finally:
+            if close_session:
+                session.close()
+
+    def _save_batch(
+        self,
+        videos_data: List[Dict[str, Any]],
+        account_name: str,
+        channel_url: Optional[str],
+        session: Session,
+    ) -> List[tuple]:
+        """
+        Write and commit a batch of scraper results (see bulk_save_analytics).
+
+        Returns:
+            List of (id, video_id, account_id, scraped_at) of the created VideoAnalytics rows
+        """
+        account_id = None
+        video_ids = []
+        try:
+            account_id = self._resolve_account_id(account_name, session)
+            channel_id = self._resolve_channel_id(account_id, channel_url, session)
+
+            # One row per (video, scraped_at); a later duplicate in the batch wins
+            rows: Dict[tuple, Dict[str, Any]] = {}
+            traffic_by_key: Dict[tuple, List[Dict[str, Any]]] = {}
             for video_data in videos_data:
-                video_id = video_data.pop('video_id', None)
+                video_id = video_data.get('video_id')
                 if not video_id:
                     continue
+                row = self.build_analytics_row(video_id, account_id, video_data)
+                key = (video_id, row['scraped_at'])
+                rows[key] = row
+                traffic_by_key[key] = self.build_traffic_source_rows(None, video_data.get('how_viewers_find') or {})
 
-                analytics = self.save_analytics(
-                    video_id=video_id,
-                    account_name=account_name,
-                    analytics_data=video_data,
-                    session=session,
-                )
-                created.append(analytics)
+            if not rows:
+                return []
 
-            return created
+            video_ids = sorted({video_id for video_id, _ in rows})
+            upsert_videos(session, [
+                {'video_id': video_id, 'channel_id': channel_id}
+                for video_id in video_ids if not self.identity_cache.get(VIDEO, video_id)
+            ])
+            inserted = self.save_snapshots(rows, traffic_by_key, account_id, session)
 
-        finally:
-            if close_session:
-                session.close()
+            session.commit()
+            self._remember(account_name, account_id, channel_url, channel_id, video_ids)
+            return inserted
+
+        except Exception:
+            session.rollback()
+            self._forget(account_name, account_id, channel_url, video_ids)
+            raise
+
+    def save_snapshots(
+        self,
+        rows: Dict[tuple, Dict[str, Any]],
+        traffic_by_key: Dict[tuple, List[Dict[str, Any]]],
+        account_id: int,
+        session: Session,
+    ) -> List[tuple]:
+        """
+        Write prepared snapshots of one account (the caller commits).
+
+        Unchanged scrapes extend their run (fold_unchanged), the rest are
+        inserted with their raw payloads and traffic sources, and
+        video_analytics_latest and analytics_daily_rollup are brought up to
+        date. Used by _save_batch() and the API analytics routes; the videos
+        must already exist.
+
+        Args:
+            rows: build_analytics_row() output keyed by (video_id, scraped_at); modified in place
+            traffic_by_key: build_traffic_source_rows() output with the same keys
+            account_id: Account of all rows
+            session: Database session
+
+        Returns:
+            List of (id, video_id, account_id, scraped_at) of the created VideoAnalytics rows
+        """
+        extensions, observed = self.fold_unchanged(rows, traffic_by_key, account_id, session)
+        self.extend_runs(extensions, session)
+        self.add_to_rollup(observed, session)
+        inserted = insert_snapshots(session, [self.split_raw_values(row)[0] for row in rows.values()])
+        self.add_observations(observed, inserted, session)
+
+        raw_rows = []
+        traffic_rows = []
+        for analytics_id, video_id, _, scraped_at in inserted:
+            raw_row = self.build_raw_row(analytics_id, rows[(video_id, scraped_at)])
+            if raw_row:
+                raw_rows.append(raw_row)
+            traffic_rows.extend(
+                {**traffic_row, 'analytics_id': analytics_id}
+                for traffic_row in traffic_by_key[(video_id, scraped_at)]
+            )
+        if raw_rows:
+            session.execute(insert(VideoAnalyticsRaw.__table__), raw_rows)
+        self.write_traffic_sources(traffic_rows, session)
+        snapshots = [
+            {**rows[(video_id, scraped_at)], 'id': analytics_id} for analytics_id, video_id, _, scraped_at in inserted
+        ]
+        self.upsert_latest(snapshots, session)
+        self.add_to_rollup(snapshots, session)
+        return inserted
+
+    def ensure_account(self, account_name: str, cookies_file: str = None) -> Account:
+        """
+        Get account from database, creating it if it doesn't exist.
+
+        Args:
+            account_name: Account name
+            cookies_file: Cookies file stored on a newly created account
+
+        Returns:
+            Account object
+        """
+        with self.db.session_scope() as session:
+            ids, created = upsert_accounts(session, [account_name], {account_name: cookies_file})
+            if created:
+                print(f"  ✓ Created account in database: {account_name}")
+            account = session.get(Account, ids[account_name])
+            session.expunge(account)
+        self.identity_cache.put(ACCOUNT, account_name, account.id)
+        return account
 
     def get_account(self, account_name: str, session: Session = None) -> Account:
         """
@@ -219,6 +303,9 @@ class ScraperDatabaseWriter:
         """
         Get latest analytics for a video.
 
+        Looks the snapshot up through video_analytics_latest, so the cost does
+        not grow with the video's history.
+
         Args:
             video_id: YouTube video ID
             account_name: Account name
@@ -237,37 +324,895 @@ class ScraperDatabaseWriter:
             if not account:
                 return None
 
+            latest = session.get(VideoAnalyticsLatest, (video_id, account.id))
+            if latest is None:
+                return None
+
+            # scraped_at lets PostgreSQL prune to a single partition; the raw
+            # payload is loaded now so it stays readable after the session closes
             return (
                 session.query(VideoAnalytics)
+                .options(selectinload(VideoAnalytics.raw))
                 .filter(
-                    VideoAnalytics.video_id == video_id,
-                    VideoAnalytics.account_id == account.id,
+                    VideoAnalytics.id == latest.analytics_id,
+                    VideoAnalytics.scraped_at == latest.scraped_at,
                 )
-                .order_by(VideoAnalytics.scraped_at.desc())
                 .first()
             )
         finally:
             if close_session:
                 session.close()
 
-    def _save_traffic_sources(
+    # ==================== Change Detection ====================
+
+    def fold_unchanged(
+        self,
+        rows: Dict[tuple, Dict[str, Any]],
+        traffic_by_key: Dict[tuple, List[Dict[str, Any]]],
+        account_id: int,
+        session: Session,
+    ) -> tuple:
+        """
+        Hash new snapshots and take out the ones that repeat the latest snapshot.
+
+        Each row gets its content_hash, last_seen_at and observed_count. A
+        row scraped after the current run of its video (from
+        video_analytics_latest, or an earlier row of the same batch) with the
+        same hash is removed from `rows` and extends that run. A row inside
+        the latest run, or older and inside an earlier run, with the same
+        hash was already observed and is removed as well, so re-sending a
+        batch stays idempotent. A latest row whose snapshot no longer exists
+        (e.g. its partition was retired) is ignored, so the scrape is stored
+        as a fresh snapshot. Rows are left alone when DB_DEDUPE_SNAPSHOTS is off.
+
+        The latest rows of the batch's videos are locked (PostgreSQL; the
+        whole database on SQLite) until the caller commits, so a concurrent writer sending the same scrape
+        waits and then sees it as already observed instead of extending the
+        run a second time.
+
+        Each removed scrape that extended a run still counts once in
+        analytics_daily_rollup, on the day it was scraped, and is recorded in
+        video_analytics_observations (add_observations()) so rebuild_rollup()
+        counts it the same way.
+
+        Args:
+            rows: build_analytics_row() output keyed by (video_id, scraped_at); modified in place
+            traffic_by_key: build_traffic_source_rows() output with the same keys
+            account_id: Account of all rows
+            session: Database session
+
+        Returns:
+            (extensions of stored runs for extend_runs(), the scrapes that
+            extended a run for add_to_rollup() and add_observations(), each
+            with 'run': the analytics id, or the (video_id, scraped_at) key of
+            the batch row it extended)
+        """
+        for key, row in rows.items():
+            row['content_hash'] = content_hash(row, traffic_by_key.get(key, []))
+            row['last_seen_at'] = row['scraped_at']
+            row['observed_count'] = 1
+        if not rows or not self.db.config.dedupe_snapshots:
+            return {}, []
+
+        latest = VideoAnalyticsLatest.__table__
+        history = VideoAnalytics.__table__
+        if session.get_bind().dialect.name == 'sqlite':
+            # SQLite ignores FOR UPDATE: take the database write lock before reading instead
+            self.lock_latest(account_id, [], session)
+        runs = {
+            run.video_id: {
+                'analytics_id': run.analytics_id,
+                'scraped_at': run.scraped_at,
+                'last_seen_at': run.last_seen_at or run.scraped_at,
+                'content_hash': run.content_hash,
+                'row': None,
+            }
+            for run in session.execute(
+                select(latest.c.video_id, latest.c.analytics_id, latest.c.scraped_at,
+                       latest.c.last_seen_at, latest.c.content_hash, history.c.id.label('stored_id'))
+                .select_from(latest.outerjoin(
+                    history,
+                    # scraped_at lets PostgreSQL prune to a single partition
+                    (history.c.id == latest.c.analytics_id) & (history.c.scraped_at == latest.c.scraped_at),
+                ))
+                .where(latest.c.account_id == account_id, latest.c.video_id.in_({video_id for video_id, _ in rows}))
+                # Same lock order in every writer
+                .order_by(latest.c.video_id)
+                .with_for_update(of=latest)
+            )
+            if run.stored_id is not None
+        }
+
+        extensions: Dict[int, Dict[str, Any]] = {}
+        observed = []
+        earlier = []
+        for video_id, scraped_at in sorted(rows):
+            row = rows[(video_id, scraped_at)]
+            run = runs.get(video_id)
+            if run is not None and run['content_hash'] == row['content_hash']:
+                if scraped_at > run['last_seen_at']:
+                    if run['row'] is not None:
+                        run['row']['last_seen_at'] = scraped_at
+                        run['row']['observed_count'] += 1
+                        observed.append({**row, 'run': (video_id, run['scraped_at'])})
+                    else:
+                        extension = extensions.setdefault(
+                            run['analytics_id'],
+                            {'video_id': video_id, 'scraped_at': run['scraped_at'], 'observed': 0},
+                        )
+                        extension['last_seen_at'] = scraped_at
+                        extension['observed'] += 1
+                        observed.append({**row, 'run': run['analytics_id']})
+                    run['last_seen_at'] = scraped_at
+                    del rows[(video_id, scraped_at)]
+                    continue
+                if run['scraped_at'] <= scraped_at:
+                    del rows[(video_id, scraped_at)]
+                    continue
+            if run is not None and scraped_at < run['scraped_at']:
+                earlier.append((video_id, scraped_at))
+            if run is None or scraped_at > run['last_seen_at']:
+                runs[video_id] = {
+                    'scraped_at': scraped_at,
+                    'last_seen_at': scraped_at,
+                    'content_hash': row['content_hash'],
+                    'row': row,
+                }
+
+        if earlier:
+            # Older than the latest snapshot (a re-sent batch): skip scrapes an older run already covers
+            covering = session.execute(
+                select(history.c.video_id, history.c.scraped_at, history.c.last_seen_at, history.c.content_hash)
+                .where(
+                    history.c.account_id == account_id,
+                    history.c.video_id.in_({video_id for video_id, _ in earlier}),
+                    history.c.last_seen_at > history.c.scraped_at,
+                    history.c.scraped_at < max(scraped_at for _, scraped_at in earlier),
+                    history.c.last_seen_at >= min(scraped_at for _, scraped_at in earlier),
+                )
+            ).all()
+            for video_id, scraped_at in earlier:
+                row_hash = rows[(video_id, scraped_at)]['content_hash']
+                if any(
+                    run.video_id == video_id and run.content_hash == row_hash
+                    and run.scraped_at < scraped_at <= run.last_seen_at
+                    for run in covering
+                ):
+                    del rows[(video_id, scraped_at)]
+
+        for extension in extensions.values():
+            extension['account_id'] = account_id
+        return extensions, observed
+
+    def lock_latest(self, account_id: int, video_ids: List[str], session: Session) -> None:
+        """
+        Lock the video_analytics_latest rows of an account's videos until the caller commits.
+
+        Takes the whole database write lock on SQLite. fold_unchanged() takes the same locks; callers that stamp scraped_at
+        themselves (the API) take them first, so a stamp is never older than
+        a run a concurrent writer committed in the meantime.
+
+        Args:
+            account_id: Account of the videos
+            video_ids: YouTube video IDs
+            session: Database session
+        """
+        latest = VideoAnalyticsLatest.__table__
+        if session.get_bind().dialect.name == 'sqlite':
+            # SQLite ignores FOR UPDATE: take the database write lock with an UPDATE
+            # of no row (video ids are never empty), looked up by primary key
+            session.execute(
+                update(latest)
+                .where(latest.c.video_id == '', latest.c.account_id == account_id)
+                .values(account_id=latest.c.account_id)
+            )
+            return
+        session.execute(
+            select(latest.c.video_id)
+            .where(latest.c.account_id == account_id, latest.c.video_id.in_(set(video_ids)))
+            # Same lock order in every writer
+            .order_by(latest.c.video_id)
+            .with_for_update()
+        )
+
+    def extend_runs(self, extensions: Dict[int, Dict[str, Any]], session: Session) -> None:
+        """
+        Move last_seen_at forward and add to observed_count of stored snapshots.
+
+        Args:
+            extensions: fold_unchanged() output, keyed by analytics id
+            session: Database session (the caller commits)
+        """
+        if not extensions:
+            return
+        history = VideoAnalytics.__table__
+        latest = VideoAnalyticsLatest.__table__
+        params = [
+            {
+                'b_id': analytics_id,
+                'b_video_id': extension['video_id'],
+                'b_account_id': extension['account_id'],
+                'b_scraped_at': extension['scraped_at'],
+                'b_last_seen_at': extension['last_seen_at'],
+                'b_observed': extension['observed'],
+            }
+            for analytics_id, extension in extensions.items()
+        ]
+        last_seen_at = bindparam('b_last_seen_at')
+        connection = session.connection()
+        connection.execute(
+            update(history)
+            # scraped_at lets PostgreSQL prune to a single partition
+            .where(history.c.id == bindparam('b_id'), history.c.scraped_at == bindparam('b_scraped_at'))
+            .values(
+                last_seen_at=case(
+                    (func.coalesce(history.c.last_seen_at, history.c.scraped_at) < last_seen_at, last_seen_at),
+                    else_=history.c.last_seen_at,
+                ),
+                observed_count=history.c.observed_count + bindparam('b_observed'),
+            ),
+            params,
+        )
+        connection.execute(
+            update(latest)
+            .where(
+                latest.c.video_id == bindparam('b_video_id'),
+                latest.c.account_id == bindparam('b_account_id'),
+                latest.c.analytics_id == bindparam('b_id'),
+            )
+            .values(
+                last_seen_at=case(
+                    (func.coalesce(latest.c.last_seen_at, latest.c.scraped_at) < last_seen_at, last_seen_at),
+                    else_=latest.c.last_seen_at,
+                ),
+                updated_at=datetime.utcnow(),
+            ),
+            [{key: value for key, value in param.items() if key != 'b_scraped_at' and key != 'b_observed'}
+             for param in params],
+        )
+
+    def add_observations(self, observed: List[Dict[str, Any]], inserted: List[tuple], session: Session) -> int:
+        """
+        Record the scrapes folded into runs in video_analytics_observations.
+
+        Args:
+            observed: fold_unchanged() output
+            inserted: insert_snapshots() output, to resolve runs that started in the same batch
+            session: Database session (the caller commits)
+
+        Returns:
+            Number of observations written
+        """
+        ids = {(video_id, scraped_at): analytics_id for analytics_id, video_id, _, scraped_at in inserted}
+        rows = []
+        for row in observed:
+            # A batch row that was not inserted (already stored) took its observations with it
+            analytics_id = ids.get(row['run']) if isinstance(row['run'], tuple) else row['run']
+            if analytics_id is not None:
+                rows.append({'analytics_id': analytics_id, 'observed_at': row['scraped_at']})
+        if rows:
+            session.execute(insert(VideoAnalyticsObservation.__table__), rows)
+        return len(rows)
+
+    # ==================== Latest Snapshot ====================
+
+    def upsert_latest(self, snapshots: List[Any], session: Session) -> None:
+        """
+        Make snapshots current in video_analytics_latest unless a newer one is already there.
+
+        Args:
+            snapshots: VideoAnalytics objects, or dicts with 'id' plus VideoAnalytics column values
+            session: Database session (the caller commits)
+        """
+        newest: Dict[tuple, Dict[str, Any]] = {}
+        for snapshot in map(self._snapshot_values, snapshots):
+            key = (snapshot['video_id'], snapshot['account_id'])
+            if key not in newest or snapshot['scraped_at'] >= newest[key]['scraped_at']:
+                newest[key] = snapshot
+        if not newest:
+            return
+
+        now = datetime.utcnow()
+        values = [
+            {
+                'video_id': video_id,
+                'account_id': account_id,
+                'analytics_id': snapshot['id'],
+                **{column: snapshot.get(column) for column in LATEST_COLUMNS},
+                'updated_at': now,
+            }
+            for (video_id, account_id), snapshot in newest.items()
+        ]
+
+        table = VideoAnalyticsLatest.__table__
+        stmt = dialect_insert(session, VideoAnalyticsLatest)
+        if stmt is not None:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['video_id', 'account_id'],
+                set_={column: stmt.excluded[column] for column in ('analytics_id', *LATEST_COLUMNS, 'updated_at')},
+                where=table.c.scraped_at <= stmt.excluded.scraped_at,
+            )
+            session.execute(stmt, values)
+            return
+
+        for value in values:
+            current = session.get(VideoAnalyticsLatest, (value['video_id'], value['account_id']))
+            if current is None:
+                session.add(VideoAnalyticsLatest(**value))
+            elif current.scraped_at <= value['scraped_at']:
+                for column, column_value in value.items():
+                    setattr(current, column, column_value)
+        session.flush()
+
+    def refresh_latest(
         self,
-        analytics: VideoAnalytics,
-        traffic_sources: Dict[str, Any],
         session: Session,
+        video_ids: Optional[List[str]] = None,
+        account_id: Optional[int] = None,
+    ) -> int:
+        """
+        Rebuild video_analytics_latest rows from the snapshot history.
+
+        Used to backfill the table and after snapshots are updated or deleted.
+
+        Args:
+            session: Database session (the caller commits)
+            video_ids: Only rebuild these videos (all if None)
+            account_id: Only rebuild this account (all if None)
+
+        Returns:
+            Number of latest rows written
+        """
+        history = VideoAnalytics.__table__
+        latest = VideoAnalyticsLatest.__table__
+
+        delete = latest.delete()
+        conditions = []
+        if video_ids is not None:
+            delete = delete.where(latest.c.video_id.in_(video_ids))
+            conditions.append(history.c.video_id.in_(video_ids))
+        if account_id is not None:
+            delete = delete.where(latest.c.account_id == account_id)
+            conditions.append(history.c.account_id == account_id)
+        session.execute(delete)
+
+        ranked = (
+            select(
+                history.c.id, history.c.video_id, history.c.account_id,
+                *[history.c[column] for column in LATEST_COLUMNS],
+                func.row_number().over(
+                    partition_by=(history.c.video_id, history.c.account_id),
+                    order_by=(history.c.scraped_at.desc(), history.c.id.desc()),
+                ).label('position'),
+            )
+            .where(*conditions)
+            .subquery()
+        )
+        result = session.execute(
+            insert(latest).from_select(
+                ['analytics_id', 'video_id', 'account_id', *LATEST_COLUMNS, 'updated_at'],
+                select(
+                    ranked.c.id, ranked.c.video_id, ranked.c.account_id,
+                    *[ranked.c[column] for column in LATEST_COLUMNS],
+                    func.now(),
+                ).where(ranked.c.position == 1),
+            )
+        )
+        return result.rowcount
+
+    # ==================== Daily Rollup ====================
+
+    def add_to_rollup(self, snapshots: List[Any], session: Session) -> None:
+        """
+        Add newly inserted snapshots to analytics_daily_rollup.
+
+        Rows are keyed by account, the video's channel and the scrape day;
+        existing rows are incremented in a single upsert.
+
+        Args:
+            snapshots: VideoAnalytics objects, or dicts of VideoAnalytics column values
+            session: Database session (the caller commits)
+        """
+        snapshots = [self._snapshot_values(snapshot) for snapshot in snapshots]
+        if not snapshots:
+            return
+        video_ids = {snapshot['video_id'] for snapshot in snapshots}
+        channels = dict(session.execute(
+            select(Video.video_id, Video.channel_id).where(Video.video_id.in_(video_ids))
+        ).all())
+
+        deltas: Dict[tuple, Dict[str, Any]] = {}
+        for snapshot in snapshots:
+            scraped_at = snapshot['scraped_at']
+            key = (snapshot['account_id'], channels.get(snapshot['video_id']) or 0, scraped_at.date())
+            delta = deltas.setdefault(key, {
+                'snapshots': 0, 'impressions': 0, 'views': 0, 'unique_viewers': 0,
+                'watch_time_hours': 0, 'ctr_sum': 0, 'ctr_count': 0,
+            })
+            delta['snapshots'] += 1
+            delta['impressions'] += snapshot.get('impressions') or 0
+            delta['views'] += snapshot.get('views') or 0
+            delta['unique_viewers'] += snapshot.get('unique_viewers') or 0
+            delta['watch_time_hours'] += float(snapshot.get('watch_time_hours') or 0)
+            if snapshot.get('ctr_percentage'):
+                delta['ctr_sum'] += float(snapshot['ctr_percentage'])
+                delta['ctr_count'] += 1
+
+        now = datetime.utcnow()
+        values = [
+            {'account_id': account_id, 'channel_id': channel_id, 'day': day, **delta, 'updated_at': now}
+            for (account_id, channel_id, day), delta in deltas.items()
+        ]
+
+        table = AnalyticsDailyRollup.__table__
+        stmt = dialect_insert(session, AnalyticsDailyRollup)
+        if stmt is not None:
+            increments = {column: table.c[column] + stmt.excluded[column] for column in ROLLUP_SUM_COLUMNS}
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['account_id', 'channel_id', 'day'],
+                set_={**increments, 'updated_at': stmt.excluded.updated_at},
+            )
+            session.execute(stmt, values)
+            return
+
+        for value in values:
+            current = session.get(AnalyticsDailyRollup, (value['account_id'], value['channel_id'], value['day']))
+            if current is None:
+                session.add(AnalyticsDailyRollup(**value))
+                continue
+            for column in ROLLUP_SUM_COLUMNS:
+                setattr(current, column, getattr(current, column) + value[column])
+            current.updated_at = now
+        session.flush()
+
+    def rebuild_rollup(
+        self,
+        session: Session,
+        account_id: Optional[int] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+    ) -> int:
+        """
+        Recompute analytics_daily_rollup rows from the snapshot history.
+
+        Used to backfill the table and after snapshots are updated or deleted.
+        A snapshot counts once on the day of scraped_at and once more on the
+        day of every later scrape folded into its run
+        (video_analytics_observations), like fold_unchanged() adds them.
+
+        Args:
+            session: Database session (the caller commits)
+            account_id: Only rebuild this account (all if None)
+            date_from: First day to rebuild (inclusive)
+            date_to: Last day to rebuild (inclusive)
+
+        Returns:
+            Number of rollup rows written
+        """
+        history = VideoAnalytics.__table__
+        rollup = AnalyticsDailyRollup.__table__
+
+        delete = rollup.delete()
+        conditions = []
+        if account_id is not None:
+            delete = delete.where(rollup.c.account_id == account_id)
+            conditions.append(history.c.account_id == account_id)
+        last_seen_at = func.coalesce(history.c.last_seen_at, history.c.scraped_at)
+        day_conditions = []
+        if date_from is not None:
+            delete = delete.where(rollup.c.day >= date_from)
+            conditions.append(last_seen_at >= datetime.combine(date_from, datetime.min.time()))
+        if date_to is not None:
+            delete = delete.where(rollup.c.day <= date_to)
+            conditions.append(history.c.scraped_at < datetime.combine(date_to + timedelta(days=1), datetime.min.time()))
+        session.execute(delete)
+
+        # SQLite has no DATE type; date() yields the same 'YYYY-MM-DD' the Date column stores
+        sqlite = session.get_bind().dialect.name == 'sqlite'
+        observations = VideoAnalyticsObservation.__table__
+
+        def scrape_day(timestamp):
+            return func.date(timestamp) if sqlite else cast(timestamp, Date)
+
+        # One row per scrape: the snapshot's own and each unchanged one folded into its run
+        scrapes = union_all(
+            select(history.c.id.label('analytics_id'), history.c.scraped_at, scrape_day(history.c.scraped_at).label('day'))
+            .where(*conditions),
+            select(history.c.id, history.c.scraped_at, scrape_day(observations.c.observed_at))
+            .select_from(history.join(observations, observations.c.analytics_id == history.c.id))
+            .where(*conditions),
+        ).subquery('scrapes')
+        day = scrapes.c.day
+        if date_from is not None:
+            day_conditions.append(day >= (date_from.isoformat() if sqlite else date_from))
+        if date_to is not None:
+            day_conditions.append(day <= (date_to.isoformat() if sqlite else date_to))
+        channel_id = func.coalesce(Video.__table__.c.channel_id, 0)
+        ctr = history.c.ctr_percentage
+
+        aggregated = (
+            select(
+                history.c.account_id,
+                channel_id,
+                day,
+                func.count(),
+                func.coalesce(func.sum(history.c.impressions), 0),
+                func.coalesce(func.sum(history.c.views), 0),
+                func.coalesce(func.sum(history.c.unique_viewers), 0),
+                func.coalesce(func.sum(history.c.watch_time_hours), 0),
+                func.coalesce(func.sum(func.nullif(ctr, 0)), 0),
+                func.count(func.nullif(ctr, 0)),
+                func.now(),
+            )
+            .select_from(
+                scrapes
+                .join(history, (history.c.id == scrapes.c.analytics_id) & (history.c.scraped_at == scrapes.c.scraped_at))
+                .join(Video.__table__, Video.__table__.c.video_id == history.c.video_id)
+            )
+            .where(*day_conditions)
+            .group_by(history.c.account_id, channel_id, day)
+        )
+        result = session.execute(
+            insert(rollup).from_select(
+                ['account_id', 'channel_id', 'day', *ROLLUP_SUM_COLUMNS, 'updated_at'], aggregated
+            )
+        )
+        return result.rowcount
+
+    @staticmethod
+    def _snapshot_values(snapshot: Any) -> Dict[str, Any]:
+        """Column values of a VideoAnalytics object (dicts are returned unchanged)."""
+        if isinstance(snapshot, VideoAnalytics):
+            return {column.name: getattr(snapshot, column.name) for column in VideoAnalytics.__table__.columns}
+        return snapshot
+
+    # ==================== Identity Resolution ====================
+
+    def _resolve_account_id(self, account_name: str, session: Session) -> int:
+        """Get an account's id, from the identity cache when possible."""
+        account_id = self.identity_cache.get(ACCOUNT, account_name)
+        if account_id is None:
+            account_id = session.scalar(select(Account.id).where(Account.name == account_name))
+            if account_id is None:
+                raise ValueError(f"Account '{account_name}' not found in database")
+            self.identity_cache.put(ACCOUNT, account_name, account_id)
+        return account_id
+
+    def _resolve_channel_id(self, account_id: int, channel_url: Optional[str], session: Session) -> Optional[int]:
+        """Get (or create) the account's channel id for a URL, from the identity cache when possible."""
+        if not channel_url:
+            return None
+        channel_id = self.identity_cache.get(CHANNEL, (account_id, channel_url))
+        if channel_id is None:
+            # Cached only after commit, so a rolled-back channel is never remembered
+            channel_id = self._get_or_create_channel(account_id, channel_url, session).id
+        return channel_id
+
+    def _remember(
+        self,
+        account_name: str,
+        account_id: int,
+        channel_url: Optional[str],
+        channel_id: Optional[int],
+        video_ids: List[str],
+    ) -> None:
+        """Cache ids of rows that are now committed."""
+        self.identity_cache.put(ACCOUNT, account_name, account_id)
+        if channel_url and channel_id is not None:
+            self.identity_cache.put(CHANNEL, (account_id, channel_url), channel_id)
+        for video_id in video_ids:
+            self.identity_cache.put(VIDEO, video_id, True)
+
+    def _forget(
+        self,
+        account_name: str,
+        account_id: Optional[int],
+        channel_url: Optional[str],
+        video_ids: List[str],
     ) -> None:
-        """Save traffic sources breakdown."""
+        """
+        Drop cache entries used by a failed write.
+
+        A row deleted by another process leaves a stale entry that surfaces as
+        an error here; dropping it lets the next attempt look the row up again.
+        """
+        self.identity_cache.invalidate(ACCOUNT, account_name)
+        if channel_url and account_id is not None:
+            self.identity_cache.invalidate(CHANNEL, (account_id, channel_url))
+        for video_id in video_ids:
+            self.identity_cache.invalidate(VIDEO, video_id)
+        # A source type created in the failed transaction may have been cached
+        self.identity_cache.invalidate(SOURCE_TYPE)
+
+    def get_or_create_channel(
+        self,
+        account: Account,
+        channel_url: Optional[str],
+        session: Session,
+    ) -> Optional[Channel]:
+        """Get the account's channel for a URL, creating it if needed."""
+        if not channel_url:
+            return None
+        return self._get_or_create_channel(account.id, channel_url, session)
+
+    def _get_or_create_channel(self, account_id: int, channel_url: str, session: Session) -> Channel:
+        ids, created = upsert_channels(session, account_id, [channel_url])
+        if created:
+            print(f"  ✓ Created channel in database: {channel_url}")
+        return session.get(Channel, ids[channel_url])
+
+    def build_analytics_row(
+        self,
+        video_id: str,
+        account_id: int,
+        analytics_data: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """Map a scraper result to VideoAnalytics column values."""
+        top_metrics = analytics_data.get('top_metrics', {})
+        impressions_data = analytics_data.get('impressions_data', {})
+        traffic_sources = analytics_data.get('how_viewers_find', {})
+
+        return {
+            'video_id': video_id,
+            'account_id': account_id,
+            'impressions': self._parse_number(top_metrics.get('Impressions')),
+            'views': self._parse_number(top_metrics.get('Views')),
+            'unique_viewers': self._parse_number(top_metrics.get('Unique viewers')),
+            'ctr_percentage': self._parse_percentage(top_metrics.get('Impressions click-through rate')),
+            'views_from_impressions': self._parse_number(impressions_data.get('Views from impressions')),
+            'youtube_recommending_percentage': self._parse_percentage(
+                impressions_data.get('YouTube recommending your content')
+            ),
+            'ctr_from_impressions_percentage': self._parse_percentage(
+                impressions_data.get('Click-through rate (from impressions)')
+            ),
+            'avg_view_duration_seconds': self._parse_duration(
+                impressions_data.get('Average view duration (from impressions)')
+            ),
+            'watch_time_hours': self._parse_float(
+                impressions_data.get('Watch time from impressions (hours)')
+            ),
+            'publish_start_date': self._parse_date(analytics_data.get('publish_start_date')),
+            'top_metrics': top_metrics,
+            'traffic_sources': traffic_sources,
+            'impressions_data': impressions_data,
+            'page_text': analytics_data.get('page_text'),
+            'metric_values': self.build_metric_values(top_metrics, impressions_data),
+            'scraped_at': self._parse_timestamp(analytics_data.get('crawl_datetime')),
+        }
+
+    def build_metric_values(self, *metric_dicts: Optional[Dict[str, Any]]) -> Optional[Dict[str, float]]:
+        """
+        Parse scraped metric dicts (top_metrics, impressions_data) into numbers keyed by label.
+
+        Stored in video_analytics_raw.metric_values, where metrics can be
+        filtered with indexed SQL instead of re-parsing display strings.
+
+        Returns:
+            Dict of label -> number, or None if nothing could be parsed
+        """
+        values = {}
+        for metrics in metric_dicts:
+            for label, value in (metrics or {}).items():
+                number = self._parse_metric_value(value)
+                if number is not None:
+                    values.setdefault(label, number)
+        return values or None
+
+    @staticmethod
+    def split_raw_values(row: Dict[str, Any]) -> tuple:
+        """
+        Split build_analytics_row() output into video_analytics and video_analytics_raw values.
+
+        Returns:
+            (analytics values, raw payload values)
+        """
+        analytics = {column: value for column, value in row.items() if column not in RAW_COLUMNS}
+        raw = {column: row.get(column) for column in RAW_COLUMNS}
+        return analytics, raw
+
+    def build_raw_row(self, analytics_id: int, row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Map build_analytics_row() output to VideoAnalyticsRaw column values (None if there is no payload)."""
+        raw = self.split_raw_values(row)[1]
+        if all(value is None for value in raw.values()):
+            return None
+        return {'analytics_id': analytics_id, **raw}
+
+    def build_traffic_source_rows(self, analytics_id: int, traffic_sources: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Map a traffic sources dict to (analytics_id, source_name, percentage) rows."""
+        rows = []
         for source_name, percentage in traffic_sources.items():
             if isinstance(percentage, str):
                 percentage = self._parse_percentage(percentage)
 
             if percentage is not None:
-                traffic = TrafficSource(
-                    analytics_id=analytics.id,
-                    source_name=source_name,
-                    percentage=percentage,
+                rows.append({
+                    'analytics_id': analytics_id,
+                    'source_name': source_name,
+                    'percentage': percentage,
+                })
+        return rows
+
+    # ==================== Traffic Sources ====================
+
+    @property
+    def traffic_layout(self) -> str:
+        """Storage layout of traffic source breakdowns ('rows' or 'wide', see DB_TRAFFIC_LAYOUT)."""
+        return self.db.config.traffic_layout
+
+    def resolve_source_type_ids(self, names: List[str], session: Session) -> Dict[str, int]:
+        """
+        Map traffic source names to traffic_source_types ids, creating unknown names.
+
+        Args:
+            names: Traffic source names
+            session: Database session (new types are inserted in its transaction)
+
+        Returns:
+            Dict of name -> id
+        """
+        ids = {}
+        missing = set()
+        for name in set(names):
+            source_type_id = self.identity_cache.get(SOURCE_TYPE, name)
+            if source_type_id is None:
+                missing.add(name)
+            else:
+                ids[name] = source_type_id
+        if not missing:
+            return ids
+
+        select_missing = select(TrafficSourceType.name, TrafficSourceType.id).where(TrafficSourceType.name.in_(missing))
+        found = dict(session.execute(select_missing).all())
+        for name, source_type_id in found.items():
+            self.identity_cache.put(SOURCE_TYPE, name, source_type_id)
+
+        new_names = sorted(missing - found.keys())
+        if new_names:
+            stmt = dialect_insert(session, TrafficSourceType)
+            if stmt is not None:
+                session.execute(
+                    stmt.on_conflict_do_nothing(index_elements=['name']), [{'name': name} for name in new_names]
                 )
-                session.add(traffic)
+            else:
+                session.add_all(TrafficSourceType(name=name) for name in new_names)
+                session.flush()
+            # Not cached: the rows are only committed with the caller's transaction
+            found.update(session.execute(select_missing).all())
+        ids.update(found)
+        return ids
+
+    def write_traffic_sources(self, rows: List[Dict[str, Any]], session: Session) -> int:
+        """
+        Insert traffic source breakdowns in the configured layout.
+
+        Args:
+            rows: build_traffic_source_rows() output (analytics_id, source_name, percentage)
+            session: Database session
+
+        Returns:
+            Number of sources written
+        """
+        if not rows:
+            return 0
+        type_ids = self.resolve_source_type_ids([row['source_name'] for row in rows], session)
+
+        if self.traffic_layout == 'wide':
+            breakdowns: Dict[int, Dict[str, list]] = {}
+            for row in rows:
+                breakdown = breakdowns.setdefault(row['analytics_id'], {'source_type_ids': [], 'percentages': []})
+                breakdown['source_type_ids'].append(type_ids[row['source_name']])
+                breakdown['percentages'].append(float(row['percentage']))
+            session.execute(
+                insert(TrafficSourceBreakdown.__table__),
+                [{'analytics_id': analytics_id, **breakdown} for analytics_id, breakdown in breakdowns.items()],
+            )
+        else:
+            session.execute(
+                insert(TrafficSource.__table__),
+                [
+                    {
+                        'analytics_id': row['analytics_id'],
+                        'source_type_id': type_ids[row['source_name']],
+                        'percentage': row['percentage'],
+                    }
+                    for row in rows
+                ],
+            )
+        return len(rows)
+
+    def traffic_from_clause(self, dialect_name: str) -> Tuple[str, str, str]:
+        """
+        FROM clause with one row per traffic source share of a snapshot.
+
+        Joins the configured layout (rows: traffic_sources, wide: unnested
+        traffic_source_breakdowns) to video_analytics as va.
+
+        Args:
+            dialect_name: Database dialect ('postgresql' or 'sqlite')
+
+        Returns:
+            (FROM clause, source type id column, percentage column)
+        """
+        if self.traffic_layout == 'rows':
+            source = """
+                FROM traffic_sources t
+                JOIN video_analytics va ON va.id = t.analytics_id
+            """
+            return source, 't.source_type_id', 't.percentage'
+        if dialect_name == 'postgresql':
+            source = """
+                FROM traffic_source_breakdowns b
+                JOIN video_analytics va ON va.id = b.analytics_id
+                CROSS JOIN LATERAL unnest(b.source_type_ids, b.percentages) AS t(source_type_id, percentage)
+            """
+            return source, 't.source_type_id', 't.percentage'
+        source = """
+            FROM traffic_source_breakdowns b
+            JOIN video_analytics va ON va.id = b.analytics_id
+            JOIN json_each(b.source_type_ids) ids
+            JOIN json_each(b.percentages) pcts ON pcts.key = ids.key
+        """
+        return source, 'ids.value', 'pcts.value'
+
+    def get_traffic_source_totals(
+        self,
+        session: Session,
+        account_id: int = None,
+        date_from: Any = None,
+        date_to: Any = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Aggregate traffic source percentages per source type.
+
+        Groups by the smallint source_type_id (rows layout: traffic_sources,
+        wide layout: unnested traffic_source_breakdowns) and joins the names
+        of the few resulting groups afterwards.
+
+        Args:
+            session: Database session
+            account_id: Only snapshots of this account
+            date_from: Only snapshots scraped at or after this date
+            date_to: Only snapshots scraped at or before this date
+
+        Returns:
+            List of dicts with source_type_id, source_name, snapshots, average_percentage
+        """
+        conditions = []
+        params: Dict[str, Any] = {}
+        for column, operator, value in (
+            ('account_id', '=', account_id), ('scraped_at', '>=', date_from), ('scraped_at', '<=', date_to),
+        ):
+            if value is not None:
+                name = f"p{len(params)}"
+                conditions.append(f"va.{column} {operator} :{name}")
+                params[name] = value
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+        source, type_column, percentage_column = self.traffic_from_clause(session.get_bind().dialect.name)
+
+        totals = session.execute(
+            text(f"""
+                SELECT {type_column} AS source_type_id, count(*) AS snapshots, avg({percentage_column}) AS average
+                {source}
+                {where}
+                GROUP BY {type_column}
+            """),
+            params,
+        ).all()
+        names = dict(session.execute(select(TrafficSourceType.id, TrafficSourceType.name)).all())
+        return sorted(
+            (
+                {
+                    'source_type_id': int(source_type_id),
+                    'source_name': names.get(int(source_type_id)),
+                    'snapshots': snapshots,
+                    'average_percentage': float(average) if average is not None else None,
+                }
+                for source_type_id, snapshots, average in totals
+            ),
+            key=lambda total: (-(total['average_percentage'] or 0), total['source_type_id']),
+        )
 
     # ==================== Parsing Utilities ====================
 
@@ -310,6 +1255,24 @@ class ScraperDatabaseWriter:
                 return None
         return None
 
+    @classmethod
+    def _parse_metric_value(cls, value: Any) -> Optional[float]:
+        """Parse a displayed metric ('1,234', '5.2%', '3:05') to a number."""
+        if isinstance(value, bool):
+            return None
+        if isinstance(value, (int, float)):
+            return float(value)
+        if isinstance(value, str):
+            value = value.strip()
+            if ':' in value:
+                seconds = cls._parse_duration(value)
+                return float(seconds) if seconds is not None else None
+            try:
+                return float(value.replace(',', '').replace('%', '').strip())
+            except ValueError:
+                return None
+        return None
+
     @staticmethod
     def _parse_date(value: Any) -> Optional[datetime]:
         """Parse date value."""
@@ -355,37 +1318,6 @@ class ScraperDatabaseWriter:
 
         return None
 
-    @staticmethod
-    def _extract_channel_id_from_url(url: str) -> Optional[str]:
-        """Extract channel ID from YouTube channel URL.
-        
-        Supports formats:
-        - https://www.youtube.com/channel/UCxxxxxx
-        - https://www.youtube.com/@username
-        - https://www.youtube.com/c/channelname
-        """
-        if not url:
-            return None
-        
-        import re
-        
-        # Extract channel ID from /channel/UCxxxxxx format
-        match = re.search(r'/channel/([^/?]+)', url)
-        if match:
-            return match.group(1)
-        
-        # For @username or /c/ format, return the identifier
-        match = re.search(r'/@([^/?]+)', url)
-        if match:
-            return match.group(1)
-        
-        match = re.search(r'/c/([^/?]+)', url)
-        if match:
-            return match.group(1)
-        
-        # If no pattern matches, return None
-        return None
-
 
 # Global instance for easy access
 db_writer = ScraperDatabaseWriter()
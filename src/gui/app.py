@@ -965,36 +965,18 @@ class YouTubeScraperGUI:
                                     # Find the account
                                     account = session.query(Account).filter(Account.name == selected_account).first()
                                     if account:
-                                        # Check if channel already exists
-                                        from src.database.models import Channel, Video
+                                        # Create channel and videos unless they already exist
+                                        from src.database.upsert import upsert_channels, upsert_videos
                                         
-                                        channel = session.query(Channel).filter(
-                                            Channel.account_id == account.id,
-                                            Channel.url == channel_url
-                                        ).first()
-                                        
-                                        if not channel:
-                                            # Create new channel
-                                            channel = Channel(
-                                                account_id=account.id,
-                                                url=channel_url
-                                            )
-                                            session.add(channel)
-                                            session.flush()  # Get channel.id
+                                        channel_ids, created = upsert_channels(session, account.id, [channel_url])
+                                        if created:
                                             self.log_message(f"✓ Channel saved to database", "SUCCESS")
                                         
-                                        # Add videos to database
-                                        videos_added = 0
-                                        for video_id in video_ids:
-                                            # Check if video exists
-                                            existing_video = session.query(Video).filter(Video.video_id == video_id).first()
-                                            if not existing_video:
-                                                video = Video(
-                                                    video_id=video_id,
-                                                    channel_id=channel.id
-                                                )
-                                                session.add(video)
-                                                videos_added += 1
+                                        _, added = upsert_videos(session, [
+                                            {'video_id': video_id, 'channel_id': channel_ids[channel_url]}
+                                            for video_id in video_ids
+                                        ])
+                                        videos_added = len(added)
                                         
                                         if videos_added > 0:
                                             self.log_message(f"✓ Added {videos_added} new videos to database", "SUCCESS")
@@ -3362,7 +3344,7 @@ class YouTubeScraperGUI:
             self.log_message(f"🎬 BẮT ĐẦU CÀO DỮ LIỆU - {total_accounts} TÀI KHOẢN", "SUCCESS")
             self.log_message(f"{'='*60}\n", "INFO")
 
-            all_results = []
+            total_scraped = 0
 
             for account_idx, account in enumerate(accounts_to_scrape, 1):
                 if not self.is_scraping:
@@ -3395,6 +3377,7 @@ class YouTubeScraperGUI:
                 # Initialize scraper for this account
                 # CRITICAL FIX: Use this account's cookies for this account's channels
                 scraper_instance = None
+                pipeline = None
                 try:
                     self.log_message(f"✓ Sử dụng cookies của {account_name}: {cookies_file}", "SUCCESS")
 
@@ -3419,8 +3402,9 @@ class YouTubeScraperGUI:
                                 pass
                         continue
 
-                    # Scrape videos for this account
-                    results = []
+                    # Scrape videos for this account: each result is written as soon as it is scraped
+                    output_file = f'analytics_results_{account_name}.json'
+                    pipeline = scraper_instance.build_result_pipeline(output_file=output_file).start()
                     for video_idx, video_id in enumerate(all_video_ids, 1):
                         if not self.is_scraping:
                             break
@@ -3440,40 +3424,37 @@ class YouTubeScraperGUI:
 
                         try:
                             data = scraper_instance.get_video_analytics(video_id, headless=False)
-                            results.append(data)
                         except Exception as e:
                             self.log_message(f"    ✗ Lỗi: {str(e)}", "ERROR")
-                            results.append({
+                            data = {
                                 'video_id': video_id,
                                 'error': str(e),
                                 'crawl_datetime': datetime.now().strftime('%d/%m/%Y')
-                            })
+                            }
+                        pipeline.put(data)
 
                         # Sleep between videos
                         if self.is_scraping:
                             time.sleep(2)
 
-                    # Save results for this account
-                    if self.is_scraping and results:
-                        self.update_progress(90, f"Đang lưu kết quả cho {account_name}...")
-                        try:
-                            output_file = f'analytics_results_{account_name}.json'
-                            scraper_instance.save_results(results, output_file=output_file)
-
-                            success_count = len([r for r in results if 'error' not in r])
-                            error_count = len([r for r in results if 'error' in r])
-
-                            self.log_message(f"✓ Tài khoản {account_name} hoàn thành!", "SUCCESS")
-                            self.log_message(f"  Thành công: {success_count}/{total_videos}, Lỗi: {error_count}", "INFO")
-                            self.log_message(f"  Kết quả lưu tại: {output_file}", "INFO")
-
-                            all_results.extend(results)
-                        except Exception as e:
-                            self.log_message(f"✗ Lỗi lưu kết quả: {str(e)}", "ERROR")
+                    # Flush the remaining database batch and merge the JSON file for this account
+                    self.update_progress(90, f"Đang lưu kết quả cho {account_name}...")
+                    stats = pipeline.close()
+                    pipeline = None
+                    if stats['received']:
+                        if any(stats['sink_errors'].values()):
+                            self.log_message(f"⚠ Lỗi khi lưu kết quả: {stats['sink_errors']}", "WARNING")
+                        self.log_message(f"✓ Tài khoản {account_name} hoàn thành!", "SUCCESS")
+                        self.log_message(f"  Thành công: {stats['succeeded']}/{total_videos}, Lỗi: {stats['failed']}", "INFO")
+                        self.log_message(f"  Kết quả lưu tại: {output_file}", "INFO")
+                        total_scraped += stats['received']
 
                 except Exception as e:
                     self.log_message(f"✗ Lỗi xử lý tài khoản {account_name}: {str(e)}", "ERROR")
                 finally:
+                    # Keep whatever was already scraped for this account
+                    if pipeline is not None:
+                        pipeline.close()
                     # Always close driver for this account, even if error occurred
                     if scraper_instance:
                         try:
@@ -3486,7 +3467,7 @@ class YouTubeScraperGUI:
                 self.update_progress(100, "Hoàn thành!")
                 self.log_message(f"\n{'='*60}", "INFO")
                 self.log_message(f"✓ HOÀN THÀNH CÀO DỮ LIỆU", "SUCCESS")
-                self.log_message(f"Tổng cộng: {len(all_results)} video từ {total_accounts} tài khoản", "INFO")
+                self.log_message(f"Tổng cộng: {total_scraped} video từ {total_accounts} tài khoản", "INFO")
                 self.log_message(f"{'='*60}\n", "INFO")
             else:
                 self.log_message("\n⚠ Quá trình cào dữ liệu đã bị dừng", "WARNING")
@@ -3574,8 +3555,10 @@ class YouTubeScraperGUI:
                     self.update_progress(0, "Lỗi cookies")
                     return
 
-                # Cào dữ liệu
-                results = []
+                # Cào dữ liệu: mỗi video được ghi ra file/database ngay khi cào xong
+                output_file = f'analytics_results_{self.current_account_name or "default"}.json'
+                pipeline = scraper_instance.build_result_pipeline(output_file=output_file).start()
+                preview = []  # Vài kết quả đầu tiên để hiển thị
                 total_videos = len(self.current_video_ids)
 
                 for i, video_id in enumerate(self.current_video_ids, 1):
@@ -3590,39 +3573,38 @@ class YouTubeScraperGUI:
                     try:
                         # Cào dữ liệu cho video này
                         data = scraper_instance.get_video_analytics(video_id, headless=False)
-                        results.append(data)
                     except Exception as e:
                         self.log_message(f"✗ Lỗi cào video {video_id}: {str(e)}", "ERROR")
                         # Tiếp tục với video tiếp theo
-                        results.append({
+                        data = {
                             'video_id': video_id,
                             'error': str(e),
                             'crawl_datetime': datetime.now().strftime('%d/%m/%Y')
-                        })
+                        }
+                    pipeline.put(data)
+                    if len(preview) < 5:
+                        preview.append(data)
 
                     # Nghỉ giữa các video
                     if self.is_scraping:
                         time.sleep(2)
 
-                if self.is_scraping:  # Chỉ lưu nếu không bị dừng
-                    # Lưu kết quả
-                    self.update_progress(95, "Đang lưu kết quả...")
-                    try:
-                        output_file = f'analytics_results_{self.current_account_name or "default"}.json'
-                        scraper_instance.save_results(results, output_file=output_file)
-
-                        self.update_progress(100, "Hoàn thành!")
-                        self.log_message(f"✓ Hoàn thành! Đã cào {len(results)}/{total_videos} video", "SUCCESS")
-                        self.log_message(f"Kết quả lưu tại: {output_file}", "INFO")
+                # Ghi nốt batch database và gộp file JSON (kể cả khi bị dừng: giữ các video đã cào)
+                self.update_progress(95, "Đang lưu kết quả...")
+                stats = pipeline.close()
+                if any(stats['sink_errors'].values()):
+                    self.log_message(f"✗ Lỗi lưu kết quả: {stats['sink_errors']}", "ERROR")
 
-                        # Hiển thị thống kê
-                        self.show_scraping_results(results)
-                    except Exception as e:
-                        self.log_message(f"✗ Lỗi lưu kết quả: {str(e)}", "ERROR")
-                        self.update_progress(0, "Lỗi lưu file")
+                if self.is_scraping:
+                    self.update_progress(100, "Hoàn thành!")
+                    self.log_message(f"✓ Hoàn thành! Đã cào {stats['received']}/{total_videos} video", "SUCCESS")
+                    self.log_message(f"Kết quả lưu tại: {output_file}", "INFO")
 
+                    # Hiển thị thống kê
+                    self.show_scraping_results(stats, preview)
                 else:
                     self.log_message("⚠ Quá trình cào dữ liệu đã bị dừng", "WARNING")
+                    self.log_message(f"Đã lưu {stats['received']} video vào: {output_file}", "INFO")
 
             except Exception as e:
                 self.log_message(f"Lỗi khi cào dữ liệu: {str(e)}", "ERROR")
@@ -3641,24 +3623,26 @@ class YouTubeScraperGUI:
         self.scraping_thread = threading.Thread(target=scraping_thread, daemon=True)
         self.scraping_thread.start()
 
-    def show_scraping_results(self, results):
-        """Hiển thị kết quả cào dữ liệu"""
-        if not results:
-            return
+    def show_scraping_results(self, stats, preview=()):
+        """Hiển thị kết quả cào dữ liệu
 
-        success_count = len([r for r in results if 'error' not in r])
-        error_count = len([r for r in results if 'error' in r])
+        Args:
+            stats: Thống kê của ResultPipeline (received, succeeded, failed)
+            preview: Vài kết quả đầu tiên để hiển thị chi tiết
+        """
+        if not stats['received']:
+            return
 
         self.log_message(f"\n{'='*50}", "INFO")
         self.log_message("KẾT QUẢ CÀO DỮ LIỆU:", "INFO")
         self.log_message(f"{'='*50}", "INFO")
-        self.log_message(f"Tổng số video: {len(results)}", "INFO")
-        self.log_message(f"Thành công: {success_count}", "SUCCESS")
-        self.log_message(f"Lỗi: {error_count}", "ERROR")
+        self.log_message(f"Tổng số video: {stats['received']}", "INFO")
+        self.log_message(f"Thành công: {stats['succeeded']}", "SUCCESS")
+        self.log_message(f"Lỗi: {stats['failed']}", "ERROR")
         self.log_message(f"{'='*50}\n", "INFO")
 
         # Hiển thị chi tiết cho một vài video đầu tiên
-        for i, result in enumerate(results[:5], 1):
+        for i, result in enumerate(preview[:5], 1):
             video_id = result.get('video_id', 'Unknown')
             if 'error' in result:
                 self.log_message(f"Video {i}: {video_id} - LỖI: {result['error']}", "ERROR")
@@ -3851,42 +3835,36 @@ class YouTubeScraperGUI:
                     wait_time=self.wait_time
                 )
 
-                # Sử dụng chế độ parallel để chạy nhiều Chrome driver
-                results = scraper_instance.scrape_multiple_videos_parallel(
-                    video_ids=self.current_video_ids,
-                    video_account_mapping=video_account_mapping,
-                    max_workers=len(set(video_account_mapping.values())),  # Số worker = số account
-                    headless=headless,
-                    auto_continue=self.auto_continue,
-                    wait_time=self.wait_time
-                )
-
-                # Lưu kết quả
-                self.update_progress(95, "Đang lưu kết quả...")
-                try:
-                    # Sử dụng file cố định thay vì tạo file mới mỗi lần
-                    output_file = 'analytics_results_parallel.json'
-                    scraper_instance.save_results(results, output_file=output_file)
-                    
-                    # Mark videos as scraped trong tracker
-                    from datetime import datetime
-                    scraped_video_ids = [r.get('video_id') for r in results if r.get('video_id') and 'error' not in r]
-                    if scraped_video_ids:
-                        self.scraping_tracker.mark_multiple_scraped(scraped_video_ids, datetime.now())
-                        self.scraping_tracker.save()
-                        self.log_message(f"✓ Đã đánh dấu {len(scraped_video_ids)} video đã cào trong tracker", "SUCCESS")
+                # Sử dụng chế độ parallel để chạy nhiều Chrome driver. Kết quả của mọi thread
+                # đi qua một pipeline: ghi file (cố định, không tạo file mới mỗi lần), ghi
+                # database theo tài khoản đã cào và đánh dấu trong tracker ngay khi xong
+                output_file = 'analytics_results_parallel.json'
+                pipeline = scraper_instance.build_result_pipeline(output_file=output_file,
+                                                                  tracker=self.scraping_tracker)
+                with pipeline:
+                    scraper_instance.stream_multiple_videos_parallel(
+                        self.current_video_ids,
+                        pipeline,
+                        video_account_mapping=video_account_mapping,
+                        max_workers=len(set(video_account_mapping.values())),  # Số worker = số account
+                        headless=headless,
+                        auto_continue=self.auto_continue,
+                        wait_time=self.wait_time
+                    )
+                    self.update_progress(95, "Đang lưu kết quả...")
+                stats = pipeline.get_statistics()
 
-                    self.update_progress(100, "Hoàn thành!")
-                    success_count = len([r for r in results if 'error' not in r])
-                    self.log_message(f"✓ Hoàn thành! Đã cào {success_count}/{len(results)} video", "SUCCESS")
-                    self.log_message(f"Kết quả lưu tại: {output_file}", "INFO")
+                if any(stats['sink_errors'].values()):
+                    self.log_message(f"✗ Lỗi lưu kết quả: {stats['sink_errors']}", "ERROR")
+                if stats['succeeded']:
+                    self.log_message(f"✓ Đã đánh dấu {stats['succeeded']} video đã cào trong tracker", "SUCCESS")
 
-                    # Hiển thị thống kê
-                    self.show_parallel_results(results)
+                self.update_progress(100, "Hoàn thành!")
+                self.log_message(f"✓ Hoàn thành! Đã cào {stats['succeeded']}/{stats['received']} video", "SUCCESS")
+                self.log_message(f"Kết quả lưu tại: {output_file}", "INFO")
 
-                except Exception as e:
-                    self.log_message(f"✗ Lỗi lưu kết quả: {str(e)}", "ERROR")
-                    self.update_progress(0, "Lỗi lưu file")
+                # Hiển thị thống kê
+                self.show_parallel_results(stats)
 
             except Exception as e:
                 self.log_message(f"Lỗi khi cào dữ liệu song song: {str(e)}", "ERROR")
@@ -3905,20 +3883,17 @@ class YouTubeScraperGUI:
         self.scraping_thread = threading.Thread(target=parallel_scraping_thread, daemon=True)
         self.scraping_thread.start()
 
-    def show_parallel_results(self, results):
-        """Hiển thị kết quả cào dữ liệu song song"""
-        if not results:
+    def show_parallel_results(self, stats):
+        """Hiển thị kết quả cào dữ liệu song song (thống kê của ResultPipeline)"""
+        if not stats['received']:
             return
 
-        success_count = len([r for r in results if 'error' not in r])
-        error_count = len([r for r in results if 'error' in r])
-
         self.log_message(f"\n{'='*60}", "INFO")
         self.log_message("KẾT QUẢ CÀO DỮ LIỆU SONG SONG:", "INFO")
         self.log_message(f"{'='*60}", "INFO")
-        self.log_message(f"Tổng số video: {len(results)}", "INFO")
-        self.log_message(f"Thành công: {success_count}", "SUCCESS")
-        self.log_message(f"Lỗi: {error_count}", "ERROR")
+        self.log_message(f"Tổng số video: {stats['received']}", "INFO")
+        self.log_message(f"Thành công: {stats['succeeded']}", "SUCCESS")
+        self.log_message(f"Lỗi: {stats['failed']}", "ERROR")
         self.log_message(f"{'='*60}\n", "INFO")
 
     def log_message(self, message, level="INFO"):
@@ -4051,6 +4026,7 @@ class YouTubeScraperGUI:
 
 def main():
     try:
+        db.use_pool_profile('scraper')
         app = YouTubeScraperGUI()
         app.run()
     except Exception as e:
@@ -0,0 +1,422 @@
+"""
+Streaming result pipeline for YouTube Analytics Scraper
+Hands every scraped record to storage sinks as soon as the video finishes
+"""
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Sentinel pushed onto the queue to stop the consumer thread
+_STOP = object()
+
+
+class ResultSink:
+    """Base class for pipeline sinks"""
+
+    name = 'sink'
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """
+        Consume a single scraped record
+
+        Args:
+            record: Analytics dict as returned by get_video_analytics()
+        """
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        """Persist anything the sink is still buffering"""
+
+    def close(self) -> None:
+        """Flush and release resources"""
+        self.flush()
+
+
+class JsonlSink(ResultSink):
+    """Appends one JSON line per record and syncs it to disk"""
+
+    name = 'jsonl'
+
+    def __init__(self, output_file: str, fsync: bool = True):
+        """
+        Initialize JsonlSink
+
+        Args:
+            output_file: Path of the .jsonl file (appended to, never rewritten)
+            fsync: Force each line to disk before the next record is accepted
+        """
+        self.output_file = output_file
+        self.fsync = fsync
+        output_dir = os.path.dirname(output_file)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        self._file = open(output_file, 'a', encoding='utf-8')
+
+    def write(self, record: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+
+class JsonArraySink(ResultSink):
+    """
+    Keeps a .json results file (one array, one entry per video_id) up to date
+
+    Records are appended to a journal next to the file ({output_file}.partial.jsonl)
+    as they arrive, so nothing is held in memory and a crash loses nothing.
+    close() merges the journal into the array once, replacing entries of
+    re-scraped videos, keeps it sorted by video_id and removes the journal.
+    """
+
+    name = 'json'
+
+    def __init__(self, output_file: str, fsync: bool = True):
+        """
+        Initialize JsonArraySink
+
+        Args:
+            output_file: Path of the .json file (merged into, like save_results())
+            fsync: Force each journal line to disk before the next record is accepted
+        """
+        self.output_file = output_file
+        self.journal_file = output_file + '.partial.jsonl'
+        self.new_count = 0
+        self.updated_count = 0
+        self._journal = JsonlSink(self.journal_file, fsync=fsync)
+
+    def write(self, record: Dict[str, Any]) -> None:
+        self._journal.write(record)
+
+    def close(self) -> None:
+        self._journal.close()
+        if not os.path.exists(self.journal_file):
+            return
+
+        results: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(self.output_file):
+            try:
+                with open(self.output_file, 'r', encoding='utf-8') as f:
+                    existing = json.load(f)
+                if isinstance(existing, list):
+                    results = {r['video_id']: r for r in existing if isinstance(r, dict) and r.get('video_id')}
+            except Exception as e:
+                logger.warning(f"Could not read {self.output_file}, starting a new file: {e}")
+
+        with open(self.journal_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                video_id = record.get('video_id')
+                if not video_id:
+                    continue
+                if video_id in results:
+                    self.updated_count += 1
+                else:
+                    self.new_count += 1
+                results[video_id] = record
+
+        temp_file = self.output_file + '.tmp'
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(sorted(results.values(), key=lambda r: r['video_id']), f, ensure_ascii=False, indent=2)
+        os.replace(temp_file, self.output_file)
+        os.remove(self.journal_file)
+
+
+class DatabaseBatchSink(ResultSink):
+    """Buffers successful records and writes them to the database in batches"""
+
+    name = 'database'
+
+    def __init__(self, account_name: str, channel_url: Optional[str] = None,
+                 cookies_file: Optional[str] = None, batch_size: int = 20, writer=None,
+                 max_retries: int = 3,
+                 dead_letter_file: str = os.path.join('data', 'result_pipeline_failed.jsonl'),
+                 metrics=None):
+        """
+        Initialize DatabaseBatchSink
+
+        Records carrying their own 'account_name' (set by plan runners that
+        switch accounts) are saved under that account instead. channel_url
+        belongs to the default account: other accounts' records are linked to
+        their own 'channel_url' if they carry one, otherwise to no channel.
+
+        A batch that fails with a transient database error stays buffered and
+        is retried on the next flush; after max_retries failed flushes, on a
+        non-transient error, or when the sink is closed, it is appended to
+        dead_letter_file instead of being dropped.
+
+        Args:
+            account_name: Default account the records belong to (created if missing)
+            channel_url: Optional channel URL of the default account to link videos to
+            cookies_file: Cookies file stored on a newly created account
+            batch_size: Number of records per database transaction
+            writer: ScraperDatabaseWriter instance (uses global db_writer if None)
+            max_retries: Failed flushes a batch is kept for before it is dead-lettered
+            dead_letter_file: JSONL file receiving records that could not be saved
+            metrics: Optional PhaseMetrics; each bulk save is recorded as the 'save' phase
+        """
+        if writer is None:
+            from src.database.writers import db_writer
+            writer = db_writer
+        self.writer = writer
+        if writer.db.config.is_edge:
+            # Edge mode: batches go to the local SQLite store, the agent syncs them centrally
+            from src.database.edge import get_edge_sync_agent
+            get_edge_sync_agent()
+        self.account_name = account_name
+        self.channel_url = channel_url
+        self.cookies_file = cookies_file
+        self.batch_size = max(1, batch_size)
+        self.max_retries = max_retries
+        self.dead_letter_file = dead_letter_file
+        self.metrics = metrics
+        self._buffer: List[Dict[str, Any]] = []
+        self._ready_accounts = set()
+        self._failed_flushes = 0
+        self._closing = False
+        self.saved = 0
+        self.dead_lettered = 0
+
+    def write(self, record: Dict[str, Any]) -> None:
+        if not record.get('video_id') or 'error' in record:
+            return
+        self._buffer.append(record)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Save the buffered records, one transaction per account and channel
+
+        Raises:
+            The last database error, after the failed records were kept for a
+            retry or dead-lettered
+        """
+        if not self._buffer:
+            return
+        from src.database.write_behind import append_dead_letter, is_transient_error
+
+        batch, self._buffer = self._buffer, []
+        groups: Dict[tuple, List[Dict[str, Any]]] = {}
+        for record in batch:
+            account_name = record.get('account_name') or self.account_name
+            channel_url = record.get('channel_url') or (
+                self.channel_url if account_name == self.account_name else None
+            )
+            groups.setdefault((account_name, channel_url), []).append(record)
+
+        retry: List[Dict[str, Any]] = []
+        error = None
+        for (account_name, channel_url), records in groups.items():
+            started = time.perf_counter()
+            try:
+                if account_name not in self._ready_accounts:
+                    cookies_file = self.cookies_file if account_name == self.account_name else None
+                    self.writer.ensure_account(account_name, cookies_file=cookies_file)
+                    self._ready_accounts.add(account_name)
+                self.writer.bulk_save_analytics(records, account_name=account_name, channel_url=channel_url)
+                self.saved += len(records)
+                if self.metrics is not None:
+                    self.metrics.record('save', time.perf_counter() - started)
+            except Exception as e:
+                if self.metrics is not None:
+                    self.metrics.record('save', time.perf_counter() - started, 'error')
+                error = e
+                if is_transient_error(e) and not self._closing and self._failed_flushes < self.max_retries:
+                    retry.extend(records)
+                elif append_dead_letter(self.dead_letter_file, records, account_name, channel_url):
+                    self.dead_lettered += len(records)
+                    logger.error(f"Saved {len(records)} record(s) of '{account_name}' to {self.dead_letter_file}")
+                else:
+                    # Nowhere to put them: keep them for the next flush rather than losing them
+                    retry.extend(records)
+
+        if error is None:
+            self._failed_flushes = 0
+            return
+        self._failed_flushes = self._failed_flushes + 1 if retry else 0
+        self._buffer = retry + self._buffer
+        raise error
+
+    def close(self) -> None:
+        # Nothing can retry after this: whatever still fails goes to the dead-letter file
+        self._closing = True
+        self.flush()
+
+
+class TrackerSink(ResultSink):
+    """Marks successfully scraped videos in the ScrapingTracker"""
+
+    name = 'tracker'
+
+    def __init__(self, tracker, save_every: int = 10):
+        """
+        Initialize TrackerSink
+
+        Args:
+            tracker: ScrapingTracker instance
+            save_every: Save the tracker file after this many marked videos
+        """
+        self.tracker = tracker
+        self.save_every = max(1, save_every)
+        self._pending = 0
+
+    def write(self, record: Dict[str, Any]) -> None:
+        video_id = record.get('video_id')
+        if not video_id or 'error' in record:
+            return
+        self.tracker.mark_scraped(video_id, datetime.now())
+        self._pending += 1
+        if self._pending >= self.save_every:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._pending:
+            self.tracker.save()
+            self._pending = 0
+
+
+class ResultPipeline:
+    """
+    Bounded producer/consumer pipeline between the scraper and its sinks
+
+    The scraper thread calls put() (or consume() with a generator). A single
+    consumer thread drains the queue and writes each record to every sink in
+    order. When the queue is full put() blocks, so a slow sink throttles the
+    scraper instead of letting results pile up in memory.
+    """
+
+    def __init__(self, sinks: List[ResultSink], max_buffer: int = 16, metrics=None):
+        """
+        Initialize ResultPipeline
+
+        Args:
+            sinks: Sinks that receive every record, in order
+            max_buffer: Maximum number of records waiting for the sinks
+            metrics: Optional PhaseMetrics; time put() blocks on a full buffer is recorded
+                     as the 'save_enqueue' phase (database saves are timed by DatabaseBatchSink)
+        """
+        self.sinks = list(sinks)
+        self.metrics = metrics
+        self.max_buffer = max(1, max_buffer)
+        self._queue: queue.Queue = queue.Queue(maxsize=self.max_buffer)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Any] = {
+            'received': 0,
+            'succeeded': 0,
+            'failed': 0,
+            'max_queue_depth': 0,
+            'blocked_seconds': 0.0,
+            'sink_errors': {sink.name: 0 for sink in self.sinks},
+        }
+
+    def start(self) -> 'ResultPipeline':
+        """Start the consumer thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='result-pipeline', daemon=True)
+            self._thread.start()
+        return self
+
+    def put(self, record: Dict[str, Any]) -> None:
+        """
+        Queue a record for the sinks (blocks while the buffer is full)
+
+        Args:
+            record: Analytics dict for one video
+        """
+        if self._thread is None:
+            self.start()
+        started = time.monotonic()
+        self._queue.put(record)
+        waited = time.monotonic() - started
+        if self.metrics is not None:
+            self.metrics.record('save_enqueue', waited)
+        with self._lock:
+            self._stats['received'] += 1
+            if 'error' in record:
+                self._stats['failed'] += 1
+            else:
+                self._stats['succeeded'] += 1
+            self._stats['blocked_seconds'] += waited
+            self._stats['max_queue_depth'] = max(self._stats['max_queue_depth'], self._queue.qsize())
+
+    def consume(self, records: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Pull records from an iterable (typically a generator) into the pipeline
+
+        Args:
+            records: Iterable of analytics dicts
+
+        Returns:
+            Pipeline statistics
+        """
+        for record in records:
+            self.put(record)
+        return self.get_statistics()
+
+    def close(self) -> Dict[str, Any]:
+        """
+        Drain the queue, flush and close every sink
+
+        Returns:
+            Pipeline statistics
+        """
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+        for sink in self.sinks:
+            try:
+                sink.close()
+            except Exception as e:
+                self._record_sink_error(sink, e)
+        return self.get_statistics()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get a snapshot of pipeline statistics"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['sink_errors'] = dict(self._stats['sink_errors'])
+        stats['blocked_seconds'] = round(stats['blocked_seconds'], 3)
+        return stats
+
+    def _run(self) -> None:
+        while True:
+            record = self._queue.get()
+            try:
+                if record is _STOP:
+                    return
+                for sink in self.sinks:
+                    try:
+                        sink.write(record)
+                    except Exception as e:
+                        self._record_sink_error(sink, e)
+            finally:
+                self._queue.task_done()
+
+    def _record_sink_error(self, sink: ResultSink, error: Exception) -> None:
+        logger.error(f"Sink '{sink.name}' failed: {error}")
+        with self._lock:
+            self._stats['sink_errors'][sink.name] = self._stats['sink_errors'].get(sink.name, 0) + 1
+
+    def __enter__(self) -> 'ResultPipeline':
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
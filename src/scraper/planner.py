@@ -0,0 +1,244 @@
+"""
+Execution planner for YouTube Analytics Scraper
+Groups (video, account) pairs so each account's cookies are loaded as few times as possible
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+class AccountBatch:
+    """Consecutive videos scraped with one account"""
+
+    def __init__(self, account_name: Optional[str], video_ids: Optional[List[str]] = None):
+        """
+        Initialize AccountBatch
+
+        Args:
+            account_name: Account whose cookies are used for this batch
+            video_ids: Video IDs scraped with that account, in order
+        """
+        self.account_name = account_name
+        self.video_ids = list(video_ids or [])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'account_name': self.account_name, 'video_ids': list(self.video_ids)}
+
+    def __len__(self) -> int:
+        return len(self.video_ids)
+
+    def __repr__(self) -> str:
+        return f"<AccountBatch(account='{self.account_name}', videos={len(self.video_ids)})>"
+
+
+class ExecutionPlan:
+    """
+    Ordered list of account batches plus the statistics that produced it
+
+    Sequential runners walk the batches in order, switching account only at
+    batch boundaries. The parallel runner (scrape_multiple_videos_parallel)
+    calls partition() and gives each worker thread its own sub-plan;
+    to_dict()/from_dict() turn a plan into plain data and back.
+    """
+
+    def __init__(self, batches: List[AccountBatch], start_account: Optional[str] = None,
+                 input_pairs: int = 0, duplicates_removed: int = 0, naive_switches: int = 0):
+        """
+        Initialize ExecutionPlan
+
+        Args:
+            batches: Account batches in execution order
+            start_account: Account the runner is logged in with before the first batch
+            input_pairs: Number of (video, account) pairs given to the planner
+            duplicates_removed: Videos dropped because another pair already covers them
+            naive_switches: Account switches the input order would have needed
+        """
+        self.batches = batches
+        self.start_account = start_account
+        self.input_pairs = input_pairs
+        self.duplicates_removed = duplicates_removed
+        self.naive_switches = naive_switches
+
+    @property
+    def total_videos(self) -> int:
+        return sum(len(batch) for batch in self.batches)
+
+    @property
+    def planned_switches(self) -> int:
+        """Number of account switches needed to run the plan"""
+        switches = 0
+        current = self.start_account
+        for batch in self.batches:
+            if batch.account_name != current:
+                switches += 1
+                current = batch.account_name
+        return switches
+
+    @property
+    def switches_avoided(self) -> int:
+        return max(0, self.naive_switches - self.planned_switches)
+
+    def video_ids(self) -> List[str]:
+        """Get all video IDs in execution order"""
+        return [video_id for batch in self.batches for video_id in batch.video_ids]
+
+    def video_account_mapping(self) -> Dict[str, Optional[str]]:
+        """Get video_id -> account_name mapping for the plan"""
+        return {video_id: batch.account_name for batch in self.batches for video_id in batch.video_ids}
+
+    def partition(self, workers: int) -> List['ExecutionPlan']:
+        """
+        Split the plan into at most `workers` sub-plans of similar size
+
+        Whole account batches are assigned largest-first to the least loaded
+        worker, so no account is split across workers unless there are more
+        workers than accounts, in which case the largest batches are halved
+        until every worker has something to do.
+
+        Args:
+            workers: Maximum number of sub-plans
+
+        Returns:
+            List of non-empty ExecutionPlans
+        """
+        batches = [AccountBatch(b.account_name, b.video_ids) for b in self.batches if b.video_ids]
+        workers = max(1, min(workers, self.total_videos))
+        while len(batches) < workers:
+            largest = max(batches, key=len)
+            if len(largest) < 2:
+                break
+            half = len(largest) // 2
+            batches.append(AccountBatch(largest.account_name, largest.video_ids[half:]))
+            largest.video_ids = largest.video_ids[:half]
+
+        buckets: List[List[AccountBatch]] = [[] for _ in range(workers)]
+        loads = [0] * workers
+        for batch in sorted(batches, key=len, reverse=True):
+            target = loads.index(min(loads))
+            buckets[target].append(batch)
+            loads[target] += len(batch)
+
+        return [
+            ExecutionPlan(bucket, start_account=bucket[0].account_name)
+            for bucket in buckets if bucket
+        ]
+
+    def summary(self) -> Dict[str, Any]:
+        """Get plan statistics for logs and run reports"""
+        return {
+            'input_pairs': self.input_pairs,
+            'videos': self.total_videos,
+            'accounts': len({batch.account_name for batch in self.batches}),
+            'duplicates_removed': self.duplicates_removed,
+            'naive_switches': self.naive_switches,
+            'planned_switches': self.planned_switches,
+            'switches_avoided': self.switches_avoided,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'start_account': self.start_account,
+            'input_pairs': self.input_pairs,
+            'duplicates_removed': self.duplicates_removed,
+            'naive_switches': self.naive_switches,
+            'batches': [batch.to_dict() for batch in self.batches],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ExecutionPlan':
+        return cls(
+            batches=[AccountBatch(b['account_name'], b['video_ids']) for b in data.get('batches', [])],
+            start_account=data.get('start_account'),
+            input_pairs=data.get('input_pairs', 0),
+            duplicates_removed=data.get('duplicates_removed', 0),
+            naive_switches=data.get('naive_switches', 0),
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"<ExecutionPlan(videos={self.total_videos}, batches={len(self.batches)}, "
+            f"switches={self.planned_switches}, avoided={self.switches_avoided})>"
+        )
+
+
+def plan_execution(pairs: Iterable[Tuple[str, Optional[str]]],
+                   start_account: Optional[str] = None) -> ExecutionPlan:
+    """
+    Build an execution plan from (video_id, account_name) pairs
+
+    A video listed under several accounts (e.g. shared across channels) is
+    scraped once, with the account that already owns the most videos. Batches
+    are ordered so the account the runner starts with goes first, followed by
+    the others in first-seen order.
+
+    Args:
+        pairs: Iterable of (video_id, account_name) tuples, in input order
+        start_account: Account the runner is currently logged in with
+
+    Returns:
+        ExecutionPlan
+    """
+    pairs = [(video_id, account) for video_id, account in pairs if video_id]
+
+    account_order: List[Optional[str]] = []
+    account_sizes: Dict[Optional[str], int] = {}
+    candidates: Dict[str, List[Optional[str]]] = {}
+    for video_id, account in pairs:
+        if account not in account_sizes:
+            account_order.append(account)
+            account_sizes[account] = 0
+        owners = candidates.setdefault(video_id, [])
+        if account not in owners:
+            owners.append(account)
+            account_sizes[account] += 1
+
+    # Naive cost: walk the deduplicated input in order, as the old loop did
+    naive_switches = 0
+    current = start_account
+    seen = set()
+    for video_id, account in pairs:
+        if video_id in seen:
+            continue
+        seen.add(video_id)
+        if account != current:
+            naive_switches += 1
+            current = account
+
+    batches: Dict[Optional[str], AccountBatch] = {}
+    for video_id, owners in candidates.items():
+        # max() keeps the first-listed owner on ties
+        owner = max(owners, key=lambda name: account_sizes[name])
+        batches.setdefault(owner, AccountBatch(owner)).video_ids.append(video_id)
+
+    ordered = sorted(
+        batches.values(),
+        key=lambda batch: (batch.account_name != start_account, account_order.index(batch.account_name)),
+    )
+
+    return ExecutionPlan(
+        ordered,
+        start_account=start_account,
+        input_pairs=len(pairs),
+        duplicates_removed=len(pairs) - len(candidates),
+        naive_switches=naive_switches,
+    )
+
+
+def plan_from_mapping(video_ids: Iterable[str], video_account_mapping: Optional[Dict[str, str]] = None,
+                      start_account: Optional[str] = None) -> ExecutionPlan:
+    """
+    Build an execution plan from a video list and a video_id -> account mapping
+
+    Videos missing from the mapping are scraped with start_account.
+
+    Args:
+        video_ids: Video IDs in input order
+        video_account_mapping: Optional dict mapping video_id -> account_name
+        start_account: Account the runner is currently logged in with
+
+    Returns:
+        ExecutionPlan
+    """
+    mapping = video_account_mapping or {}
+    return plan_execution(
+        ((video_id, mapping.get(video_id, start_account)) for video_id in video_ids),
+        start_account=start_account,
+    )
@@ -100,7 +100,8 @@ def thread_safe_print(*args, **kwargs):
 
 
 class YouTubeAnalyticsScraper:
-    def __init__(self, cookies_file=None, account_name=None, auto_continue=False, wait_time=30, channel_url=None):
+    def __init__(self, cookies_file=None, account_name=None, auto_continue=False, wait_time=30, channel_url=None,
+                 watchdog=None, latency_model=None):
         # Đảm bảo thư mục profile tồn tại
         os.makedirs('data/cookies/profile', exist_ok=True)
 
@@ -136,6 +137,27 @@ class YouTubeAnalyticsScraper:
         self.channel_url = channel_url
         
         self.driver = None
+        self.headless = False
+        
+        # Watchdog theo dõi RAM / số trang / độ trễ lệnh của driver (dùng chung trong process)
+        if watchdog is None:
+            from src.utils.driver_watchdog import get_default_watchdog
+            watchdog = get_default_watchdog()
+        self.watchdog = watchdog
+        
+        # Timeout học từ thời gian load thực tế theo từng tài khoản / từng phần của trang
+        if latency_model is None:
+            from src.utils.latency_model import get_default_latency_model
+            latency_model = get_default_latency_model()
+        self.latency_model = latency_model
+        
+        # Thời gian và kết quả từng giai đoạn khi cào một video (navigate, đợi load, từng section, lưu)
+        from src.utils.phase_metrics import PhaseMetrics
+        self.phase_metrics = PhaseMetrics()
+        
+        # Kế hoạch cào và thống kê pipeline gần nhất - dùng cho báo cáo
+        self.last_plan = None
+        self.last_pipeline_stats = None
         
     def init_driver(self, headless=False):
         """Khởi tạo Chrome driver với retry mechanism - Windows Compatible"""
@@ -144,6 +166,7 @@ class YouTubeAnalyticsScraper:
         
         chrome_options = Options()
         current_platform = platform.system()
+        self.headless = headless
         
         if headless:
             chrome_options.add_argument('--headless')
@@ -276,6 +299,9 @@ class YouTubeAnalyticsScraper:
                     raise Exception("Chrome driver bị đóng ngay sau khi khởi tạo")
                 
                 self.driver.maximize_window()
+                # Không để lệnh điều hướng treo lâu hơn ngưỡng của watchdog
+                self.driver.set_page_load_timeout(self.watchdog.command_timeout)
+                self.watchdog.register(self)
                 safe_print("✓ Chrome driver đã sẵn sàng sử dụng!")
                 return
                 
@@ -802,19 +828,49 @@ class YouTubeAnalyticsScraper:
         print(f"  [DEBUG] Không tìm thấy elements với selector '{selector}' sau {max_retries} attempts")
         return []
 
-    def wait_for_analytics_page_load(self, timeout=30, headless=False):
+    def adaptive_timeout(self, section, default, minimum=None):
+        """Timeout (giây) cho một phần của trang, học từ thời gian load của tài khoản hiện tại
+
+        Args:
+            section: Tên phần (vd: 'page_load', 'top_metrics')
+            default: Timeout cố định dùng khi chưa đủ dữ liệu
+            minimum: Ngưỡng tối thiểu (tùy chọn)
+        """
+        return self.latency_model.timeout_for(self.account_name, section, default, minimum=minimum)
+
+    def record_latency(self, section, start_time, timed_out=False, timeout=None):
+        """Ghi nhận thời gian chờ một phần của trang vào latency model
+
+        Args:
+            section: Tên phần của trang
+            start_time: Thời điểm bắt đầu chờ (time.time())
+            timed_out: True nếu hết thời gian chờ mà phần đó chưa xuất hiện
+            timeout: Timeout của một lần chờ - khi timed_out, ghi nhận giá trị này thay vì tổng thời gian
+                     (tránh timeout tăng vọt khi thử nhiều selector liên tiếp)
+        """
+        waited = timeout if timed_out and timeout else time.time() - start_time
+        self.latency_model.record(self.account_name, section, waited, timed_out=timed_out)
+
+    def wait_for_analytics_page_load(self, timeout=None, headless=False):
         """Đợi YouTube Studio Analytics page load hoàn toàn
 
         Args:
-            timeout: Thời gian chờ tối đa (giây)
+            timeout: Thời gian chờ tối đa (giây). Mặc định: học từ thời gian load trước đó của tài khoản
             headless: Có đang chạy headless mode không
 
         Returns:
             bool: True nếu page đã load, False nếu timeout
         """
-        # Headless mode cần nhiều thời gian hơn
+        from src.utils.constants import PAGE_LOAD_TIMEOUT, HEADLESS_TIMEOUT, HEADLESS_PAGE_LOAD_MIN
+
+        # Headless mode load chậm hơn nên được học riêng
+        section = 'page_load_headless' if headless else 'page_load'
+        if timeout is None:
+            if headless:
+                timeout = self.adaptive_timeout(section, HEADLESS_TIMEOUT, minimum=HEADLESS_PAGE_LOAD_MIN)
+            else:
+                timeout = self.adaptive_timeout(section, PAGE_LOAD_TIMEOUT)
         if headless:
-            timeout = max(timeout, 45)  # Tối thiểu 45s cho headless
             print(f"Đang đợi YouTube Studio Analytics page load hoàn toàn (headless mode, timeout: {timeout}s)...")
         else:
             print(f"Đang đợi YouTube Studio Analytics page load hoàn toàn (timeout: {timeout}s)...")
@@ -863,12 +919,14 @@ class YouTubeAnalyticsScraper:
                         # Headless mode cần ít elements hơn để pass
                         if found_indicators >= 1 and total_elements >= 1:
                             print("✓ YouTube Studio Analytics page đã load hoàn toàn (headless mode)!")
+                            self.record_latency(section, start_time)
                             return True
                     else:
                         print(f"  Indicators found: {found_indicators}, Elements found: {total_elements}")
                         # Nếu có đủ indicators và elements, coi như page đã load
                         if found_indicators >= 3 and total_elements >= 5:
                             print("✓ YouTube Studio Analytics page đã load hoàn toàn!")
+                            self.record_latency(section, start_time)
                             return True
 
                 except Exception:
@@ -902,6 +960,7 @@ class YouTubeAnalyticsScraper:
                 continue
 
         print(f"⚠ Timeout sau {timeout}s - page có thể chưa load hoàn toàn")
+        self.record_latency(section, start_time, timed_out=True, timeout=timeout)
         return False
 
     def get_video_analytics(self, video_id, headless=False):
@@ -912,20 +971,32 @@ class YouTubeAnalyticsScraper:
             headless: Chế độ headless (để tự động đăng nhập lại nếu cần)
         """
         url = f'https://studio.youtube.com/video/{video_id}/analytics/tab-reach_viewers/period-default'
+        phases = self.phase_metrics
+        self.ensure_healthy_driver(headless=headless)
         print(f"\nĐang truy cập: {url}")
-        self.driver.get(url)
+        with phases.phase('navigate'):
+            with self.watchdog.track(self, 'navigate'):
+                self.driver.get(url)
+        self.watchdog.note_page_load(self)
 
         # Đợi trang load hoàn toàn
-        if not self.wait_for_analytics_page_load(timeout=30, headless=headless):
+        with phases.phase('readiness_wait') as phase:
+            page_ready = self.wait_for_analytics_page_load(headless=headless)
+            if not page_ready:
+                phase.outcome = 'timeout'
+        if not page_ready:
             print("⚠ Cảnh báo: Page có thể chưa load đủ, thử refresh page...")
 
             # Thử refresh page cho headless mode
             if headless:
                 print("  [HEADLESS] Đang refresh page để thử lại...")
-                self.driver.refresh()
-                time.sleep(5)  # Đợi sau refresh
-                if not self.wait_for_analytics_page_load(timeout=20, headless=headless):
-                    print("⚠ Cảnh báo: Page vẫn chưa load đủ sau refresh, tiếp tục với dữ liệu có sẵn")
+                with phases.phase('refresh_retry') as phase:
+                    with self.watchdog.track(self, 'refresh'):
+                        self.driver.refresh()
+                    time.sleep(5)  # Đợi sau refresh
+                    if not self.wait_for_analytics_page_load(headless=headless):
+                        phase.outcome = 'timeout'
+                        print("⚠ Cảnh báo: Page vẫn chưa load đủ sau refresh, tiếp tục với dữ liệu có sẵn")
             else:
                 print("⚠ Cảnh báo: Page có thể chưa load đủ, tiếp tục với dữ liệu có sẵn")
         
@@ -934,12 +1005,18 @@ class YouTubeAnalyticsScraper:
         if 'accounts.google.com' in current_url or 'signin' in current_url:
             print("⚠ Phát hiện: Bị redirect về trang đăng nhập. Cookies có thể đã hết hạn.")
             print("Đang tự động đăng nhập lại...")
-            if self.auto_relogin_if_needed(headless=headless):
-                # Thử lại sau khi đăng nhập
-                print("Đang truy cập lại analytics page...")
-                self.driver.get(url)
-                time.sleep(8)
-            else:
+            with phases.phase('relogin') as phase:
+                relogged_in = self.auto_relogin_if_needed(headless=headless)
+                if relogged_in:
+                    # Thử lại sau khi đăng nhập
+                    print("Đang truy cập lại analytics page...")
+                    with self.watchdog.track(self, 'navigate'):
+                        self.driver.get(url)
+                    self.watchdog.note_page_load(self)
+                    time.sleep(8)
+                else:
+                    phase.outcome = 'error'
+            if not relogged_in:
                 print("⚠ Không thể đăng nhập lại. Bỏ qua video này.")
                 return {
                     'video_id': video_id,
@@ -972,19 +1049,19 @@ class YouTubeAnalyticsScraper:
             
             # Lấy ngày bắt đầu đăng (từ label "Aug 13, 2025 — Now") nếu có
             print("Đang lấy ngày bắt đầu đăng video...")
-            analytics_data['publish_start_date'] = self.get_publish_start_date()
+            analytics_data['publish_start_date'] = self._run_phase('publish_date', self.get_publish_start_date)
             
             # Lấy các metrics trong top section (Key metric card)
             print("Đang lấy dữ liệu Top metrics (key metric card)...")
-            analytics_data['top_metrics'] = self.get_top_section_metrics()
+            analytics_data['top_metrics'] = self._run_phase('top_metrics', self.get_top_section_metrics)
             
             # Lấy dữ liệu "How viewers find this video"
             print("Đang lấy dữ liệu 'How viewers find this video'...")
-            analytics_data['how_viewers_find'] = self.get_traffic_sources()
+            analytics_data['how_viewers_find'] = self._run_phase('traffic_sources', self.get_traffic_sources)
             
             # Lấy dữ liệu "Impressions and how they led to watch time"
             print("Đang lấy dữ liệu 'Impressions'...")
-            analytics_data['impressions_data'] = self.get_impressions_data()
+            analytics_data['impressions_data'] = self._run_phase('impressions', self.get_impressions_data)
             
         except Exception as e:
             print(f"Lỗi khi lấy dữ liệu: {str(e)}")
@@ -993,12 +1070,21 @@ class YouTubeAnalyticsScraper:
             
         return analytics_data
     
+    def _run_phase(self, name, getter):
+        """Chạy một hàm lấy dữ liệu như một phase; kết quả rỗng được ghi nhận là 'empty'"""
+        with self.phase_metrics.phase(name) as phase:
+            result = getter()
+            if not result:
+                phase.outcome = 'empty'
+        return result
+
     def get_publish_start_date(self):
         """Tìm và parse ngày bắt đầu trong label kiểu 'Aug 13, 2025 — Now' bên cạnh 'Since published'.
         Trả về ISO date (YYYY-MM-DD) nếu tìm được, ngược lại trả về None.
         """
         try:
-            wait = WebDriverWait(self.driver, 10)
+            timeout = self.adaptive_timeout('publish_date', 10)
+            wait = WebDriverWait(self.driver, timeout)
             # Tìm container dropdown trigger thời gian
             candidates = []
             selectors = [
@@ -1008,14 +1094,20 @@ class YouTubeAnalyticsScraper:
                 '[id*="time" i] [class*="label-text"]'
             ]
             for sel in selectors:
+                # Mỗi selector chờ riêng: đo từ lúc bắt đầu selector này
+                start_time = time.time()
                 try:
                     elems = wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, sel)))
                     if elems:
+                        if not candidates:
+                            self.record_latency('publish_date', start_time)
                         candidates.extend(elems)
                 except TimeoutException:
                     continue
                 except Exception:
                     continue
+            if not candidates:
+                self.record_latency('publish_date', start_time, timed_out=True, timeout=timeout)
             
             # Lấy text và tìm pattern 'Mon dd, yyyy — Now'
             # Ví dụ: 'Aug 13, 2025 — Now'
@@ -1071,15 +1163,19 @@ class YouTubeAnalyticsScraper:
         print("  [DEBUG] Bắt đầu tìm top section metrics...")
 
         try:
-            wait = WebDriverWait(self.driver, 15)
+            timeout = self.adaptive_timeout('top_metrics', 15)
+            wait = WebDriverWait(self.driver, timeout)
+            start_time = time.time()
             # Tìm section chứa key metric card
             try:
                 section = wait.until(
                     EC.presence_of_element_located((By.CSS_SELECTOR, '#top-section, [id="top-section"]'))
                 )
+                self.record_latency('top_metrics', start_time)
                 print("  [DEBUG] Tìm thấy #top-section element")
             except TimeoutException:
-                print("  [DEBUG] Không tìm thấy #top-section element trong 15s")
+                self.record_latency('top_metrics', start_time, timed_out=True, timeout=timeout)
+                print(f"  [DEBUG] Không tìm thấy #top-section element trong {timeout}s")
                 # Thử tìm các selector khác
                 alternative_selectors = [
                     '[class*="top-section"]',
@@ -1239,7 +1335,8 @@ class YouTubeAnalyticsScraper:
         print("  [DEBUG] Bắt đầu tìm traffic sources...")
 
         try:
-            wait = WebDriverWait(self.driver, 15)
+            timeout = self.adaptive_timeout('traffic_sources', 15)
+            wait = WebDriverWait(self.driver, timeout)
 
             # Các nguồn traffic có thể có (bao gồm cả Browse features)
             sources_list = [
@@ -1269,18 +1366,24 @@ class YouTubeAnalyticsScraper:
 
                 title_elements = []
                 for selector in title_selectors:
+                    # Mỗi selector chờ riêng: đo từ lúc bắt đầu selector này
+                    start_time = time.time()
                     try:
                         elements = wait.until(
                             EC.presence_of_all_elements_located((By.CSS_SELECTOR, selector))
                         )
                         if elements:
                             title_elements = elements
+                            self.record_latency('traffic_sources', start_time)
                             print(f"  [DEBUG] Tìm thấy {len(title_elements)} title elements với selector: {selector}")
                             break
                     except TimeoutException:
-                        print(f"  [DEBUG] Selector '{selector}' timeout sau 15s")
+                        print(f"  [DEBUG] Selector '{selector}' timeout sau {timeout}s")
                         continue
 
+                if not title_elements:
+                    self.record_latency('traffic_sources', start_time, timed_out=True, timeout=timeout)
+
                 # Nếu không tìm thấy với WebDriverWait, thử retry với scroll
                 if not title_elements:
                     print("  [DEBUG] Không tìm thấy title elements ngay lập tức, thử retry với scroll...")
@@ -1952,6 +2055,76 @@ class YouTubeAnalyticsScraper:
             
         return impressions_data
         
+    def iter_video_analytics(self, video_ids, video_account_mapping=None, headless=False):
+        """Generator lấy analytics của nhiều videos, yield từng kết quả ngay khi cào xong
+
+        Video được nhóm theo tài khoản bằng ExecutionPlan để giảm số lần chuyển tài khoản.
+
+        Args:
+            video_ids: Danh sách video IDs cần scrape
+            video_account_mapping: Dict mapping video_id -> account_name (tùy chọn)
+                                  Nếu có, sẽ tự động chuyển đổi tài khoản khi cần
+            headless: Chế độ headless (để tự động đăng nhập lại nếu cần)
+
+        Yields:
+            dict: Kết quả analytics của từng video
+        """
+        from src.scraper.planner import plan_from_mapping
+
+        plan = plan_from_mapping(video_ids, video_account_mapping, start_account=self.account_name)
+        yield from self.iter_plan(plan, headless=headless)
+
+    def iter_plan(self, plan, headless=False):
+        """Chạy một ExecutionPlan, chỉ chuyển tài khoản ở ranh giới giữa các batch
+
+        Args:
+            plan: ExecutionPlan (từ plan_execution / plan_from_mapping / partition)
+            headless: Chế độ headless
+
+        Yields:
+            dict: Kết quả analytics của từng video (kèm 'account_name' đã dùng để cào)
+        """
+        self.last_plan = plan
+        summary = plan.summary()
+        if summary['accounts'] > 1 or summary['duplicates_removed']:
+            print(f"\nKế hoạch cào: {summary['videos']} video(s), {summary['accounts']} tài khoản, "
+                  f"{summary['planned_switches']} lần chuyển tài khoản "
+                  f"(tránh được {summary['switches_avoided']}, bỏ {summary['duplicates_removed']} video trùng)")
+
+        total = plan.total_videos
+        index = 0
+        for batch in plan.batches:
+            # Chỉ chuyển tài khoản khi bắt đầu batch của tài khoản khác
+            if batch.account_name and batch.account_name != self.account_name:
+                print(f"\nBatch tiếp theo cần tài khoản: {batch.account_name} ({len(batch)} video)")
+                if not self.switch_account(account_name=batch.account_name):
+                    print(f"⚠ Không thể chuyển đổi sang tài khoản {batch.account_name}. Tiếp tục với tài khoản hiện tại.")
+
+            for video_id in batch.video_ids:
+                index += 1
+                print(f"\n{'='*50}")
+                print(f"Đang xử lý video {index}/{total}: {video_id}")
+                print(f"{'='*50}")
+
+                try:
+                    data = self.get_video_analytics(video_id, headless=headless)
+                except Exception as e:
+                    # Driver bị watchdog kill (treo) hoặc chết giữa chừng: ghi lỗi và thay driver mới
+                    print(f"✗ Lỗi khi cào video {video_id}: {str(e)}")
+                    data = {'video_id': video_id, 'error': str(e),
+                            'crawl_datetime': datetime.now().strftime('%d/%m/%Y')}
+                    self.recycle_driver(headless=headless, reason=str(e)[:100])
+                if self.account_name:
+                    data.setdefault('account_name', self.account_name)
+                yield data
+
+                # Nghỉ giữa các requests
+                if index < total:
+                    time.sleep(3)
+
+        # Lưu timeout đã học để lần chạy sau dùng ngay
+        self.latency_model.save()
+
     def scrape_multiple_videos(self, video_ids, video_account_mapping=None, headless=False):
         """Lấy analytics của nhiều videos
         
@@ -1964,38 +2137,69 @@ class YouTubeAnalyticsScraper:
         Returns:
             list: Danh sách kết quả analytics
         """
-        results = []
-        current_account = self.account_name  # Theo dõi tài khoản hiện tại
-        
-        for video_id in video_ids:
-            print(f"\n{'='*50}")
-            print(f"Đang xử lý video: {video_id}")
-            print(f"{'='*50}")
-            
-            # Kiểm tra xem video này cần tài khoản khác không
-            if video_account_mapping and video_id in video_account_mapping:
-                required_account = video_account_mapping[video_id]
-                
-                # Nếu tài khoản hiện tại khác với tài khoản cần thiết, chuyển đổi
-                if required_account != current_account:
-                    print(f"Video này cần tài khoản: {required_account}")
-                    if self.switch_account(account_name=required_account):
-                        current_account = required_account
-                    else:
-                        print(f"⚠ Không thể chuyển đổi sang tài khoản {required_account}. Tiếp tục với tài khoản hiện tại.")
-            
-            data = self.get_video_analytics(video_id, headless=headless)
-            results.append(data)
-            
-            # Nghỉ giữa các requests
-            time.sleep(3)
-            
-        return results
+        return list(self.iter_video_analytics(video_ids, video_account_mapping=video_account_mapping, headless=headless))
+
+    def stream_multiple_videos(self, video_ids, pipeline, video_account_mapping=None, headless=False):
+        """Cào nhiều videos và đẩy từng kết quả qua pipeline (không giữ kết quả trong bộ nhớ)
+
+        Args:
+            video_ids: Danh sách video IDs cần scrape
+            pipeline: ResultPipeline nhận từng kết quả ngay khi video cào xong
+            video_account_mapping: Dict mapping video_id -> account_name (tùy chọn)
+            headless: Chế độ headless
+
+        Returns:
+            dict: Thống kê của pipeline (received, succeeded, failed, ...)
+        """
+        self.last_pipeline_stats = pipeline.consume(
+            self.iter_video_analytics(video_ids, video_account_mapping=video_account_mapping, headless=headless)
+        )
+        return self.last_pipeline_stats
+
+    def build_result_pipeline(self, output_file='analytics_results.jsonl', save_to_db=True, tracker=None,
+                              db_batch_size=20, max_buffer=16):
+        """Tạo ResultPipeline với các sink mặc định: file kết quả, database (theo batch) và tracker
+
+        Args:
+            output_file: File kết quả. File .jsonl: mỗi video một dòng, ghi ngay khi xong.
+                         File .json: vẫn là một mảng JSON gộp theo video_id như save_results()
+                         (ghi nhật ký {output_file}.partial.jsonl khi cào, gộp một lần khi đóng pipeline)
+            save_to_db: Có ghi vào database không
+            tracker: ScrapingTracker (tùy chọn) để đánh dấu video đã cào
+            db_batch_size: Số bản ghi mỗi transaction database
+            max_buffer: Số bản ghi tối đa chờ trong hàng đợi trước khi scraper bị chặn
+
+        Returns:
+            ResultPipeline (chưa start)
+        """
+        from src.scraper.pipeline import ResultPipeline, JsonArraySink, JsonlSink, DatabaseBatchSink, TrackerSink
+
+        if output_file.endswith('.json'):
+            sinks = [JsonArraySink(output_file)]
+        else:
+            sinks = [JsonlSink(output_file)]
+        if save_to_db and self.account_name:
+            sinks.append(DatabaseBatchSink(
+                account_name=self.account_name,
+                channel_url=self.channel_url,
+                cookies_file=self.cookies_file,
+                batch_size=db_batch_size,
+                metrics=self.phase_metrics,
+            ))
+        if tracker is not None:
+            sinks.append(TrackerSink(tracker))
+        return ResultPipeline(sinks, max_buffer=max_buffer, metrics=self.phase_metrics)
     
-    def scrape_multiple_videos_parallel(self, video_ids, video_account_mapping=None, max_workers=None, headless=False, auto_continue=False, wait_time=30):
+    def scrape_multiple_videos_parallel(self, video_ids, video_account_mapping=None, max_workers=None, headless=False, auto_continue=False, wait_time=30,
+                                        pipeline=None):
         """Lấy analytics của nhiều videos song song (đa luồng)
 
-        Mỗi thread có driver riêng và cookies riêng, không bị lộn cookie.
+        Video được nhóm theo tài khoản bằng ExecutionPlan rồi chia cho các thread.
+        Mỗi thread có driver riêng và cookies riêng, không bị lộn cookie, và chỉ
+        khởi tạo driver một lần cho toàn bộ phần việc của mình.
+
+        Nếu có pipeline, mỗi kết quả được đẩy vào pipeline ngay khi xong và không
+        giữ lại trong bộ nhớ (xem stream_multiple_videos_parallel).
 
         Args:
             video_ids: Danh sách video IDs cần scrape
@@ -2005,103 +2209,121 @@ class YouTubeAnalyticsScraper:
             headless: Chạy browser ở chế độ headless
             auto_continue: Tự động tiếp tục đăng nhập
             wait_time: Thời gian chờ trước khi tự động tiếp tục
+            pipeline: ResultPipeline (tùy chọn) nhận từng kết quả thay vì danh sách trả về
 
         Returns:
-            list: Danh sách kết quả analytics (có thể không theo thứ tự)
+            list: Danh sách kết quả analytics (có thể không theo thứ tự), rỗng nếu dùng pipeline
         """
         if not video_account_mapping:
             thread_safe_print("⚠ Cảnh báo: video_account_mapping là bắt buộc khi dùng parallel mode.")
             thread_safe_print("   Chuyển sang chế độ tuần tự...")
-            return self.scrape_multiple_videos(video_ids, video_account_mapping)
+            if pipeline is not None:
+                self.stream_multiple_videos(video_ids, pipeline, headless=headless)
+                return []
+            return self.scrape_multiple_videos(video_ids, video_account_mapping, headless=headless)
         
-        # Nhóm video theo account
-        account_videos = {}
-        for video_id in video_ids:
-            account = video_account_mapping.get(video_id, self.account_name)
-            if account not in account_videos:
-                account_videos[account] = []
-            account_videos[account].append(video_id)
+        from src.scraper.planner import plan_from_mapping
+
+        plan = plan_from_mapping(video_ids, video_account_mapping, start_account=self.account_name)
+        self.last_plan = plan
+        summary = plan.summary()
+        
+        # Xác định số worker
+        if max_workers is None:
+            max_workers = summary['accounts']
+        sub_plans = plan.partition(max_workers)
         
         thread_safe_print(f"\n{'='*50}")
         thread_safe_print("CHẠY ĐA LUỒNG - PHÂN PHỐI VIDEO:")
         thread_safe_print(f"{'='*50}")
-        for account, vids in account_videos.items():
-            thread_safe_print(f"  Tài khoản '{account}': {len(vids)} video(s)")
+        for batch in plan.batches:
+            thread_safe_print(f"  Tài khoản '{batch.account_name}': {len(batch)} video(s)")
+        thread_safe_print(f"  Video trùng đã bỏ: {summary['duplicates_removed']}")
+        thread_safe_print(f"  Số lần chuyển tài khoản tránh được: {summary['switches_avoided']}")
         thread_safe_print(f"{'='*50}\n")
         
-        # Xác định số worker
-        if max_workers is None:
-            max_workers = len(account_videos)
-        max_workers = min(max_workers, len(account_videos), len(video_ids))
-        
-        thread_safe_print(f"Sử dụng {max_workers} thread(s) để scrape {len(video_ids)} video(s)\n")
+        thread_safe_print(f"Sử dụng {len(sub_plans)} thread(s) để scrape {plan.total_videos} video(s)\n")
         
         results = []
         results_lock = Lock()  # Lock để thread-safe khi append results
-        
-        def scrape_video_with_account(video_id, account_name, auto_continue_param, wait_time_param):
-            """Helper function để scrape một video với một account cụ thể (thread-safe)"""
-            thread_id = f"[Thread-{account_name}]"
+        progress = {'completed': 0}
+
+        def emit(data):
+            # Pipeline: ghi ngay (queue của pipeline đã thread-safe), không giữ kết quả
+            if pipeline is not None:
+                pipeline.put(data)
+            else:
+                with results_lock:
+                    results.append(data)
+        
+        def scrape_sub_plan(worker_index, sub_plan):
+            """Helper function để chạy một phần kế hoạch với driver riêng (thread-safe)"""
+            account_name = sub_plan.start_account
+            thread_id = f"[Thread-{worker_index}-{account_name}]"
+            scraper = None
+            pending = list(sub_plan.video_ids())
             try:
-                thread_safe_print(f"{thread_id} Đang khởi tạo scraper cho video: {video_id}")
+                thread_safe_print(f"{thread_id} Đang khởi tạo scraper cho {len(pending)} video(s)")
 
                 # Tạo scraper mới cho thread này (mỗi thread có driver riêng)
-                scraper = YouTubeAnalyticsScraper(account_name=account_name, auto_continue=auto_continue_param, wait_time=wait_time_param)
+                scraper = YouTubeAnalyticsScraper(account_name=account_name, auto_continue=auto_continue, wait_time=wait_time)
                 scraper.init_driver(headless=headless)
                 
                 # Load cookies
                 if not scraper.load_cookies(headless=headless):
-                    thread_safe_print(f"{thread_id} ⚠ Không thể load cookies cho {account_name}. Bỏ qua video {video_id}")
-                    scraper.close()
-                    return {'video_id': video_id, 'error': f'Không thể load cookies cho {account_name}'}
-                
-                thread_safe_print(f"{thread_id} Đang scrape video: {video_id}")
+                    thread_safe_print(f"{thread_id} ⚠ Không thể load cookies cho {account_name}. Bỏ qua {len(pending)} video")
+                    for video_id in pending:
+                        emit({'video_id': video_id, 'error': f'Không thể load cookies cho {account_name}'})
+                    return
                 
-                # Scrape video
-                data = scraper.get_video_analytics(video_id, headless=headless)
-                
-                # Đóng driver
-                scraper.close()
-                
-                thread_safe_print(f"{thread_id} ✓ Hoàn thành video: {video_id}")
-                return data
+                for data in scraper.iter_plan(sub_plan, headless=headless):
+                    pending.remove(data['video_id'])
+                    emit(data)
+                    with results_lock:
+                        progress['completed'] += 1
+                        completed = progress['completed']
+                    thread_safe_print(f"\n[{completed}/{plan.total_videos}] {thread_id} ✓ Hoàn thành video: {data['video_id']}")
                 
             except Exception as e:
-                thread_safe_print(f"{thread_id} ✗ Lỗi khi scrape video {video_id}: {str(e)}")
+                thread_safe_print(f"{thread_id} ✗ Lỗi khi scrape: {str(e)}")
                 import traceback
                 thread_safe_print(f"{thread_id} Traceback: {traceback.format_exc()}")
-                return {'video_id': video_id, 'error': str(e)}
+                for video_id in pending:
+                    emit({'video_id': video_id, 'error': str(e)})
+            finally:
+                if scraper:
+                    self.phase_metrics.merge(scraper.phase_metrics.snapshot())
+                    scraper.close()
         
         # Chạy song song với ThreadPoolExecutor
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Submit tất cả tasks
-            future_to_video = {}
-            for video_id in video_ids:
-                account = video_account_mapping.get(video_id, self.account_name)
-                future = executor.submit(scrape_video_with_account, video_id, account, auto_continue, wait_time)
-                future_to_video[future] = video_id
-            
-            # Thu thập kết quả khi hoàn thành
-            completed = 0
-            for future in as_completed(future_to_video):
-                video_id = future_to_video[future]
-                try:
-                    result = future.result()
-                    with results_lock:
-                        results.append(result)
-                    completed += 1
-                    thread_safe_print(f"\n[{completed}/{len(video_ids)}] Đã hoàn thành video: {video_id}")
-                except Exception as e:
-                    thread_safe_print(f"✗ Exception khi xử lý video {video_id}: {str(e)}")
-                    with results_lock:
-                        results.append({'video_id': video_id, 'error': str(e)})
+        with ThreadPoolExecutor(max_workers=len(sub_plans)) as executor:
+            futures = [executor.submit(scrape_sub_plan, idx, sub_plan)
+                       for idx, sub_plan in enumerate(sub_plans, 1)]
+            for future in as_completed(futures):
+                future.result()
         
         thread_safe_print(f"\n{'='*50}")
-        thread_safe_print(f"HOÀN THÀNH: Đã scrape {len(results)}/{len(video_ids)} video(s)")
+        thread_safe_print(f"HOÀN THÀNH: Đã scrape {progress['completed']}/{plan.total_videos} video(s)")
         thread_safe_print(f"{'='*50}\n")
         
         return results
-        
+
+    def stream_multiple_videos_parallel(self, video_ids, pipeline, video_account_mapping=None, max_workers=None,
+                                        headless=False, auto_continue=False, wait_time=30):
+        """Cào song song (như scrape_multiple_videos_parallel) và đẩy từng kết quả qua pipeline
+
+        Kết quả của mọi thread đi vào cùng một pipeline, bản ghi mang 'account_name'
+        của tài khoản đã cào nên DatabaseBatchSink lưu đúng tài khoản.
+
+        Returns:
+            dict: Thống kê của pipeline (received, succeeded, failed, ...)
+        """
+        self.scrape_multiple_videos_parallel(video_ids, video_account_mapping=video_account_mapping,
+                                             max_workers=max_workers, headless=headless,
+                                             auto_continue=auto_continue, wait_time=wait_time, pipeline=pipeline)
+        self.last_pipeline_stats = pipeline.get_statistics()
+        return self.last_pipeline_stats
+
     def save_results(self, results, output_file='analytics_results.json', save_to_db=True):
         """Lưu kết quả ra file JSON và database (merge với dữ liệu cũ, tránh trùng lặp video_id)
         
@@ -2161,48 +2383,41 @@ class YouTubeAnalyticsScraper:
         if save_to_db:
             try:
                 from src.database.writers import db_writer
-                from src.database.models import Account
-                from src.database.connection import db
+                from src.database.write_behind import get_write_behind_writer
                 
-                print(f"\n📊 Đang lưu vào database...")
+                print(f"\n📊 Đang đưa kết quả vào hàng đợi ghi database...")
                 
-                # Ensure account exists in database
-                with db.session_scope() as session:
-                    account = session.query(Account).filter(Account.name == self.account_name).first()
-                    if not account:
-                        # Create account if it doesn't exist
-                        account = Account(
-                            name=self.account_name,
-                            cookies_file=self.cookies_file
-                        )
-                        session.add(account)
-                        session.commit()
-                        print(f"  ✓ Created account in database: {self.account_name}")
+                # Scraper processes keep a small pool (see DB_POOL_PROFILE)
+                db_writer.db.use_pool_profile('scraper')
+
+                # Ensure account exists in database (with cookies file)
+                db_writer.ensure_account(self.account_name, cookies_file=self.cookies_file)
                 
-                # Save each result to database
-                db_saved_count = 0
-                db_error_count = 0
-                for result in results:
-                    video_id = result.get('video_id')
-                    if not video_id or 'error' in result:
-                        continue
-                    
-                    try:
-                        db_writer.save_analytics(
-                            video_id=video_id,
-                            account_name=self.account_name,
-                            analytics_data=result,
-                            channel_url=self.channel_url  # Pass channel URL for linking
-                        )
-                        db_saved_count += 1
-                    except Exception as e:
-                        print(f"  ⚠ Lỗi khi lưu video {video_id} vào database: {str(e)}")
-                        db_error_count += 1
+                # Write-behind: luồng nền gom các bản ghi thành batch lớn và ghi một lần,
+                # scraper không phải chờ database sau mỗi kênh
+                valid_results = [r for r in results if r.get('video_id') and 'error' not in r]
+                writer = get_write_behind_writer()
+                # 'save_enqueue': thời gian chờ hàng đợi; 'save' được ghi khi luồng nền thực sự ghi batch
+                with self.phase_metrics.phase('save_enqueue'):
+                    queued = writer.submit_many(
+                        valid_results,
+                        account_name=self.account_name,
+                        channel_url=self.channel_url,  # Pass channel URL for linking
+                        timeout=None,  # Chờ nếu hàng đợi đầy thay vì bỏ dữ liệu
+                        metrics=self.phase_metrics,
+                    )
                 
-                print(f"✓ Đã lưu vào database:")
-                print(f"  - Thành công: {db_saved_count} video(s)")
-                if db_error_count > 0:
-                    print(f"  - Lỗi: {db_error_count} video(s)")
+                if db_writer.db.config.is_edge:
+                    # Edge mode: records land in the local SQLite store, the agent syncs them centrally
+                    from src.database.edge import get_edge_sync_agent
+                    get_edge_sync_agent()
+
+                metrics = writer.get_metrics()
+                print(f"✓ Đã đưa vào hàng đợi ghi database:")
+                print(f"  - Thành công: {queued} video(s)")
+                print(f"  - Đang chờ ghi: {metrics['queue_depth']} bản ghi")
+                if queued < len(valid_results):
+                    print(f"  - Không đưa được vào hàng đợi: {len(valid_results) - queued} video(s)")
                     
             except ImportError as e:
                 print(f"⚠ Không thể import database modules: {str(e)}")
@@ -2211,10 +2426,95 @@ class YouTubeAnalyticsScraper:
                 print(f"⚠ Lỗi khi lưu vào database: {str(e)}")
                 print("  → Dữ liệu đã được lưu vào JSON file")
         
+    def ensure_healthy_driver(self, headless=False):
+        """Thay driver mới nếu watchdog báo driver vượt ngưỡng RAM / số trang hoặc đã bị kill
+
+        Returns:
+            bool: True nếu driver đã được thay mới
+        """
+        reason = self.watchdog.needs_recycle(self)
+        if not reason:
+            return False
+        return self.recycle_driver(headless=headless, reason=reason)
+
+    def recycle_driver(self, headless=None, reason=None):
+        """Đóng driver hiện tại (hoặc process đã chết) và khởi tạo lại với cookies của tài khoản hiện tại
+
+        Args:
+            headless: Chế độ headless (mặc định: giữ chế độ của driver cũ)
+            reason: Lý do thay driver (để log)
+
+        Returns:
+            bool: True nếu driver mới đã sẵn sàng
+        """
+        if headless is None:
+            headless = self.headless
+        print(f"\n♻ Đang khởi động lại Chrome driver{f' ({reason})' if reason else ''}...")
+        killed = self.watchdog.is_killed(self)
+        self.watchdog.unregister(self)
+        if self.driver and not killed:
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+        self.driver = None
+        self.watchdog.reap_orphans()
+        try:
+            self.init_driver(headless=headless)
+            self.watchdog.record_recycle()
+            return self.load_cookies(headless=headless)
+        except Exception as e:
+            print(f"✗ Không thể khởi động lại Chrome driver: {str(e)}")
+            return False
+
+    def get_run_report(self):
+        """Báo cáo lần chạy gần nhất: kế hoạch cào, thống kê pipeline và sức khỏe driver
+
+        Returns:
+            dict: Báo cáo dạng JSON-serializable
+        """
+        return {
+            'account_name': self.account_name,
+            'plan': self.last_plan.summary() if self.last_plan else None,
+            'pipeline': self.last_pipeline_stats,
+            'watchdog': self.watchdog.get_metrics(),
+            'latency': self.latency_model.get_report(),
+            'phases': self.phase_metrics.snapshot(),
+        }
+
+    def export_phase_metrics(self, output_file=None, api_url=None):
+        """Xuất histogram thời gian từng phase ra file JSON và (nếu cấu hình) đẩy lên API
+
+        Args:
+            output_file: File JSON (mặc định: data/metrics/phases_<account>_<thời gian>.json)
+            api_url: URL gốc của API (mặc định: biến môi trường METRICS_API_URL)
+
+        Returns:
+            str: Đường dẫn file đã ghi, hoặc None nếu lỗi
+        """
+        from src.utils.constants import PHASE_METRICS_DIR, METRICS_API_URL
+
+        extra = {'account_name': self.account_name}
+        if output_file is None:
+            safe_account_name = re.sub(r'[^\w\-_]', '_', self.account_name or 'default')
+            output_file = os.path.join(
+                PHASE_METRICS_DIR, f"phases_{safe_account_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        written = self.phase_metrics.export_json(output_file, extra=extra)
+        api_url = api_url or METRICS_API_URL
+        if api_url:
+            self.phase_metrics.push(api_url, extra=extra)
+        return output_file if written else None
+
     def close(self):
-        """Đóng browser"""
+        """Đóng browser và lưu latency model cho lần chạy sau"""
+        self.latency_model.save()
+        self.watchdog.unregister(self)
         if self.driver:
-            self.driver.quit()
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+            self.driver = None
 
 
 def update_accounts_list(account_name, cookies_file):
@@ -2521,28 +2821,30 @@ def process_channels_parallel(account_channels=None, cookies_file=None, account_
                         'error': 'Không thể load cookies'
                     }
                 
-                # Lấy analytics cho tất cả videos trong channel
-                results = scraper.scrape_multiple_videos(video_ids, headless=headless)
-                
                 # Lưu kết quả với output_file riêng hoặc mặc định
                 if not channel_output_file:
                     # Tạo tên file dựa trên channel URL và index để tránh trùng
                     safe_channel_name = re.sub(r'[^\w\-_]', '_', channel_url.split('/')[-1])
-                    channel_output_file = f'analytics_results_{safe_channel_name}_{channel_idx}.json'
+                    channel_output_file = f'analytics_results_{safe_channel_name}_{channel_idx}.jsonl'
+                
+                # Cào và lưu từng video ngay khi xong (mỗi channel một pipeline riêng)
+                scraper.channel_url = channel_url
+                pipeline = scraper.build_result_pipeline(output_file=channel_output_file)
+                with pipeline:
+                    scraper.stream_multiple_videos(video_ids, pipeline, headless=headless)
+                stats = pipeline.get_statistics()
                 
-                # Lưu kết quả (thread-safe)
                 with results_lock:
-                    scraper.save_results(results, output_file=channel_output_file)
                     completed_channels.append({
                         'channel_url': channel_url,
                         'video_count': len(video_ids),
-                        'output_file': channel_output_file,
+                        'output_file': pipeline.sinks[0].output_file,
                         'status': 'success'
                     })
                 
                 thread_safe_print(f"{thread_id} ✓ Hoàn thành channel: {channel_url}")
-                thread_safe_print(f"{thread_id}   - Đã cào {len(results)} video(s)")
-                thread_safe_print(f"{thread_id}   - Output file: {channel_output_file}")
+                thread_safe_print(f"{thread_id}   - Đã cào {stats['received']} video(s) ({stats['failed']} lỗi)")
+                thread_safe_print(f"{thread_id}   - Output file: {pipeline.sinks[0].output_file}")
                 
                 scraper.close()
                 
@@ -2550,8 +2852,8 @@ def process_channels_parallel(account_channels=None, cookies_file=None, account_
                     'channel_url': channel_url,
                     'status': 'success',
                     'video_count': len(video_ids),
-                    'results_count': len(results),
-                    'output_file': channel_output_file
+                    'results_count': stats['received'],
+                    'output_file': pipeline.sinks[0].output_file
                 }
                 
             except Exception as e:
@@ -2677,22 +2979,31 @@ def process_channel(channel_url=None, video_ids=None, cookies_file=None, output_
                 print(f"  Video {vid} -> Tài khoản: {acc}")
             print("="*50)
         
-        # Lấy analytics
-        results = scraper.scrape_multiple_videos(video_ids, video_account_mapping=video_account_mapping, headless=headless)
-        
-        # Lưu kết quả với output_file (mặc định nếu không có)
+        # Lấy analytics và lưu từng video ngay khi cào xong (output_file mặc định nếu không có)
         if not output_file:
-            output_file = 'analytics_results.json'
-        scraper.save_results(results, output_file=output_file)
+            output_file = 'analytics_results.jsonl'
+        scraper.channel_url = channel_url
+        pipeline = scraper.build_result_pipeline(output_file=output_file)
+        with pipeline:
+            scraper.stream_multiple_videos(video_ids, pipeline, video_account_mapping=video_account_mapping,
+                                           headless=headless)
+        stats = pipeline.get_statistics()
         
         # In kết quả
         print("\n" + "="*50)
         print("KẾT QUẢ:")
         print("="*50)
-        for result in results:
-            print(f"\nVideo ID: {result['video_id']}")
-            print(f"Traffic Sources: {result['how_viewers_find']}")
-            print(f"Impressions Data: {result['impressions_data']}")
+        print(f"  - Đã cào: {stats['received']} video(s)")
+        print(f"  - Thành công: {stats['succeeded']}")
+        print(f"  - Lỗi: {stats['failed']}")
+        print(f"  - Output file: {pipeline.sinks[0].output_file}")
+        watchdog_metrics = scraper.get_run_report()['watchdog']
+        print(f"  - Driver: {watchdog_metrics['recycles']} lần khởi động lại, "
+              f"{watchdog_metrics['hard_kills']} lần kill do treo, "
+              f"{watchdog_metrics['orphans_reaped']} process mồ côi đã dọn")
+        phases_file = scraper.export_phase_metrics()
+        if phases_file:
+            print(f"  - Thời gian từng phase: {phases_file}")
             
     except Exception as e:
         print(f"Lỗi: {str(e)}")
@@ -7,6 +7,9 @@ from .chrome_driver import ChromeDriverManager
 from .cookie_manager import CookieManager
 from .validators import validate_youtube_url, validate_account_name
 from .scraping_tracker import ScrapingTracker
+from .driver_watchdog import DriverWatchdog, get_default_watchdog
+from .latency_model import LatencyModel, get_default_latency_model
+from .phase_metrics import PhaseMetrics
 
 __all__ = [
     'ConfigManager',
@@ -17,5 +20,10 @@ __all__ = [
     'validate_youtube_url',
     'validate_account_name',
     'ScrapingTracker',
+    'DriverWatchdog',
+    'get_default_watchdog',
+    'LatencyModel',
+    'get_default_latency_model',
+    'PhaseMetrics',
 ]
 
@@ -4,6 +4,7 @@ Constants for YouTube Analytics Scraper
 import os
 
 # File paths
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 CONFIG_FILE = 'config.json'
 PROFILE_DIR = 'profile'
 COOKIES_FILE_PREFIX = 'youtube_cookies_'
@@ -16,6 +17,27 @@ PAGE_LOAD_TIMEOUT = 30
 ELEMENT_WAIT_TIMEOUT = 10
 COOKIE_LOAD_TIMEOUT = 5
 
+# Driver watchdog
+DRIVER_MAX_RSS_MB = 2048  # Recycle driver when Chrome process tree exceeds this
+DRIVER_MAX_PAGES = 150  # Recycle driver after this many page loads
+DRIVER_COMMAND_TIMEOUT = 180  # Hard-kill driver when a command hangs longer (seconds)
+WATCHDOG_INTERVAL = 15  # seconds
+
+# Adaptive timeouts (learned from observed load times)
+LATENCY_WINDOW = 200  # Recent samples kept per account and section
+LATENCY_MIN_SAMPLES = 5  # Samples needed before static defaults are replaced
+LATENCY_TIMEOUT_FACTOR = 1.5  # timeout = p95 * factor + margin
+LATENCY_TIMEOUT_MARGIN = 2  # seconds
+LATENCY_MISS_WIDEN = 1.0  # At a 100% miss rate the timeout is (1 + this) times the success-based one
+ADAPTIVE_TIMEOUT_MIN = 5  # seconds
+ADAPTIVE_TIMEOUT_MAX = 120  # seconds
+HEADLESS_PAGE_LOAD_MIN = 20  # Floor for the analytics page wait in headless mode
+
+# Phase metrics
+PHASE_HISTOGRAM_BUCKETS = (0.5, 1, 2, 5, 10, 20, 30, 60, 120)  # Bucket upper bounds (seconds)
+PHASE_METRICS_DIR = os.path.join('data', 'metrics')
+METRICS_API_URL = os.getenv('METRICS_API_URL', '')  # e.g. http://localhost:8000; empty disables push
+
 # Retry settings
 MAX_RETRIES = 3
 RETRY_DELAY = 3  # seconds
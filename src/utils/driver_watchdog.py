@@ -0,0 +1,459 @@
+"""
+Driver health watchdog for YouTube Analytics Scraper
+Tracks Chrome driver memory, page count and command latency; recycles,
+hard-kills and reaps drivers that leak or hang
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from .constants import (
+    DRIVER_MAX_RSS_MB, DRIVER_MAX_PAGES, DRIVER_COMMAND_TIMEOUT, WATCHDOG_INTERVAL
+)
+from .logger import get_logger
+
+try:
+    import psutil
+except ImportError:  # RSS tracking and orphan reaping are disabled without psutil; hung drivers are still killed
+    psutil = None
+
+logger = get_logger(__name__)
+
+# Process names that belong to a Selenium-driven Chrome
+DRIVER_PROCESS_NAMES = ('chromedriver', 'chromedriver.exe')
+BROWSER_PROCESS_NAMES = ('chrome', 'chrome.exe', 'google-chrome', 'chromium', 'chromium-browser')
+# Chrome started by chromedriver always carries this switch
+WEBDRIVER_BROWSER_FLAG = '--test-type=webdriver'
+
+
+class DriverHealth:
+    """Health counters for one registered driver"""
+
+    def __init__(self, label: str, pid: Optional[int], create_time: Optional[float] = None, process=None):
+        """
+        Initialize DriverHealth
+
+        Args:
+            label: Name used in metrics
+            pid: chromedriver process id
+            create_time: Start time of that process (psutil), so a reused pid is never mistaken for it
+            process: subprocess.Popen handle of chromedriver, used to kill it without psutil
+        """
+        self.label = label
+        self.pid = pid
+        self.create_time = create_time
+        self.process = process
+        self.registered_at = time.time()
+        self.pages_loaded = 0
+        self.commands = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.last_latency = 0.0
+        self.rss_mb = 0.0
+        self.peak_rss_mb = 0.0
+        self.killed = False
+        # name -> start time (monotonic) of commands still running
+        self.in_flight: Dict[str, float] = {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'label': self.label,
+            'pid': self.pid,
+            'pages_loaded': self.pages_loaded,
+            'commands': self.commands,
+            'avg_latency_seconds': round(self.total_latency / self.commands, 3) if self.commands else 0.0,
+            'max_latency_seconds': round(self.max_latency, 3),
+            'last_latency_seconds': round(self.last_latency, 3),
+            'rss_mb': round(self.rss_mb, 1),
+            'peak_rss_mb': round(self.peak_rss_mb, 1),
+            'killed': self.killed,
+        }
+
+
+class DriverWatchdog:
+    """
+    Watches every registered scraper's Chrome driver
+
+    Scrapers wrap blocking driver calls in track(); a monitor thread samples
+    process-tree RSS and hard-kills any driver whose tracked command has run
+    longer than command_timeout, which makes the blocked call fail instead of
+    hanging the worker thread forever. needs_recycle() tells the scraper when
+    a driver has grown past its memory or page budget.
+    """
+
+    def __init__(self, max_rss_mb: float = DRIVER_MAX_RSS_MB, max_pages: int = DRIVER_MAX_PAGES,
+                 command_timeout: float = DRIVER_COMMAND_TIMEOUT, interval: float = WATCHDOG_INTERVAL):
+        """
+        Initialize DriverWatchdog
+
+        Args:
+            max_rss_mb: Recycle a driver whose process tree uses more memory than this
+            max_pages: Recycle a driver after this many page loads
+            command_timeout: Hard-kill a driver whose command runs longer than this (seconds)
+            interval: Seconds between monitor passes
+        """
+        self.max_rss_mb = max_rss_mb
+        self.max_pages = max_pages
+        self.command_timeout = command_timeout
+        self.interval = interval
+        self._drivers: Dict[int, DriverHealth] = {}
+        # pid -> create time of every registered driver's chromedriver until it is unregistered
+        self._known_pids: Dict[int, Optional[float]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._totals = {'recycles': 0, 'hard_kills': 0, 'orphans_reaped': 0}
+
+    # ==================== Lifecycle ====================
+
+    def start(self) -> None:
+        """Start the monitor thread (idempotent)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._monitor, name='driver-watchdog', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the monitor thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+    def register(self, scraper, label: Optional[str] = None) -> None:
+        """
+        Start watching a scraper's driver
+
+        Args:
+            scraper: Object with a `driver` attribute (YouTubeAnalyticsScraper)
+            label: Name used in metrics (default: scraper.account_name)
+        """
+        process = _driver_service_process(scraper.driver)
+        pid = process.pid if process is not None else None
+        health = DriverHealth(label or getattr(scraper, 'account_name', None) or 'driver', pid,
+                              create_time=_create_time(pid), process=process)
+        with self._lock:
+            self._drivers[id(scraper)] = health
+            if pid:
+                self._known_pids[pid] = health.create_time
+        self.start()
+
+    def unregister(self, scraper) -> None:
+        """Stop watching a scraper's driver (its processes are no longer reaped)"""
+        with self._lock:
+            health = self._drivers.pop(id(scraper), None)
+            if health is not None and health.pid:
+                self._known_pids.pop(health.pid, None)
+
+    # ==================== Tracking ====================
+
+    @contextmanager
+    def track(self, scraper, command: str) -> Iterator[None]:
+        """
+        Record latency of a driver command and let the monitor kill it if it hangs
+
+        Args:
+            scraper: Registered scraper
+            command: Short command name (e.g. 'navigate', 'refresh')
+        """
+        health = self._drivers.get(id(scraper))
+        if health is None:
+            yield
+            return
+        key = f"{command}:{threading.get_ident()}"
+        started = time.monotonic()
+        with self._lock:
+            health.in_flight[key] = started
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            with self._lock:
+                health.in_flight.pop(key, None)
+                health.commands += 1
+                health.total_latency += elapsed
+                health.last_latency = elapsed
+                health.max_latency = max(health.max_latency, elapsed)
+
+    def note_page_load(self, scraper) -> None:
+        """Count a page navigation for a scraper's driver"""
+        health = self._drivers.get(id(scraper))
+        if health is not None:
+            with self._lock:
+                health.pages_loaded += 1
+
+    def needs_recycle(self, scraper) -> Optional[str]:
+        """
+        Check whether a driver should be replaced
+
+        Args:
+            scraper: Registered scraper
+
+        Returns:
+            Reason string if the driver should be recycled, None otherwise
+        """
+        health = self._drivers.get(id(scraper))
+        if health is None:
+            return None
+        if health.killed:
+            return 'driver was killed after hanging'
+        if self.max_pages and health.pages_loaded >= self.max_pages:
+            return f'{health.pages_loaded} pages loaded (limit {self.max_pages})'
+        rss_mb = self._sample_rss(health)
+        if self.max_rss_mb and rss_mb >= self.max_rss_mb:
+            return f'process tree RSS {rss_mb:.0f} MB (limit {self.max_rss_mb:.0f} MB)'
+        return None
+
+    def is_killed(self, scraper) -> bool:
+        health = self._drivers.get(id(scraper))
+        return bool(health and health.killed)
+
+    def record_recycle(self) -> None:
+        with self._lock:
+            self._totals['recycles'] += 1
+
+    # ==================== Enforcement ====================
+
+    def hard_kill(self, scraper) -> bool:
+        """
+        Kill a driver's chromedriver process and every Chrome process under it
+
+        Args:
+            scraper: Registered scraper
+
+        Returns:
+            True if any process was killed
+        """
+        health = self._drivers.get(id(scraper))
+        if health is None:
+            return False
+        self._mark_killed(health)
+        killed = _kill_driver(health)
+        logger.warning(f"Watchdog hard-killed driver '{health.label}' (pid {health.pid})")
+        return killed
+
+    def reap_orphans(self) -> int:
+        """
+        Kill chromedriver/Chrome processes left behind by crashed workers
+
+        A process is reaped when it is the chromedriver of a registered driver
+        that was killed after hanging (with whatever Chrome it left behind), or
+        when it is a webdriver Chrome/chromedriver whose parent has died
+        (re-parented to init). Known pids are only killed while they still
+        belong to the same chromedriver/Chrome process (name and create time),
+        so a pid reused by an unrelated process is left alone.
+
+        Returns:
+            Number of processes killed
+        """
+        if psutil is None:
+            return 0
+        with self._lock:
+            live_pids = {h.pid for h in self._drivers.values() if h.pid and not h.killed}
+            stale = {pid: created for pid, created in self._known_pids.items() if pid not in live_pids}
+
+        reaped = 0
+        for pid, created in stale.items():
+            if _is_driver_process(pid, created) and _kill_tree(pid):
+                reaped += 1
+        with self._lock:
+            for pid in stale:
+                self._known_pids.pop(pid, None)
+
+        protected = set()
+        for pid in live_pids:
+            protected.add(pid)
+            protected.update(child.pid for child in _children(pid))
+
+        for proc in psutil.process_iter(['pid', 'ppid', 'name', 'cmdline']):
+            try:
+                info = proc.info
+                if info['pid'] in protected or info['ppid'] not in (0, 1):
+                    continue
+                name = (info['name'] or '').lower()
+                cmdline = ' '.join(info['cmdline'] or [])
+                is_driver = name in DRIVER_PROCESS_NAMES
+                is_browser = name in BROWSER_PROCESS_NAMES and WEBDRIVER_BROWSER_FLAG in cmdline
+                if (is_driver or is_browser) and _kill_tree(info['pid']):
+                    reaped += 1
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+
+        if reaped:
+            logger.warning(f"Watchdog reaped {reaped} orphaned Chrome/chromedriver process(es)")
+            with self._lock:
+                self._totals['orphans_reaped'] += reaped
+        return reaped
+
+    # ==================== Metrics ====================
+
+    def get_metrics(self, scraper=None) -> Dict[str, Any]:
+        """
+        Get watchdog metrics
+
+        Args:
+            scraper: Only include this scraper's driver (default: all drivers)
+
+        Returns:
+            Dictionary with per-driver health and totals
+        """
+        with self._lock:
+            if scraper is not None:
+                drivers = [self._drivers[id(scraper)]] if id(scraper) in self._drivers else []
+            else:
+                drivers = list(self._drivers.values())
+            totals = dict(self._totals)
+        return {
+            'limits': {
+                'max_rss_mb': self.max_rss_mb,
+                'max_pages': self.max_pages,
+                'command_timeout_seconds': self.command_timeout,
+            },
+            'rss_tracking': psutil is not None,
+            'drivers': [health.to_dict() for health in drivers],
+            **totals,
+        }
+
+    # ==================== Internals ====================
+
+    def _monitor(self) -> None:
+        passes = 0
+        while not self._stop.wait(self.interval):
+            passes += 1
+            now = time.monotonic()
+            with self._lock:
+                drivers = list(self._drivers.items())
+            for scraper_id, health in drivers:
+                if health.killed:
+                    continue
+                self._sample_rss(health)
+                oldest = min(health.in_flight.values(), default=None)
+                if oldest is not None and now - oldest > self.command_timeout:
+                    logger.warning(
+                        f"Driver '{health.label}' command running for {now - oldest:.0f}s "
+                        f"(timeout {self.command_timeout:.0f}s), killing it"
+                    )
+                    # Mark first so the unblocked worker sees why its call failed
+                    self._mark_killed(health)
+                    _kill_driver(health)
+            # Orphan scan walks the whole process table, so do it less often
+            if passes % 10 == 0:
+                self.reap_orphans()
+
+    def _mark_killed(self, health: DriverHealth) -> None:
+        with self._lock:
+            health.killed = True
+            health.in_flight.clear()
+            self._totals['hard_kills'] += 1
+
+    def _sample_rss(self, health: DriverHealth) -> float:
+        if psutil is None or not health.pid:
+            return 0.0
+        total = 0
+        try:
+            root = psutil.Process(health.pid)
+            for proc in [root] + root.children(recursive=True):
+                try:
+                    total += proc.memory_info().rss
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    continue
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return health.rss_mb
+        with self._lock:
+            health.rss_mb = total / (1024 * 1024)
+            health.peak_rss_mb = max(health.peak_rss_mb, health.rss_mb)
+        return health.rss_mb
+
+
+def _driver_service_process(driver):
+    """Get the chromedriver subprocess.Popen behind a Selenium driver"""
+    try:
+        return driver.service.process
+    except AttributeError:
+        return None
+
+
+def _create_time(pid: Optional[int]) -> Optional[float]:
+    if psutil is None or not pid:
+        return None
+    try:
+        return psutil.Process(pid).create_time()
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        return None
+
+
+def _is_driver_process(pid: Optional[int], create_time: Optional[float]) -> bool:
+    """Whether pid is still a chromedriver/Chrome process, and the same one if create_time is known"""
+    if psutil is None or not pid:
+        return False
+    try:
+        proc = psutil.Process(pid)
+        name = (proc.name() or '').lower()
+        if name not in DRIVER_PROCESS_NAMES and name not in BROWSER_PROCESS_NAMES:
+            return False
+        return create_time is None or proc.create_time() == create_time
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        return False
+
+
+def _kill_driver(health: DriverHealth) -> bool:
+    """
+    Kill a registered driver's chromedriver (and with psutil, every Chrome under it)
+
+    Without psutil only chromedriver itself is killed, through its Popen
+    handle (which never signals a pid it has already reaped); that is enough
+    to make the blocked Selenium call fail.
+    """
+    if psutil is not None:
+        return _is_driver_process(health.pid, health.create_time) and _kill_tree(health.pid)
+    if health.process is None or health.process.poll() is not None:
+        return False
+    try:
+        health.process.kill()
+        return True
+    except OSError:
+        return False
+
+
+def _children(pid: Optional[int]) -> List[Any]:
+    if psutil is None or not pid:
+        return []
+    try:
+        return psutil.Process(pid).children(recursive=True)
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        return []
+
+
+def _kill_tree(pid: Optional[int]) -> bool:
+    """Kill a process and all of its descendants"""
+    if psutil is None or not pid:
+        return False
+    try:
+        root = psutil.Process(pid)
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        return False
+    procs = root.children(recursive=True) + [root]
+    for proc in procs:
+        try:
+            proc.kill()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    psutil.wait_procs(procs, timeout=5)
+    return True
+
+
+# Shared watchdog for every scraper in this process
+_default_watchdog: Optional[DriverWatchdog] = None
+_default_lock = threading.Lock()
+
+
+def get_default_watchdog() -> DriverWatchdog:
+    """Get the process-wide DriverWatchdog (creates if not exists)"""
+    global _default_watchdog
+    with _default_lock:
+        if _default_watchdog is None:
+            _default_watchdog = DriverWatchdog()
+        return _default_watchdog
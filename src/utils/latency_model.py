@@ -0,0 +1,268 @@
+"""
+Adaptive timeout model for YouTube Analytics Scraper
+Learns per-account, per-section page-load latency and derives wait timeouts from it
+"""
+import json
+import math
+import os
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from .constants import (
+    PROFILE_DIR, LATENCY_WINDOW, LATENCY_MIN_SAMPLES, LATENCY_TIMEOUT_FACTOR,
+    LATENCY_TIMEOUT_MARGIN, LATENCY_MISS_WIDEN, ADAPTIVE_TIMEOUT_MIN, ADAPTIVE_TIMEOUT_MAX
+)
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+# Pseudo-account holding samples from every account, used until an account has its own history
+ALL_ACCOUNTS = '*'
+
+
+def _percentile(sorted_values, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted, non-empty sequence"""
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class LatencyWindow:
+    """
+    Sliding window of load times for one (account, section) pair
+
+    Only waits that succeeded are kept as samples; a timed-out wait only says
+    the section took longer than the time waited (or never appeared), so it is
+    kept as a miss in the outcome window instead.
+    """
+
+    def __init__(self, size: int = LATENCY_WINDOW):
+        self.samples: Deque[float] = deque(maxlen=size)
+        self.outcomes: Deque[bool] = deque(maxlen=size)
+        self.total = 0
+        self.misses = 0
+
+    def add(self, seconds: float, timed_out: bool = False) -> None:
+        if not timed_out:
+            self.samples.append(seconds)
+        self.outcomes.append(timed_out)
+        self.total += 1
+        if timed_out:
+            self.misses += 1
+
+    @property
+    def miss_rate(self) -> float:
+        """Share of timed-out waits among the recent outcomes"""
+        return sum(self.outcomes) / len(self.outcomes) if self.outcomes else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        base = {'total': self.total, 'misses': self.misses, 'miss_rate': round(self.miss_rate, 3)}
+        if not self.samples:
+            return {'samples': 0, **base, 'p50': None, 'p95': None}
+        ordered = sorted(self.samples)
+        return {
+            'samples': len(ordered),
+            **base,
+            'p50': round(_percentile(ordered, 0.50), 3),
+            'p95': round(_percentile(ordered, 0.95), 3),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'samples': [round(s, 3) for s in self.samples],
+            'outcomes': [int(timed_out) for timed_out in self.outcomes],
+            'total': self.total,
+            'misses': self.misses,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], size: int = LATENCY_WINDOW) -> 'LatencyWindow':
+        window = cls(size)
+        window.samples.extend(float(s) for s in data.get('samples', []))
+        window.outcomes.extend(bool(o) for o in data.get('outcomes', []))
+        window.total = int(data.get('total', len(window.samples)))
+        window.misses = int(data.get('misses', 0))
+        return window
+
+
+class LatencyModel:
+    """
+    Learns how long each account's analytics sections take to load
+
+    Every wait in the scraper reports its outcome through record(); timeout_for()
+    then returns p95 * factor + margin of the successful waits for that account
+    and section, clamped to [min_timeout, max_timeout]. Timed-out waits stay out
+    of the p95: they widen the timeout by miss_widen times the recent miss rate,
+    so a section that keeps missing gets at most (1 + miss_widen) times its
+    timeout and one miss only moves it by miss_widen / window. Accounts without
+    enough successful waits use the pooled estimate of all accounts, then the
+    caller's static default.
+    """
+
+    def __init__(self, model_file: Optional[str] = None, window: int = LATENCY_WINDOW,
+                 min_samples: int = LATENCY_MIN_SAMPLES, factor: float = LATENCY_TIMEOUT_FACTOR,
+                 margin: float = LATENCY_TIMEOUT_MARGIN, miss_widen: float = LATENCY_MISS_WIDEN,
+                 min_timeout: float = ADAPTIVE_TIMEOUT_MIN, max_timeout: float = ADAPTIVE_TIMEOUT_MAX):
+        """
+        Initialize LatencyModel
+
+        Args:
+            model_file: JSON file the model is persisted to (default: profile/latency_model.json)
+            window: Number of recent samples kept per account and section
+            min_samples: Successful waits needed before an estimate replaces the default
+            factor: Multiplier applied to p95
+            margin: Seconds added on top of p95 * factor
+            miss_widen: Extra timeout share at a 100% miss rate
+            min_timeout: Lower bound for derived timeouts (seconds)
+            max_timeout: Upper bound for derived timeouts (seconds)
+        """
+        if model_file is None:
+            model_file = os.path.join(PROFILE_DIR, 'latency_model.json')
+        self.model_file = model_file
+        self.window = window
+        self.min_samples = min_samples
+        self.factor = factor
+        self.margin = margin
+        self.miss_widen = miss_widen
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self._windows: Dict[str, Dict[str, LatencyWindow]] = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    def record(self, account: Optional[str], section: str, seconds: float, timed_out: bool = False) -> None:
+        """
+        Record how long a section took to load
+
+        Args:
+            account: Account name the page was loaded with
+            section: Section name (e.g. 'page_load', 'top_metrics')
+            seconds: Time spent waiting
+            timed_out: True if the wait gave up before the section appeared
+        """
+        with self._lock:
+            for key in {account or ALL_ACCOUNTS, ALL_ACCOUNTS}:
+                self._window(key, section).add(seconds, timed_out)
+
+    def timeout_for(self, account: Optional[str], section: str, default: float,
+                    minimum: Optional[float] = None, maximum: Optional[float] = None) -> float:
+        """
+        Get the wait timeout for a section
+
+        Args:
+            account: Account name the page is loaded with
+            section: Section name
+            default: Static timeout used until enough samples exist
+            minimum: Override for the lower bound
+            maximum: Override for the upper bound
+
+        Returns:
+            Timeout in seconds
+        """
+        lower = self.min_timeout if minimum is None else minimum
+        upper = self.max_timeout if maximum is None else maximum
+        with self._lock:
+            for key in (account or ALL_ACCOUNTS, ALL_ACCOUNTS):
+                window = self._windows.get(key, {}).get(section)
+                if window is not None and len(window.samples) >= self.min_samples:
+                    p95 = _percentile(sorted(window.samples), 0.95)
+                    timeout = (p95 * self.factor + self.margin) * (1 + self.miss_widen * window.miss_rate)
+                    return round(min(upper, max(lower, timeout)), 1)
+        return max(lower, default) if minimum is not None else default
+
+    def get_report(self, account: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Get p50/p95 estimates and current timeouts
+
+        Args:
+            account: Only report this account (default: every account)
+
+        Returns:
+            Dict of account -> section -> statistics
+        """
+        with self._lock:
+            accounts = {k: v for k, v in self._windows.items() if account is None or k == account}
+            report = {
+                name: {section: window.stats() for section, window in sections.items()}
+                for name, sections in accounts.items()
+            }
+        for name, sections in report.items():
+            for section, stats in sections.items():
+                stats['timeout'] = self.timeout_for(name, section, default=None) \
+                    if stats['samples'] >= self.min_samples else None
+        return report
+
+    def load(self) -> None:
+        """Load samples from the model file"""
+        if not os.path.exists(self.model_file):
+            return
+        try:
+            with open(self.model_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.warning(f"Error loading latency model: {e}")
+            return
+        with self._lock:
+            self._windows = {
+                account: {
+                    section: LatencyWindow.from_dict(window, self.window)
+                    for section, window in sections.items()
+                }
+                for account, sections in data.get('accounts', {}).items()
+            }
+        logger.debug(f"Loaded latency model: {len(self._windows)} accounts")
+
+    def save(self) -> bool:
+        """
+        Save samples to the model file
+
+        Sections recorded only by another process since this model was loaded
+        are kept, so concurrent runs do not erase each other's history.
+
+        Returns:
+            True if saved successfully
+        """
+        try:
+            existing: Dict[str, Any] = {}
+            if os.path.exists(self.model_file):
+                try:
+                    with open(self.model_file, 'r', encoding='utf-8') as f:
+                        existing = json.load(f).get('accounts', {})
+                except Exception:
+                    existing = {}
+            with self._lock:
+                for account, sections in self._windows.items():
+                    merged = existing.setdefault(account, {})
+                    for section, window in sections.items():
+                        merged[section] = window.to_dict()
+
+            model_dir = os.path.dirname(self.model_file)
+            if model_dir:
+                os.makedirs(model_dir, exist_ok=True)
+            temp_file = f"{self.model_file}.tmp"
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump({'version': 1, 'accounts': existing}, f, ensure_ascii=False, indent=2)
+            os.replace(temp_file, self.model_file)
+            return True
+        except Exception as e:
+            logger.error(f"Error saving latency model: {e}")
+            return False
+
+    def _window(self, account: str, section: str) -> LatencyWindow:
+        sections = self._windows.setdefault(account, {})
+        if section not in sections:
+            sections[section] = LatencyWindow(self.window)
+        return sections[section]
+
+
+_default_model: Optional[LatencyModel] = None
+_default_lock = threading.Lock()
+
+
+def get_default_latency_model() -> LatencyModel:
+    """Get the process-wide LatencyModel (creates if not exists)"""
+    global _default_model
+    with _default_lock:
+        if _default_model is None:
+            _default_model = LatencyModel()
+        return _default_model
@@ -0,0 +1,235 @@
+"""
+Per-phase timing metrics for YouTube Analytics Scraper
+Records how long each phase of a video scrape takes and how it ended
+"""
+import json
+import os
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from .constants import PHASE_HISTOGRAM_BUCKETS
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+# Phases of get_video_analytics, in execution order. 'save_enqueue' is the time the
+# scraper spends handing a result off (blocked on a full pipeline or write-behind
+# queue); 'save' is one database bulk save of a batch of results.
+PHASES = (
+    'navigate', 'readiness_wait', 'refresh_retry', 'relogin',
+    'publish_date', 'top_metrics', 'traffic_sources', 'impressions', 'save_enqueue', 'save',
+)
+
+OUTCOME_OK = 'ok'
+OUTCOME_TIMEOUT = 'timeout'
+OUTCOME_EMPTY = 'empty'
+OUTCOME_ERROR = 'error'
+
+
+class PhaseTimer:
+    """Handle yielded by PhaseMetrics.phase(); set `outcome` to override 'ok'"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.outcome = OUTCOME_OK
+
+
+class PhaseHistogram:
+    """Duration histogram and outcome counts for one phase"""
+
+    def __init__(self, buckets: Tuple[float, ...] = PHASE_HISTOGRAM_BUCKETS):
+        self.buckets = tuple(buckets)
+        # One count per bucket upper bound, plus the overflow bucket
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = 0.0
+        self.outcomes: Dict[str, int] = {}
+
+    def add(self, seconds: float, outcome: str) -> None:
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+
+    def merge(self, data: Dict[str, Any]) -> None:
+        """Add counts from another histogram's to_dict() with the same buckets"""
+        if tuple(data.get('buckets', ())) != self.buckets:
+            raise ValueError('Histogram bucket bounds do not match')
+        for i, value in enumerate(data.get('counts', [])):
+            self.counts[i] += value
+        self.count += data.get('count', 0)
+        self.total += data.get('total_seconds', 0.0)
+        if data.get('min_seconds') is not None:
+            self.min = data['min_seconds'] if self.min is None else min(self.min, data['min_seconds'])
+        self.max = max(self.max, data.get('max_seconds', 0.0))
+        for outcome, value in data.get('outcomes', {}).items():
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'total_seconds': round(self.total, 3),
+            'avg_seconds': round(self.total / self.count, 3) if self.count else 0.0,
+            'min_seconds': round(self.min, 3) if self.min is not None else None,
+            'max_seconds': round(self.max, 3),
+            'buckets': list(self.buckets),
+            'counts': list(self.counts),
+            'outcomes': dict(self.outcomes),
+        }
+
+
+class PhaseMetrics:
+    """
+    Thread-safe store of per-phase histograms for one run
+
+    Recording is a lock, a bucket lookup and a few additions, so phases can be
+    timed on every video. Snapshots are plain dicts that can be written to
+    JSON, pushed to the API, or merged into another store (e.g. results from
+    worker processes).
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = PHASE_HISTOGRAM_BUCKETS):
+        """
+        Initialize PhaseMetrics
+
+        Args:
+            buckets: Histogram bucket upper bounds in seconds
+        """
+        self.buckets = tuple(buckets)
+        self.started_at = datetime.now()
+        self._phases: Dict[str, PhaseHistogram] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[PhaseTimer]:
+        """
+        Time a block of code as one phase
+
+        The outcome is 'ok' unless the block sets timer.outcome or raises,
+        in which case it is recorded as 'error' and the exception propagates.
+
+        Args:
+            name: Phase name (see PHASES)
+        """
+        timer = PhaseTimer(name)
+        started = time.perf_counter()
+        try:
+            yield timer
+        except BaseException:
+            timer.outcome = OUTCOME_ERROR
+            raise
+        finally:
+            self.record(name, time.perf_counter() - started, timer.outcome)
+
+    def record(self, name: str, seconds: float, outcome: str = OUTCOME_OK) -> None:
+        """
+        Record one phase duration
+
+        Args:
+            name: Phase name
+            seconds: Duration in seconds
+            outcome: 'ok', 'timeout', 'empty', 'error' or any other label
+        """
+        with self._lock:
+            histogram = self._phases.get(name)
+            if histogram is None:
+                histogram = self._phases[name] = PhaseHistogram(self.buckets)
+            histogram.add(seconds, outcome)
+
+    def merge(self, snapshot: Dict[str, Any]) -> None:
+        """
+        Add another store's snapshot into this one
+
+        Args:
+            snapshot: Dict returned by snapshot()
+        """
+        with self._lock:
+            for name, data in snapshot.get('phases', {}).items():
+                histogram = self._phases.get(name)
+                if histogram is None:
+                    histogram = self._phases[name] = PhaseHistogram(self.buckets)
+                histogram.merge(data)
+
+    def reset(self) -> None:
+        """Clear all recorded phases"""
+        with self._lock:
+            self._phases = {}
+            self.started_at = datetime.now()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get per-phase histograms, in PHASES order then by name
+
+        Returns:
+            JSON-serializable dict
+        """
+        with self._lock:
+            phases = {name: histogram.to_dict() for name, histogram in self._phases.items()}
+        ordered = sorted(phases, key=lambda name: (PHASES.index(name) if name in PHASES else len(PHASES), name))
+        total = sum(phases[name]['total_seconds'] for name in ordered)
+        for name in ordered:
+            phases[name]['share'] = round(phases[name]['total_seconds'] / total, 3) if total else 0.0
+        return {
+            'started_at': self.started_at.isoformat(),
+            'exported_at': datetime.now().isoformat(),
+            'phases': {name: phases[name] for name in ordered},
+        }
+
+    def export_json(self, output_file: str, extra: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Write a snapshot to a JSON file
+
+        Args:
+            output_file: Destination path
+            extra: Additional top-level fields (e.g. account_name)
+
+        Returns:
+            True if written successfully
+        """
+        try:
+            output_dir = os.path.dirname(output_file)
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+            with open(output_file, 'w', encoding='utf-8') as f:
+                json.dump({**(extra or {}), **self.snapshot()}, f, ensure_ascii=False, indent=2)
+            return True
+        except Exception as e:
+            logger.error(f"Error exporting phase metrics: {e}")
+            return False
+
+    def push(self, api_url: str, extra: Optional[Dict[str, Any]] = None, timeout: float = 5) -> bool:
+        """
+        POST a snapshot to the API's /metrics/phases endpoint
+
+        Args:
+            api_url: Base URL of the API (e.g. http://localhost:8000)
+            extra: Additional top-level fields (e.g. account_name)
+            timeout: Request timeout in seconds
+
+        Returns:
+            True if the API accepted the snapshot
+        """
+        body = json.dumps({**(extra or {}), **self.snapshot()}).encode('utf-8')
+        request = urllib.request.Request(
+            api_url.rstrip('/') + '/metrics/phases', data=body,
+            headers={'Content-Type': 'application/json'}, method='POST',
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                return 200 <= response.status < 300
+        except Exception as e:
+            logger.warning(f"Could not push phase metrics to {api_url}: {e}")
+            return False
@@ -0,0 +1,9 @@
+"""Fixtures shared by the test modules."""
+
+import pytest
+
+
+@pytest.fixture
+def dead_letter_file(tmp_path):
+    """Path of a dead-letter JSONL file that does not exist yet."""
+    return tmp_path / 'failed.jsonl'
@@ -0,0 +1,43 @@
+"""
+Stand-ins shared by the tests of the scraper's database writers
+(tests/test_result_pipeline.py, tests/test_write_behind.py).
+"""
+
+import json
+from types import SimpleNamespace
+
+from sqlalchemy.exc import OperationalError
+
+
+class FakeWriter:
+    """ScraperDatabaseWriter stand-in that fails the first `failures` saves with `error`."""
+
+    def __init__(self, failures=0, error=None):
+        self.db = SimpleNamespace(config=SimpleNamespace(is_edge=False))
+        self.failures = failures
+        self.error = error or OperationalError('INSERT', {}, Exception('server closed the connection'))
+        self.attempts = 0
+        self.saved = []
+        self.accounts = []
+
+    def ensure_account(self, account_name, cookies_file=None):
+        self.accounts.append(account_name)
+
+    def bulk_save_analytics(self, records, account_name, channel_url=None):
+        self.attempts += 1
+        if self.failures:
+            self.failures -= 1
+            raise self.error
+        self.saved.append((account_name, channel_url, [record['video_id'] for record in records]))
+
+
+def record(number, **extra):
+    """Minimal scraper result for video number `number`."""
+    return {'video_id': f'video{number:06d}', 'crawl_datetime': '01/03/2025', **extra}
+
+
+def read_dead_letters(path):
+    """Records in a dead-letter JSONL file (none if it was never written)."""
+    if not path.exists():
+        return []
+    return [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Tests of change detection in the writer (fold_unchanged, extend_runs and
+the daily rollup in src/database/writers.py).
+
+Runs on a temporary SQLite file by default. Set TEST_DATABASE_URL to run it
+against PostgreSQL (all tables in that database are dropped).
+
+Usage:
+    python -m pytest tests/test_change_detection.py
+"""
+
+import os
+import sys
+from datetime import date, datetime
+from pathlib import Path
+
+import pytest
+from sqlalchemy import delete, func, select
+
+# Add project root to path (1 level up from tests/)
+project_root = Path(__file__).parents[1]
+sys.path.insert(0, str(project_root))
+
+from src.database.config import DatabaseConfig
+from src.database.connection import DatabaseConnection
+from src.database.models import (
+    AnalyticsDailyRollup, VideoAnalytics, VideoAnalyticsLatest, VideoAnalyticsObservation, VideoAnalyticsRaw,
+)
+from src.database.writers import ScraperDatabaseWriter
+
+ACCOUNT = 'change-detection'
+VIDEO_ID = 'changedet01'
+
+
+@pytest.fixture(params=[True, False], ids=['dedupe', 'no-dedupe'])
+def writer(request, tmp_path):
+    url = os.getenv('TEST_DATABASE_URL') or f"sqlite:///{tmp_path / 'change_detection.db'}"
+    config = DatabaseConfig(url=url)
+    config.dedupe_snapshots = request.param
+    connection = DatabaseConnection(config)
+    connection.drop_tables()
+    connection.create_tables()
+    writer = ScraperDatabaseWriter(connection)
+    writer.ensure_account(ACCOUNT)
+    yield writer
+    connection.close()
+
+
+def scrape(day, views):
+    return {
+        'video_id': VIDEO_ID,
+        'top_metrics': {'Views': str(views), 'Impressions': '1000'},
+        'publish_start_date': '2025-01-15',
+        'crawl_datetime': day.strftime('%d/%m/%Y'),
+    }
+
+
+def rollup(writer):
+    with writer.db.session_scope() as session:
+        return [
+            (row.day, row.snapshots, row.views)
+            for row in session.scalars(select(AnalyticsDailyRollup).order_by(AnalyticsDailyRollup.day))
+        ]
+
+
+def test_rollup_counts_only_scrape_days_across_gaps(writer):
+    for day, views in [(date(2025, 3, 1), 100), (date(2025, 3, 10), 100), (date(2025, 3, 20), 150)]:
+        writer.bulk_save_analytics([scrape(day, views)], ACCOUNT)
+
+    expected = [(date(2025, 3, 1), 1, 100), (date(2025, 3, 10), 1, 100), (date(2025, 3, 20), 1, 150)]
+    assert rollup(writer) == expected
+
+    with writer.db.session_scope() as session:
+        writer.rebuild_rollup(session)
+    assert rollup(writer) == expected
+
+
+def test_unchanged_scrapes_in_one_batch_count_on_their_own_days(writer):
+    writer.bulk_save_analytics(
+        [scrape(date(2025, 3, day), 100) for day in (1, 4, 9)] + [scrape(date(2025, 3, 12), 120)], ACCOUNT,
+    )
+    # Re-sending the batch changes nothing
+    writer.bulk_save_analytics([scrape(date(2025, 3, day), 100) for day in (1, 4, 9)], ACCOUNT)
+
+    expected = [(date(2025, 3, day), 1, views) for day, views in ((1, 100), (4, 100), (9, 100), (12, 120))]
+    assert rollup(writer) == expected
+    with writer.db.session_scope() as session:
+        writer.rebuild_rollup(session, date_from=date(2025, 3, 4), date_to=date(2025, 3, 9))
+    assert rollup(writer) == expected
+
+
+def test_run_records_each_folded_scrape(writer):
+    for day in (1, 10, 20):
+        writer.bulk_save_analytics([scrape(date(2025, 3, day), 100)], ACCOUNT)
+
+    with writer.db.session_scope() as session:
+        snapshots = session.scalar(select(func.count()).select_from(VideoAnalytics))
+        observed = session.scalar(select(func.sum(VideoAnalytics.observed_count)))
+        observations = list(session.scalars(
+            select(VideoAnalyticsObservation.observed_at).order_by(VideoAnalyticsObservation.observed_at)
+        ))
+    assert observed == 3
+    if writer.db.config.dedupe_snapshots:
+        assert snapshots == 1
+        assert observations == [datetime(2025, 3, 10), datetime(2025, 3, 20)]
+    else:
+        assert snapshots == 3
+        assert observations == []
+
+
+def test_unchanged_scrape_after_its_snapshot_was_deleted_is_stored(writer):
+    writer.bulk_save_analytics([scrape(date(2025, 3, 1), 100)], ACCOUNT)
+    # A retired partition took the latest snapshot and its child rows with it
+    with writer.db.session_scope() as session:
+        session.execute(delete(VideoAnalyticsRaw))
+        session.execute(delete(VideoAnalytics))
+
+    inserted = writer.bulk_save_analytics([scrape(date(2025, 3, 2), 100)], ACCOUNT)
+
+    assert len(inserted) == 1
+    with writer.db.session_scope() as session:
+        latest = session.scalars(select(VideoAnalyticsLatest)).one()
+        assert (latest.analytics_id, latest.scraped_at) == (inserted[0], datetime(2025, 3, 2))
+        assert session.scalar(select(VideoAnalytics.observed_count)) == 1
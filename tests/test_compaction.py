@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Tests of the snapshot retention policy (src/database/compaction.py).
+
+Runs on a temporary SQLite file by default. Set TEST_DATABASE_URL to run it
+against PostgreSQL (all tables in that database are dropped).
+
+Usage:
+    python -m pytest tests/test_compaction.py
+"""
+
+import os
+import sys
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import pytest
+from sqlalchemy import insert, select
+
+# Add project root to path (1 level up from tests/)
+project_root = Path(__file__).parents[1]
+sys.path.insert(0, str(project_root))
+
+from src.database.compaction import SnapshotCompactor
+from src.database.config import DatabaseConfig
+from src.database.connection import DatabaseConnection
+from src.database.models import Account, Video, VideoAnalytics, VideoAnalyticsLatest
+
+# A Monday: keep everything from 2025-06-23, one per day from 2025-04-01, one per week before
+TODAY = date(2025, 6, 30)
+VIDEO_ID = 'compact0001'
+
+
+@pytest.fixture
+def connection(tmp_path):
+    url = os.getenv('TEST_DATABASE_URL') or f"sqlite:///{tmp_path / 'compaction.db'}"
+    connection = DatabaseConnection(DatabaseConfig(url=url))
+    connection.drop_tables()
+    connection.create_tables()
+    with connection.engine.begin() as conn:
+        conn.execute(insert(Account.__table__).values(id=1, name='compaction'))
+        conn.execute(insert(Video.__table__).values(video_id=VIDEO_ID))
+    yield connection
+    connection.close()
+
+
+def store(connection, *runs):
+    """Insert (id, scraped_at, last_seen_at) snapshots of the test video."""
+    with connection.engine.begin() as conn:
+        conn.execute(insert(VideoAnalytics.__table__), [
+            {'id': analytics_id, 'video_id': VIDEO_ID, 'account_id': 1, 'views': analytics_id,
+             'scraped_at': scraped_at, 'last_seen_at': last_seen_at, 'observed_count': 1}
+            for analytics_id, scraped_at, last_seen_at in runs
+        ])
+
+
+def compact(connection):
+    compactor = SnapshotCompactor(connection, keep_all_days=7, daily_days=90)
+    report = compactor.compact(today=TODAY)
+    with connection.engine.connect() as conn:
+        remaining = list(conn.execute(select(VideoAnalytics.id).order_by(VideoAnalytics.id)).scalars())
+    return report, remaining
+
+
+def at(day, hour=0, minute=0, second=0):
+    return datetime.combine(day, datetime.min.time()) + timedelta(hours=hour, minutes=minute, seconds=second)
+
+
+def test_last_snapshot_of_each_day_and_week_is_kept(connection):
+    store(
+        connection,
+        # Daily buckets
+        (1, at(date(2025, 6, 10), 8), at(date(2025, 6, 10), 8)),
+        (2, at(date(2025, 6, 10), 20), at(date(2025, 6, 10), 20)),
+        (3, at(date(2025, 6, 10), 23, 59, 59), at(date(2025, 6, 10), 23, 59, 59)),
+        (4, at(date(2025, 6, 11)), at(date(2025, 6, 11))),
+        # Weekly bucket (Monday 2025-03-10 to Sunday 2025-03-16)
+        (5, at(date(2025, 3, 10)), at(date(2025, 3, 10))),
+        (6, at(date(2025, 3, 16), 23), at(date(2025, 3, 16), 23)),
+        (7, at(date(2025, 3, 17)), at(date(2025, 3, 17))),
+    )
+
+    report, remaining = compact(connection)
+
+    assert remaining == [3, 4, 6, 7]
+    assert report['snapshots'] == 3
+
+
+def test_keep_all_and_daily_cutoffs(connection):
+    keep_all = at(date(2025, 6, 23))
+    daily = at(date(2025, 4, 1))
+    store(
+        connection,
+        (1, keep_all - timedelta(hours=2), keep_all - timedelta(hours=2)),
+        (2, keep_all - timedelta(seconds=1), keep_all - timedelta(seconds=1)),
+        # Kept whatever their day: younger than keep_all_days
+        (3, keep_all, keep_all),
+        (4, keep_all + timedelta(hours=1), keep_all + timedelta(hours=1)),
+        # Same ISO week, but one side of the cutoff is bucketed by day
+        (5, daily - timedelta(hours=3), daily - timedelta(hours=3)),
+        (6, daily - timedelta(hours=1), daily - timedelta(hours=1)),
+        (7, daily + timedelta(hours=1), daily + timedelta(hours=1)),
+    )
+
+    _, remaining = compact(connection)
+
+    assert remaining == [2, 3, 4, 6, 7]
+
+
+def test_run_observed_last_is_kept_over_later_started_snapshot(connection):
+    day = date(2025, 6, 10)
+    store(
+        connection,
+        # Observed from 08:00 to 20:00; an older batch re-sent later started a run at 12:00
+        (1, at(day, 8), at(day, 20)),
+        (2, at(day, 12), at(day, 12)),
+    )
+
+    _, remaining = compact(connection)
+
+    assert remaining == [1]
+
+
+def test_runs_lasting_past_their_bucket_are_kept(connection):
+    store(
+        connection,
+        (1, at(date(2025, 6, 10), 8), at(date(2025, 6, 12), 8)),
+        (2, at(date(2025, 6, 10), 9), at(date(2025, 6, 11), 9)),
+        # Still observed inside the keep_all window
+        (3, at(date(2025, 6, 16), 6), at(date(2025, 6, 25), 6)),
+        (4, at(date(2025, 6, 16), 7), at(date(2025, 6, 26), 7)),
+        (5, at(date(2025, 6, 16), 8), at(date(2025, 6, 16), 8)),
+    )
+
+    _, remaining = compact(connection)
+
+    assert remaining == [1, 2, 3, 4]
+
+
+def test_snapshot_referenced_by_latest_is_kept(connection):
+    day = date(2025, 6, 10)
+    store(connection, (1, at(day, 8), at(day, 8)), (2, at(day, 9), at(day, 9)))
+    with connection.engine.begin() as conn:
+        conn.execute(insert(VideoAnalyticsLatest.__table__).values(
+            video_id=VIDEO_ID, account_id=1, analytics_id=1, scraped_at=at(day, 8),
+        ))
+
+    _, remaining = compact(connection)
+
+    assert remaining == [1, 2]
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Tests of the driver watchdog's kill paths (src/utils/driver_watchdog.py).
+
+A `sleep` started through a symlink named chromedriver stands in for the
+driver service process. POSIX only.
+
+Usage:
+    python -m pytest tests/test_driver_watchdog.py
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add project root to path (1 level up from tests/)
+project_root = Path(__file__).parents[1]
+sys.path.insert(0, str(project_root))
+
+from src.utils import driver_watchdog
+from src.utils.driver_watchdog import DriverWatchdog
+
+pytestmark = pytest.mark.skipif(os.name != 'posix' or not shutil.which('sleep'), reason='needs POSIX sleep')
+
+
+@pytest.fixture
+def chromedriver(tmp_path):
+    """Start a fake chromedriver process; yields its Popen."""
+    executable = tmp_path / 'chromedriver'
+    executable.symlink_to(shutil.which('sleep'))
+    process = subprocess.Popen([str(executable), '60'])
+    yield process
+    if process.poll() is None:
+        process.kill()
+    process.wait()
+
+
+@pytest.fixture
+def watchdog():
+    watchdog = DriverWatchdog(interval=60)
+    yield watchdog
+    watchdog.stop()
+
+
+def scraper_for(process):
+    return SimpleNamespace(account_name='test', driver=SimpleNamespace(service=SimpleNamespace(process=process)))
+
+
+def is_running(process) -> bool:
+    try:
+        process.wait(timeout=2)
+    except subprocess.TimeoutExpired:
+        return True
+    return False
+
+
+def test_hard_kill_kills_registered_driver(watchdog, chromedriver):
+    scraper = scraper_for(chromedriver)
+    watchdog.register(scraper)
+
+    assert watchdog.hard_kill(scraper)
+    assert not is_running(chromedriver)
+    assert watchdog.is_killed(scraper)
+
+
+def test_reused_pid_is_not_reaped(watchdog, chromedriver):
+    scraper = scraper_for(chromedriver)
+    watchdog.register(scraper)
+    health = watchdog._drivers[id(scraper)]
+    health.killed = True
+    # Same pid, different process start: the pid now belongs to another process
+    watchdog._known_pids[chromedriver.pid] = health.create_time - 100
+
+    assert watchdog.reap_orphans() == 0
+    assert is_running(chromedriver)
+    assert chromedriver.pid not in watchdog._known_pids
+
+
+def test_killed_driver_still_registered_is_reaped(watchdog, chromedriver):
+    scraper = scraper_for(chromedriver)
+    watchdog.register(scraper)
+    watchdog._drivers[id(scraper)].killed = True
+
+    assert watchdog.reap_orphans() == 1
+    assert not is_running(chromedriver)
+
+
+def test_unregister_forgets_the_pid(watchdog, chromedriver):
+    scraper = scraper_for(chromedriver)
+    watchdog.register(scraper)
+    watchdog.unregister(scraper)
+
+    assert watchdog._known_pids == {}
+    assert watchdog.reap_orphans() == 0
+    assert is_running(chromedriver)
+
+
+def test_hard_kill_without_psutil_uses_the_service_process(watchdog, chromedriver, monkeypatch):
+    monkeypatch.setattr(driver_watchdog, 'psutil', None)
+    scraper = scraper_for(chromedriver)
+    watchdog.register(scraper)
+
+    assert watchdog.hard_kill(scraper)
+    assert not is_running(chromedriver)
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Tests of the edge store sync agent (src/database/edge.py).
+
+Both the edge store and the central database are temporary SQLite files.
+
+Usage:
+    python -m pytest tests/test_edge_sync.py
+"""
+
+import sys
+from datetime import date, datetime
+from pathlib import Path
+
+import pytest
+from sqlalchemy import func, select
+
+# Add project root to path (1 level up from tests/)
+project_root = Path(__file__).parents[1]
+sys.path.insert(0, str(project_root))
+
+from src.database.config import DatabaseConfig
+from src.database.connection import DatabaseConnection
+from src.database.edge import EdgeSyncAgent
+from src.database.models import VideoAnalytics
+from src.database.writers import ScraperDatabaseWriter
+
+ACCOUNT = 'edge-sync'
+VIDEO_ID = 'edgesync001'
+
+
+def connect(path):
+    connection = DatabaseConnection(DatabaseConfig(url=f"sqlite:///{path}"))
+    connection.drop_tables()
+    connection.create_tables()
+    return connection
+
+
+@pytest.fixture
+def stores(tmp_path):
+    edge, central = connect(tmp_path / 'edge.db'), connect(tmp_path / 'central.db')
+    yield edge, central
+    edge.close()
+    central.close()
+
+
+def scrape(day):
+    return {
+        'video_id': VIDEO_ID,
+        'top_metrics': {'Views': '100', 'Impressions': '1000'},
+        'crawl_datetime': day.strftime('%d/%m/%Y'),
+    }
+
+
+def test_unchanged_scrapes_reach_the_central_run(stores):
+    edge, central = stores
+    # An explicit url is not edge mode, so dedupe would default to on
+    agent = EdgeSyncAgent(edge, central)
+    writer = ScraperDatabaseWriter(edge)
+    writer.ensure_account(ACCOUNT)
+    writer.bulk_save_analytics([scrape(date(2025, 3, day)) for day in (1, 2, 3)], ACCOUNT)
+
+    agent.sync()
+
+    with edge.session_scope() as session:
+        assert session.scalar(select(func.count()).select_from(VideoAnalytics)) == 3
+    with central.session_scope() as session:
+        run = session.scalars(select(VideoAnalytics)).one()
+        assert (run.scraped_at, run.last_seen_at, run.observed_count) == (
+            datetime(2025, 3, 1), datetime(2025, 3, 3), 3,
+        )
+
+
+def test_store_with_folded_scrapes_is_rejected(stores):
+    edge, central = stores
+    writer = ScraperDatabaseWriter(edge)
+    writer.ensure_account(ACCOUNT)
+    writer.bulk_save_analytics([scrape(date(2025, 3, day)) for day in (1, 2)], ACCOUNT)
+
+    with pytest.raises(ValueError, match='folded'):
+        EdgeSyncAgent(edge, central)
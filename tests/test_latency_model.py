@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Tests of the adaptive timeout model (src/utils/latency_model.py).
+
+Usage:
+    python -m pytest tests/test_latency_model.py
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add project root to path (1 level up from tests/)
+project_root = Path(__file__).parents[1]
+sys.path.insert(0, str(project_root))
+
+from src.utils.latency_model import LatencyModel
+
+ACCOUNT = 'latency'
+SECTION = 'traffic_sources'
+
+
+@pytest.fixture
+def model(tmp_path):
+    model = LatencyModel(model_file=str(tmp_path / 'latency_model.json'), window=20, min_timeout=1)
+    for _ in range(10):
+        model.record(ACCOUNT, SECTION, 1.0)
+    return model
+
+
+def miss(model):
+    """Time out after the current timeout, as the scraper does"""
+    model.record(ACCOUNT, SECTION, model.timeout_for(ACCOUNT, SECTION, 15), timed_out=True)
+
+
+def test_timeout_comes_from_successful_waits(model):
+    # p95 1s * 1.5 + 2s
+    assert model.timeout_for(ACCOUNT, SECTION, 15) == 3.5
+
+
+def test_misses_widen_the_timeout_slowly(model):
+    timeouts = []
+    for _ in range(4):
+        miss(model)
+        timeouts.append(model.timeout_for(ACCOUNT, SECTION, 15))
+
+    assert timeouts == sorted(timeouts)
+    assert timeouts[0] < 3.5 * 1.1
+    assert timeouts[-1] < 3.5 * 1.5
+
+
+def test_a_section_that_always_misses_stays_bounded(model):
+    for _ in range(100):
+        miss(model)
+
+    # Miss rate 100%: (1 + miss_widen) times the success-based timeout
+    assert model.timeout_for(ACCOUNT, SECTION, 15) == 7.0
+
+
+def test_misses_alone_keep_the_default(tmp_path):
+    model = LatencyModel(model_file=str(tmp_path / 'latency_model.json'))
+    for _ in range(10):
+        model.record(ACCOUNT, SECTION, 15, timed_out=True)
+
+    assert model.timeout_for(ACCOUNT, SECTION, 15) == 15
+
+
+def test_outcomes_survive_save_and_load(model):
+    miss(model)
+    model.save()
+
+    reloaded = LatencyModel(model_file=model.model_file, window=20, min_timeout=1)
+
+    assert reloaded.timeout_for(ACCOUNT, SECTION, 15) == model.timeout_for(ACCOUNT, SECTION, 15)
+    assert reloaded.get_report(ACCOUNT)[ACCOUNT][SECTION]['misses'] == 1
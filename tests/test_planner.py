@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Tests of the execution planner (src/scraper/planner.py).
+
+Usage:
+    python -m pytest tests/test_planner.py
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to path (1 level up from tests/)
+project_root = Path(__file__).parents[1]
+sys.path.insert(0, str(project_root))
+
+from src.scraper.planner import ExecutionPlan, plan_execution, plan_from_mapping
+
+
+def batches(plan):
+    return [(batch.account_name, batch.video_ids) for batch in plan.batches]
+
+
+def test_interleaved_accounts_are_grouped_in_first_seen_order():
+    plan = plan_execution([('v1', 'a'), ('v2', 'b'), ('v3', 'a'), ('v4', 'c'), ('v5', 'b')])
+
+    assert batches(plan) == [('a', ['v1', 'v3']), ('b', ['v2', 'v5']), ('c', ['v4'])]
+    assert plan.naive_switches == 5
+    assert plan.planned_switches == 3
+    assert plan.switches_avoided == 2
+
+
+def test_start_account_goes_first():
+    plan = plan_execution([('v1', 'a'), ('v2', 'b'), ('v3', 'a')], start_account='b')
+
+    assert batches(plan) == [('b', ['v2']), ('a', ['v1', 'v3'])]
+    assert plan.planned_switches == 1
+
+
+def test_shared_video_is_scraped_once_by_the_larger_account():
+    plan = plan_execution([('v1', 'a'), ('shared', 'a'), ('v2', 'b'), ('shared', 'b'), ('v3', 'b')])
+
+    assert batches(plan) == [('a', ['v1']), ('b', ['shared', 'v2', 'v3'])]
+    assert plan.duplicates_removed == 1
+    assert plan.total_videos == 4
+
+
+def test_ties_keep_the_first_listed_owner():
+    plan = plan_execution([('shared', 'a'), ('shared', 'b'), ('v1', 'a'), ('v2', 'b')])
+
+    assert plan.video_account_mapping()['shared'] == 'a'
+
+
+def test_unmapped_videos_use_the_start_account():
+    plan = plan_from_mapping(['v1', 'v2', 'v3'], {'v2': 'b'}, start_account='a')
+
+    assert batches(plan) == [('a', ['v1', 'v3']), ('b', ['v2'])]
+    assert plan.video_ids() == ['v1', 'v3', 'v2']
+
+
+def test_partition_keeps_accounts_whole_and_balances_load():
+    plan = plan_execution(
+        [(f'a{n}', 'a') for n in range(6)] + [(f'b{n}', 'b') for n in range(3)] + [(f'c{n}', 'c') for n in range(3)]
+    )
+    sub_plans = plan.partition(2)
+
+    assert [[batch.account_name for batch in sub_plan.batches] for sub_plan in sub_plans] == [['a'], ['b', 'c']]
+    assert [sub_plan.total_videos for sub_plan in sub_plans] == [6, 6]
+    assert [sub_plan.start_account for sub_plan in sub_plans] == ['a', 'b']
+
+
+def test_partition_splits_batches_when_workers_outnumber_accounts():
+    plan = plan_execution([(f'v{n}', 'a') for n in range(5)])
+    sub_plans = plan.partition(3)
+
+    assert len(sub_plans) == 3
+    assert sorted(video for sub_plan in sub_plans for video in sub_plan.video_ids()) == sorted(plan.video_ids())
+    assert all(sub_plan.start_account == 'a' for sub_plan in sub_plans)
+
+
+def test_dict_round_trip():
+    plan = plan_execution([('v1', 'a'), ('v2', 'b'), ('v1', 'b')], start_account='a')
+    restored = ExecutionPlan.from_dict(plan.to_dict())
+
+    assert batches(restored) == batches(plan)
+    assert restored.summary() == plan.summary()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Tests of the streaming result pipeline (src/scraper/pipeline.py).
+
+Usage:
+    python -m pytest tests/test_result_pipeline.py
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+# Add project root to path (1 level up from tests/)
+project_root = Path(__file__).parents[1]
+sys.path.insert(0, str(project_root))
+
+from src.scraper.pipeline import DatabaseBatchSink, JsonArraySink, ResultPipeline
+from src.utils.phase_metrics import PhaseMetrics
+from tests.fakes import FakeWriter, read_dead_letters, record
+
+
+def make_sink(writer, dead_letter_file, **kwargs):
+    return DatabaseBatchSink('main', writer=writer, dead_letter_file=str(dead_letter_file), **kwargs)
+
+
+def test_transient_failure_keeps_batch_for_next_flush(dead_letter_file):
+    writer = FakeWriter(failures=1)
+    sink = make_sink(writer, dead_letter_file, batch_size=2)
+
+    sink.write(record(1))
+    with pytest.raises(OperationalError):
+        sink.write(record(2))
+    assert writer.saved == []
+
+    sink.write(record(3))
+    assert writer.saved == [('main', None, ['video000001', 'video000002', 'video000003'])]
+    assert sink.saved == 3
+    assert read_dead_letters(dead_letter_file) == []
+
+
+def test_batch_is_dead_lettered_after_max_retries(dead_letter_file):
+    writer = FakeWriter(failures=10)
+    sink = make_sink(writer, dead_letter_file, batch_size=1, max_retries=2)
+
+    for number in range(3):
+        with pytest.raises(OperationalError):
+            sink.write(record(number))
+
+    # Kept for two failed flushes, dead-lettered on the third
+    assert [line['video_id'] for line in read_dead_letters(dead_letter_file)] == [
+        'video000000', 'video000001', 'video000002',
+    ]
+    assert sink.dead_lettered == 3
+    assert writer.saved == []
+
+
+def test_non_transient_failure_is_dead_lettered_at_once(dead_letter_file):
+    writer = FakeWriter(failures=1, error=IntegrityError('INSERT', {}, Exception('check constraint')))
+    sink = make_sink(writer, dead_letter_file, batch_size=1, channel_url='https://www.youtube.com/@main')
+
+    with pytest.raises(IntegrityError):
+        sink.write(record(1))
+
+    assert read_dead_letters(dead_letter_file) == [{
+        **record(1), 'account_name': 'main', 'channel_url': 'https://www.youtube.com/@main',
+    }]
+    sink.write(record(2))
+    assert writer.saved == [('main', 'https://www.youtube.com/@main', ['video000002'])]
+
+
+def test_close_dead_letters_what_still_fails(dead_letter_file):
+    writer = FakeWriter(failures=10)
+    sink = make_sink(writer, dead_letter_file, batch_size=100)
+    sink.write(record(1))
+    sink.write(record(2))
+
+    with pytest.raises(OperationalError):
+        sink.close()
+    assert len(read_dead_letters(dead_letter_file)) == 2
+
+
+def test_pipeline_counts_sink_failure_without_losing_records(dead_letter_file):
+    writer = FakeWriter(failures=10)
+    sink = make_sink(writer, dead_letter_file, batch_size=100)
+    with ResultPipeline([sink]) as pipeline:
+        pipeline.consume([record(1), record(2), {'video_id': 'video000003', 'error': 'timeout'}])
+    stats = pipeline.get_statistics()
+
+    assert stats['received'] == 3
+    assert stats['failed'] == 1
+    assert stats['sink_errors']['database'] == 1
+    assert [line['video_id'] for line in read_dead_letters(dead_letter_file)] == ['video000001', 'video000002']
+
+
+def test_records_of_other_accounts_do_not_get_the_default_channel(dead_letter_file):
+    writer = FakeWriter()
+    sink = make_sink(writer, dead_letter_file, batch_size=100, channel_url='https://www.youtube.com/@main')
+    sink.write(record(1))
+    sink.write(record(2, account_name='other'))
+    sink.write(record(3, account_name='other', channel_url='https://www.youtube.com/@other'))
+    sink.write(record(4, account_name='main'))
+    sink.close()
+
+    assert sorted(writer.saved, key=lambda saved: (saved[0], saved[1] or '')) == [
+        ('main', 'https://www.youtube.com/@main', ['video000001', 'video000004']),
+        ('other', None, ['video000002']),
+        ('other', 'https://www.youtube.com/@other', ['video000003']),
+    ]
+    assert writer.accounts == ['main', 'other']
+
+
+def test_json_array_sink_merges_into_existing_file(tmp_path):
+    output_file = tmp_path / 'analytics_results.json'
+    output_file.write_text(json.dumps([record(2, views=1), record(5, views=1)]), encoding='utf-8')
+
+    sink = JsonArraySink(str(output_file))
+    sink.write(record(3, views=2))
+    sink.write(record(2, views=2))
+    assert Path(sink.journal_file).exists()
+    sink.close()
+
+    results = json.loads(output_file.read_text(encoding='utf-8'))
+    assert [(r['video_id'], r['views']) for r in results] == [
+        ('video000002', 2), ('video000003', 2), ('video000005', 1),
+    ]
+    assert (sink.new_count, sink.updated_count) == (1, 1)
+    assert not Path(sink.journal_file).exists()
+
+
+def test_bulk_save_is_timed_as_save_and_hand_off_as_save_enqueue(dead_letter_file):
+    metrics = PhaseMetrics()
+    writer = FakeWriter(failures=1)
+    sink = make_sink(writer, dead_letter_file, batch_size=2, metrics=metrics)
+    with ResultPipeline([sink], metrics=metrics) as pipeline:
+        pipeline.consume([record(number) for number in range(5)])
+    phases = metrics.snapshot()['phases']
+
+    # One failed flush, then the retried batch and the final partial batch
+    assert phases['save']['count'] == 3
+    assert phases['save']['outcomes'] == {'error': 1, 'ok': 2}
+    assert phases['save_enqueue']['count'] == 5
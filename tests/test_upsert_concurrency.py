@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Concurrency test of the upsert layer (src/database/upsert.py).
+
+Many threads create the same accounts, channels, videos and snapshots at
+the same moment, each with its own writer like separate scraper processes.
+Every key must be stored exactly once, every thread must get the same ids
+back, and no snapshot may be counted twice in the latest table or rollup.
+The API analytics routes are hammered the same way.
+
+Runs on a temporary SQLite file by default. Set TEST_DATABASE_URL to run it
+against PostgreSQL, where the writers really overlap (all tables in that
+database are dropped).
+
+Usage:
+    python -m pytest tests/test_upsert_concurrency.py
+    TEST_DATABASE_URL=postgresql://postgres@localhost:5432/youtube_analytics_test \\
+        python -m pytest tests/test_upsert_concurrency.py
+"""
+
+import os
+import random
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from sqlalchemy import func, select
+
+# Add project root to path (1 level up from tests/)
+project_root = Path(__file__).parents[1]
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / 'scripts' / 'benchmark'))
+
+from benchmark_bulk_save import make_record
+from src.api.routes import analytics
+from src.api.schemas import BulkAnalyticsCreate, VideoAnalyticsCreate
+from src.database.config import DatabaseConfig
+from src.database.connection import DatabaseConnection
+from src.database.models import (
+    Account, AnalyticsDailyRollup, Channel, Video, VideoAnalytics, VideoAnalyticsLatest, VideoAnalyticsObservation,
+)
+from src.database.upsert import upsert_accounts, upsert_channels, upsert_videos
+from src.database.writers import ScraperDatabaseWriter
+
+THREADS = 16
+ACCOUNTS = [f"concurrency-{number}" for number in range(4)]
+CHANNEL_URLS = [f"https://www.youtube.com/@concurrency{number}" for number in range(3)]
+VIDEOS = 200
+CRAWL_DATE = datetime(2025, 3, 1)
+
+
+@pytest.fixture
+def connection(tmp_path):
+    url = os.getenv('TEST_DATABASE_URL') or f"sqlite:///{tmp_path / 'upsert.db'}"
+    # The api profile keeps a connection per thread, so writers overlap instead of queueing
+    connection = DatabaseConnection(DatabaseConfig(url=url, pool_profile='api'))
+    connection.drop_tables()
+    connection.create_tables()
+    yield connection
+    connection.close()
+
+
+def hammer(worker):
+    """Run worker(thread_number) on THREADS threads released at the same moment."""
+    barrier = threading.Barrier(THREADS)
+
+    def run(number):
+        barrier.wait()
+        return worker(number)
+
+    with ThreadPoolExecutor(THREADS) as pool:
+        return list(pool.map(run, range(THREADS)))
+
+
+def count(connection, model) -> int:
+    with connection.session_scope() as session:
+        return session.scalar(select(func.count()).select_from(model))
+
+
+def test_concurrent_identity_upserts(connection):
+    video_ids = [make_record(number, CRAWL_DATE)['video_id'] for number in range(VIDEOS)]
+
+    def worker(number):
+        # Every thread sends the keys in its own order
+        rng = random.Random(number)
+        with connection.session_scope() as session:
+            account_ids, accounts_created = upsert_accounts(session, rng.sample(ACCOUNTS, len(ACCOUNTS)))
+            channel_ids, channels_created = {}, []
+            for name in ACCOUNTS:
+                ids, created = upsert_channels(session, account_ids[name], rng.sample(CHANNEL_URLS, len(CHANNEL_URLS)))
+                channel_ids.update({(name, url): channel_id for url, channel_id in ids.items()})
+                channels_created.extend((name, url) for url in created)
+            first_channel = channel_ids[(ACCOUNTS[0], CHANNEL_URLS[0])]
+            ids, videos_created = upsert_videos(
+                session, [{'video_id': video_id, 'channel_id': first_channel}
+                          for video_id in rng.sample(video_ids, len(video_ids))]
+            )
+            return account_ids, accounts_created, channel_ids, channels_created, ids, videos_created
+
+    results = hammer(worker)
+
+    # Same ids everywhere, each key created by exactly one thread
+    for position in (0, 2, 4):
+        assert all(result[position] == results[0][position] for result in results)
+    assert sorted(name for result in results for name in result[1]) == sorted(ACCOUNTS)
+    assert len([key for result in results for key in result[3]]) == len(ACCOUNTS) * len(CHANNEL_URLS)
+    assert sorted(video_id for result in results for video_id in result[5]) == sorted(video_ids)
+
+    assert count(connection, Account) == len(ACCOUNTS)
+    assert count(connection, Channel) == len(ACCOUNTS) * len(CHANNEL_URLS)
+    assert count(connection, Video) == VIDEOS
+
+
+def test_concurrent_bulk_save(connection):
+    ScraperDatabaseWriter(connection).ensure_account(ACCOUNTS[0])
+    days = 3
+    # Same metrics every day: day one is stored, later days extend its run
+    batches = [
+        [{**make_record(number, CRAWL_DATE + timedelta(days=day)), 'publish_start_date': '2024-06-01'}
+         for number in range(VIDEOS)]
+        for day in range(days)
+    ]
+
+    def worker(number):
+        # A fresh writer per thread: nothing cached, like separate scraper processes
+        writer = ScraperDatabaseWriter(connection)
+        inserted = []
+        for batch in batches:
+            inserted.extend(writer.bulk_save_analytics(batch, ACCOUNTS[0], channel_url=CHANNEL_URLS[0]))
+        record = batches[0][number % VIDEOS]
+        writer.save_analytics(record['video_id'], ACCOUNTS[0], record, channel_url=CHANNEL_URLS[0])
+        return inserted
+
+    results = hammer(worker)
+
+    inserted = [analytics_id for result in results for analytics_id in result]
+    assert len(inserted) == len(set(inserted)) == VIDEOS
+    assert count(connection, VideoAnalytics) == VIDEOS
+    assert count(connection, VideoAnalyticsLatest) == VIDEOS
+    assert count(connection, Channel) == 1
+    assert count(connection, Video) == VIDEOS
+
+    with connection.session_scope() as session:
+        observed = session.scalar(select(func.sum(VideoAnalytics.observed_count)))
+        rollup_snapshots = session.scalar(select(func.sum(AnalyticsDailyRollup.snapshots)))
+    # Each day of each video observed and counted once, however many threads sent it
+    assert observed == VIDEOS * days
+    assert rollup_snapshots == VIDEOS * days
+
+
+def test_concurrent_api_bulk_create(connection, monkeypatch):
+    monkeypatch.setattr(analytics, 'db_writer', ScraperDatabaseWriter(connection))
+    with connection.session_scope() as session:
+        account_ids, _ = upsert_accounts(session, ACCOUNTS[:2])
+    videos = 50
+    # Two accounts per request, so every request locks both in the same order
+    bulk = BulkAnalyticsCreate(analytics=[
+        VideoAnalyticsCreate(
+            video_id=f"api{number:08d}", account_id=account_ids[name], impressions=1000, views=100 + number,
+            top_metrics={'Views': str(100 + number)}, traffic_sources={'YouTube search': '40.0%'},
+        )
+        for name in ACCOUNTS[:2] for number in range(videos)
+    ])
+    records = len(bulk.analytics)
+    expected = [(record.video_id, record.account_id) for record in bulk.analytics]
+
+    def post(_=None):
+        with connection.session_scope() as session:
+            return [(row.id, row.video_id, row.account_id) for row in analytics.bulk_create_analytics(bulk, db=session)]
+
+    results = hammer(post)
+
+    snapshots = count(connection, VideoAnalytics)
+    assert count(connection, VideoAnalyticsLatest) == records
+    assert count(connection, Video) == videos
+    with connection.session_scope() as session:
+        stored = set(session.scalars(select(VideoAnalytics.id)))
+        observed = session.scalar(select(func.sum(VideoAnalytics.observed_count)))
+        rollup_snapshots = session.scalar(select(func.sum(AnalyticsDailyRollup.snapshots)))
+        newest = session.execute(
+            select(VideoAnalytics.video_id, VideoAnalytics.account_id, func.max(VideoAnalytics.scraped_at))
+            .group_by(VideoAnalytics.video_id, VideoAnalytics.account_id)
+        ).all()
+        latest = session.execute(
+            select(VideoAnalyticsLatest.video_id, VideoAnalyticsLatest.account_id, VideoAnalyticsLatest.scraped_at)
+        ).all()
+    # Every request answered with a stored snapshot per record
+    for result in results:
+        assert [(video_id, account_id) for _, video_id, account_id in result] == expected
+        assert {analytics_id for analytics_id, *_ in result} <= stored
+    # Each request observed and counted once; unchanged ones only extended a run
+    assert observed == rollup_snapshots == THREADS * records
+    assert count(connection, VideoAnalyticsObservation) == THREADS * records - snapshots
+    assert sorted(latest) == sorted(newest)
+
+    # Sent again with nothing changed: no new snapshot
+    post()
+    assert count(connection, VideoAnalytics) == snapshots
+    with connection.session_scope() as session:
+        assert session.scalar(select(func.sum(VideoAnalytics.observed_count))) == (THREADS + 1) * records
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Tests of the write-behind batching writer (src/database/write_behind.py).
+
+Usage:
+    python -m pytest tests/test_write_behind.py
+"""
+
+import sys
+from pathlib import Path
+
+from sqlalchemy.exc import IntegrityError
+
+# Add project root to path (1 level up from tests/)
+project_root = Path(__file__).parents[1]
+sys.path.insert(0, str(project_root))
+
+from src.database.write_behind import WriteBehindWriter
+from src.utils.phase_metrics import PhaseMetrics
+from tests.fakes import FakeWriter, read_dead_letters, record
+
+
+def run(writer, dead_letter_file, submissions, **kwargs):
+    """Submit (record, account_name, channel_url) tuples, then stop the writer."""
+    write_behind = WriteBehindWriter(
+        writer=writer, flush_interval=60, retry_backoff=0, dead_letter_file=str(dead_letter_file), **kwargs,
+    )
+    metrics = PhaseMetrics()
+    for item, account_name, channel_url in submissions:
+        assert write_behind.submit(item, account_name, channel_url, metrics=metrics)
+    write_behind.stop()
+    return write_behind.get_metrics(), metrics.snapshot()['phases']
+
+
+def test_records_are_grouped_by_account_and_channel(dead_letter_file):
+    writer = FakeWriter()
+    stats, phases = run(writer, dead_letter_file, [
+        (record(1), 'a', None), (record(2), 'b', None), (record(3), 'a', None), (record(4), 'a', 'https://c'),
+    ])
+
+    assert writer.saved == [
+        ('a', None, ['video000001', 'video000003']),
+        ('b', None, ['video000002']),
+        ('a', 'https://c', ['video000004']),
+    ]
+    assert writer.accounts == ['a', 'b']
+    assert (stats['written'], stats['failed'], stats['batches']) == (4, 0, 1)
+    assert phases['save']['outcomes'] == {'ok': 3}
+
+
+def test_transient_failure_is_retried(dead_letter_file):
+    writer = FakeWriter(failures=2)
+    stats, _ = run(writer, dead_letter_file, [(record(1), 'a', None)], max_retries=3)
+
+    assert writer.attempts == 3
+    assert writer.saved == [('a', None, ['video000001'])]
+    assert (stats['written'], stats['retries'], stats['failed']) == (1, 2, 0)
+    assert read_dead_letters(dead_letter_file) == []
+
+
+def test_batch_is_dead_lettered_after_max_retries(dead_letter_file):
+    writer = FakeWriter(failures=10)
+    stats, phases = run(writer, dead_letter_file, [(record(1), 'a', 'https://c'), (record(2), 'a', 'https://c')],
+                        max_retries=2)
+
+    assert writer.attempts == 3
+    assert read_dead_letters(dead_letter_file) == [
+        {**record(1), 'account_name': 'a', 'channel_url': 'https://c'},
+        {**record(2), 'account_name': 'a', 'channel_url': 'https://c'},
+    ]
+    assert (stats['written'], stats['retries'], stats['failed']) == (0, 2, 2)
+    assert phases['save']['outcomes'] == {'error': 1}
+
+
+def test_non_transient_failure_is_not_retried(dead_letter_file):
+    writer = FakeWriter(failures=1, error=IntegrityError('INSERT', {}, Exception('check constraint')))
+    stats, _ = run(writer, dead_letter_file, [(record(1), 'a', None), (record(2), 'b', None)], max_retries=3)
+
+    assert writer.attempts == 2
+    assert writer.saved == [('b', None, ['video000002'])]
+    assert [line['video_id'] for line in read_dead_letters(dead_letter_file)] == ['video000001']
+    assert (stats['written'], stats['retries'], stats['failed']) == (1, 0, 1)
+
+
+def test_full_queue_rejects_instead_of_blocking(dead_letter_file, monkeypatch):
+    write_behind = WriteBehindWriter(writer=FakeWriter(), max_queue=1, dead_letter_file=str(dead_letter_file))
+    # Pretend the thread is running so submit() doesn't start one to drain the queue
+    monkeypatch.setattr(WriteBehindWriter, 'running', True)
+
+    assert write_behind.submit(record(1), 'a')
+    assert not write_behind.submit(record(2), 'a')
+    assert write_behind.submit_many([record(3), record(4)], 'a') == 0
+    assert write_behind.get_metrics()['rejected'] == 2
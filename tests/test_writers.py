@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Tests of the objects returned by the scraper writer (src/database/writers.py).
+
+Runs on a temporary SQLite file by default. Set TEST_DATABASE_URL to run it
+against PostgreSQL (all tables in that database are dropped).
+
+Usage:
+    python -m pytest tests/test_writers.py
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add project root to path (1 level up from tests/)
+project_root = Path(__file__).parents[1]
+sys.path.insert(0, str(project_root))
+
+from src.database.config import DatabaseConfig
+from src.database.connection import DatabaseConnection
+from src.database.writers import ScraperDatabaseWriter
+
+ACCOUNT = 'writers'
+VIDEO_ID = 'writers0001'
+SCRAPE = {
+    'top_metrics': {'Views': '1,200', 'Impressions': '10K'},
+    'how_viewers_find': {'YouTube search': '40.0%'},
+    'impressions_data': {'Views from impressions': '800'},
+    'page_text': 'Analytics page',
+    'crawl_datetime': '01/03/2025',
+}
+
+
+@pytest.fixture
+def writer(tmp_path):
+    url = os.getenv('TEST_DATABASE_URL') or f"sqlite:///{tmp_path / 'writers.db'}"
+    connection = DatabaseConnection(DatabaseConfig(url=url))
+    connection.drop_tables()
+    connection.create_tables()
+    writer = ScraperDatabaseWriter(connection)
+    writer.ensure_account(ACCOUNT)
+    yield writer
+    connection.close()
+
+
+def assert_raw_payload(analytics):
+    assert analytics.top_metrics == SCRAPE['top_metrics']
+    assert analytics.traffic_sources == SCRAPE['how_viewers_find']
+    assert analytics.impressions_data == SCRAPE['impressions_data']
+    assert analytics.page_text == SCRAPE['page_text']
+    assert analytics.metric_values['Views'] == 1200
+
+
+def test_saved_snapshot_keeps_its_raw_payload_after_the_session_closes(writer):
+    inserted = writer.save_analytics(VIDEO_ID, ACCOUNT, SCRAPE)
+    # Unchanged: returns the stored snapshot instead of inserting one
+    folded = writer.save_analytics(VIDEO_ID, ACCOUNT, {**SCRAPE, 'crawl_datetime': '02/03/2025'})
+
+    assert folded.id == inserted.id
+    assert_raw_payload(inserted)
+    assert_raw_payload(folded)
+
+
+def test_latest_snapshot_keeps_its_raw_payload_after_the_session_closes(writer):
+    writer.save_analytics(VIDEO_ID, ACCOUNT, SCRAPE)
+
+    assert_raw_payload(writer.get_video_analytics(VIDEO_ID, ACCOUNT))